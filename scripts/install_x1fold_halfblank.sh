@@ -8,6 +8,7 @@ Usage: install_x1fold_halfblank.sh [--enable-system]
 
 Installs the X1 Fold halfblank tooling into a live system:
   - /usr/local/bin/{x1fold_mode.py,x1fold_dock.py,x1fold_halfblankd.py,x1fold_halfblank_ui.py,x1fold_tty.py,x1fold_tty_rotate.py}
+  - /usr/local/bin/{x1fold_state_stream.py,x1fold_dbus.py,x1fold_iio.py,x1fold_xrandr.py,x1fold_uevent.py} (modules shared by the daemon and its clients)
   - /usr/local/bin/x1fold-halfblank-ui-session
   - /usr/local/bin/{halfblank_switch.sh,halfblank_regression.sh,halfblank_collect.sh}
   - /etc/systemd/system/{x1fold-halfblankd.service,x1fold-tty-rotate.service}
@@ -45,13 +46,17 @@ x1fold_root="$repo_root"
 install -Dm0755 "$x1fold_root/tools/x1fold_mode.py" /usr/local/bin/x1fold_mode.py
 install -Dm0755 "$x1fold_root/tools/x1fold_dock.py" /usr/local/bin/x1fold_dock.py
 install -Dm0755 "$x1fold_root/tools/x1fold_halfblankd.py" /usr/local/bin/x1fold_halfblankd.py
+# Imported by x1fold_halfblankd.py (in-process console engine); also a CLI.
+install -Dm0755 "$x1fold_root/tools/x1fold_tty.py" /usr/local/bin/x1fold_tty.py
 install -Dm0755 "$x1fold_root/tools/x1fold_halfblank_ui.py" /usr/local/bin/x1fold_halfblank_ui.py
+install -Dm0644 "$x1fold_root/tools/x1fold_state_stream.py" /usr/local/bin/x1fold_state_stream.py
+install -Dm0644 "$x1fold_root/tools/x1fold_dbus.py" /usr/local/bin/x1fold_dbus.py
+install -Dm0644 "$x1fold_root/tools/x1fold_iio.py" /usr/local/bin/x1fold_iio.py
+install -Dm0644 "$x1fold_root/tools/x1fold_uevent.py" /usr/local/bin/x1fold_uevent.py
+install -Dm0755 "$x1fold_root/tools/x1fold_xrandr.py" /usr/local/bin/x1fold_xrandr.py
 if [[ -f "$x1fold_root/tools/x1fold_touch_probe.py" ]]; then
   install -Dm0755 "$x1fold_root/tools/x1fold_touch_probe.py" /usr/local/bin/x1fold_touch_probe.py
 fi
-if [[ -f "$x1fold_root/tools/x1fold_tty.py" ]]; then
-  install -Dm0755 "$x1fold_root/tools/x1fold_tty.py" /usr/local/bin/x1fold_tty.py
-fi
 if [[ -f "$x1fold_root/tools/x1fold_tty_rotate.py" ]]; then
   install -Dm0755 "$x1fold_root/tools/x1fold_tty_rotate.py" /usr/local/bin/x1fold_tty_rotate.py
 fi
@@ -62,7 +67,17 @@ fi
 if [[ -f "$x1fold_root/tools/x1fold_x11_blank.c" ]]; then
   if command -v cc >/dev/null 2>&1 && command -v pkg-config >/dev/null 2>&1 && pkg-config --exists x11 xfixes; then
     tmp_bin="$(mktemp -t x1fold_x11_blank.XXXXXX)"
-    cc -O2 -Wall -Wextra "$x1fold_root/tools/x1fold_x11_blank.c" -o "$tmp_bin" $(pkg-config --cflags --libs x11 xfixes)
+    # libXi enables the event-driven cursor clamp (XI2 raw motion); without it
+    # the helper falls back to a 100 ms clamp timer.
+    x11_blank_pkgs=(x11 xfixes)
+    x11_blank_defs=()
+    if pkg-config --exists xi; then
+      x11_blank_pkgs+=(xi)
+      x11_blank_defs+=(-DHAVE_XI2)
+    else
+      echo "warning: pkg-config xi missing; x1fold_x11_blank will clamp the cursor on a 100 ms timer" >&2
+    fi
+    cc -O2 -Wall -Wextra "${x11_blank_defs[@]}" "$x1fold_root/tools/x1fold_x11_blank.c" -o "$tmp_bin" $(pkg-config --cflags --libs "${x11_blank_pkgs[@]}")
     install -Dm0755 "$tmp_bin" /usr/local/bin/x1fold_x11_blank
     rm -f "$tmp_bin"
   else
@@ -77,6 +92,8 @@ if [[ -f "$x1fold_root/tools/x1fold_wl_blank.c" ]]; then
       "$x1fold_root/tools/x1fold_wl_blank.c" \
       "$x1fold_root/tools/wayland/wlr-layer-shell-unstable-v1-protocol.c" \
       "$x1fold_root/tools/wayland/xdg-shell-protocol.c" \
+      "$x1fold_root/tools/wayland/viewporter-protocol.c" \
+      "$x1fold_root/tools/wayland/single-pixel-buffer-v1-protocol.c" \
       -o "$tmp_bin" \
       $(pkg-config --cflags --libs wayland-client)
     install -Dm0755 "$tmp_bin" /usr/local/bin/x1fold_wl_blank
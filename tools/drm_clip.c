@@ -1,11 +1,18 @@
+#define _GNU_SOURCE  // accept4
 #include <errno.h>
 #include <fcntl.h>
 #include <inttypes.h>
+#include <linux/netlink.h>
+#include <poll.h>
+#include <signal.h>
 #include <stdbool.h>
 #include <stdint.h>
 #include <stdio.h>
 #include <stdlib.h>
 #include <string.h>
+#include <sys/socket.h>
+#include <sys/stat.h>
+#include <sys/un.h>
 #include <unistd.h>
 #include <xf86drm.h>
 #include <xf86drmMode.h>
@@ -32,7 +39,25 @@ static const char *default_card_path(void) {
 static void usage(FILE *out) {
   fprintf(out,
           "Usage:\n"
-          "  drm_clip [--card /dev/dri/cardN] [--connector eDP-1] [--height 1240] {status|half|full}\n");
+          "  drm_clip [--card /dev/dri/cardN] [--connector eDP-1] [--height 1240] {status|half|full}\n"
+          "           [--print-status]\n"
+          "  drm_clip [--card ...] [--connector ...] [--height 1240] serve [--socket PATH] [--hold-master]\n"
+          "\n"
+          "--print-status (half/full): after the commit, read the plane rect back and\n"
+          "print the same JSON as `status` (set + verify in one run).\n"
+          "\n"
+          "serve: keep the card open and the connector/CRTC/plane/property IDs cached;\n"
+          "read one request per line (stdin, or each client of --socket) and answer\n"
+          "one JSON line:\n"
+          "  status | half [H] | full | quit\n"
+          "  -> {\"ok\": true, \"cmd\": \"half\", \"enumerated\": false, \"status\": {...}}\n"
+          "  -> {\"ok\": false, \"cmd\": \"half\", \"error\": \"...\"}\n"
+          "half/full answer with the status read back after the commit (clip + verify\n"
+          "in one round trip). The object graph is re-enumerated only after a DRM\n"
+          "hotplug uevent or when a cached ID stops matching. DRM master is taken per\n"
+          "commit and dropped again after every request, as is the master an open()\n"
+          "of an unowned card grants (so a compositor can still claim the card),\n"
+          "unless --hold-master is given.\n");
 }
 
 static const char *connector_name(const drmModeConnector *conn, char *buf, size_t n) {
@@ -75,40 +100,78 @@ static int crtc_index(drmModeRes *res, uint32_t crtc_id) {
   return -1;
 }
 
-static int get_prop_by_name(int fd,
-                            uint32_t obj_id,
-                            uint32_t obj_type,
-                            const char *name,
-                            uint32_t *prop_id_out,
-                            uint64_t *value_out) {
-  drmModeObjectProperties *props = drmModeObjectGetProperties(fd, obj_id, obj_type);
+// Plane properties the primary-plane pick, the clip commit and the status
+// read-back use.
+enum PlaneProp {
+  P_TYPE,
+  P_FB_ID,
+  P_CRTC_ID,
+  P_CRTC_X,
+  P_CRTC_Y,
+  P_CRTC_W,
+  P_CRTC_H,
+  P_SRC_X,
+  P_SRC_Y,
+  P_SRC_W,
+  P_SRC_H,
+  PLANE_PROP_COUNT,
+};
+
+static const char *const k_plane_prop_names[PLANE_PROP_COUNT] = {
+    "type", "FB_ID", "CRTC_ID", "CRTC_X", "CRTC_Y", "CRTC_W", "CRTC_H", "SRC_X", "SRC_Y", "SRC_W", "SRC_H",
+};
+
+// Name -> property ID. The standard plane properties are device-wide objects
+// (drm_mode_config), so one table serves every plane on the fd and the names
+// only have to be resolved once.
+struct PropIds {
+  uint32_t id[PLANE_PROP_COUNT];
+  int resolved;
+};
+
+// One property-table fetch for `plane_id`: fills values[] for every known
+// property and learns the IDs of any still-unresolved names on the way
+// (drmModeGetProperty only until all are known). Returns a bitmask of the
+// values found.
+static unsigned fetch_plane_props(int fd, uint32_t plane_id, struct PropIds *ids, uint64_t values[PLANE_PROP_COUNT]) {
+  drmModeObjectProperties *props = drmModeObjectGetProperties(fd, plane_id, DRM_MODE_OBJECT_PLANE);
   if (!props) {
-    return -1;
+    return 0;
   }
-  int rc = -1;
+  unsigned found = 0;
   for (uint32_t i = 0; i < props->count_props; i++) {
-    drmModePropertyRes *prop = drmModeGetProperty(fd, props->props[i]);
-    if (!prop) {
-      continue;
+    int idx = -1;
+    for (int k = 0; k < PLANE_PROP_COUNT; k++) {
+      if ((ids->resolved & (1 << k)) && ids->id[k] == props->props[i]) {
+        idx = k;
+        break;
+      }
     }
-    if (strcmp(prop->name, name) == 0) {
-      if (prop_id_out) {
-        *prop_id_out = prop->prop_id;
+    if (idx < 0 && ids->resolved != (1 << PLANE_PROP_COUNT) - 1) {
+      drmModePropertyRes *prop = drmModeGetProperty(fd, props->props[i]);
+      if (!prop) {
+        continue;
       }
-      if (value_out) {
-        *value_out = props->prop_values[i];
+      for (int k = 0; k < PLANE_PROP_COUNT; k++) {
+        if (!(ids->resolved & (1 << k)) && strcmp(prop->name, k_plane_prop_names[k]) == 0) {
+          ids->id[k] = prop->prop_id;
+          ids->resolved |= 1 << k;
+          idx = k;
+          break;
+        }
       }
-      rc = 0;
       drmModeFreeProperty(prop);
-      break;
     }
-    drmModeFreeProperty(prop);
+    if (idx >= 0) {
+      values[idx] = props->prop_values[i];
+      found |= 1u << idx;
+    }
   }
   drmModeFreeObjectProperties(props);
-  return rc;
+  return found;
 }
 
-static drmModePlane *pick_primary_plane(int fd, uint32_t crtc_id, int crtc_idx) {
+static drmModePlane *pick_primary_plane(int fd, uint32_t crtc_id, int crtc_idx, struct PropIds *ids) {
   drmModePlaneRes *pres = drmModeGetPlaneResources(fd);
   if (!pres) {
     return NULL;
@@ -127,12 +190,13 @@ static drmModePlane *pick_primary_plane(int fd, uint32_t crtc_id, int crtc_idx)
       drmModeFreePlane(plane);
       continue;
     }
-    uint64_t type_val = 0;
-    if (get_prop_by_name(fd, plane->plane_id, DRM_MODE_OBJECT_PLANE, "type", NULL, &type_val) != 0) {
+    uint64_t values[PLANE_PROP_COUNT] = {0};
+    unsigned found = fetch_plane_props(fd, plane->plane_id, ids, values);
+    if (!(found & (1u << P_TYPE))) {
       drmModeFreePlane(plane);
       continue;
     }
-    if (type_val != 1) {
+    if (values[P_TYPE] != 1) {
       drmModeFreePlane(plane);
       continue;
     }
@@ -143,35 +207,157 @@ static drmModePlane *pick_primary_plane(int fd, uint32_t crtc_id, int crtc_idx)
   return best;
 }
 
-static int set_clip(int fd, drmModePlane *plane, uint32_t crtc_id, uint32_t w, uint32_t h) {
-  struct {
-    const char *name;
-    uint64_t value;
-  } props[] = {
-      {"FB_ID", plane->fb_id},
-      {"CRTC_ID", crtc_id},
-      {"CRTC_X", 0},
-      {"CRTC_Y", 0},
-      {"CRTC_W", w},
-      {"CRTC_H", h},
-      {"SRC_X", 0},
-      {"SRC_Y", 0},
-      {"SRC_W", ((uint64_t)w) << 16},
-      {"SRC_H", ((uint64_t)h) << 16},
+// Object IDs that only change on hotplug/re-probe. Everything that a
+// modeset or page flip can change (mode, fb) is re-read per request.
+struct Graph {
+  bool valid;
+  uint32_t connector_id;
+  char connector_name[32];
+  uint32_t crtc_id;
+  int crtc_idx;
+  uint32_t plane_id;
+  struct PropIds props;  // kept across re-enumeration (device-wide IDs)
+};
+
+// Per-request view: the cached IDs plus the current mode and fb.
+struct Live {
+  uint32_t fb_id;
+  uint16_t hdisplay;
+  uint16_t vdisplay;
+  uint64_t rect[8];  // CRTC_X/Y/W/H, SRC_X/Y/W/H
+};
+
+static const char *enumerate(int fd, const char *want_connector, struct Graph *g) {
+  struct PropIds props = g->props;
+  memset(g, 0, sizeof(*g));
+  g->props = props;
+  drmModeRes *res = drmModeGetResources(fd);
+  if (!res) {
+    return "drmModeGetResources failed";
+  }
+  const char *err = NULL;
+  drmModeConnector *conn = pick_connector(fd, res, want_connector);
+  drmModeEncoder *enc = NULL;
+  drmModeCrtc *crtc = NULL;
+  drmModePlane *plane = NULL;
+  if (!conn) {
+    err = "no connected connector found";
+    goto out;
+  }
+  if (conn->encoder_id == 0) {
+    err = "connector has no encoder_id";
+    goto out;
+  }
+  enc = drmModeGetEncoder(fd, conn->encoder_id);
+  if (!enc) {
+    err = "drmModeGetEncoder failed";
+    goto out;
+  }
+  if (enc->crtc_id == 0) {
+    err = "encoder has no crtc_id";
+    goto out;
+  }
+  g->crtc_idx = crtc_index(res, enc->crtc_id);
+  if (g->crtc_idx < 0) {
+    err = "failed to find CRTC index";
+    goto out;
+  }
+  crtc = drmModeGetCrtc(fd, enc->crtc_id);
+  if (!crtc) {
+    err = "drmModeGetCrtc failed";
+    goto out;
+  }
+  if (crtc->mode_valid == 0) {
+    err = "CRTC has no valid mode";
+    goto out;
+  }
+  plane = pick_primary_plane(fd, enc->crtc_id, g->crtc_idx, &g->props);
+  if (!plane) {
+    err = "failed to find active primary plane";
+    goto out;
+  }
+  g->connector_id = conn->connector_id;
+  connector_name(conn, g->connector_name, sizeof(g->connector_name));
+  g->crtc_id = enc->crtc_id;
+  g->plane_id = plane->plane_id;
+  g->valid = true;
+
+out:
+  if (plane) {
+    drmModeFreePlane(plane);
+  }
+  if (crtc) {
+    drmModeFreeCrtc(crtc);
+  }
+  if (enc) {
+    drmModeFreeEncoder(enc);
+  }
+  if (conn) {
+    drmModeFreeConnector(conn);
+  }
+  drmModeFreeResources(res);
+  return err;
+}
+
+// Current fb + mode for the cached plane/CRTC; fails (so the caller
+// re-enumerates) when the plane was moved to another CRTC or disabled.
+static const char *read_live(int fd, const struct Graph *g, struct Live *live) {
+  memset(live, 0, sizeof(*live));
+  drmModePlane *plane = drmModeGetPlane(fd, g->plane_id);
+  if (!plane) {
+    return "primary plane is gone";
+  }
+  bool same_crtc = plane->crtc_id == g->crtc_id;
+  live->fb_id = plane->fb_id;
+  drmModeFreePlane(plane);
+  if (!same_crtc) {
+    return "primary plane moved to another CRTC";
+  }
+  drmModeCrtc *crtc = drmModeGetCrtc(fd, g->crtc_id);
+  if (!crtc) {
+    return "CRTC is gone";
+  }
+  bool mode_valid = crtc->mode_valid != 0;
+  live->hdisplay = crtc->mode.hdisplay;
+  live->vdisplay = crtc->mode.vdisplay;
+  drmModeFreeCrtc(crtc);
+  if (!mode_valid) {
+    return "CRTC has no valid mode";
+  }
+  return NULL;
+}
+
+// Plane rect in one drmModeObjectGetProperties (IDs already resolved).
+static void read_rect(int fd, struct Graph *g, struct Live *live) {
+  uint64_t values[PLANE_PROP_COUNT] = {0};
+  fetch_plane_props(fd, g->plane_id, &g->props, values);
+  memcpy(live->rect, &values[P_CRTC_X], sizeof(live->rect));
+}
+
+static int set_clip(int fd, const struct Graph *g, uint32_t fb_id, uint32_t w, uint32_t h) {
+  if (g->props.resolved != (1 << PLANE_PROP_COUNT) - 1) {
+    return -ENOENT;
+  }
+
+  uint64_t values[PLANE_PROP_COUNT] = {
+      [P_FB_ID] = fb_id,
+      [P_CRTC_ID] = g->crtc_id,
+      [P_CRTC_X] = 0,
+      [P_CRTC_Y] = 0,
+      [P_CRTC_W] = w,
+      [P_CRTC_H] = h,
+      [P_SRC_X] = 0,
+      [P_SRC_Y] = 0,
+      [P_SRC_W] = ((uint64_t)w) << 16,
+      [P_SRC_H] = ((uint64_t)h) << 16,
   };
 
   drmModeAtomicReq *req = drmModeAtomicAlloc();
   if (!req) {
     return -ENOMEM;
   }
-
-  for (size_t i = 0; i < sizeof(props) / sizeof(props[0]); i++) {
-    uint32_t prop_id = 0;
-    if (get_prop_by_name(fd, plane->plane_id, DRM_MODE_OBJECT_PLANE, props[i].name, &prop_id, NULL) != 0) {
-      drmModeAtomicFree(req);
-      return -ENOENT;
-    }
-    if (drmModeAtomicAddProperty(req, plane->plane_id, prop_id, props[i].value) < 0) {
+  for (int i = P_FB_ID; i < PLANE_PROP_COUNT; i++) {
+    if (drmModeAtomicAddProperty(req, g->plane_id, g->props.id[i], values[i]) < 0) {
       drmModeAtomicFree(req);
       return -errno;
     }
@@ -185,41 +371,374 @@ static int set_clip(int fd, drmModePlane *plane, uint32_t crtc_id, uint32_t w, u
   return 0;
 }
 
-static void print_status_json(int fd,
-                              const drmModeConnector *conn,
-                              const drmModeCrtc *crtc,
-                              const drmModePlane *plane) {
-  char name_buf[32];
-  const char *name = connector_name(conn, name_buf, sizeof(name_buf));
-
-  uint64_t crtc_x = 0, crtc_y = 0, crtc_w = 0, crtc_h = 0;
-  uint64_t src_x = 0, src_y = 0, src_w = 0, src_h = 0;
-  get_prop_by_name(fd, plane->plane_id, DRM_MODE_OBJECT_PLANE, "CRTC_X", NULL, &crtc_x);
-  get_prop_by_name(fd, plane->plane_id, DRM_MODE_OBJECT_PLANE, "CRTC_Y", NULL, &crtc_y);
-  get_prop_by_name(fd, plane->plane_id, DRM_MODE_OBJECT_PLANE, "CRTC_W", NULL, &crtc_w);
-  get_prop_by_name(fd, plane->plane_id, DRM_MODE_OBJECT_PLANE, "CRTC_H", NULL, &crtc_h);
-  get_prop_by_name(fd, plane->plane_id, DRM_MODE_OBJECT_PLANE, "SRC_X", NULL, &src_x);
-  get_prop_by_name(fd, plane->plane_id, DRM_MODE_OBJECT_PLANE, "SRC_Y", NULL, &src_y);
-  get_prop_by_name(fd, plane->plane_id, DRM_MODE_OBJECT_PLANE, "SRC_W", NULL, &src_w);
-  get_prop_by_name(fd, plane->plane_id, DRM_MODE_OBJECT_PLANE, "SRC_H", NULL, &src_h);
-
-  printf("{\n");
-  printf("  \"connector\": {\"name\": \"%s\", \"id\": %" PRIu32 "},\n", name, conn->connector_id);
-  printf("  \"crtc\": {\"id\": %" PRIu32 ", \"mode\": \"%ux%u\"},\n", crtc->crtc_id, crtc->mode.hdisplay,
-         crtc->mode.vdisplay);
-  printf("  \"plane\": {\"id\": %" PRIu32 ", \"fb_id\": %" PRIu32 "},\n", plane->plane_id, plane->fb_id);
-  printf("  \"plane_rect\": {\n");
-  printf("    \"crtc\": {\"x\": %" PRIu64 ", \"y\": %" PRIu64 ", \"w\": %" PRIu64 ", \"h\": %" PRIu64 "},\n", crtc_x, crtc_y,
-         crtc_w, crtc_h);
-  printf("    \"src\": {\"x\": %" PRIu64 ", \"y\": %" PRIu64 ", \"w\": %" PRIu64 ", \"h\": %" PRIu64 "}\n", src_x, src_y, src_w,
-         src_h);
-  printf("  }\n");
-  printf("}\n");
+// Same document as the `status` command; `pretty` keeps the historical
+// multi-line CLI layout, otherwise it is a single line for serve replies.
+static void format_status_json(char *buf, size_t n, bool pretty, const struct Graph *g, const struct Live *live) {
+  const char *nl = pretty ? "\n" : "";
+  const char *in1 = pretty ? "  " : "";
+  const char *in2 = pretty ? "    " : "";
+  const char *sp = pretty ? "" : " ";
+  snprintf(buf, n,
+           "{%s"
+           "%s\"connector\": {\"name\": \"%s\", \"id\": %" PRIu32 "},%s%s"
+           "%s\"crtc\": {\"id\": %" PRIu32 ", \"mode\": \"%ux%u\"},%s%s"
+           "%s\"plane\": {\"id\": %" PRIu32 ", \"fb_id\": %" PRIu32 "},%s%s"
+           "%s\"plane_rect\": {%s"
+           "%s\"crtc\": {\"x\": %" PRIu64 ", \"y\": %" PRIu64 ", \"w\": %" PRIu64 ", \"h\": %" PRIu64 "},%s%s"
+           "%s\"src\": {\"x\": %" PRIu64 ", \"y\": %" PRIu64 ", \"w\": %" PRIu64 ", \"h\": %" PRIu64 "}%s"
+           "%s}%s"
+           "}",
+           nl, in1, g->connector_name, g->connector_id, nl, sp, in1, g->crtc_id, live->hdisplay, live->vdisplay, nl,
+           sp, in1, g->plane_id, live->fb_id, nl, sp, in1, nl, in2, live->rect[0], live->rect[1], live->rect[2],
+           live->rect[3], nl, sp, in2, live->rect[4], live->rect[5], live->rect[6], live->rect[7], nl, in1, nl);
+}
+
+static int take_master(int fd) {
+  drmSetMaster(fd);
+  return drmIsMaster(fd) == 1 ? 0 : -EACCES;
+}
+
+// open() of a card with no master makes the opener master implicitly, so
+// serve mode drops it whenever it holds it without --hold-master.
+static void release_master(int fd, bool hold_master) {
+  if (!hold_master && drmIsMaster(fd) == 1) {
+    drmDropMaster(fd);
+  }
+}
+
+// --- serve -------------------------------------------------------------------
+
+#define MAX_CLIENTS 8
+
+struct Client {
+  int in_fd;
+  int out_fd;
+  char buf[256];
+  size_t len;
+};
+
+struct Server {
+  int fd;
+  const char *card;
+  const char *connector;
+  uint32_t half_h;
+  bool hold_master;
+  struct Graph graph;
+  bool stale;
+};
+
+static volatile sig_atomic_t g_stop = 0;
+
+static void on_signal(int sig) {
+  (void)sig;
+  g_stop = 1;
+}
+
+static void write_all(int fd, const char *buf, size_t len) {
+  while (len > 0) {
+    ssize_t n = write(fd, buf, len);
+    if (n < 0) {
+      if (errno == EINTR) {
+        continue;
+      }
+      return;
+    }
+    buf += n;
+    len -= (size_t)n;
+  }
+}
+
+static void reply_error(char *out, size_t n, const char *cmd, const char *err) {
+  snprintf(out, n, "{\"ok\": false, \"cmd\": \"%s\", \"error\": \"%s\"}\n", cmd, err);
+}
+
+// One request: re-enumerate if stale, apply, read back. Returns false for quit.
+static bool handle_request(struct Server *s, char *line, char *out, size_t n) {
+  char *save = NULL;
+  char *cmd = strtok_r(line, " \t\r", &save);
+  char *arg = strtok_r(NULL, " \t\r", &save);
+  if (!cmd) {
+    reply_error(out, n, "", "empty request");
+    return true;
+  }
+  if (strcmp(cmd, "quit") == 0) {
+    snprintf(out, n, "{\"ok\": true, \"cmd\": \"quit\"}\n");
+    return false;
+  }
+  bool is_status = strcmp(cmd, "status") == 0;
+  bool is_half = strcmp(cmd, "half") == 0;
+  bool is_full = strcmp(cmd, "full") == 0;
+  if (!is_status && !is_half && !is_full) {
+    reply_error(out, n, "", "unknown request (status|half [H]|full|quit)");
+    return true;
+  }
+  uint32_t half_h = s->half_h;
+  if (is_half && arg) {
+    half_h = (uint32_t)strtoul(arg, NULL, 0);
+  }
+
+  bool enumerated = false;
+  struct Live live;
+  const char *err = NULL;
+  for (int attempt = 0; attempt < 2; attempt++) {
+    if (!s->graph.valid || s->stale) {
+      s->stale = false;
+      enumerated = true;
+      err = enumerate(s->fd, s->connector, &s->graph);
+      if (err) {
+        break;
+      }
+    }
+    err = read_live(s->fd, &s->graph, &live);
+    if (err && !enumerated) {
+      s->stale = true;
+      continue;
+    }
+    break;
+  }
+  if (err) {
+    reply_error(out, n, cmd, err);
+    return true;
+  }
+
+  if (is_half || is_full) {
+    uint32_t w = live.hdisplay;
+    uint32_t h = is_half ? half_h : live.vdisplay;
+    if (h == 0 || h > live.vdisplay) {
+      reply_error(out, n, cmd, "height must be in 1..current_vdisplay");
+      return true;
+    }
+    int rc = take_master(s->fd);
+    if (rc == 0) {
+      rc = set_clip(s->fd, &s->graph, live.fb_id, w, h);
+      if (rc == -EINVAL || rc == -ENOENT) {
+        // IDs may be stale without a uevent (e.g. driver re-probe); retry once.
+        memset(&s->graph.props, 0, sizeof(s->graph.props));
+        const char *e2 = enumerate(s->fd, s->connector, &s->graph);
+        enumerated = true;
+        if (!e2 && !read_live(s->fd, &s->graph, &live)) {
+          rc = set_clip(s->fd, &s->graph, live.fb_id, w, h);
+        }
+      }
+    }
+    if (rc != 0) {
+      char msg[160];
+      if (rc == -EACCES) {
+        snprintf(msg, sizeof(msg), "not DRM master (another compositor may own %s)", s->card);
+      } else {
+        snprintf(msg, sizeof(msg), "clip failed: %s", strerror(-rc));
+      }
+      reply_error(out, n, cmd, msg);
+      return true;
+    }
+  }
+
+  read_rect(s->fd, &s->graph, &live);
+  char status[1024];
+  format_status_json(status, sizeof(status), false, &s->graph, &live);
+  snprintf(out, n, "{\"ok\": true, \"cmd\": \"%s\", \"enumerated\": %s, \"status\": %s}\n", cmd,
+           enumerated ? "true" : "false", status);
+  return true;
+}
+
+// Kernel uevents (group 1, no udevd needed): any DRM add/remove/hotplug marks
+// the cached graph stale; the next request re-enumerates.
+static int open_uevent_socket(void) {
+  int fd = socket(AF_NETLINK, SOCK_DGRAM | SOCK_CLOEXEC | SOCK_NONBLOCK, NETLINK_KOBJECT_UEVENT);
+  if (fd < 0) {
+    return -1;
+  }
+  struct sockaddr_nl addr = {.nl_family = AF_NETLINK, .nl_groups = 1};
+  if (bind(fd, (struct sockaddr *)&addr, sizeof(addr)) != 0) {
+    close(fd);
+    return -1;
+  }
+  return fd;
+}
+
+static bool drain_uevents(int fd) {
+  bool drm = false;
+  char buf[8192];
+  for (;;) {
+    ssize_t n = recv(fd, buf, sizeof(buf) - 1, 0);
+    if (n < 0) {
+      if (errno == ENOBUFS) {
+        drm = true;  // dropped events: assume the worst
+        continue;
+      }
+      break;
+    }
+    buf[n] = '\0';
+    for (ssize_t off = 0; off < n; off += (ssize_t)strlen(buf + off) + 1) {
+      if (strcmp(buf + off, "SUBSYSTEM=drm") == 0) {
+        drm = true;
+      }
+    }
+  }
+  return drm;
+}
+
+static int open_listen_socket(const char *path) {
+  struct sockaddr_un addr = {.sun_family = AF_UNIX};
+  if (strlen(path) >= sizeof(addr.sun_path)) {
+    errno = ENAMETOOLONG;
+    return -1;
+  }
+  strcpy(addr.sun_path, path);
+  int fd = socket(AF_UNIX, SOCK_STREAM | SOCK_CLOEXEC, 0);
+  if (fd < 0) {
+    return -1;
+  }
+  unlink(path);
+  mode_t old = umask(0077);
+  int rc = bind(fd, (struct sockaddr *)&addr, sizeof(addr));
+  umask(old);
+  if (rc != 0 || listen(fd, MAX_CLIENTS) != 0) {
+    close(fd);
+    return -1;
+  }
+  return fd;
+}
+
+static void drop_client(struct Client *clients, int *count, int i) {
+  if (clients[i].in_fd != STDIN_FILENO) {
+    close(clients[i].in_fd);
+  }
+  clients[i] = clients[--(*count)];
+}
+
+static int serve(struct Server *s, const char *socket_path) {
+  signal(SIGPIPE, SIG_IGN);
+  struct sigaction sa = {.sa_handler = on_signal};
+  sigaction(SIGINT, &sa, NULL);
+  sigaction(SIGTERM, &sa, NULL);
+
+  int uevent_fd = open_uevent_socket();
+  int listen_fd = -1;
+  struct Client clients[MAX_CLIENTS];
+  int nclients = 0;
+  if (socket_path) {
+    listen_fd = open_listen_socket(socket_path);
+    if (listen_fd < 0) {
+      die(socket_path);
+    }
+  } else {
+    clients[nclients++] = (struct Client){.in_fd = STDIN_FILENO, .out_fd = STDOUT_FILENO};
+  }
+
+  // Enumerate up front so the first request is as cheap as the rest.
+  const char *err = enumerate(s->fd, s->connector, &s->graph);
+  if (err) {
+    fprintf(stderr, "drm_clip serve: %s (will retry per request)\n", err);
+  }
+  if (!socket_path) {
+    char ready[160];
+    snprintf(ready, sizeof(ready), "{\"ok\": %s, \"cmd\": \"ready\", \"uevents\": %s}\n", err ? "false" : "true",
+             uevent_fd >= 0 ? "true" : "false");
+    write_all(STDOUT_FILENO, ready, strlen(ready));
+  }
+
+  int rc = 0;
+  while (!g_stop) {
+    struct pollfd pfds[MAX_CLIENTS + 2];
+    int n = 0;
+    int uevent_idx = -1, listen_idx = -1;
+    if (uevent_fd >= 0) {
+      uevent_idx = n;
+      pfds[n++] = (struct pollfd){.fd = uevent_fd, .events = POLLIN};
+    }
+    if (listen_fd >= 0 && nclients < MAX_CLIENTS) {
+      listen_idx = n;
+      pfds[n++] = (struct pollfd){.fd = listen_fd, .events = POLLIN};
+    }
+    int first_client = n;
+    for (int i = 0; i < nclients; i++) {
+      pfds[n++] = (struct pollfd){.fd = clients[i].in_fd, .events = POLLIN};
+    }
+    if (poll(pfds, (nfds_t)n, -1) < 0) {
+      if (errno == EINTR) {
+        continue;
+      }
+      die("poll");
+    }
+    if (uevent_idx >= 0 && (pfds[uevent_idx].revents & POLLIN) && drain_uevents(uevent_fd)) {
+      s->stale = true;
+    }
+    if (listen_idx >= 0 && (pfds[listen_idx].revents & POLLIN)) {
+      int cfd = accept4(listen_fd, NULL, NULL, SOCK_CLOEXEC);
+      if (cfd >= 0) {
+        clients[nclients++] = (struct Client){.in_fd = cfd, .out_fd = cfd};
+      }
+    }
+    // Walk backwards so drop_client() can swap the last entry in.
+    for (int i = n - first_client - 1; i >= 0; i--) {
+      if (i >= nclients || !(pfds[first_client + i].revents & (POLLIN | POLLHUP | POLLERR))) {
+        continue;
+      }
+      struct Client *c = &clients[i];
+      ssize_t got = read(c->in_fd, c->buf + c->len, sizeof(c->buf) - 1 - c->len);
+      if (got <= 0) {
+        if (got < 0 && errno == EINTR) {
+          continue;
+        }
+        if (c->in_fd == STDIN_FILENO) {
+          g_stop = 1;  // stdin EOF: the parent went away
+        }
+        drop_client(clients, &nclients, i);
+        continue;
+      }
+      c->len += (size_t)got;
+      c->buf[c->len] = '\0';
+      bool keep = true;
+      char *nl;
+      while (keep && (nl = memchr(c->buf, '\n', c->len)) != NULL) {
+        *nl = '\0';
+        char out[1536];
+        keep = handle_request(s, c->buf, out, sizeof(out));
+        // Covers every exit path: status, enumerate/height errors, commits.
+        release_master(s->fd, s->hold_master);
+        write_all(c->out_fd, out, strlen(out));
+        size_t used = (size_t)(nl - c->buf) + 1;
+        memmove(c->buf, nl + 1, c->len - used);
+        c->len -= used;
+      }
+      if (keep && c->len >= sizeof(c->buf) - 1) {
+        char out[160];
+        reply_error(out, sizeof(out), "", "request too long");
+        write_all(c->out_fd, out, strlen(out));
+        c->len = 0;
+      }
+      if (!keep) {
+        if (c->in_fd == STDIN_FILENO) {
+          g_stop = 1;
+        }
+        drop_client(clients, &nclients, i);
+      }
+    }
+  }
+
+  for (int i = nclients - 1; i >= 0; i--) {
+    drop_client(clients, &nclients, i);
+  }
+  if (listen_fd >= 0) {
+    close(listen_fd);
+    unlink(socket_path);
+  }
+  if (uevent_fd >= 0) {
+    close(uevent_fd);
+  }
+  if (s->hold_master) {
+    drmDropMaster(s->fd);
+  }
+  return rc;
 }
 
 int main(int argc, char **argv) {
   const char *card = default_card_path();
   const char *connector = NULL;
+  const char *socket_path = NULL;
+  bool hold_master = false;
+  bool print_status = false;
   uint32_t half_h = 1240;
   const char *cmd = NULL;
 
@@ -230,6 +749,12 @@ int main(int argc, char **argv) {
       connector = argv[++i];
     } else if (strcmp(argv[i], "--height") == 0 && i + 1 < argc) {
       half_h = (uint32_t)strtoul(argv[++i], NULL, 0);
+    } else if (strcmp(argv[i], "--socket") == 0 && i + 1 < argc) {
+      socket_path = argv[++i];
+    } else if (strcmp(argv[i], "--hold-master") == 0) {
+      hold_master = true;
+    } else if (strcmp(argv[i], "--print-status") == 0) {
+      print_status = true;
     } else if (strcmp(argv[i], "-h") == 0 || strcmp(argv[i], "--help") == 0) {
       usage(stdout);
       return 0;
@@ -245,17 +770,28 @@ int main(int argc, char **argv) {
     usage(stderr);
     return 2;
   }
+  bool is_serve = strcmp(cmd, "serve") == 0;
+  if ((socket_path || hold_master) && !is_serve) {
+    usage(stderr);
+    return 2;
+  }
+  if (print_status && (is_serve || strcmp(cmd, "status") == 0)) {
+    usage(stderr);
+    return 2;
+  }
 
   int fd = open(card, O_RDWR | O_CLOEXEC);
   if (fd < 0) {
     die(card);
   }
-  drmSetMaster(fd);
-  bool is_master = drmIsMaster(fd) == 1;
-  if (!is_master && strcmp(cmd, "status") != 0) {
-    fprintf(stderr, "not DRM master (another compositor may own %s)\n", card);
-    close(fd);
-    return 1;
+  if (!is_serve) {
+    drmSetMaster(fd);
+    bool is_master = drmIsMaster(fd) == 1;
+    if (!is_master && strcmp(cmd, "status") != 0) {
+      fprintf(stderr, "not DRM master (another compositor may own %s)\n", card);
+      close(fd);
+      return 1;
+    }
   }
 
   if (drmSetClientCap(fd, DRM_CLIENT_CAP_UNIVERSAL_PLANES, 1) != 0) {
@@ -267,93 +803,45 @@ int main(int argc, char **argv) {
     die("drmSetClientCap(ATOMIC)");
   }
 
-  drmModeRes *res = drmModeGetResources(fd);
-  if (!res) {
-    close(fd);
-    die("drmModeGetResources");
-  }
-
-  drmModeConnector *conn = pick_connector(fd, res, connector);
-  if (!conn) {
-    drmModeFreeResources(res);
-    close(fd);
-    die_msg("no connected connector found");
-  }
-  if (conn->encoder_id == 0) {
-    drmModeFreeConnector(conn);
-    drmModeFreeResources(res);
-    close(fd);
-    die_msg("connector has no encoder_id");
-  }
-
-  drmModeEncoder *enc = drmModeGetEncoder(fd, conn->encoder_id);
-  if (!enc) {
-    drmModeFreeConnector(conn);
-    drmModeFreeResources(res);
-    close(fd);
-    die("drmModeGetEncoder");
-  }
-  if (enc->crtc_id == 0) {
-    drmModeFreeEncoder(enc);
-    drmModeFreeConnector(conn);
-    drmModeFreeResources(res);
-    close(fd);
-    die_msg("encoder has no crtc_id");
-  }
-
-  int idx = crtc_index(res, enc->crtc_id);
-  if (idx < 0) {
-    drmModeFreeEncoder(enc);
-    drmModeFreeConnector(conn);
-    drmModeFreeResources(res);
+  if (is_serve) {
+    release_master(fd, hold_master);
+    struct Server s = {.fd = fd, .card = card, .connector = connector, .half_h = half_h, .hold_master = hold_master};
+    int rc = serve(&s, socket_path);
     close(fd);
-    die_msg("failed to find CRTC index");
+    return rc;
   }
 
-  drmModeCrtc *crtc = drmModeGetCrtc(fd, enc->crtc_id);
-  if (!crtc) {
-    drmModeFreeEncoder(enc);
-    drmModeFreeConnector(conn);
-    drmModeFreeResources(res);
-    close(fd);
-    die("drmModeGetCrtc");
+  struct Graph g = {0};
+  struct Live live;
+  const char *err = enumerate(fd, connector, &g);
+  if (!err) {
+    err = read_live(fd, &g, &live);
   }
-  if (crtc->mode_valid == 0) {
-    drmModeFreeCrtc(crtc);
-    drmModeFreeEncoder(enc);
-    drmModeFreeConnector(conn);
-    drmModeFreeResources(res);
+  if (err) {
     close(fd);
-    die_msg("CRTC has no valid mode");
-  }
-
-  drmModePlane *plane = pick_primary_plane(fd, enc->crtc_id, idx);
-  if (!plane) {
-    drmModeFreeCrtc(crtc);
-    drmModeFreeEncoder(enc);
-    drmModeFreeConnector(conn);
-    drmModeFreeResources(res);
-    close(fd);
-    die_msg("failed to find active primary plane");
+    die_msg(err);
   }
 
   int rc = 0;
   if (strcmp(cmd, "status") == 0) {
-    print_status_json(fd, conn, crtc, plane);
+    char status[1024];
+    read_rect(fd, &g, &live);
+    format_status_json(status, sizeof(status), true, &g, &live);
+    printf("%s\n", status);
   } else if (strcmp(cmd, "half") == 0) {
-    uint32_t w = crtc->mode.hdisplay;
+    uint32_t w = live.hdisplay;
     uint32_t h = half_h;
-    if (h == 0 || h > crtc->mode.vdisplay) {
+    if (h == 0 || h > live.vdisplay) {
       die_msg("--height must be in 1..current_vdisplay");
     }
-    rc = set_clip(fd, plane, enc->crtc_id, w, h);
+    rc = set_clip(fd, &g, live.fb_id, w, h);
     if (rc != 0) {
       fprintf(stderr, "clip failed: %s\n", strerror(-rc));
     }
   } else if (strcmp(cmd, "full") == 0) {
-    uint32_t w = crtc->mode.hdisplay;
-    uint32_t h = crtc->mode.vdisplay;
-    rc = set_clip(fd, plane, enc->crtc_id, w, h);
+    uint32_t w = live.hdisplay;
+    uint32_t h = live.vdisplay;
+    rc = set_clip(fd, &g, live.fb_id, w, h);
     if (rc != 0) {
       fprintf(stderr, "clip failed: %s\n", strerror(-rc));
     }
@@ -362,11 +850,13 @@ int main(int argc, char **argv) {
     rc = 2;
   }
 
-  drmModeFreePlane(plane);
-  drmModeFreeCrtc(crtc);
-  drmModeFreeEncoder(enc);
-  drmModeFreeConnector(conn);
-  drmModeFreeResources(res);
+  if (rc == 0 && print_status && strcmp(cmd, "status") != 0) {
+    char status[1024];
+    read_rect(fd, &g, &live);
+    format_status_json(status, sizeof(status), true, &g, &live);
+    printf("%s\n", status);
+  }
+
   close(fd);
   return rc == 0 ? 0 : 1;
 }
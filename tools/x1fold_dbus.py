@@ -0,0 +1,569 @@
+"""
+Minimal D-Bus client for the system bus, plus an iio-sensor-proxy wrapper.
+
+Repo source: x1fold/tools/x1fold_dbus.py
+
+Only what the X1 Fold helpers need: SASL EXTERNAL auth over the bus socket,
+method calls with replies, match rules and signals, and a marshaller/reader for
+the basic D-Bus types. No child processes (busctl / monitor-sensor) and no
+dependency on dbus-python or GLib.
+
+SensorProxy keeps one connection open while auto-rotation is wanted: it calls
+ClaimAccelerometer on that connection (iio-sensor-proxy ties the claim to the
+connection's lifetime) and receives AccelerometerOrientation through
+PropertiesChanged, so callers select() on `fileno()` instead of polling.
+"""
+
+from __future__ import annotations
+
+import os
+import select
+import socket
+import struct
+import time
+from dataclasses import dataclass, field
+from typing import Any
+
+SYSTEM_BUS_DEFAULT = "unix:path=/run/dbus/system_bus_socket"
+
+MSG_METHOD_CALL = 1
+MSG_METHOD_RETURN = 2
+MSG_ERROR = 3
+MSG_SIGNAL = 4
+
+FLAG_NO_REPLY_EXPECTED = 0x1
+
+HDR_PATH = 1
+HDR_INTERFACE = 2
+HDR_MEMBER = 3
+HDR_ERROR_NAME = 4
+HDR_REPLY_SERIAL = 5
+HDR_DESTINATION = 6
+HDR_SENDER = 7
+HDR_SIGNATURE = 8
+
+_HDR_FIELD_SIGS = {
+    HDR_PATH: "o",
+    HDR_INTERFACE: "s",
+    HDR_MEMBER: "s",
+    HDR_ERROR_NAME: "s",
+    HDR_REPLY_SERIAL: "u",
+    HDR_DESTINATION: "s",
+    HDR_SENDER: "s",
+    HDR_SIGNATURE: "g",
+}
+
+_FIXED = {
+    "y": ("B", 1),
+    "b": ("I", 4),
+    "n": ("h", 2),
+    "q": ("H", 2),
+    "i": ("i", 4),
+    "u": ("I", 4),
+    "x": ("q", 8),
+    "t": ("Q", 8),
+    "d": ("d", 8),
+    "h": ("I", 4),
+}
+_ALIGN = {**{k: v[1] for k, v in _FIXED.items()}, "s": 4, "o": 4, "g": 1, "v": 1, "a": 4, "(": 8, "{": 8}
+
+
+class DBusError(Exception):
+    def __init__(self, name: str, message: str = "") -> None:
+        super().__init__(f"{name}: {message}" if message else name)
+        self.name = name
+
+
+def _split_signature(sig: str) -> list[str]:
+    """
+    Split a signature into its complete types ("sa{sv}as" -> ["s", "a{sv}", "as"]).
+    """
+
+    out: list[str] = []
+    i = 0
+    while i < len(sig):
+        j = _complete_type_end(sig, i)
+        out.append(sig[i:j])
+        i = j
+    return out
+
+
+def _complete_type_end(sig: str, i: int) -> int:
+    c = sig[i]
+    if c == "a":
+        return _complete_type_end(sig, i + 1)
+    if c in "({":
+        close = ")" if c == "(" else "}"
+        depth = 0
+        for j in range(i, len(sig)):
+            if sig[j] in "({":
+                depth += 1
+            elif sig[j] in ")}":
+                depth -= 1
+                if depth == 0:
+                    if sig[j] != close:
+                        break
+                    return j + 1
+        raise ValueError(f"unbalanced signature: {sig!r}")
+    return i + 1
+
+
+class _Writer:
+    def __init__(self) -> None:
+        self.buf = bytearray()
+
+    def align(self, n: int) -> None:
+        self.buf += b"\0" * ((-len(self.buf)) % n)
+
+    def write(self, sig: str, value: Any) -> None:
+        c = sig[0]
+        if c in _FIXED:
+            fmt, size = _FIXED[c]
+            self.align(size)
+            self.buf += struct.pack("<" + fmt, int(bool(value)) if c == "b" else value)
+        elif c in "so":
+            data = str(value).encode("utf-8")
+            self.align(4)
+            self.buf += struct.pack("<I", len(data)) + data + b"\0"
+        elif c == "g":
+            data = str(value).encode("ascii")
+            self.buf += struct.pack("<B", len(data)) + data + b"\0"
+        elif c == "v":
+            vsig, vval = value
+            self.write("g", vsig)
+            self.write(vsig, vval)
+        elif c == "a":
+            elem = sig[1:]
+            self.align(4)
+            len_off = len(self.buf)
+            self.buf += b"\0\0\0\0"
+            self.align(_ALIGN[elem[0]])
+            start = len(self.buf)
+            items = value.items() if elem[0] == "{" else value
+            for item in items:
+                self.write(elem, item)
+            struct.pack_into("<I", self.buf, len_off, len(self.buf) - start)
+        elif c in "({":
+            self.align(8)
+            for sub, v in zip(_split_signature(sig[1:-1]), value):
+                self.write(sub, v)
+        else:
+            raise ValueError(f"unsupported D-Bus type: {sig!r}")
+
+
+class _Reader:
+    def __init__(self, data: bytes, endian: str, off: int = 0) -> None:
+        self.data = data
+        self.e = endian
+        self.off = off
+
+    def align(self, n: int) -> None:
+        self.off += (-self.off) % n
+
+    def read(self, sig: str) -> Any:
+        c = sig[0]
+        if c in _FIXED:
+            fmt, size = _FIXED[c]
+            self.align(size)
+            (v,) = struct.unpack_from(self.e + fmt, self.data, self.off)
+            self.off += size
+            return bool(v) if c == "b" else v
+        if c in "so":
+            self.align(4)
+            (n,) = struct.unpack_from(self.e + "I", self.data, self.off)
+            self.off += 4
+            s = self.data[self.off : self.off + n].decode("utf-8", errors="replace")
+            self.off += n + 1
+            return s
+        if c == "g":
+            n = self.data[self.off]
+            s = self.data[self.off + 1 : self.off + 1 + n].decode("ascii", errors="replace")
+            self.off += n + 2
+            return s
+        if c == "v":
+            vsig = self.read("g")
+            return self.read(vsig)
+        if c == "a":
+            elem = sig[1:]
+            self.align(4)
+            (n,) = struct.unpack_from(self.e + "I", self.data, self.off)
+            self.off += 4
+            self.align(_ALIGN[elem[0]])
+            end = self.off + n
+            if elem[0] == "{":
+                d: dict[Any, Any] = {}
+                while self.off < end:
+                    k, v = self.read(elem)
+                    d[k] = v
+                return d
+            items: list[Any] = []
+            while self.off < end:
+                items.append(self.read(elem))
+            return items
+        if c in "({":
+            self.align(8)
+            return tuple(self.read(sub) for sub in _split_signature(sig[1:-1]))
+        raise ValueError(f"unsupported D-Bus type: {sig!r}")
+
+
+@dataclass
+class Message:
+    type: int
+    serial: int
+    flags: int = 0
+    fields: dict[int, Any] = field(default_factory=dict)
+    body: list[Any] = field(default_factory=list)
+
+    @property
+    def member(self) -> str | None:
+        return self.fields.get(HDR_MEMBER)
+
+    @property
+    def interface(self) -> str | None:
+        return self.fields.get(HDR_INTERFACE)
+
+    @property
+    def path(self) -> str | None:
+        return self.fields.get(HDR_PATH)
+
+    @property
+    def reply_serial(self) -> int | None:
+        return self.fields.get(HDR_REPLY_SERIAL)
+
+
+def _encode_message(msg: Message, signature: str) -> bytes:
+    body = _Writer()
+    for sub, v in zip(_split_signature(signature), msg.body):
+        body.write(sub, v)
+    fields = dict(msg.fields)
+    if signature:
+        fields[HDR_SIGNATURE] = signature
+    hdr = _Writer()
+    hdr.buf += struct.pack("<cBBBII", b"l", msg.type, msg.flags, 1, len(body.buf), msg.serial)
+    hdr.write("a(yv)", [(code, (_HDR_FIELD_SIGS[code], val)) for code, val in sorted(fields.items())])
+    hdr.align(8)
+    return bytes(hdr.buf + body.buf)
+
+
+def _message_size(buf: bytes | bytearray) -> int | None:
+    if len(buf) < 16:
+        return None
+    e = "<" if buf[0:1] == b"l" else ">"
+    body_len, _, fields_len = struct.unpack_from(e + "III", buf, 4)
+    hdr_len = 16 + fields_len
+    hdr_len += (-hdr_len) % 8
+    return hdr_len + body_len
+
+
+def _decode_message(data: bytes) -> Message:
+    e = "<" if data[0:1] == b"l" else ">"
+    msg_type, flags, _ = struct.unpack_from("BBB", data, 1)
+    body_len, serial = struct.unpack_from(e + "II", data, 4)
+    r = _Reader(data, e, 12)
+    raw_fields = r.read("a(yv)")
+    r.align(8)
+    fields = {int(code): val for code, val in raw_fields}
+    body: list[Any] = []
+    sig = fields.get(HDR_SIGNATURE) or ""
+    if sig:
+        br = _Reader(data[r.off : r.off + body_len], e)
+        body = [br.read(sub) for sub in _split_signature(sig)]
+    return Message(type=msg_type, serial=serial, flags=flags, fields=fields, body=body)
+
+
+def _bus_socket_path(address: str) -> tuple[str, bool]:
+    """
+    Return (path, abstract) for the first unix: transport in a bus address.
+    """
+
+    for entry in address.split(";"):
+        transport, _, params = entry.partition(":")
+        if transport != "unix":
+            continue
+        kv = dict(p.split("=", 1) for p in params.split(",") if "=" in p)
+        if "path" in kv:
+            return kv["path"], False
+        if "abstract" in kv:
+            return kv["abstract"], True
+    raise ValueError(f"no unix transport in D-Bus address: {address!r}")
+
+
+class DBusConnection:
+    def __init__(self, address: str | None = None, *, timeout_s: float = 2.0) -> None:
+        self.address = address or os.environ.get("DBUS_SYSTEM_BUS_ADDRESS") or SYSTEM_BUS_DEFAULT
+        self.timeout_s = float(timeout_s)
+        self.sock: socket.socket | None = None
+        self.serial = 0
+        self.unique_name: str | None = None
+        self.buf = bytearray()
+        # Signals that arrived while waiting for a method reply.
+        self.pending: list[Message] = []
+
+    def fileno(self) -> int | None:
+        return self.sock.fileno() if self.sock is not None else None
+
+    def connect(self) -> None:
+        path, abstract = _bus_socket_path(self.address)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC)
+        try:
+            sock.settimeout(self.timeout_s)
+            sock.connect(("\0" + path) if abstract else path)
+            uid_hex = str(os.geteuid()).encode("ascii").hex()
+            sock.sendall(b"\0AUTH EXTERNAL " + uid_hex.encode("ascii") + b"\r\n")
+            line = b""
+            while not line.endswith(b"\r\n"):
+                chunk = sock.recv(256)
+                if not chunk:
+                    raise ConnectionError("bus closed during auth")
+                line += chunk
+            if not line.startswith(b"OK "):
+                raise ConnectionError(f"bus auth rejected: {line.strip().decode('ascii', errors='replace')}")
+            sock.sendall(b"BEGIN\r\n")
+        except BaseException:
+            sock.close()
+            raise
+        self.sock = sock
+        self.buf = bytearray()
+        self.pending = []
+        (self.unique_name,) = self.call(
+            "org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus", "Hello"
+        ) or (None,)
+
+    def close(self) -> None:
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+        self.pending = []
+
+    def _send(self, msg: Message, signature: str) -> None:
+        if self.sock is None:
+            raise ConnectionError("not connected")
+        self.sock.sendall(_encode_message(msg, signature))
+
+    def _next_serial(self) -> int:
+        self.serial = (self.serial % 0xFFFFFFFF) + 1
+        return self.serial
+
+    def _recv_messages(self, timeout_s: float | None) -> list[Message]:
+        if self.sock is None:
+            return []
+        if timeout_s is not None:
+            ready, _, _ = select.select([self.sock], [], [], max(0.0, timeout_s))
+            if not ready:
+                return []
+        self.sock.settimeout(0.0)
+        try:
+            while True:
+                try:
+                    chunk = self.sock.recv(65536)
+                except (BlockingIOError, InterruptedError):
+                    break
+                if not chunk:
+                    raise ConnectionError("bus connection closed")
+                self.buf += chunk
+                if len(chunk) < 65536:
+                    break
+        finally:
+            if self.sock is not None:
+                self.sock.settimeout(self.timeout_s)
+        out: list[Message] = []
+        while True:
+            size = _message_size(self.buf)
+            if size is None or len(self.buf) < size:
+                break
+            data = bytes(self.buf[:size])
+            del self.buf[:size]
+            out.append(_decode_message(data))
+        return out
+
+    def call(
+        self,
+        destination: str,
+        path: str,
+        interface: str,
+        member: str,
+        signature: str = "",
+        args: list[Any] | tuple[Any, ...] = (),
+    ) -> list[Any]:
+        """
+        Invoke a method and wait for its reply; raises DBusError on an error reply.
+        """
+
+        serial = self._next_serial()
+        msg = Message(
+            type=MSG_METHOD_CALL,
+            serial=serial,
+            fields={
+                HDR_PATH: path,
+                HDR_INTERFACE: interface,
+                HDR_MEMBER: member,
+                HDR_DESTINATION: destination,
+            },
+            body=list(args),
+        )
+        self._send(msg, signature)
+        deadline = time.monotonic() + self.timeout_s
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                raise TimeoutError(f"no reply to {interface}.{member}")
+            for reply in self._recv_messages(remaining):
+                if reply.reply_serial == serial and reply.type == MSG_METHOD_RETURN:
+                    return reply.body
+                if reply.reply_serial == serial and reply.type == MSG_ERROR:
+                    text = reply.body[0] if reply.body and isinstance(reply.body[0], str) else ""
+                    raise DBusError(str(reply.fields.get(HDR_ERROR_NAME) or "error"), text)
+                if reply.type == MSG_SIGNAL:
+                    self.pending.append(reply)
+
+    def add_match(self, rule: str) -> None:
+        self.call(
+            "org.freedesktop.DBus", "/org/freedesktop/DBus", "org.freedesktop.DBus", "AddMatch", "s", [rule]
+        )
+
+    def signals(self) -> list[Message]:
+        """
+        Return queued and newly readable signals without blocking.
+        """
+
+        out = self.pending
+        self.pending = []
+        out += [m for m in self._recv_messages(0.0) if m.type == MSG_SIGNAL]
+        return out
+
+
+SENSOR_PROXY_BUS = "net.hadess.SensorProxy"
+SENSOR_PROXY_PATH = "/net/hadess/SensorProxy"
+SENSOR_PROXY_IFACE = "net.hadess.SensorProxy"
+PROPERTIES_IFACE = "org.freedesktop.DBus.Properties"
+
+
+class SensorProxy:
+    """
+    Accelerometer claim + orientation push from iio-sensor-proxy.
+
+    `start()` connects (if needed) and claims; `stop()` releases and closes.
+    `orientation` is updated by `handle_events()` whenever `fileno()` is
+    readable. Connection attempts are rate-limited so a missing bus or service
+    costs nothing per loop.
+    """
+
+    mode = "dbus"
+
+    def __init__(self, *, retry_s: float = 5.0) -> None:
+        self.conn: DBusConnection | None = None
+        self.orientation: str | None = None
+        self.claimed = False
+        self.retry_s = float(retry_s)
+        self.last_attempt = 0.0
+        self.error: str | None = None
+
+    def active(self) -> bool:
+        return self.conn is not None
+
+    def connected(self) -> bool:
+        return self.conn is not None and self.conn.sock is not None
+
+    def fileno(self) -> int | None:
+        return self.conn.fileno() if self.conn is not None else None
+
+    def start(self) -> bool:
+        """
+        Ensure the accelerometer is claimed; returns True if it was (re)claimed now.
+        """
+
+        if self.claimed and self.connected():
+            return False
+        now = time.monotonic()
+        if self.last_attempt and (now - self.last_attempt) < self.retry_s:
+            return False
+        self.last_attempt = now
+        try:
+            if not self.connected():
+                self.conn = DBusConnection()
+                self.conn.connect()
+                self.conn.add_match(
+                    f"type='signal',sender='{SENSOR_PROXY_BUS}',path='{SENSOR_PROXY_PATH}',"
+                    f"interface='{PROPERTIES_IFACE}',member='PropertiesChanged'"
+                )
+                # Re-claim when iio-sensor-proxy restarts (the claim dies with it).
+                self.conn.add_match(
+                    "type='signal',sender='org.freedesktop.DBus',interface='org.freedesktop.DBus',"
+                    f"member='NameOwnerChanged',arg0='{SENSOR_PROXY_BUS}'"
+                )
+            assert self.conn is not None
+            self.conn.call(SENSOR_PROXY_BUS, SENSOR_PROXY_PATH, SENSOR_PROXY_IFACE, "ClaimAccelerometer")
+            self.claimed = True
+            body = self.conn.call(
+                SENSOR_PROXY_BUS,
+                SENSOR_PROXY_PATH,
+                PROPERTIES_IFACE,
+                "Get",
+                "ss",
+                [SENSOR_PROXY_IFACE, "AccelerometerOrientation"],
+            )
+            self._set_orientation(body[0] if body else None)
+        except (OSError, ValueError, DBusError) as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+            self.claimed = False
+            self.orientation = None
+            if not isinstance(exc, DBusError):
+                self.close()
+            return False
+        self.error = None
+        return True
+
+    def stop(self) -> bool:
+        if self.conn is None:
+            return False
+        if self.claimed and self.connected():
+            try:
+                self.conn.call(SENSOR_PROXY_BUS, SENSOR_PROXY_PATH, SENSOR_PROXY_IFACE, "ReleaseAccelerometer")
+            except (OSError, DBusError):
+                pass
+        self.close()
+        self.last_attempt = 0.0
+        return True
+
+    def close(self) -> None:
+        if self.conn is not None:
+            self.conn.close()
+        self.conn = None
+        self.claimed = False
+        self.orientation = None
+
+    def _set_orientation(self, value: object) -> None:
+        s = value.strip() if isinstance(value, str) else ""
+        # "undefined" is what iio-sensor-proxy reports before the first reading.
+        self.orientation = s if s and s != "undefined" else None
+
+    def handle_events(self) -> bool:
+        """
+        Drain pending signals; returns True if the orientation changed.
+        """
+
+        if self.conn is None:
+            return False
+        before = self.orientation
+        try:
+            msgs = self.conn.signals()
+        except (OSError, ValueError) as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+            self.close()
+            return before is not None
+        for msg in msgs:
+            if msg.member == "PropertiesChanged" and msg.body and msg.body[0] == SENSOR_PROXY_IFACE:
+                changed = msg.body[1] if len(msg.body) > 1 and isinstance(msg.body[1], dict) else {}
+                if "AccelerometerOrientation" in changed:
+                    self._set_orientation(changed["AccelerometerOrientation"])
+            elif msg.member == "NameOwnerChanged" and len(msg.body) >= 3:
+                # Service restarted or went away: our claim is gone.
+                self.claimed = False
+                self.orientation = None
+                self.last_attempt = 0.0
+                if msg.body[2]:
+                    self.start()
+        return self.orientation != before
@@ -12,18 +12,30 @@ This tool is intentionally conservative: it supports /proc/acpi/call (acpi_call
 kernel module) for bring-up, and can also read the EC byte directly via ec_sys
 debugfs. Long-term we want a proper in-kernel ACPI driver for LEN009E that
 exposes a normal Linux event stream (SW_DOCK) and/or a sysfs attribute.
+
+The "events" backend reads the same sources, but only when something hints that
+the dock state may have changed (see DockEvents): an ACPI netlink event, an
+evdev SW_DOCK/SW_TABLET_MODE switch, or an input device add/remove uevent. A
+slow safety timer still re-reads the EC in case a transition arrives without
+any notification.
 """
 
 from __future__ import annotations
 
 import argparse
+import fcntl
 import json
+import os
 import re
+import select
+import socket
+import struct
 import time
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable
 
+import x1fold_uevent
 
 DEFAULT_GDST = r"\_SB.DEVD.GDST"
 DEFAULT_CMMD = r"\_SB.PC00.LPCB.EC.CMMD"
@@ -31,6 +43,10 @@ DEFAULT_ACPI_CALL = Path("/proc/acpi/call")
 DEFAULT_EC_IO = Path("/sys/kernel/debug/ec/ec0/io")
 DEFAULT_EC_OFFSET = 0xC1
 DEFAULT_DOCK_SYSFS = Path("/sys/devices/platform/dock.0/docked")
+DEFAULT_INPUT_DIR = Path("/dev/input")
+DEFAULT_EVENTS_SAFETY_S = 30.0
+
+BACKENDS = ("auto", "acpi_call", "ec_sys", "events")
 
 
 def _read_int_file(path: Path) -> int | None:
@@ -124,8 +140,12 @@ def read_dock_state(
     dock_sysfs_val: int | None = None
 
     backend = backend.strip().lower()
-    if backend not in ("auto", "acpi_call", "ec_sys"):
-        raise ValueError("backend must be one of: auto, acpi_call, ec_sys")
+    if backend not in BACKENDS:
+        raise ValueError("backend must be one of: " + ", ".join(BACKENDS))
+    if backend == "events":
+        # The events backend only changes *when* we read; the read itself is
+        # the same source chain as auto.
+        backend = "auto"
     if backend == "acpi_call" and not acpi_call_path.exists():
         errors["acpi_call"] = f"{acpi_call_path} missing (need acpi_call kernel module?)"
 
@@ -181,6 +201,475 @@ def read_dock_state(
     )
 
 
+class DockReader:
+    """
+    Stateful equivalent of read_dock_state() for loops.
+
+    Sources are probed once and their fds kept open, so a steady-state poll is
+    one pread() of the EC byte (ec_sys), or a pwrite()+pread() pair per ACPI
+    method (acpi_call), plus one pread() of the dock sysfs node when present.
+    Any I/O error closes everything and the next read() probes again.
+
+    Per-poll syscalls with --backend ec_sys and no dock sysfs node, counted
+    from the two code paths (not measured; check with
+    `strace -c -f python3 x1fold_dock.py --backend ec_sys watch`):
+
+      read_dock_state(): stat(dock sysfs), stat(ec io), openat, fstat,
+        ioctl(TCGETS), lseek, lseek, read, close = 9. The buffered read(1)
+        also asks ec_sys for a full 4 KiB buffer, i.e. every EC byte from the
+        offset to 0xff (63 EC transactions at 0xc1).
+      DockReader.read(): pread(fd, 1, 0xc1) = 1, one EC transaction.
+    """
+
+    # While a requested source is missing, look for it again this often.
+    REPROBE_S = 10.0
+
+    def __init__(
+        self,
+        *,
+        backend: str,
+        acpi_call_path: Path = DEFAULT_ACPI_CALL,
+        gdst_path: str = DEFAULT_GDST,
+        cmmd_path: str = DEFAULT_CMMD,
+        ec_io: Path = DEFAULT_EC_IO,
+        ec_offset: int = DEFAULT_EC_OFFSET,
+        dock_sysfs: Path = DEFAULT_DOCK_SYSFS,
+    ) -> None:
+        backend = backend.strip().lower()
+        if backend not in BACKENDS:
+            raise ValueError("backend must be one of: " + ", ".join(BACKENDS))
+        if ec_offset < 0 or ec_offset > 0xFFFF:
+            raise ValueError("EC offset out of range")
+        self.backend = "auto" if backend == "events" else backend
+        self.acpi_call_path = acpi_call_path
+        self.gdst_expr = f"{gdst_path}\n".encode("utf-8")
+        self.cmmd_expr = f"{cmmd_path}\n".encode("utf-8")
+        self.ec_io = ec_io
+        self.ec_offset = int(ec_offset)
+        self.dock_sysfs = dock_sysfs
+        self.acpi_fd: int | None = None
+        self.ec_fd: int | None = None
+        self.sysfs_fd: int | None = None
+        self.probed = False
+        self.probe_ts = 0.0
+        # Errors that describe the probe result and are reported on every read.
+        self.probe_errors: dict[str, str] = {}
+
+    def probe(self) -> None:
+        self.close()
+        self.probed = True
+        self.probe_ts = time.monotonic()
+        self.probe_errors = {}
+        self.sysfs_fd = self._open(self.dock_sysfs, os.O_RDONLY)
+        if self.backend in ("auto", "acpi_call"):
+            self.acpi_fd = self._open(self.acpi_call_path, os.O_RDWR)
+            if self.acpi_fd is None and self.backend == "acpi_call":
+                self.probe_errors["acpi_call"] = f"{self.acpi_call_path} missing (need acpi_call kernel module?)"
+        if self.backend in ("auto", "ec_sys"):
+            self.ec_fd = self._open(self.ec_io, os.O_RDONLY)
+            if self.ec_fd is None:
+                self.probe_errors["ec_sys"] = (
+                    f"FileNotFoundError: {self.ec_io} missing (need ec_sys + mounted debugfs?)"
+                )
+
+    @staticmethod
+    def _open(path: Path, flags: int) -> int | None:
+        try:
+            return os.open(path, flags | os.O_CLOEXEC)
+        except OSError:
+            return None
+
+    def close(self) -> None:
+        for fd in (self.acpi_fd, self.ec_fd, self.sysfs_fd):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self.acpi_fd = None
+        self.ec_fd = None
+        self.sysfs_fd = None
+        self.probed = False
+
+    def _acpi(self, expr: bytes) -> str:
+        assert self.acpi_fd is not None
+        os.write(self.acpi_fd, expr)
+        return os.pread(self.acpi_fd, 4096, 0).decode("utf-8", errors="replace").strip("\0").strip()
+
+    def read(self) -> DockState:
+        if not self.probed:
+            self.probe()
+        errors: dict[str, str] = {}
+        failed = False
+
+        gdst: int | None = None
+        cmmd: int | None = None
+        dock_sysfs_val: int | None = None
+
+        if self.sysfs_fd is not None:
+            try:
+                raw = os.pread(self.sysfs_fd, 16, 0).decode("ascii", errors="replace").strip()
+                dock_sysfs_val = int(raw, 0)
+            except ValueError:
+                dock_sysfs_val = None
+            except OSError:
+                failed = True
+            if dock_sysfs_val not in (0, 1):
+                errors["dock_sysfs"] = f"invalid dock sysfs value: {dock_sysfs_val!r}"
+                dock_sysfs_val = None
+
+        if self.acpi_fd is not None:
+            for key, expr in (("gdst", self.gdst_expr), ("cmmd", self.cmmd_expr)):
+                try:
+                    out = self._acpi(expr)
+                except OSError as exc:
+                    errors[key] = f"{type(exc).__name__}: {exc}"
+                    failed = True
+                    continue
+                val = _parse_acpi_call_int(out)
+                if val is None:
+                    errors[key] = out
+                elif key == "gdst":
+                    gdst = val
+                else:
+                    cmmd = val
+
+        if cmmd is None and self.ec_fd is not None:
+            try:
+                b = os.pread(self.ec_fd, 1, self.ec_offset)
+                if len(b) != 1:
+                    raise OSError("short read from EC io")
+                cmmd = int(b[0])
+            except OSError as exc:
+                errors["ec_sys"] = f"{type(exc).__name__}: {exc}"
+                failed = True
+        elif cmmd is None and "ec_sys" in self.probe_errors:
+            errors["ec_sys"] = self.probe_errors["ec_sys"]
+        if "acpi_call" in self.probe_errors:
+            errors["acpi_call"] = self.probe_errors["acpi_call"]
+
+        docked: int | None = None
+        modeid: int | None = None
+        if cmmd is not None:
+            docked = (cmmd >> 7) & 0x1
+            modeid = cmmd & 0x7F
+        if gdst in (0, 1):
+            docked = gdst
+        if docked is None and dock_sysfs_val in (0, 1):
+            docked = dock_sysfs_val
+
+        if failed or docked is None or (
+            self.probe_errors and (time.monotonic() - self.probe_ts) >= self.REPROBE_S
+        ):
+            # Re-probe on the next read (module loaded, debugfs mounted, ...).
+            self.close()
+
+        return DockState(
+            docked=docked,
+            modeid=modeid,
+            cmmd=cmmd,
+            gdst=gdst,
+            dock_sysfs=dock_sysfs_val,
+            errors=errors,
+        )
+
+
+# --- change notifications (events backend) -----------------------------------
+
+NETLINK_GENERIC = 16
+SOL_NETLINK = 270
+NETLINK_ADD_MEMBERSHIP = 1
+GENL_ID_CTRL = 0x10
+CTRL_CMD_GETFAMILY = 3
+CTRL_ATTR_FAMILY_ID = 1
+CTRL_ATTR_FAMILY_NAME = 2
+CTRL_ATTR_MCAST_GROUPS = 7
+CTRL_ATTR_MCAST_GRP_NAME = 1
+CTRL_ATTR_MCAST_GRP_ID = 2
+ACPI_GENL_FAMILY = "acpi_event"
+ACPI_GENL_MCAST_GROUP = "acpi_mc_group"
+ACPI_GENL_ATTR_EVENT = 1
+
+EV_SW = 0x05
+SW_TABLET_MODE = 0x01
+SW_DOCK = 0x05
+_SW_NAMES = {SW_TABLET_MODE: "SW_TABLET_MODE", SW_DOCK: "SW_DOCK"}
+
+_NLMSGHDR = struct.Struct("=IHHII")  # len, type, flags, seq, pid
+_GENLMSGHDR = struct.Struct("=BBH")  # cmd, version, reserved
+_NLATTR = struct.Struct("=HH")  # len, type
+_ACPI_GENL_EVENT = struct.Struct("=20s15sxII")  # device_class, bus_id, (pad), type, data
+_INPUT_EVENT = struct.Struct("@llHHi")  # struct input_event (64-bit timeval)
+
+
+def _ioc(direction: int, typ: int, nr: int, size: int) -> int:
+    return (direction << 30) | (size << 16) | (typ << 8) | nr
+
+
+def _eviocgbit(ev: int, length: int) -> int:
+    return _ioc(2, ord("E"), 0x20 + ev, length)
+
+
+def _nla_iter(data: bytes) -> Iterable[tuple[int, bytes]]:
+    off = 0
+    while off + _NLATTR.size <= len(data):
+        length, typ = _NLATTR.unpack_from(data, off)
+        if length < _NLATTR.size:
+            return
+        yield typ & 0x3FFF, data[off + _NLATTR.size : off + length]
+        off += (length + 3) & ~3
+
+
+def _genl_mcast_group(family: str, group: str) -> int | None:
+    """
+    Resolve a generic netlink multicast group id via the nlctrl family.
+    """
+
+    name = family.encode("ascii") + b"\0"
+    attr = _NLATTR.pack(_NLATTR.size + len(name), CTRL_ATTR_FAMILY_NAME) + name
+    attr += b"\0" * ((4 - len(attr) % 4) % 4)
+    body = _GENLMSGHDR.pack(CTRL_CMD_GETFAMILY, 1, 0) + attr
+    msg = _NLMSGHDR.pack(_NLMSGHDR.size + len(body), GENL_ID_CTRL, 1, 1, 0) + body
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW | socket.SOCK_CLOEXEC, NETLINK_GENERIC) as sock:
+        sock.settimeout(1.0)
+        sock.bind((0, 0))
+        sock.send(msg)
+        data = sock.recv(65536)
+    if len(data) < _NLMSGHDR.size + _GENLMSGHDR.size:
+        return None
+    _, msg_type, _, _, _ = _NLMSGHDR.unpack_from(data, 0)
+    if msg_type != GENL_ID_CTRL:
+        # NLMSG_ERROR: family not registered (ACPI built without netlink events).
+        return None
+    for typ, payload in _nla_iter(data[_NLMSGHDR.size + _GENLMSGHDR.size :]):
+        if typ != CTRL_ATTR_MCAST_GROUPS:
+            continue
+        for _, grp in _nla_iter(payload):
+            grp_name: str | None = None
+            grp_id: int | None = None
+            for gtyp, gval in _nla_iter(grp):
+                if gtyp == CTRL_ATTR_MCAST_GRP_NAME:
+                    grp_name = gval.rstrip(b"\0").decode("ascii", errors="replace")
+                elif gtyp == CTRL_ATTR_MCAST_GRP_ID and len(gval) >= 4:
+                    grp_id = struct.unpack_from("=I", gval)[0]
+            if grp_name == group and grp_id is not None:
+                return grp_id
+    return None
+
+
+def _evdev_switches(path: Path) -> list[int]:
+    """
+    Return the dock-related EV_SW codes an evdev node advertises.
+    """
+
+    try:
+        fd = os.open(path, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+    except OSError:
+        return []
+    try:
+        buf = bytearray(8)
+        try:
+            fcntl.ioctl(fd, _eviocgbit(EV_SW, len(buf)), buf, True)
+        except OSError:
+            return []
+    finally:
+        os.close(fd)
+    bits = int.from_bytes(buf, "little")
+    return [code for code in _SW_NAMES if bits & (1 << code)]
+
+
+class DockEvents:
+    """
+    Notification sources that tell the events backend when to re-read the EC.
+
+    Every source is optional; `open()` returns what could be opened. None of
+    them is trusted for the dock value itself, they only trigger a read.
+
+    Input add/remove uevents come from the process-wide x1fold_uevent registry
+    (its socket is listed under "uevent"), so a process that also tracks the
+    digitizer reads each uevent once. Changes picked up by anyone else's
+    `poll()` of the registry are still reported by the next `drain()`.
+    """
+
+    def __init__(
+        self, *, input_dir: Path = DEFAULT_INPUT_DIR, devices: x1fold_uevent.DeviceRegistry | None = None
+    ) -> None:
+        self.input_dir = input_dir
+        self.devices = devices if devices is not None else x1fold_uevent.shared()
+        self.kinds: dict[int, str] = {}  # fd -> "acpi" | "uevent" | "evdev"
+        self.evdev_paths: dict[int, str] = {}
+        self.errors: dict[str, str] = {}
+        self._socks: dict[int, socket.socket] = {}
+        self._input_changes: list[str] = []
+
+    def sources(self) -> list[str]:
+        return sorted(set(self.kinds.values()))
+
+    def fds(self) -> list[int]:
+        return list(self.kinds)
+
+    def open(self) -> list[str]:
+        self.close()
+        self.errors = {}
+        try:
+            grp = _genl_mcast_group(ACPI_GENL_FAMILY, ACPI_GENL_MCAST_GROUP)
+            if grp is None:
+                self.errors["acpi"] = f"generic netlink family {ACPI_GENL_FAMILY!r} not available"
+            else:
+                sock = socket.socket(
+                    socket.AF_NETLINK, socket.SOCK_RAW | socket.SOCK_CLOEXEC | socket.SOCK_NONBLOCK, NETLINK_GENERIC
+                )
+                sock.bind((0, 0))
+                sock.setsockopt(SOL_NETLINK, NETLINK_ADD_MEMBERSHIP, grp)
+                self._add_sock(sock, "acpi")
+        except OSError as exc:
+            self.errors["acpi"] = f"{type(exc).__name__}: {exc}"
+        fd = self.devices.fileno()
+        if fd is None:
+            self.errors["uevent"] = self.devices.error or "uevent netlink socket not available"
+        else:
+            self.kinds[fd] = "uevent"
+            self.devices.subscribe(self._on_device_change)
+        self._open_evdev()
+        return self.sources()
+
+    def _add_sock(self, sock: socket.socket, kind: str) -> None:
+        self._socks[sock.fileno()] = sock
+        self.kinds[sock.fileno()] = kind
+
+    def _open_evdev(self) -> None:
+        for fd in [fd for fd, kind in self.kinds.items() if kind == "evdev"]:
+            self._close_fd(fd)
+        try:
+            nodes = sorted(self.input_dir.glob("event*"))
+        except OSError:
+            nodes = []
+        for node in nodes:
+            if not _evdev_switches(node):
+                continue
+            try:
+                fd = os.open(node, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+            except OSError as exc:
+                self.errors[f"evdev:{node.name}"] = f"{type(exc).__name__}: {exc}"
+                continue
+            self.kinds[fd] = "evdev"
+            self.evdev_paths[fd] = str(node)
+
+    def _close_fd(self, fd: int) -> None:
+        if self.kinds.pop(fd, None) == "uevent":
+            # The shared registry owns that socket.
+            self.devices.unsubscribe(self._on_device_change)
+            self._input_changes.clear()
+            return
+        self.evdev_paths.pop(fd, None)
+        sock = self._socks.pop(fd, None)
+        try:
+            if sock is not None:
+                sock.close()
+            else:
+                os.close(fd)
+        except OSError:
+            pass
+
+    def close(self) -> None:
+        for fd in list(self.kinds):
+            self._close_fd(fd)
+
+    def wait(self, timeout_s: float | None) -> list[str]:
+        fds = self.fds()
+        if not fds:
+            if timeout_s:
+                time.sleep(timeout_s)
+            return []
+        try:
+            ready, _, _ = select.select(fds, [], [], timeout_s)
+        except InterruptedError:
+            return []
+        return self.drain(ready)
+
+    def drain(self, ready: Iterable[int]) -> list[str]:
+        """
+        Read pending notifications from `ready` fds; returns short reasons
+        (empty when nothing dock-relevant arrived).
+        """
+
+        reasons: list[str] = []
+        for fd in ready:
+            kind = self.kinds.get(fd)
+            if kind == "acpi":
+                reasons += self._drain_acpi(fd)
+            elif kind == "uevent":
+                # Feeds _on_device_change (a no-op if the owner already polled).
+                self.devices.poll()
+            elif kind == "evdev":
+                reasons += self._drain_evdev(fd)
+        if self._input_changes:
+            reasons += self._input_changes
+            self._input_changes = []
+            # Input devices came or went; pick up (or drop) switch nodes.
+            self._open_evdev()
+        return reasons
+
+    def _drain_acpi(self, fd: int) -> list[str]:
+        out: list[str] = []
+        sock = self._socks[fd]
+        while True:
+            try:
+                data = sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                break
+            off = 0
+            while off + _NLMSGHDR.size <= len(data):
+                length = _NLMSGHDR.unpack_from(data, off)[0]
+                if length < _NLMSGHDR.size:
+                    break
+                body = data[off + _NLMSGHDR.size + _GENLMSGHDR.size : off + length]
+                off += (length + 3) & ~3
+                for typ, payload in _nla_iter(body):
+                    if typ != ACPI_GENL_ATTR_EVENT or len(payload) < _ACPI_GENL_EVENT.size:
+                        continue
+                    dev_class, bus_id, ev_type, ev_data = _ACPI_GENL_EVENT.unpack_from(payload)
+                    out.append(
+                        "acpi:%s %s %#x %#x"
+                        % (
+                            dev_class.split(b"\0", 1)[0].decode("ascii", errors="replace"),
+                            bus_id.split(b"\0", 1)[0].decode("ascii", errors="replace"),
+                            ev_type,
+                            ev_data,
+                        )
+                    )
+        return out
+
+    def _on_device_change(self, change: x1fold_uevent.DeviceChange) -> None:
+        # The keyboard shows up as an input device while attached.
+        if change.kind != "input" or change.action not in ("add", "remove", "resync"):
+            return
+        name = change.node.props.get("NAME", "") if change.node is not None else ""
+        self._input_changes.append(f"uevent:{change.action} {name}".rstrip())
+
+    def _drain_evdev(self, fd: int) -> list[str]:
+        out: list[str] = []
+        while True:
+            try:
+                data = os.read(fd, _INPUT_EVENT.size * 64)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                # Device went away; the remove uevent triggers a rescan.
+                self._close_fd(fd)
+                out.append("evdev:gone")
+                break
+            if not data:
+                break
+            for off in range(0, len(data) - _INPUT_EVENT.size + 1, _INPUT_EVENT.size):
+                _, _, ev_type, code, value = _INPUT_EVENT.unpack_from(data, off)
+                if ev_type == EV_SW and code in _SW_NAMES:
+                    out.append(f"evdev:{_SW_NAMES[code]}={value}")
+        return out
+
+
 def cmd_status(args: argparse.Namespace) -> int:
     state = read_dock_state(
         backend=args.backend,
@@ -205,40 +694,62 @@ def cmd_status(args: argparse.Namespace) -> int:
 
 
 def cmd_watch(args: argparse.Namespace) -> int:
+    events: DockEvents | None = None
+    if args.backend == "events":
+        events = DockEvents()
+        sources = events.open()
+        print(
+            json.dumps(
+                {"ts": utc_iso(), "event": "dock_events", "sources": sources, "errors": events.errors},
+                sort_keys=True,
+            )
+        )
+
+    def _sleep() -> None:
+        if events is None or not events.fds():
+            time.sleep(args.interval_s)
+            return
+        # Block until a notification (or the safety timer), then re-read.
+        events.wait(float(args.safety_s))
+
+    reader = DockReader(
+        backend=args.backend,
+        acpi_call_path=args.acpi_call,
+        gdst_path=args.gdst,
+        cmmd_path=args.cmmd,
+        ec_io=args.ec_io,
+        ec_offset=args.ec_offset,
+        dock_sysfs=args.dock_sysfs,
+    )
     last: DockState | None = None
     count = 0
     while True:
-        state = read_dock_state(
-            backend=args.backend,
-            acpi_call_path=args.acpi_call,
-            gdst_path=args.gdst,
-            cmmd_path=args.cmmd,
-            ec_io=args.ec_io,
-            ec_offset=args.ec_offset,
-            dock_sysfs=args.dock_sysfs,
-        )
+        state = reader.read()
         if last is None and args.print_initial:
             print(json.dumps({"ts": utc_iso(), "event": "initial", "state": state.to_json()}, sort_keys=True))
             last = state
             continue
         if last is not None and state.docked == last.docked and state.modeid == last.modeid:
-            time.sleep(args.interval_s)
+            _sleep()
             continue
         print(json.dumps({"ts": utc_iso(), "event": "change", "state": state.to_json()}, sort_keys=True))
         last = state
         count += 1
         if args.max_events and count >= args.max_events:
             return 0
-        time.sleep(args.interval_s)
+        _sleep()
 
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Read/watch the Lenovo X1 Fold dock (magnet keyboard) state.")
     parser.add_argument(
         "--backend",
-        choices=["auto", "acpi_call", "ec_sys"],
+        choices=list(BACKENDS),
         default="auto",
-        help="Backend for reading dock state (default: auto).",
+        help=(
+            "Backend for reading dock state (default: auto). 'events' reads like auto but, for watch, "
+            "only after an ACPI/evdev/uevent notification or the --safety-s timer."
+        ),
     )
     parser.add_argument(
         "--dock-sysfs",
@@ -274,6 +785,12 @@ def build_parser() -> argparse.ArgumentParser:
 
     p_watch = sub.add_parser("watch", help="Poll and print JSON lines on changes.")
     p_watch.add_argument("--interval-s", type=float, default=0.2, help="Polling interval in seconds (default: 0.2).")
+    p_watch.add_argument(
+        "--safety-s",
+        type=float,
+        default=DEFAULT_EVENTS_SAFETY_S,
+        help="With --backend events: re-read at least this often without a notification (default: 30).",
+    )
     p_watch.add_argument("--print-initial", action="store_true", help="Emit an initial state event immediately.")
     p_watch.add_argument("--max-events", type=int, default=0, help="Stop after N change events (0 = infinite).")
     p_watch.set_defaults(fn=cmd_watch)
@@ -5,7 +5,9 @@ User-session UI helper for X1 Fold "halfblank" behavior.
 Repo source: x1fold/tools/x1fold_halfblank_ui.py
 
 This tool reads a small state file written by x1fold_halfblankd.py (system daemon)
-and applies the *display geometry* part in the active user session.
+and applies the *display geometry* part in the active user session. When the
+daemon's state socket is reachable, transitions are pushed to us over it (see
+x1fold_state_stream.py) and the file is only read as a fallback.
 
 Today we implement X11 by creating a black "_NET_WM_WINDOW_TYPE_DOCK" window that
 covers the bottom part of the screen and reserves that space via
@@ -24,15 +26,24 @@ and fall back to the layer-shell helper only when unsupported.
 from __future__ import annotations
 
 import argparse
+import ctypes
 import json
 import os
 import re
-import shutil
+import select
+import socket
+import struct
 import subprocess
 import time
+from dataclasses import dataclass
 from pathlib import Path
 from typing import Any
 
+from x1fold_dbus import SensorProxy
+from x1fold_iio import IIOAccel
+from x1fold_state_stream import StateStreamClient
+from x1fold_xrandr import XRandR
+
 
 def utc_iso() -> str:
     return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
@@ -64,6 +75,26 @@ def _xrandr(display: str, argv: list[str]) -> subprocess.CompletedProcess[str]:
     return subprocess.run(["xrandr", *argv], check=False, capture_output=True, text=True, env=env)
 
 
+_X11_RANDR: dict[str, XRandR] = {}
+
+
+def _x11_randr(display: str) -> XRandR | None:
+    """
+    Persistent RandR connection for `display`; None falls back to the `xrandr` binary.
+    """
+
+    rr = _X11_RANDR.get(display)
+    if rr is None:
+        rr = _X11_RANDR[display] = XRandR(display)
+    had_error = rr.error
+    ok, err = rr.connect()
+    if not ok:
+        if err != had_error:
+            _log("x11_randr_unavailable", display=display, error=err)
+        return None
+    return rr
+
+
 def _is_wayland_session() -> bool:
     st = (os.environ.get("XDG_SESSION_TYPE") or "").strip().lower()
     if st:
@@ -72,6 +103,9 @@ def _is_wayland_session() -> bool:
 
 
 def _x11_output_rotation(display: str, output: str) -> str | None:
+    rr = _x11_randr(display)
+    if rr is not None:
+        return rr.output_rotation(output)
     proc = _xrandr(display, ["--query"])
     if proc.returncode != 0:
         return None
@@ -97,6 +131,9 @@ def _x11_output_rotation(display: str, output: str) -> str | None:
 def _x11_set_rotation(display: str, output: str, rotation: str) -> tuple[bool, str]:
     if rotation not in {"normal", "left", "right", "inverted"}:
         return False, f"invalid rotation: {rotation}"
+    rr = _x11_randr(display)
+    if rr is not None:
+        return rr.set_rotation(output, rotation)
     proc = _xrandr(display, ["--output", output, "--rotate", rotation])
     if proc.returncode == 0:
         return True, ""
@@ -104,117 +141,6 @@ def _x11_set_rotation(display: str, output: str, rotation: str) -> tuple[bool, s
     return False, msg
 
 
-def _sensorproxy_claim() -> None:
-    try:
-        subprocess.run(
-            [
-                "busctl",
-                "--system",
-                "call",
-                "net.hadess.SensorProxy",
-                "/net/hadess/SensorProxy",
-                "net.hadess.SensorProxy",
-                "ClaimAccelerometer",
-            ],
-            check=False,
-            capture_output=True,
-            text=True,
-        )
-    except OSError:
-        return
-
-
-def _sensorproxy_orientation() -> str | None:
-    """
-    Read iio-sensor-proxy's AccelerometerOrientation, e.g. "normal", "left-up".
-
-    Returns None on failure or if no orientation is available.
-    """
-
-    try:
-        proc = subprocess.run(
-            [
-                "busctl",
-                "--system",
-                "get-property",
-                "net.hadess.SensorProxy",
-                "/net/hadess/SensorProxy",
-                "net.hadess.SensorProxy",
-                "AccelerometerOrientation",
-            ],
-            check=False,
-            capture_output=True,
-            text=True,
-        )
-    except OSError:
-        return None
-    if proc.returncode != 0:
-        return None
-    m = re.search(r"\"([^\"]*)\"", proc.stdout)
-    if not m:
-        return None
-    s = m.group(1).strip()
-    return s or None
-
-
-class SensorClaim:
-    """
-    Keep iio-sensor-proxy's accelerometer "claimed" while auto-rotate is needed.
-
-    iio-sensor-proxy may power down sensors when no clients claim them. A one-shot
-    ClaimAccelerometer call is typically not enough because the claim is tied to
-    the D-Bus connection lifetime.
-    """
-
-    def __init__(self) -> None:
-        self.proc: subprocess.Popen[str] | None = None
-        self.available: bool | None = None
-
-    def _have_monitor_sensor(self) -> bool:
-        if self.available is not None:
-            return bool(self.available)
-        self.available = bool(shutil.which("monitor-sensor"))
-        return bool(self.available)
-
-    def running(self) -> bool:
-        return bool(self.proc and self.proc.poll() is None)
-
-    def start(self) -> bool:
-        if self.running():
-            return False
-        if not self._have_monitor_sensor():
-            return False
-        try:
-            self.proc = subprocess.Popen(
-                ["monitor-sensor", "--accel"],
-                stdin=subprocess.DEVNULL,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                text=True,
-            )
-        except OSError as exc:
-            _log("sensor_claim_start_failed", error=f"{type(exc).__name__}: {exc}")
-            self.proc = None
-            self.available = False
-            return False
-        return True
-
-    def stop(self) -> bool:
-        if not self.proc:
-            return False
-        try:
-            if self.proc.poll() is None:
-                self.proc.terminate()
-                try:
-                    self.proc.wait(timeout=1.0)
-                except subprocess.TimeoutExpired:
-                    self.proc.kill()
-                    self.proc.wait(timeout=1.0)
-        finally:
-            self.proc = None
-        return True
-
-
 def _sensorproxy_to_xrandr_rotation(orientation: str) -> str | None:
     # iio-sensor-proxy -> XRandR rotation mapping:
     # - "left-up"  means the device left edge is up -> rotate output left
@@ -234,7 +160,20 @@ def _sensorproxy_to_sway_transform(orientation: str) -> str | None:
     return mapping.get(orientation)
 
 
+# (runtime dir, its mtime_ns, result) of the last sway-ipc.*.sock scan.
+_sway_socket_cache: tuple[str, int, str | None] | None = None
+
+
 def _detect_sway_socket() -> str | None:
+    """
+    SWAYSOCK if it is a socket, else the newest sway-ipc.*.sock in the runtime dir.
+
+    The socket is not a kernel device, so x1fold_uevent cannot announce it;
+    instead the runtime dir is only re-listed when its mtime changes (a socket
+    was created or removed), which makes the per-loop call a single stat().
+    """
+
+    global _sway_socket_cache
     env = (os.environ.get("SWAYSOCK") or "").strip()
     if env:
         p = Path(env)
@@ -248,6 +187,13 @@ def _detect_sway_socket() -> str | None:
     if not runtime:
         runtime = f"/run/user/{os.getuid()}"
     root = Path(runtime)
+    try:
+        mtime_ns = root.stat().st_mtime_ns
+    except OSError:
+        return None
+    cached = _sway_socket_cache
+    if cached is not None and cached[0] == runtime and cached[1] == mtime_ns:
+        return cached[2]
     try:
         candidates = sorted(
             (p for p in root.glob("sway-ipc.*.sock") if p.exists()),
@@ -256,61 +202,351 @@ def _detect_sway_socket() -> str | None:
         )
     except OSError:
         return None
+    found: str | None = None
     for p in candidates:
         try:
             if p.is_socket():
-                return str(p)
+                found = str(p)
+                break
         except OSError:
             continue
-    return None
+    _sway_socket_cache = (runtime, mtime_ns, found)
+    return found
 
 
-def _swaymsg(sock: str, argv: list[str]) -> subprocess.CompletedProcess[str]:
-    env = dict(os.environ)
-    env["SWAYSOCK"] = sock
-    return subprocess.run(["swaymsg", *argv], check=False, capture_output=True, text=True, env=env)
+_I3_IPC_MAGIC = b"i3-ipc"
+_I3_IPC_HEADER = struct.Struct("=6sII")  # magic, payload length, message type (native endian)
+IPC_RUN_COMMAND = 0
+IPC_SUBSCRIBE = 2
+IPC_GET_OUTPUTS = 3
+IPC_GET_INPUTS = 100
+IPC_EVENT_OUTPUT = 0x80000001
+IPC_EVENT_SHUTDOWN = 0x80000006
+IPC_EVENT_INPUT = 0x80000015
 
 
-def _sway_outputs(sock: str) -> list[dict[str, Any]] | None:
-    proc = _swaymsg(sock, ["-t", "get_outputs", "-r"])
-    if proc.returncode != 0:
+class SwayIPC:
+    """
+    Minimal i3/sway IPC client that keeps one connection to SWAYSOCK open.
+
+    This replaces spawning `swaymsg` for every query/command. The connection is
+    (re)opened lazily and whenever `_detect_sway_socket()` resolves a different
+    socket path; any I/O error drops it so the next request reconnects.
+    """
+
+    def __init__(self, *, timeout_s: float = 2.0) -> None:
+        self.path: str | None = None
+        self.sock: socket.socket | None = None
+        self.timeout_s = float(timeout_s)
+
+    def use(self, path: str | None) -> None:
+        if path != self.path:
+            self.close()
+            self.path = path
+
+    def close(self) -> None:
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+
+    def _connect(self) -> socket.socket:
+        if self.sock is not None:
+            return self.sock
+        if not self.path:
+            raise OSError("no SWAYSOCK")
+        s = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | getattr(socket, "SOCK_CLOEXEC", 0))
+        s.settimeout(self.timeout_s)
+        try:
+            s.connect(self.path)
+        except OSError:
+            s.close()
+            raise
+        self.sock = s
+        return s
+
+    def _recv_exact(self, n: int) -> bytes:
+        assert self.sock is not None
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = self.sock.recv(n - len(buf))
+            if not chunk:
+                raise ConnectionError("sway IPC connection closed")
+            buf += chunk
+        return bytes(buf)
+
+    def _roundtrip(self, msg_type: int, payload: bytes) -> bytes:
+        s = self._connect()
+        s.sendall(_I3_IPC_HEADER.pack(_I3_IPC_MAGIC, len(payload), msg_type) + payload)
+        magic, length, reply_type = _I3_IPC_HEADER.unpack(self._recv_exact(_I3_IPC_HEADER.size))
+        if magic != _I3_IPC_MAGIC:
+            raise ConnectionError("bad sway IPC magic")
+        body = self._recv_exact(length)
+        if reply_type != msg_type:
+            raise ConnectionError(f"unexpected sway IPC reply type {reply_type} (wanted {msg_type})")
+        return body
+
+    def request(self, msg_type: int, payload: str = "") -> Any:
+        """
+        Send one message and return the decoded JSON reply (None on failure).
+
+        Retries once on a fresh connection so a restarted compositor (same
+        socket path) or an idle disconnect doesn't cost a poll interval.
+        """
+
+        data = payload.encode("utf-8")
+        for attempt in range(2):
+            try:
+                body = self._roundtrip(msg_type, data)
+            except (OSError, ConnectionError) as exc:
+                self.close()
+                if attempt == 0 and self.path:
+                    continue
+                _log("sway_ipc_error", path=self.path, msg_type=msg_type, error=f"{type(exc).__name__}: {exc}")
+                return None
+            try:
+                return json.loads(body.decode("utf-8", errors="replace"))
+            except json.JSONDecodeError:
+                return None
         return None
-    try:
-        data = json.loads(proc.stdout)
-    except json.JSONDecodeError:
+
+    def fileno(self) -> int | None:
+        return self.sock.fileno() if self.sock is not None else None
+
+    def subscribe(self, events: list[str]) -> bool:
+        """
+        Turn this connection into an event stream (see `read_event`).
+
+        A subscribed connection must not be used for requests afterwards.
+        """
+
+        try:
+            body = self._roundtrip(IPC_SUBSCRIBE, json.dumps(events).encode("utf-8"))
+            reply = json.loads(body.decode("utf-8", errors="replace"))
+        except (OSError, ConnectionError, json.JSONDecodeError) as exc:
+            self.close()
+            _log("sway_ipc_subscribe_failed", path=self.path, events=events, error=f"{type(exc).__name__}: {exc}")
+            return False
+        if not (isinstance(reply, dict) and reply.get("success")):
+            self.close()
+            return False
+        return True
+
+    def read_event(self) -> tuple[int, Any]:
+        """
+        Read one event from a subscribed connection (blocks up to timeout_s).
+
+        Raises OSError/ConnectionError when the stream breaks.
+        """
+
+        if self.sock is None:
+            raise ConnectionError("sway IPC event stream not connected")
+        magic, length, msg_type = _I3_IPC_HEADER.unpack(self._recv_exact(_I3_IPC_HEADER.size))
+        if magic != _I3_IPC_MAGIC:
+            raise ConnectionError("bad sway IPC magic")
+        body = self._recv_exact(length)
+        try:
+            return msg_type, json.loads(body.decode("utf-8", errors="replace"))
+        except json.JSONDecodeError:
+            return msg_type, None
+
+    def command(self, argv: list[str]) -> tuple[bool, str]:
+        """
+        Run a sway command (like `swaymsg <argv...>`); returns (ok, error).
+        """
+
+        reply = self.request(IPC_RUN_COMMAND, " ".join(_sway_quote(a) for a in argv))
+        if not isinstance(reply, list):
+            return False, "sway IPC command failed (no reply)"
+        errs = [
+            str(r.get("error") or "command failed")
+            for r in reply
+            if isinstance(r, dict) and not r.get("success", False)
+        ]
+        if errs:
+            return False, "; ".join(errs)
+        return True, ""
+
+
+def _sway_quote(arg: str) -> str:
+    arg = str(arg)
+    if arg and not any(c.isspace() or c in "\"';," for c in arg):
+        return arg
+    return '"' + arg.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+@dataclass(frozen=True)
+class SwayOutput:
+    name: str
+    transform: str | None
+    current_mode: tuple[int, int] | None
+    active: bool
+
+    @classmethod
+    def from_json(cls, o: dict[str, Any]) -> SwayOutput | None:
+        name = o.get("name")
+        if not (isinstance(name, str) and name):
+            return None
+        t = o.get("transform")
+        transform = t if isinstance(t, str) and t else (str(int(t)) if isinstance(t, int) else None)
+        mode: tuple[int, int] | None = None
+        cm = o.get("current_mode")
+        if isinstance(cm, dict):
+            w = cm.get("width")
+            h = cm.get("height")
+            if isinstance(w, int) and isinstance(h, int) and w > 0 and h > 0:
+                mode = (int(w), int(h))
+        return cls(name=name, transform=transform, current_mode=mode, active=bool(o.get("active")))
+
+
+@dataclass(frozen=True)
+class SwayInput:
+    identifier: str
+    vendor: int | None
+    product: int | None
+    type: str | None
+
+    @classmethod
+    def from_json(cls, i: dict[str, Any]) -> SwayInput | None:
+        ident = i.get("identifier")
+        if not (isinstance(ident, str) and ident):
+            return None
+        vendor = i.get("vendor")
+        product = i.get("product")
+        typ = i.get("type")
+        return cls(
+            identifier=ident,
+            vendor=vendor if isinstance(vendor, int) else None,
+            product=product if isinstance(product, int) else None,
+            type=typ if isinstance(typ, str) else None,
+        )
+
+
+def _sway_outputs(ipc: SwayIPC) -> list[SwayOutput] | None:
+    data = ipc.request(IPC_GET_OUTPUTS)
+    if not isinstance(data, list):
         return None
-    if isinstance(data, list):
-        return [o for o in data if isinstance(o, dict)]
-    return None
+    return [so for so in (SwayOutput.from_json(o) for o in data if isinstance(o, dict)) if so]
+
+
+def _sway_inputs(ipc: SwayIPC) -> list[SwayInput] | None:
+    data = ipc.request(IPC_GET_INPUTS)
+    if not isinstance(data, list):
+        return None
+    return [si for si in (SwayInput.from_json(i) for i in data if isinstance(i, dict)) if si]
+
+
+class SwayModel:
+    """
+    In-memory view of Sway outputs/inputs, kept current via IPC `subscribe`.
+
+    Outputs are fetched once per connection and again only after an `output`
+    event (Sway's output event carries no payload, so one get_outputs per
+    event); inputs are patched in place from `input` events. If the subscribe
+    fails we fall back to re-reading on every sync, like the old poll loop.
+    """
+
+    def __init__(self) -> None:
+        self.events = SwayIPC()
+        self.subscribed = False
+        self.outputs: list[SwayOutput] | None = None
+        self.inputs: dict[str, SwayInput] | None = None
+
+    def use(self, path: str | None) -> None:
+        if path != self.events.path:
+            self.events.use(path)
+            self.subscribed = False
+            self.outputs = None
+            self.inputs = None
+
+    def fileno(self) -> int | None:
+        return self.events.fileno() if self.subscribed else None
+
+    def _drop_stream(self) -> None:
+        self.events.close()
+        self.subscribed = False
+        self.outputs = None
+        self.inputs = None
+
+    def sync(self, ipc: SwayIPC) -> None:
+        if not self.subscribed and self.events.path:
+            self.subscribed = self.events.subscribe(["output", "input"])
+            # Stream (re)started: anything cached may have missed events.
+            self.outputs = None
+            self.inputs = None
+        if self.outputs is None or not self.subscribed:
+            self.outputs = _sway_outputs(ipc)
+
+    def get_inputs(self, ipc: SwayIPC) -> list[SwayInput] | None:
+        if self.inputs is None or not self.subscribed:
+            inputs = _sway_inputs(ipc)
+            self.inputs = {i.identifier: i for i in inputs} if inputs is not None else None
+        return list(self.inputs.values()) if self.inputs is not None else None
+
+    def handle_events(self) -> bool:
+        """
+        Drain pending events; returns True if the model changed.
+        """
+
+        changed = False
+        while self.subscribed:
+            fd = self.events.fileno()
+            if fd is None:
+                break
+            try:
+                ready, _, _ = select.select([fd], [], [], 0)
+            except (OSError, ValueError):
+                ready = []
+            if not ready:
+                break
+            try:
+                msg_type, payload = self.events.read_event()
+            except (OSError, ConnectionError):
+                self._drop_stream()
+                return True
+            if msg_type == IPC_EVENT_OUTPUT:
+                self.outputs = None
+                changed = True
+            elif msg_type == IPC_EVENT_INPUT and isinstance(payload, dict):
+                if self.inputs is None:
+                    continue
+                inp = payload.get("input")
+                si = SwayInput.from_json(inp) if isinstance(inp, dict) else None
+                if si is None:
+                    self.inputs = None
+                elif payload.get("change") == "removed":
+                    self.inputs.pop(si.identifier, None)
+                else:
+                    self.inputs[si.identifier] = si
+                changed = True
+            elif msg_type == IPC_EVENT_SHUTDOWN:
+                self._drop_stream()
+                return True
+        return changed
 
 
-def _sway_pick_output(outputs: list[dict[str, Any]], preferred: str | None) -> str | None:
+def _sway_pick_output(outputs: list[SwayOutput], preferred: str | None) -> str | None:
     if preferred:
         return preferred
-    active = [o for o in outputs if bool(o.get("active")) and isinstance(o.get("name"), str)]
+    active = [o for o in outputs if o.active]
     for o in active:
-        name = str(o.get("name") or "")
-        if name.startswith("eDP-") or name.startswith("eDP"):
-            return name
+        if o.name.startswith("eDP-") or o.name.startswith("eDP"):
+            return o.name
     if active:
-        return str(active[0].get("name") or "")
+        return active[0].name
     return None
 
 
-def _sway_output_transform(outputs: list[dict[str, Any]], output: str) -> str | None:
+def _sway_output_transform(outputs: list[SwayOutput], output: str) -> str | None:
     for o in outputs:
-        if str(o.get("name") or "") != output:
-            continue
-        t = o.get("transform")
-        if isinstance(t, str) and t:
-            return t
-        if isinstance(t, int):
-            return str(int(t))
-        return None
+        if o.name == output:
+            return o.transform
     return None
 
 
-def _sway_set_transform(sock: str, *, output: str, transform: str) -> tuple[bool, str]:
+def _sway_set_transform(ipc: SwayIPC, *, output: str, transform: str) -> tuple[bool, str]:
     allowed = {
         "normal",
         "90",
@@ -323,28 +559,15 @@ def _sway_set_transform(sock: str, *, output: str, transform: str) -> tuple[bool
     }
     if transform not in allowed:
         return False, f"invalid sway transform: {transform}"
-    proc = _swaymsg(sock, ["output", str(output), "transform", str(transform)])
-    if proc.returncode == 0:
-        return True, ""
-    msg = (proc.stderr or proc.stdout).strip() or f"swaymsg failed (rc={proc.returncode})"
-    return False, msg
+    return ipc.command(["output", str(output), "transform", str(transform)])
 
 
-def _sway_set_x1fold_halfblank(sock: str, *, output: str, desired: str, active_size: int) -> tuple[bool, str]:
+def _sway_set_x1fold_halfblank(ipc: SwayIPC, *, output: str, desired: str, active_size: int) -> tuple[bool, str]:
     if desired == "half":
         if int(active_size) <= 0:
             return False, "active_size must be > 0"
-        proc = _swaymsg(
-            sock,
-            ["output", str(output), "x1fold_halfblank", "enable", str(int(active_size))],
-        )
-    else:
-        proc = _swaymsg(sock, ["output", str(output), "x1fold_halfblank", "disable"])
-
-    if proc.returncode == 0:
-        return True, ""
-    msg = (proc.stderr or proc.stdout).strip() or f"swaymsg failed (rc={proc.returncode})"
-    return False, msg
+        return ipc.command(["output", str(output), "x1fold_halfblank", "enable", str(int(active_size))])
+    return ipc.command(["output", str(output), "x1fold_halfblank", "disable"])
 
 
 def _sway_halfblank_unsupported(err: str) -> bool:
@@ -363,31 +586,10 @@ def _sway_halfblank_unsupported(err: str) -> bool:
     return any(n in s for n in needles)
 
 
-def _sway_inputs(sock: str) -> list[dict[str, Any]] | None:
-    proc = _swaymsg(sock, ["-t", "get_inputs", "-r"])
-    if proc.returncode != 0:
-        return None
-    try:
-        data = json.loads(proc.stdout)
-    except json.JSONDecodeError:
-        return None
-    if isinstance(data, list):
-        return [i for i in data if isinstance(i, dict)]
-    return None
-
-
-def _sway_output_current_mode(outputs: list[dict[str, Any]], output: str) -> tuple[int, int] | None:
+def _sway_output_current_mode(outputs: list[SwayOutput], output: str) -> tuple[int, int] | None:
     for o in outputs:
-        if str(o.get("name") or "") != output:
-            continue
-        cm = o.get("current_mode")
-        if not isinstance(cm, dict):
-            return None
-        w = cm.get("width")
-        h = cm.get("height")
-        if isinstance(w, int) and isinstance(h, int) and w > 0 and h > 0:
-            return (int(w), int(h))
-        return None
+        if o.name == output:
+            return o.current_mode
     return None
 
 
@@ -397,45 +599,44 @@ def _fmt_frac(v: float) -> str:
 
 
 def _sway_set_input_map_from_region(
-    sock: str,
+    ipc: SwayIPC,
     *,
     identifier: str,
     p1: str,
     p2: str,
 ) -> tuple[bool, str]:
-    proc = _swaymsg(sock, ["input", str(identifier), "map_from_region", str(p1), str(p2)])
-    if proc.returncode == 0:
-        return True, ""
-    msg = (proc.stderr or proc.stdout).strip() or f"swaymsg failed (rc={proc.returncode})"
-    return False, msg
+    return ipc.command(["input", str(identifier), "map_from_region", str(p1), str(p2)])
 
 
-def _sway_set_x1fold_touch_map_from_region(sock: str, *, p1: str, p2: str) -> tuple[bool, str]:
+def _sway_set_x1fold_touch_map_from_region(
+    ipc: SwayIPC,
+    model: SwayModel,
+    *,
+    p1: str,
+    p2: str,
+) -> tuple[bool, str]:
     """
     Apply Sway's map_from_region to the X1 Fold internal touch + pen inputs.
     """
 
-    inputs = _sway_inputs(sock)
+    inputs = model.get_inputs(ipc)
     if not inputs:
         return False, "failed to read sway inputs"
 
     ids: list[str] = []
     for i in inputs:
-        ident = i.get("identifier")
-        if not (isinstance(ident, str) and ident):
-            continue
-        if i.get("vendor") != 1386 or i.get("product") != 21178:
+        if i.vendor != 1386 or i.product != 21178:
             continue
-        if i.get("type") not in {"touch", "tablet_tool"}:
+        if i.type not in {"touch", "tablet_tool"}:
             continue
-        ids.append(ident)
+        ids.append(i.identifier)
 
     if not ids:
         return False, "no matching x1fold touch inputs"
 
     errs: list[str] = []
     for ident in ids:
-        ok, err = _sway_set_input_map_from_region(sock, identifier=ident, p1=p1, p2=p2)
+        ok, err = _sway_set_input_map_from_region(ipc, identifier=ident, p1=p1, p2=p2)
         if not ok:
             errs.append(f"{ident}: {err}")
 
@@ -490,6 +691,9 @@ def _xinput_map_to_output(display: str, dev_id: int, output: str) -> tuple[bool,
 def _x11_pick_output(display: str, preferred: str | None) -> str | None:
     if preferred:
         return preferred
+    rr = _x11_randr(display)
+    if rr is not None:
+        return rr.pick_output(None)
     proc = _xrandr(display, ["--query"])
     if proc.returncode != 0:
         return None
@@ -506,6 +710,9 @@ def _x11_pick_output(display: str, preferred: str | None) -> str | None:
 
 
 def _x11_current_mode(display: str, output: str) -> tuple[int, int] | None:
+    rr = _x11_randr(display)
+    if rr is not None:
+        return rr.current_mode(output)
     proc = _xrandr(display, ["--query"])
     if proc.returncode != 0:
         return None
@@ -523,6 +730,9 @@ def _x11_current_mode(display: str, output: str) -> tuple[int, int] | None:
 
 
 def _x11_set_fb(display: str, w: int, h: int) -> tuple[bool, str]:
+    rr = _x11_randr(display)
+    if rr is not None:
+        return rr.set_screen_size(w, h)
     proc = _xrandr(display, ["--fb", f"{int(w)}x{int(h)}"])
     if proc.returncode == 0:
         return True, ""
@@ -546,6 +756,9 @@ def _x11_monitor_geometry(display: str, output: str) -> tuple[int, int, int, int
 
 
 def _x11_del_monitor(display: str, *, name: str) -> tuple[bool, str]:
+    rr = _x11_randr(display)
+    if rr is not None:
+        return rr.delete_monitor(name)
     proc = _xrandr(display, ["--delmonitor", name])
     if proc.returncode == 0:
         return True, ""
@@ -565,6 +778,9 @@ def _x11_set_monitor_rect(
     w: int,
     h: int,
 ) -> tuple[bool, str]:
+    rr = _x11_randr(display)
+    if rr is not None:
+        return rr.set_monitor(name, output=output, x=x, y=y, w=w, h=h)
     _x11_del_monitor(display, name=name)
     geom = _x11_monitor_geometry(display, output)
     if not geom:
@@ -590,46 +806,288 @@ def _x11_set_monitor_rect(
     return True, ""
 
 
-class X11Blanker:
+def _pidfd_open(pid: int) -> int | None:
+    fn = getattr(os, "pidfd_open", None)
+    if fn is None:
+        return None
+    try:
+        return int(fn(pid))
+    except OSError:
+        return None
+
+
+class _ExitWatch:
+    """
+    pidfd for a blank helper, so the main loop can block and still notice the
+    helper exiting (the fd becomes readable when the child dies).
+    """
+
+    def __init__(self) -> None:
+        self.pidfd: int | None = None
+
+    def watch(self, proc: subprocess.Popen[str]) -> None:
+        self.unwatch()
+        self.pidfd = _pidfd_open(proc.pid)
+
+    def unwatch(self) -> None:
+        if self.pidfd is not None:
+            try:
+                os.close(self.pidfd)
+            except OSError:
+                pass
+        self.pidfd = None
+
+
+class _BlankHelper:
+    """
+    One long-lived blank helper process driven over its --control channel.
+
+    The helper prints "ready" once its window/surface is up and answers each
+    stdin command ("size PX", "side SIDE", "show", "hide") with a single
+    "configured ..." or "error ..." line, so a geometry change is a pipe
+    round-trip instead of a respawn, and startup waits for the helper to say
+    it is up rather than sleeping a fixed 200ms. Helpers built before the
+    control channel reject --control with a usage error; we then fall back to
+    respawn-per-change for the rest of the session.
+
+    With visible=False (--prewarm-blanker in full mode) the helper is started
+    with --hidden, or told to "hide", and kept connected: the X11 window is
+    unmapped and the layer surface has no buffer attached, so it neither draws
+    nor reserves space. Entering half mode is then one "show" round-trip; the
+    log carries both that latency and the last cold start (spawn_s). At most
+    one helper per backend is ever kept alive.
+    """
+
+    label = "blank helper"
+    ready_timeout_s = 1.0
+    reply_timeout_s = 1.0
+
     def __init__(self) -> None:
         self.proc: subprocess.Popen[str] | None = None
-        self.key: tuple[str, str, int, str] | None = None  # (helper, display, active_size, side)
+        self.key: tuple[str, ...] | None = None  # spawn key; geometry is reconfigured in place
+        self.active_size: int | None = None
+        self.side: str | None = None
+        self.visible: bool | None = None
+        self.control = True
+        self.spawn_s: float | None = None  # last spawn -> "ready" latency
+        self.ready_reply: str | None = None  # e.g. "ready side=bottom active=1240 visible=1 buffer=single-pixel"
+        self.exit_watch = _ExitWatch()
+        self._buf = b""
+        self._eof = False
+
+    def _argv(self, helper: str, active_size: int, side: str, name: str) -> list[str]:
+        raise NotImplementedError
 
-    def ensure(self, *, helper: str, display: str, active_size: int, side: str, name: str) -> tuple[bool, str]:
-        key = (helper, display, int(active_size), str(side))
-        if self.proc and self.proc.poll() is None and self.key == key:
-            return True, ""
+    def running(self) -> bool:
+        return bool(self.proc and self.proc.poll() is None)
+
+    def shown(self) -> bool:
+        """
+        True if a helper is up and blanking (legacy helpers are always shown).
+        """
+
+        return self.running() and self.visible is not False
+
+    def _ensure(
+        self,
+        key: tuple[str, ...],
+        *,
+        helper: str,
+        active_size: int,
+        side: str,
+        name: str,
+        visible: bool,
+    ) -> tuple[bool, str]:
+        active_size = int(active_size)
+        side = str(side)
+        if self.running() and self.key == key:
+            if self.active_size == active_size and self.side == side and self.visible == visible:
+                return True, ""
+            if self.control:
+                was_visible = self.visible
+                t0 = time.monotonic()
+                res = self._reconfigure(active_size, side, visible)
+                if res is not None:
+                    ok, err = res
+                    _log(
+                        "blank_helper_reconfigured",
+                        helper=helper,
+                        active_size=active_size,
+                        side=side,
+                        visible=visible,
+                        was_visible=was_visible,
+                        ok=ok,
+                        error=err or None,
+                        elapsed_s=round(time.monotonic() - t0, 4),
+                        spawn_s=self.spawn_s,
+                    )
+                    return ok, err
         self.stop()
+        if not visible and not self.control:
+            # An old helper cannot start hidden; standby is simply "not running".
+            return True, ""
+        t0 = time.monotonic()
+        ok, err = self._spawn(key, helper=helper, active_size=active_size, side=side, name=name, visible=visible)
+        if ok and self.proc is not None:
+            self.spawn_s = round(time.monotonic() - t0, 4)
+            _log(
+                "blank_helper_started",
+                helper=helper,
+                active_size=active_size,
+                side=side,
+                visible=visible,
+                control=self.control,
+                reply=self.ready_reply if self.control else None,
+                elapsed_s=self.spawn_s,
+            )
+        return ok, err
+
+    def _spawn(
+        self,
+        key: tuple[str, ...],
+        *,
+        helper: str,
+        active_size: int,
+        side: str,
+        name: str,
+        visible: bool,
+    ) -> tuple[bool, str]:
+        argv = self._argv(helper, active_size, side, name)
+        if self.control:
+            argv.append("--control")
+            if not visible:
+                argv.append("--hidden")
         self.key = key
+        self.active_size = active_size
+        self.side = side
+        self.visible = visible if self.control else True
+        self._buf = b""
+        self._eof = False
         try:
             self.proc = subprocess.Popen(
-                [
-                    helper,
-                    "--display",
-                    display,
-                    "--side",
-                    str(side),
-                    "--active-size",
-                    str(int(active_size)),
-                    "--name",
-                    name,
-                ],
-                stdin=subprocess.DEVNULL,
-                stdout=subprocess.DEVNULL,
+                argv,
+                stdin=subprocess.PIPE if self.control else subprocess.DEVNULL,
+                stdout=subprocess.PIPE if self.control else subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
                 text=True,
             )
         except OSError as exc:
             return False, f"{type(exc).__name__}: {exc}"
-
-        # Give it a moment to fail fast if DISPLAY/auth is wrong.
-        time.sleep(0.2)
-        if self.proc.poll() is None:
-            return True, ""
+        self.exit_watch.watch(self.proc)
+
+        if self.control:
+            # A helper that cannot reach the display exits before "ready". One
+            # that is merely slow (e.g. the compositor is on another VT) stays
+            # alive; treat that like the old fixed sleep did and carry on.
+            line = self._read_line(self.ready_timeout_s)
+            self.ready_reply = line
+            if line is not None and not line.startswith("ready"):
+                _log("blank_helper_unexpected_reply", helper=helper, reply=line)
+            if self._eof:
+                # stdout closes a moment before the child can be reaped.
+                try:
+                    self.proc.wait(timeout=2.0)
+                except subprocess.TimeoutExpired:
+                    pass
+            if self.proc.poll() is None:
+                return True, ""
+            if self.proc.returncode == 2 and line is None:
+                err = (self.proc.stderr.read() if self.proc.stderr else "").strip()
+                if "--control" not in err:
+                    # Pre-control helper: usage error on the unknown flag.
+                    _log("blank_helper_no_control", helper=helper)
+                    self.control = False
+                    self.proc = None
+                    self.exit_watch.unwatch()
+                    if not visible:
+                        self.key = None
+                        return True, ""
+                    return self._spawn(key, helper=helper, active_size=active_size, side=side, name=name, visible=True)
+                return False, err or f"{self.label} exited rc=2"
+        else:
+            # Give it a moment to fail fast if the display/auth is wrong.
+            time.sleep(0.2)
+            if self.proc.poll() is None:
+                return True, ""
         err = (self.proc.stderr.read() if self.proc.stderr else "").strip()
-        return False, err or f"blank helper exited rc={self.proc.returncode}"
+        return False, err or f"{self.label} exited rc={self.proc.returncode}"
+
+    def _reconfigure(self, active_size: int, side: str, visible: bool) -> tuple[bool, str] | None:
+        """
+        Push a new side/size/visibility to the running helper. Returns None
+        when the control channel itself failed, so the caller respawns instead.
+        """
+
+        cmds: list[str] = []
+        if self.visible and not visible:
+            cmds.append("hide")
+        if self.side != side:
+            cmds.append(f"side {side}")
+        if self.active_size != active_size:
+            cmds.append(f"size {active_size}")
+        if visible and not self.visible:
+            cmds.append("show")
+        for cmd in cmds:
+            reply = self._command(cmd)
+            if reply is None:
+                return None
+            if reply.startswith("error"):
+                return False, reply[len("error") :].strip() or f"{self.label} rejected {cmd!r}"
+            if cmd.startswith("side"):
+                self.side = side
+            elif cmd.startswith("size"):
+                self.active_size = active_size
+            else:
+                self.visible = cmd == "show"
+        return True, ""
+
+    def _command(self, cmd: str) -> str | None:
+        if not self.proc or self.proc.stdin is None or self.proc.poll() is not None:
+            return None
+        try:
+            os.write(self.proc.stdin.fileno(), (cmd + "\n").encode())
+        except OSError:
+            return None
+        while True:
+            line = self._read_line(self.reply_timeout_s)
+            if line is None:
+                return None
+            # A late "ready" from a slow startup precedes the real reply.
+            if not line.startswith("ready"):
+                return line
+
+    def _read_line(self, timeout_s: float) -> str | None:
+        if not self.proc or self.proc.stdout is None:
+            return None
+        fd = self.proc.stdout.fileno()
+        deadline = time.monotonic() + max(0.0, float(timeout_s))
+        while b"\n" not in self._buf:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                readable, _, _ = select.select([fd], [], [], remaining)
+            except InterruptedError:
+                continue
+            if not readable:
+                return None
+            try:
+                chunk = os.read(fd, 4096)
+            except OSError:
+                return None
+            if not chunk:
+                self._eof = True
+                return None
+            self._buf += chunk
+        line, self._buf = self._buf.split(b"\n", 1)
+        return line.decode("utf-8", "replace").strip()
 
     def stop(self) -> None:
+        self.exit_watch.unwatch()
+        self.active_size = None
+        self.side = None
+        self.visible = None
+        self._buf = b""
         if not self.proc:
             return
         if self.proc.poll() is not None:
@@ -646,58 +1104,180 @@ class X11Blanker:
         self.key = None
 
 
-class WaylandBlanker:
+class X11Blanker(_BlankHelper):
+    label = "blank helper"
+
     def __init__(self) -> None:
-        self.proc: subprocess.Popen[str] | None = None
-        self.key: tuple[str, int, str] | None = None  # (helper, active_size, side)
+        super().__init__()
+        self.display = ""
+
+    def _argv(self, helper: str, active_size: int, side: str, name: str) -> list[str]:
+        return [
+            helper,
+            "--display",
+            self.display,
+            "--side",
+            str(side),
+            "--active-size",
+            str(int(active_size)),
+            "--name",
+            name,
+        ]
+
+    def ensure(
+        self,
+        *,
+        helper: str,
+        display: str,
+        active_size: int,
+        side: str,
+        name: str,
+        visible: bool = True,
+    ) -> tuple[bool, str]:
+        self.display = display
+        return self._ensure(
+            (helper, display), helper=helper, active_size=active_size, side=side, name=name, visible=visible
+        )
 
-    def ensure(self, *, helper: str, active_size: int, side: str, name: str) -> tuple[bool, str]:
-        key = (str(helper), int(active_size), str(side))
-        if self.proc and self.proc.poll() is None and self.key == key:
-            return True, ""
-        self.stop()
-        self.key = key
-        try:
-            self.proc = subprocess.Popen(
-                [
-                    helper,
-                    "--side",
-                    str(side),
-                    "--active-size",
-                    str(int(active_size)),
-                    "--name",
-                    str(name),
-                ],
-                stdin=subprocess.DEVNULL,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.PIPE,
-                text=True,
+
+class WaylandBlanker(_BlankHelper):
+    label = "wayland blank helper"
+
+    def _argv(self, helper: str, active_size: int, side: str, name: str) -> list[str]:
+        return [
+            helper,
+            "--side",
+            str(side),
+            "--active-size",
+            str(int(active_size)),
+            "--name",
+            str(name),
+        ]
+
+    def ensure(
+        self,
+        *,
+        helper: str,
+        active_size: int,
+        side: str,
+        name: str,
+        visible: bool = True,
+    ) -> tuple[bool, str]:
+        return self._ensure(
+            (str(helper),), helper=helper, active_size=active_size, side=side, name=name, visible=visible
+        )
+
+
+# --- state.json change notification (inotify) --------------------------------
+
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_INOTIFY_EVENT = struct.Struct("iIII")  # wd, mask, cookie, len (name follows)
+
+
+class StateFileWatcher:
+    """
+    Watch the state file's directory with inotify so we only re-read state.json
+    when the daemon replaces it.
+
+    x1fold_halfblankd.py writes the file via mkstemp + os.replace(), which shows
+    up as IN_MOVED_TO for the final name (IN_CLOSE_WRITE covers editors/tools
+    writing in place). If inotify is unavailable or the directory does not
+    exist yet, `active` stays False and the caller keeps polling.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.fd: int | None = None
+        self.wd: int | None = None
+        self.failed = False
+
+    @property
+    def active(self) -> bool:
+        return self.fd is not None and self.wd is not None
+
+    def fileno(self) -> int | None:
+        return self.fd if self.active else None
+
+    def start(self) -> bool:
+        """
+        Try to (re)establish the watch; returns True if it became active.
+        """
+
+        if self.active or self.failed:
+            return False
+        if self.fd is None:
+            try:
+                libc = ctypes.CDLL(None, use_errno=True)
+                fd = int(libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC))
+            except (OSError, AttributeError):
+                fd = -1
+            if fd < 0:
+                self.failed = True
+                return False
+            self.fd = fd
+            self._libc = libc
+        wd = int(
+            self._libc.inotify_add_watch(
+                self.fd,
+                os.fsencode(str(self.path.parent)),
+                IN_CLOSE_WRITE | IN_MOVED_TO | IN_DELETE_SELF | IN_MOVE_SELF,
             )
-        except OSError as exc:
-            return False, f"{type(exc).__name__}: {exc}"
+        )
+        if wd < 0:
+            # Typically ENOENT until the daemon creates /run/x1fold-halfblank.
+            return False
+        self.wd = wd
+        return True
 
-        # Give it a moment to fail fast if WAYLAND_DISPLAY/auth is wrong.
-        time.sleep(0.2)
-        if self.proc.poll() is None:
-            return True, ""
-        err = (self.proc.stderr.read() if self.proc.stderr else "").strip()
-        return False, err or f"wayland blank helper exited rc={self.proc.returncode}"
+    def drain(self) -> bool:
+        """
+        Consume pending events; returns True if the state file may have changed.
+        """
 
-    def stop(self) -> None:
-        if not self.proc:
-            return
-        if self.proc.poll() is not None:
-            self.proc = None
-            self.key = None
-            return
-        self.proc.terminate()
-        try:
-            self.proc.wait(timeout=2.0)
-        except subprocess.TimeoutExpired:
-            self.proc.kill()
-            self.proc.wait(timeout=2.0)
-        self.proc = None
-        self.key = None
+        if self.fd is None:
+            return False
+        changed = False
+        name = os.fsencode(self.path.name)
+        while True:
+            try:
+                data = os.read(self.fd, 4096)
+            except BlockingIOError:
+                break
+            except OSError:
+                self.close()
+                return True
+            if not data:
+                break
+            off = 0
+            while off + _INOTIFY_EVENT.size <= len(data):
+                _, mask, _, name_len = _INOTIFY_EVENT.unpack_from(data, off)
+                ev_name = data[off + _INOTIFY_EVENT.size : off + _INOTIFY_EVENT.size + name_len].rstrip(b"\0")
+                off += _INOTIFY_EVENT.size + name_len
+                if mask & IN_Q_OVERFLOW:
+                    changed = True
+                elif mask & (IN_IGNORED | IN_DELETE_SELF | IN_MOVE_SELF):
+                    # Directory went away; fall back to polling until it returns.
+                    self.wd = None
+                    changed = True
+                elif ev_name == name and mask & (IN_CLOSE_WRITE | IN_MOVED_TO):
+                    changed = True
+        return changed
+
+    def close(self) -> None:
+        if self.fd is not None:
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+        self.fd = None
+        self.wd = None
 
 
 def _read_state(path: Path) -> dict[str, Any] | None:
@@ -731,6 +1311,7 @@ def _apply_x11(
     name: str,
     monitor_name: str,
     setmonitor: bool,
+    standby: bool = False,
 ) -> tuple[bool, str]:
     mode = _x11_current_mode(display, output)
     if mode:
@@ -756,6 +1337,10 @@ def _apply_x11(
         ok, err = _x11_del_monitor(display, name=monitor_name)
         if not ok:
             _log("x11_delmonitor_failed", display=display, output=output, monitor=monitor_name, error=err)
+    if standby:
+        return blanker.ensure(
+            helper=helper, display=display, active_size=active_size, side="bottom", name=name, visible=False
+        )
     blanker.stop()
     return True, ""
 
@@ -767,9 +1352,12 @@ def _apply_wayland(
     helper: str,
     active_size: int,
     name: str,
+    standby: bool = False,
 ) -> tuple[bool, str]:
     if desired == "half":
         return blanker.ensure(helper=helper, active_size=active_size, side="bottom", name=name)
+    if standby:
+        return blanker.ensure(helper=helper, active_size=active_size, side="bottom", name=name, visible=False)
     blanker.stop()
     return True, ""
 
@@ -793,7 +1381,7 @@ def main(argv: list[str]) -> int:
         "--x11-auto-rotate-interval-s",
         type=float,
         default=0.5,
-        help="Polling interval for iio-sensor-proxy orientation (default: 0.5).",
+        help="Re-evaluate the iio-sensor-proxy orientation at least this often; changes are also pushed over D-Bus (default: 0.5).",
     )
     p.add_argument(
         "--x11-auto-rotate-min-apply-s",
@@ -812,6 +1400,33 @@ def main(argv: list[str]) -> int:
         action="store_true",
         help="Force XRandR rotation to 'normal' while halfblank is active (default: off).",
     )
+    p.add_argument(
+        "--sensor-backend",
+        choices=["sensorproxy", "iio"],
+        default="sensorproxy",
+        help=(
+            "Orientation source for auto-rotate: iio-sensor-proxy over D-Bus, or the IIO accelerometer "
+            "directly (buffered /dev/iio:deviceN when possible, else raw sysfs) (default: sensorproxy)."
+        ),
+    )
+    p.add_argument(
+        "--iio-threshold-deg",
+        type=float,
+        default=35.0,
+        help="iio backend: tilt needed to enter an orientation (default: 35, as iio-sensor-proxy).",
+    )
+    p.add_argument(
+        "--iio-hysteresis-deg",
+        type=float,
+        default=10.0,
+        help="iio backend: stay in the current orientation until its tilt drops this far below the threshold (default: 10).",
+    )
+    p.add_argument(
+        "--iio-sample-s",
+        type=float,
+        default=0.1,
+        help="iio backend, raw sysfs mode: minimum time between samples (default: 0.1).",
+    )
     p.add_argument("--sway-output", default="", help="Sway output override (default: auto pick eDP-*).")
     p.add_argument(
         "--sway-auto-rotate",
@@ -822,7 +1437,7 @@ def main(argv: list[str]) -> int:
         "--sway-auto-rotate-interval-s",
         type=float,
         default=0.5,
-        help="Polling interval for iio-sensor-proxy orientation (default: 0.5).",
+        help="Re-evaluate the iio-sensor-proxy orientation at least this often; changes are also pushed over D-Bus (default: 0.5).",
     )
     p.add_argument(
         "--sway-auto-rotate-min-apply-s",
@@ -901,7 +1516,28 @@ def main(argv: list[str]) -> int:
         default="X1FOLD_HALFBLANK",
         help="Namespace/name passed to the Wayland blank helper (default: X1FOLD_HALFBLANK).",
     )
+    p.add_argument(
+        "--prewarm-blanker",
+        action="store_true",
+        help=(
+            "Keep the X11/layer-shell blank helper running but hidden while in full mode, so entering half mode "
+            "is a single show round-trip instead of a helper start (logged as blank_helper_reconfigured)."
+        ),
+    )
     p.add_argument("--no-wayland", action="store_true", help="Force X11 behavior even if XDG_SESSION_TYPE=wayland.")
+    p.add_argument(
+        "--state-socket",
+        default="/run/x1fold-halfblank/state.sock",
+        help=(
+            "x1fold_halfblankd state stream socket; used instead of re-reading --state-file when reachable "
+            "(empty disables; default: /run/x1fold-halfblank/state.sock)."
+        ),
+    )
+    p.add_argument(
+        "--no-inotify",
+        action="store_true",
+        help="Poll --state-file every --interval-s instead of waiting for inotify events.",
+    )
     p.add_argument("--once", action="store_true", help="Apply once and exit (useful with systemd .path units).")
     args = p.parse_args(argv)
 
@@ -917,18 +1553,146 @@ def main(argv: list[str]) -> int:
     last_key: tuple[object, ...] = ()
     x11_blanker = X11Blanker()
     wl_blanker = WaylandBlanker()
+    prewarm = bool(args.prewarm_blanker)
     last_sensor_check = 0.0
+    last_sensor_error: str | None = None
     last_sensor_orientation: str | None = None
     last_sensor_orientation_change = 0.0
     last_x11_rotate_apply = 0.0
     last_sway_rotate_apply = 0.0
     sway_halfblank_supported: bool | None = None
     last_sway_sock: str | None = None
-    sensor_claim = SensorClaim()
-    sensor_claim_enabled = False
+    sway_ipc = SwayIPC()
+    sway_model = SwayModel()
+
+    state_watch = StateFileWatcher(args.state_file)
+    if args.no_inotify:
+        state_watch.failed = True
+    state_dirty = True
+    state_stream = StateStreamClient(Path(args.state_socket)) if args.state_socket else None
+    stream_state: dict[str, Any] | None = None
+    want_sensor = False
+    sensor: SensorProxy | IIOAccel
+    if args.sensor_backend == "iio":
+        sensor = IIOAccel(
+            threshold_deg=args.iio_threshold_deg,
+            hysteresis_deg=args.iio_hysteresis_deg,
+            sample_s=args.iio_sample_s,
+        )
+    else:
+        sensor = SensorProxy()
+    sensor_changed = False
+    # A sensor rotation is being held back (rate limit / stability window),
+    # so we need a timed wakeup rather than waiting for the next event.
+    sensor_pending = False
+    # X11 session: RandR connection with change events selected, so geometry
+    # is re-read only after an event (None until the X11 path first runs).
+    x11_rr: XRandR | None = None
+
+    def _state_pushed() -> bool:
+        return state_stream is not None and state_stream.connected()
+
+    def _idle_ok() -> bool:
+        """
+        True if every input we care about can wake select(), so waiting
+        without a timeout cannot miss anything.
+        """
+
+        if not (state_watch.active or _state_pushed()):
+            return False
+        if sway_model.fileno() is None and not (x11_rr is not None and x11_rr.subscribed):
+            return False
+        if want_sensor and (not sensor.connected() or sensor_pending):
+            return False
+        for blanker in (x11_blanker, wl_blanker):
+            if blanker.proc and blanker.proc.poll() is None and blanker.exit_watch.pidfd is None:
+                return False
+        return True
 
+    def _wait(timeout_s: float, *, idle: bool = False) -> None:
+        """
+        Sleep until the next poll, waking early on state.json replacement,
+        Sway output/input events, RandR changes, an orientation change, or a
+        blank helper exiting. With idle=True
+        (steady state, nothing left to retry) block until one of those fires.
+        """
+
+        nonlocal state_dirty, stream_state, sensor_changed
+        fds: list[int] = []
+        sway_fd = sway_model.fileno()
+        if sway_fd is not None:
+            fds.append(sway_fd)
+        stream_fd = state_stream.fileno() if state_stream is not None else None
+        if stream_fd is not None:
+            fds.append(stream_fd)
+        watch_fd = state_watch.fileno()
+        if watch_fd is not None:
+            fds.append(watch_fd)
+        sensor_fd = sensor.fileno()
+        if sensor_fd is not None:
+            fds.append(sensor_fd)
+        x11_fd = x11_rr.fileno() if x11_rr is not None and x11_rr.subscribed else None
+        if x11_fd is not None:
+            fds.append(x11_fd)
+        exit_fds: dict[int, _ExitWatch] = {}
+        for blanker in (x11_blanker, wl_blanker):
+            pidfd = blanker.exit_watch.pidfd
+            if pidfd is not None:
+                exit_fds[pidfd] = blanker.exit_watch
+                fds.append(pidfd)
+        timeout: float | None = None if (idle and _idle_ok()) else max(0.0, float(timeout_s))
+        if not fds:
+            time.sleep(timeout_s)
+            return
+        try:
+            ready, _, _ = select.select(fds, [], [], timeout)
+        except InterruptedError:
+            return
+        if sway_fd is not None and sway_fd in ready:
+            sway_model.handle_events()
+        if x11_fd is not None and x11_fd in ready and x11_rr is not None:
+            x11_rr.handle_events()
+        if sensor_fd is not None and sensor_fd in ready and sensor.handle_events():
+            sensor_changed = True
+        if stream_fd is not None and stream_fd in ready and state_stream is not None:
+            msgs = state_stream.read()
+            if msgs:
+                # Only the latest transition matters for geometry.
+                stream_state = msgs[-1]
+            if not state_stream.connected():
+                _log("state_stream", path=str(args.state_socket), connected=False)
+                state_dirty = True
+        if watch_fd is not None and watch_fd in ready and state_watch.drain() and not _state_pushed():
+            state_dirty = True
+        for fd, watch in exit_fds.items():
+            if fd in ready:
+                # Helper exited; the next loop notices proc.poll() and restarts it.
+                watch.unwatch()
+
+    st: dict[str, Any] | None = None
+    state_rev: object = None
     while True:
-        st = _read_state(args.state_file)
+        if not state_watch.active and state_watch.start():
+            _log("state_watch", path=str(args.state_file), method="inotify")
+            state_dirty = True
+        if state_stream is not None and not state_stream.connected() and state_stream.connect():
+            _log("state_stream", path=str(args.state_socket), connected=True, since=state_stream.seq)
+        if stream_state is not None:
+            st = stream_state
+            stream_state = None
+            state_rev = (st.get("stream"), st.get("seq"))
+        elif state_dirty or not (state_watch.active or _state_pushed()):
+            state_dirty = False
+            st = _read_state(args.state_file)
+            if st and isinstance(st.get("seq"), int):
+                # Snapshot written by a daemon that also streams; seq is exact
+                # where mtime granularity could hide back-to-back writes.
+                state_rev = (st.get("stream"), st.get("seq"))
+            else:
+                try:
+                    state_rev = args.state_file.stat().st_mtime
+                except OSError:
+                    state_rev = None
         desired = _desired_mode(st) if st else "full"
         docked: int | None = None
         if st and isinstance(st.get("dock"), dict):
@@ -936,19 +1700,14 @@ def main(argv: list[str]) -> int:
             if isinstance(d.get("docked"), int):
                 docked = int(d.get("docked"))
 
-        try:
-            mtime = args.state_file.stat().st_mtime
-        except OSError:
-            mtime = None
-
-        x11_blanker_running = bool(x11_blanker.proc and x11_blanker.proc.poll() is None)
-        wl_blanker_running = bool(wl_blanker.proc and wl_blanker.proc.poll() is None)
+        x11_blanker_running = x11_blanker.running()
+        wl_blanker_running = wl_blanker.running()
 
         if desired not in {"half", "full"}:
             _log("no_desired_mode", desired=desired)
             if args.once:
                 return 0
-            time.sleep(args.interval_s)
+            _wait(args.interval_s)
             continue
 
         use_wayland = _is_wayland_session() and not bool(args.no_wayland)
@@ -961,23 +1720,17 @@ def main(argv: list[str]) -> int:
             )
         )
         if want_sensor:
-            if not sensor_claim_enabled:
-                sensor_claim_enabled = True
-                _sensorproxy_claim()
-                started = sensor_claim.start()
-                _log(
-                    "sensor_claim_enabled",
-                    started=bool(started),
-                    running=bool(sensor_claim.running()),
-                )
-            elif not sensor_claim.running():
-                started = sensor_claim.start()
-                if started:
-                    _log("sensor_claim_restarted", running=bool(sensor_claim.running()))
-        elif sensor_claim_enabled:
-            sensor_claim_enabled = False
-            stopped = sensor_claim.stop()
+            if sensor.start():
+                _log("sensor_claim_enabled", backend=args.sensor_backend, mode=sensor.mode, orientation=sensor.orientation, note=sensor.error)
+                sensor_changed = True
+            elif not sensor.claimed and sensor.error and sensor.error != last_sensor_error:
+                _log("sensor_claim_failed", error=sensor.error)
+            last_sensor_error = sensor.error
+        elif sensor.active():
+            stopped = sensor.stop()
+            last_sensor_error = None
             _log("sensor_claim_disabled", stopped=bool(stopped))
+        sensor_pending = False
 
         if use_wayland:
             if x11_blanker_running:
@@ -989,7 +1742,12 @@ def main(argv: list[str]) -> int:
             if sway_sock != last_sway_sock:
                 last_sway_sock = sway_sock
                 sway_halfblank_supported = None
-            outputs = _sway_outputs(sway_sock) if sway_sock else None
+                sway_ipc.use(sway_sock)
+                sway_model.use(sway_sock)
+            outputs: list[SwayOutput] | None = None
+            if sway_sock:
+                sway_model.sync(sway_ipc)
+                outputs = sway_model.outputs
             sway_output: str | None = None
             sway_transform: str | None = None
             if outputs:
@@ -1010,9 +1768,10 @@ def main(argv: list[str]) -> int:
                     target_transform = "normal"
                     target_transform_reason = "force_normal_when_half"
                 elif sway_sock and sway_output and args.sway_auto_rotate and desired == "full" and (docked in (0, None)):
-                    if (now - last_sensor_check) >= float(args.sway_auto_rotate_interval_s):
+                    if sensor_changed or (now - last_sensor_check) >= float(args.sway_auto_rotate_interval_s):
                         last_sensor_check = now
-                        ori = _sensorproxy_orientation()
+                        sensor_changed = False
+                        ori = sensor.orientation
                         if ori:
                             if ori != last_sensor_orientation:
                                 last_sensor_orientation = ori
@@ -1037,6 +1796,7 @@ def main(argv: list[str]) -> int:
                         and min_apply_s > 0
                         and (now - last_sway_rotate_apply) < min_apply_s
                     ):
+                        sensor_pending = True
                         _log(
                             "sway_rotate_rate_limited",
                             output=sway_output,
@@ -1055,6 +1815,7 @@ def main(argv: list[str]) -> int:
                             and stable_s > 0
                             and (now - last_sensor_orientation_change) < stable_s
                         ):
+                            sensor_pending = True
                             _log(
                                 "sway_rotate_debounced",
                                 output=sway_output,
@@ -1068,7 +1829,7 @@ def main(argv: list[str]) -> int:
                             )
                         else:
                             rot_start = time.monotonic()
-                            ok, err = _sway_set_transform(sway_sock, output=sway_output, transform=target_transform)
+                            ok, err = _sway_set_transform(sway_ipc, output=sway_output, transform=target_transform)
                             rot_elapsed_s = round(time.monotonic() - rot_start, 3)
                             if ok:
                                 _log(
@@ -1110,7 +1871,7 @@ def main(argv: list[str]) -> int:
 
             key = (
                 desired,
-                mtime,
+                state_rev,
                 "wayland",
                 sway_transform,
                 halfblank_method,
@@ -1119,9 +1880,11 @@ def main(argv: list[str]) -> int:
             )
             same_key = key == last_key
             if halfblank_method == "layer_shell":
-                if same_key and desired == "half" and not wl_blanker_running:
+                if same_key and desired == "half" and not wl_blanker.shown():
+                    same_key = False
+                if same_key and desired == "full" and wl_blanker.shown():
                     same_key = False
-                if same_key and desired == "full" and wl_blanker_running:
+                if same_key and desired == "full" and prewarm and wl_blanker.control and not wl_blanker_running:
                     same_key = False
             else:
                 # When using the compositor-native crop, the layer-shell helper
@@ -1131,7 +1894,7 @@ def main(argv: list[str]) -> int:
             if same_key:
                 if args.once:
                     return 0
-                time.sleep(args.interval_s)
+                _wait(args.interval_s, idle=True)
                 continue
             last_key = key
 
@@ -1145,7 +1908,7 @@ def main(argv: list[str]) -> int:
                 else:
                     hb_start = time.monotonic()
                     ok, err = _sway_set_x1fold_halfblank(
-                        sway_sock,
+                        sway_ipc,
                         output=sway_output,
                         desired=desired,
                         active_size=int(args.active_size),
@@ -1185,7 +1948,8 @@ def main(argv: list[str]) -> int:
                                     y2 = max(0.0, min(1.0, y2))
                                     p1, p2 = f"0x{_fmt_frac(y1)}", f"1x{_fmt_frac(y2)}"
                                     tm_ok, tm_err = _sway_set_x1fold_touch_map_from_region(
-                                        sway_sock,
+                                        sway_ipc,
+                                        sway_model,
                                         p1=p1,
                                         p2=p2,
                                     )
@@ -1223,7 +1987,7 @@ def main(argv: list[str]) -> int:
                                     error="failed to read sway output current_mode",
                                 )
                         elif sway_sock:
-                            tm_ok, tm_err = _sway_set_x1fold_touch_map_from_region(sway_sock, p1="0x0", p2="1x1")
+                            tm_ok, tm_err = _sway_set_x1fold_touch_map_from_region(sway_ipc, sway_model, p1="0x0", p2="1x1")
                             if not tm_ok:
                                 _log(
                                     "sway_touch_map_reset_failed",
@@ -1243,7 +2007,7 @@ def main(argv: list[str]) -> int:
                         )
                         if args.once:
                             return 0
-                        time.sleep(args.interval_s)
+                        _wait(args.interval_s, idle=True)
                         continue
 
                     _log(
@@ -1263,7 +2027,7 @@ def main(argv: list[str]) -> int:
                         # default. Only fall back for "half".
                         if desired == "full":
                             if sway_sock:
-                                tm_ok, tm_err = _sway_set_x1fold_touch_map_from_region(sway_sock, p1="0x0", p2="1x1")
+                                tm_ok, tm_err = _sway_set_x1fold_touch_map_from_region(sway_ipc, sway_model, p1="0x0", p2="1x1")
                                 if not tm_ok:
                                     _log(
                                         "sway_touch_map_reset_failed",
@@ -1282,7 +2046,7 @@ def main(argv: list[str]) -> int:
                             )
                             if args.once:
                                 return 0
-                            time.sleep(args.interval_s)
+                            _wait(args.interval_s, idle=True)
                             continue
 
                     # Fall back to layer-shell (best-effort).
@@ -1293,7 +2057,7 @@ def main(argv: list[str]) -> int:
                 # keeps its full size; the layer-shell blanker reserves the
                 # bottom region via exclusive_zone instead.
                 ok2, err2 = _sway_set_x1fold_halfblank(
-                    sway_sock,
+                    sway_ipc,
                     output=sway_output,
                     desired="full",
                     active_size=int(args.active_size),
@@ -1313,10 +2077,11 @@ def main(argv: list[str]) -> int:
                 helper=str(args.wayland_blank_helper),
                 active_size=int(args.active_size),
                 name=str(args.wayland_blank_name),
+                standby=prewarm,
             )
             if ok:
                 if sway_sock:
-                    tm_ok, tm_err = _sway_set_x1fold_touch_map_from_region(sway_sock, p1="0x0", p2="1x1")
+                    tm_ok, tm_err = _sway_set_x1fold_touch_map_from_region(sway_ipc, sway_model, p1="0x0", p2="1x1")
                     if not tm_ok:
                         _log(
                             "sway_touch_map_reset_failed",
@@ -1329,7 +2094,7 @@ def main(argv: list[str]) -> int:
                 if halfblank_method != key[4]:
                     last_key = (
                         desired,
-                        mtime,
+                        state_rev,
                         "wayland",
                         sway_transform,
                         halfblank_method,
@@ -1348,13 +2113,13 @@ def main(argv: list[str]) -> int:
                 )
                 if args.once:
                     return 0
-                time.sleep(args.interval_s)
+                _wait(args.interval_s, idle=True)
                 continue
 
             _log("apply_failed", desired=desired, backend="wayland", docked=docked, error=err)
             if args.once:
                 return 1
-            time.sleep(args.interval_s)
+            _wait(args.interval_s)
             continue
 
         # X11 path.
@@ -1367,15 +2132,25 @@ def main(argv: list[str]) -> int:
             _log("no_x11_display", desired=desired, backend="x11")
             if args.once:
                 return 0
-            time.sleep(args.interval_s)
+            _wait(args.interval_s)
             continue
 
+        # One RandR snapshot per pass; the queries below are served from it.
+        # Once change events are selected the snapshot is only re-fetched after
+        # one arrives, so an idle pass sends no X requests at all.
+        rr = _x11_randr(x11_display)
+        if rr is not None and not rr.subscribed:
+            ok, err = rr.subscribe()
+            _log("x11_randr_events", display=x11_display, subscribed=ok, error=err or None)
+        x11_rr = rr
+        if rr is not None:
+            rr.refresh()
         output = _x11_pick_output(x11_display, args.x11_output or None)
         if not output:
             _log("x11_no_output", desired=desired, display=x11_display)
             if args.once:
                 return 1
-            time.sleep(args.interval_s)
+            _wait(args.interval_s)
             continue
 
         rotation = _x11_output_rotation(x11_display, output)
@@ -1391,9 +2166,10 @@ def main(argv: list[str]) -> int:
             target_rot = "normal"
             target_rot_reason = "force_normal_when_half"
         elif args.x11_auto_rotate and desired == "full" and (docked in (0, None)):
-            if (now - last_sensor_check) >= float(args.x11_auto_rotate_interval_s):
+            if sensor_changed or (now - last_sensor_check) >= float(args.x11_auto_rotate_interval_s):
                 last_sensor_check = now
-                ori = _sensorproxy_orientation()
+                sensor_changed = False
+                ori = sensor.orientation
                 if ori:
                     if ori != last_sensor_orientation:
                         last_sensor_orientation = ori
@@ -1410,6 +2186,7 @@ def main(argv: list[str]) -> int:
         if target_rot and target_rot != rotation:
             min_apply_s = float(args.x11_auto_rotate_min_apply_s or 0.0)
             if target_rot_reason == "sensor" and min_apply_s > 0 and (now - last_x11_rotate_apply) < min_apply_s:
+                sensor_pending = True
                 _log(
                     "x11_rotate_rate_limited",
                     display=x11_display,
@@ -1425,6 +2202,7 @@ def main(argv: list[str]) -> int:
             else:
                 stable_s = float(args.x11_auto_rotate_stable_s or 0.0)
                 if target_rot_reason == "sensor" and stable_s > 0 and (now - last_sensor_orientation_change) < stable_s:
+                    sensor_pending = True
                     _log(
                         "x11_rotate_debounced",
                         display=x11_display,
@@ -1458,6 +2236,8 @@ def main(argv: list[str]) -> int:
                         rotated = True
                         last_x11_rotate_apply = time.monotonic()
                     else:
+                        # Retry on the next timed pass rather than idling.
+                        sensor_pending = True
                         _log(
                             "x11_rotate_failed",
                             display=x11_display,
@@ -1506,20 +2286,22 @@ def main(argv: list[str]) -> int:
                     regex=str(args.x11_xinput_regex),
                 )
 
-        blanker_running = x11_blanker_running
-        key = (desired, mtime, "x11", rotation)
+        key = (desired, state_rev, "x11", rotation)
         same_key = key == last_key
-        if same_key and desired == "half" and not blanker_running:
+        if same_key and desired == "half" and not x11_blanker.shown():
+            same_key = False
+        if same_key and desired == "full" and x11_blanker.shown():
             same_key = False
-        if same_key and desired == "full" and blanker_running:
+        if same_key and desired == "full" and prewarm and x11_blanker.control and not x11_blanker_running:
             same_key = False
         if same_key:
             if args.once:
                 return 0
-            time.sleep(args.interval_s)
+            _wait(args.interval_s, idle=True)
             continue
         last_key = key
 
+        apply_start = time.monotonic()
         ok, err = _apply_x11(
             desired,
             blanker=x11_blanker,
@@ -1530,7 +2312,9 @@ def main(argv: list[str]) -> int:
             name=str(args.x11_blank_name),
             monitor_name=str(args.x11_monitor_name),
             setmonitor=not bool(args.no_x11_setmonitor),
+            standby=prewarm,
         )
+        apply_elapsed_s = round(time.monotonic() - apply_start, 4)
         if ok:
             _log(
                 "applied",
@@ -1542,6 +2326,8 @@ def main(argv: list[str]) -> int:
                 docked=docked,
                 sensor_orientation=last_sensor_orientation,
                 blank_helper=str(args.x11_blank_helper),
+                randr="native" if rr is not None and rr.connected() else "xrandr",
+                elapsed_s=apply_elapsed_s,
             )
         else:
             _log(
@@ -1560,7 +2346,7 @@ def main(argv: list[str]) -> int:
 
         if args.once:
             return 0
-        time.sleep(args.interval_s)
+        _wait(args.interval_s, idle=ok)
 
 
 if __name__ == "__main__":
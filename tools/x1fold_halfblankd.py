@@ -13,16 +13,24 @@ eventually come from a proper kernel driver, but for now we can poll via
 from __future__ import annotations
 
 import argparse
+import atexit
+import collections
 import json
 import os
+import select
 import shlex
+import shutil
 import subprocess
 import tempfile
 import time
 from dataclasses import dataclass
 from pathlib import Path
 
-from x1fold_dock import DockState, read_dock_state
+import x1fold_mode
+import x1fold_tty
+import x1fold_uevent
+from x1fold_dock import BACKENDS, DEFAULT_EVENTS_SAFETY_S, DockEvents, DockReader, DockState
+from x1fold_state_stream import StateStreamServer
 
 
 def _safe_read_text(path: Path) -> str | None:
@@ -85,6 +93,55 @@ class Commands:
     half: list[str]
     full: list[str]
     status: list[str]
+    # Parsed x1fold_mode.py argv when the command is run in-process (None = exec).
+    half_args: argparse.Namespace | None = None
+    full_args: argparse.Namespace | None = None
+    status_args: argparse.Namespace | None = None
+
+    def engines(self) -> dict[str, str]:
+        def _engine(margs: argparse.Namespace | None) -> str:
+            return "inprocess" if margs is not None else "exec"
+
+        return {
+            "half": _engine(self.half_args),
+            "full": _engine(self.full_args),
+            "status": _engine(self.status_args),
+        }
+
+
+_MODE_TOOL_NAMES = ("x1fold_mode.py", "x1fold_mode")
+
+
+def _inprocess_mode_args(cmd: list[str]) -> argparse.Namespace | None:
+    """
+    Parse `cmd` as an x1fold_mode.py invocation for in-process use.
+
+    Returns None when the command targets some other tool (or doesn't parse),
+    in which case the caller keeps exec'ing it.
+    """
+
+    if not cmd or Path(cmd[0]).name not in _MODE_TOOL_NAMES:
+        return None
+    try:
+        return x1fold_mode.parse_args(cmd[1:])
+    except SystemExit:
+        return None
+
+
+_TTY_TOOL_NAMES = ("x1fold_tty.py", "x1fold_tty")
+
+
+def _inprocess_tty_args(cmd: list[str]) -> argparse.Namespace | None:
+    """
+    Parse `cmd` as an x1fold_tty.py invocation for in-process use (None = exec).
+    """
+
+    if not cmd or Path(cmd[0]).name not in _TTY_TOOL_NAMES:
+        return None
+    try:
+        return x1fold_tty.parse_args(cmd[1:])
+    except SystemExit:
+        return None
 
 
 def _parse_cmd(value: str) -> list[str]:
@@ -104,6 +161,80 @@ def run_cmd(cmd: list[str], *, dry_run: bool, timeout_s: float | None) -> int:
         return 124
 
 
+def run_mode(
+    cmd: list[str],
+    margs: argparse.Namespace | None,
+    *,
+    dry_run: bool,
+    timeout_s: float | None,
+    controller: x1fold_mode.DigitizerController | None = None,
+) -> int:
+    """
+    Apply a mode switch, in-process when `margs` is set, otherwise via `cmd`.
+    """
+
+    if margs is None:
+        return run_cmd(cmd, dry_run=dry_run, timeout_s=timeout_s)
+    if dry_run:
+        print(f"[dry-run] (in-process) {' '.join(shlex.quote(c) for c in cmd)}")
+        return 0
+    start = time.monotonic()
+    try:
+        out, failures = x1fold_mode.set_mode(margs, controller)
+        err = x1fold_mode.set_mode_error(margs, out, failures)
+    except SystemExit as exc:
+        out, err = {}, str(exc.code)
+    except Exception as exc:
+        out, err = {}, f"{type(exc).__name__}: {exc}"
+    _log(
+        "digitizer_set",
+        mode=getattr(margs, "mode", None),
+        backend_used=out.get("digitizer_backend_used"),
+        attempted=out.get("digitizer_attempted"),
+        elapsed_s=round(time.monotonic() - start, 3),
+        discoveries=controller.discoveries if controller is not None else None,
+        report_len=out.get("report_len"),
+        warnings=[r["report_len"]["warning"] for r in out.get("results", []) if r.get("report_len", {}).get("warning")],
+        error=err,
+    )
+    return 1 if err else 0
+
+
+def run_tty(
+    cmd: list[str],
+    targs: argparse.Namespace | None,
+    *,
+    dry_run: bool,
+    timeout_s: float | None,
+    controller: x1fold_tty.ConsoleController | None = None,
+) -> int:
+    """
+    Apply the console clip/resize, in-process when `targs` is set, otherwise via `cmd`.
+    """
+
+    if targs is None:
+        return run_cmd(cmd, dry_run=dry_run, timeout_s=timeout_s)
+    if dry_run:
+        print(f"[dry-run] (in-process) {' '.join(shlex.quote(c) for c in cmd)}")
+        return 0
+    start = time.monotonic()
+    try:
+        rc, err = x1fold_tty.set_console(targs, controller), None
+    except SystemExit as exc:
+        rc, err = 1, str(exc.code)
+    except Exception as exc:
+        rc, err = 1, f"{type(exc).__name__}: {exc}"
+    _log(
+        "tty_set",
+        mode=getattr(targs, "mode", None),
+        elapsed_s=round(time.monotonic() - start, 4),
+        applies=controller.applies if controller is not None else None,
+        state_writes=controller.writes if controller is not None else None,
+        error=err,
+    )
+    return rc
+
+
 def utc_iso() -> str:
     return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
 
@@ -153,6 +284,167 @@ def run_status(cmd: list[str], *, dry_run: bool, timeout_s: float | None) -> tup
     except json.JSONDecodeError as exc:
         return None, f"JSONDecodeError: {exc}"
 
+
+def run_mode_status(
+    cmd: list[str],
+    margs: argparse.Namespace | None,
+    *,
+    dry_run: bool,
+    timeout_s: float | None,
+    controller: x1fold_mode.DigitizerController | None = None,
+) -> tuple[dict | None, str | None]:
+    if margs is None:
+        return run_status(cmd, dry_run=dry_run, timeout_s=timeout_s)
+    if dry_run:
+        return None, None
+    try:
+        return x1fold_mode.read_status(margs, controller), None
+    except SystemExit as exc:
+        return None, str(exc.code)
+    except Exception as exc:
+        return None, f"{type(exc).__name__}: {exc}"
+
+
+class PollScheduler:
+    """
+    Adaptive interval for the polling dock backends.
+
+    Polls at `min_s` for `boost_s` after something that makes a dock transition
+    likely (resume from suspend, VT switch, a recent transition), then doubles
+    the interval on every stable poll up to `max_s`, the latency ceiling.
+    `budget_per_min` caps wakeups per rolling minute by stretching the interval,
+    but never beyond the ceiling (the ceiling wins; the log says so).
+    """
+
+    def __init__(self, *, min_s: float, max_s: float, boost_s: float, budget_per_min: int) -> None:
+        self.min_s = max(0.01, float(min_s))
+        self.max_s = max(self.min_s, float(max_s))
+        self.boost_s = max(0.0, float(boost_s))
+        self.budget_per_min = max(0, int(budget_per_min))
+        self.interval_s = self.min_s
+        self.boost_until = 0.0
+        self.boost_reason = "start"
+        self.wakeups: collections.deque[float] = collections.deque()
+        self.suspend_offset = self._suspend_offset()
+        self.active_tty: str | None = None
+        # Set by the daemon when a VtWatcher is live (no sysfs read per poll).
+        self.vt: x1fold_tty.VtWatcher | None = None
+
+    @staticmethod
+    def _suspend_offset() -> float:
+        # CLOCK_MONOTONIC stops during suspend, CLOCK_BOOTTIME does not.
+        return time.clock_gettime(time.CLOCK_BOOTTIME) - time.monotonic()
+
+    def boost(self, reason: str, now: float | None = None) -> None:
+        now = time.monotonic() if now is None else now
+        self.boost_until = now + self.boost_s
+        self.boost_reason = reason
+        self.interval_s = self.min_s
+
+    def _detect_boosts(self, now: float) -> None:
+        offset = self._suspend_offset()
+        if offset - self.suspend_offset > 1.0:
+            self.boost("resume", now)
+        self.suspend_offset = offset
+        active_tty = self.vt.active if self.vt is not None else _safe_read_text(x1fold_tty.ACTIVE_VT_PATH)
+        if active_tty and self.active_tty is not None and active_tty != self.active_tty:
+            self.boost("vt_switch", now)
+        if active_tty:
+            self.active_tty = active_tty
+
+    def next_interval(self) -> tuple[float, str]:
+        """
+        Pick the sleep before the next poll; returns (interval_s, reason).
+        """
+
+        now = time.monotonic()
+        self._detect_boosts(now)
+        if now < self.boost_until:
+            interval, reason = self.min_s, self.boost_reason
+        else:
+            self.interval_s = min(self.max_s, self.interval_s * 2.0)
+            interval, reason = self.interval_s, "backoff" if self.interval_s < self.max_s else "ceiling"
+
+        if self.budget_per_min > 0:
+            while self.wakeups and now - self.wakeups[0] >= 60.0:
+                self.wakeups.popleft()
+            if len(self.wakeups) >= self.budget_per_min:
+                # Sleep until the oldest wakeup leaves the window.
+                wait_s = 60.0 - (now - self.wakeups[0])
+                if wait_s > interval:
+                    interval = min(self.max_s, wait_s)
+                    reason = "budget" if interval < self.max_s else "budget_ceiling"
+            self.wakeups.append(now)
+        return round(interval, 3), reason
+
+
+class DrmClipService:
+    """
+    Long-lived `drm_clip serve --socket PATH` for x1fold_tty.py.
+
+    The server keeps the DRM fd and the connector/CRTC/plane/property IDs, so a
+    tty switch costs two socket round trips instead of three drm_clip execs
+    (each re-opening the card and re-enumerating every resource). Started on
+    first use and restarted if it has exited; x1fold_tty.py falls back to
+    exec'ing drm_clip whenever the socket is unreachable.
+    """
+
+    def __init__(self, drm_clip: str, socket_path: Path, *, dry_run: bool) -> None:
+        self.drm_clip = drm_clip
+        self.socket_path = socket_path
+        self.dry_run = dry_run
+        self.proc: subprocess.Popen | None = None
+        self.starts = 0
+
+    def ensure(self) -> str:
+        """
+        Return the socket path to pass to x1fold_tty.py ("" when not running).
+        """
+
+        if self.dry_run:
+            return ""
+        if self.proc is not None and self.proc.poll() is None:
+            return str(self.socket_path)
+        if self.proc is not None:
+            _log("drm_clip_serve_exited", rc=self.proc.returncode, starts=self.starts)
+            self.proc = None
+        cmd = [self.drm_clip, "serve", "--socket", str(self.socket_path)]
+        try:
+            self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+            self.proc = subprocess.Popen(cmd, stdin=subprocess.DEVNULL)
+        except OSError as exc:
+            _log("drm_clip_serve_error", cmd=cmd, error=f"{type(exc).__name__}: {exc}")
+            return ""
+        self.starts += 1
+        # The first request must not race the bind(); give it a moment.
+        deadline = time.monotonic() + 0.5
+        while not self.socket_path.exists() and self.proc.poll() is None and time.monotonic() < deadline:
+            time.sleep(0.01)
+        _log("drm_clip_serve", cmd=cmd, pid=self.proc.pid, ready=self.socket_path.exists(), starts=self.starts)
+        return str(self.socket_path) if self.proc.poll() is None else ""
+
+    def stop(self) -> None:
+        if self.proc is None or self.proc.poll() is not None:
+            self.proc = None
+            return
+        self.proc.terminate()
+        try:
+            self.proc.wait(timeout=1.0)
+        except subprocess.TimeoutExpired:
+            self.proc.kill()
+        self.proc = None
+
+
+def _find_drm_clip(path_arg: str) -> str | None:
+    if path_arg:
+        return path_arg
+    found = shutil.which("drm_clip")
+    if found:
+        return found
+    local = Path(__file__).resolve().parent / "drm_clip"
+    return str(local) if local.exists() else None
+
+
 def _write_json_atomic(path: Path, data: dict) -> None:
     path.parent.mkdir(parents=True, exist_ok=True)
     tmp_fd = None
@@ -196,9 +488,18 @@ def main(argv: list[str]) -> int:
     )
     parser.add_argument(
         "--backend",
-        choices=["auto", "acpi_call", "ec_sys"],
+        choices=list(BACKENDS),
         default="auto",
-        help="Backend for reading dock state (default: auto).",
+        help=(
+            "Backend for reading dock state (default: auto). 'events' reads like auto, but only after an "
+            "ACPI netlink / evdev switch / input uevent notification or every --events-safety-s."
+        ),
+    )
+    parser.add_argument(
+        "--events-safety-s",
+        type=float,
+        default=DEFAULT_EVENTS_SAFETY_S,
+        help="With --backend events: re-read the dock state at least this often without a notification (default: 30).",
     )
     parser.add_argument(
         "--dock-sysfs",
@@ -225,7 +526,44 @@ def main(argv: list[str]) -> int:
         default=0xC1,
         help="EC offset for CMMD (default: 0xc1).",
     )
+    parser.add_argument(
+        "--state-socket",
+        default="/run/x1fold-halfblank/state.sock",
+        help=(
+            "Unix socket streaming each state transition to subscribers "
+            "(see x1fold_state_stream.py; empty disables; default: /run/x1fold-halfblank/state.sock)."
+        ),
+    )
     parser.add_argument("--interval-s", type=float, default=0.2, help="Polling interval (seconds).")
+    parser.add_argument(
+        "--poll-scheduler",
+        choices=["fixed", "adaptive"],
+        default="fixed",
+        help=(
+            "Polling backends only: 'fixed' sleeps --interval-s between polls; 'adaptive' polls every "
+            "--poll-min-s after resume, VT switches and transitions and backs off exponentially to "
+            "--poll-max-s while the dock state is stable (default: fixed)."
+        ),
+    )
+    parser.add_argument("--poll-min-s", type=float, default=0.2, help="Adaptive: fastest poll interval (default: 0.2).")
+    parser.add_argument(
+        "--poll-max-s",
+        type=float,
+        default=1.5,
+        help="Adaptive: latency ceiling, the slowest poll interval (default: 1.5).",
+    )
+    parser.add_argument(
+        "--poll-boost-s",
+        type=float,
+        default=10.0,
+        help="Adaptive: how long to poll at --poll-min-s after resume/VT switch/transition (default: 10).",
+    )
+    parser.add_argument(
+        "--poll-budget-per-min",
+        type=int,
+        default=0,
+        help="Adaptive: maximum dock polls per rolling minute, bounded by --poll-max-s (0 = unlimited; default: 0).",
+    )
     parser.add_argument(
         "--dock-debounce-on-s",
         type=float,
@@ -301,11 +639,28 @@ def main(argv: list[str]) -> int:
         default="",
         help="Path to drm_clip helper to pass to x1fold_mode.py (default: unset).",
     )
+    parser.add_argument(
+        "--digitizer-wait-s",
+        type=float,
+        default=2.0,
+        help=(
+            "Passed to x1fold_mode.py set --wait-device-s: how long a switch waits for the digitizer's hidraw "
+            "add uevent when the node is missing (e.g. right after resume) (default: 2)."
+        ),
+    )
     parser.add_argument(
         "--tty-clip",
         action="store_true",
         help="Best-effort: when on a Linux text console, also apply drm_clip + tty resize via x1fold_tty.py.",
     )
+    parser.add_argument(
+        "--drm-clip-serve-socket",
+        default="/run/x1fold-halfblank/drm_clip.sock",
+        help=(
+            "With --tty-clip: run `drm_clip serve` on this socket and point x1fold_tty.py at it "
+            "(empty disables; default: /run/x1fold-halfblank/drm_clip.sock)."
+        ),
+    )
     parser.add_argument(
         "--tty-state-file",
         type=Path,
@@ -317,12 +672,31 @@ def main(argv: list[str]) -> int:
         default="",
         help="Path to x1fold_tty.py helper (default: auto-detect from common install locations).",
     )
+    parser.add_argument(
+        "--tty-engine",
+        choices=["auto", "exec"],
+        default="auto",
+        help=(
+            "How to run x1fold_tty.py set (default: auto = in-process, per-tty geometry kept in memory). "
+            "'exec' spawns it per apply (legacy). A --tty-tool that is not x1fold_tty.py is always exec'd."
+        ),
+    )
     parser.add_argument(
         "--tty-enforce-every-s",
         type=float,
         default=0.0,
         help="While dock state is stable, periodically re-apply tty clip/resize (0 disables; default: 0).",
     )
+    parser.add_argument(
+        "--mode-engine",
+        choices=["auto", "exec"],
+        default="auto",
+        help=(
+            "How to run x1fold_mode.py set/status (default: auto = import and call it in-process). "
+            "'exec' spawns a fresh interpreter per call (legacy; useful for latency comparisons). "
+            "--half-cmd/--full-cmd overrides are always exec'd."
+        ),
+    )
     parser.add_argument("--half-cmd", default="", help="Command to run when docked (string; default uses halfblank_switch).")
     parser.add_argument("--full-cmd", default="", help="Command to run when undocked (string; default uses halfblank_switch).")
     parser.add_argument(
@@ -370,6 +744,8 @@ def main(argv: list[str]) -> int:
             cmd += ["--display-height", str(int(args.display_height))]
         if args.drm_clip:
             cmd += ["--drm-clip", str(args.drm_clip)]
+        if args.digitizer_wait_s > 0:
+            cmd += ["--wait-device-s", str(float(args.digitizer_wait_s))]
         return cmd
 
     def _detect_tty_tool() -> str:
@@ -390,10 +766,23 @@ def main(argv: list[str]) -> int:
 
     tty_tool = _detect_tty_tool()
 
+    drm_clip_service: DrmClipService | None = None
+    if args.tty_clip and args.drm_clip_serve_socket:
+        drm_clip_bin = _find_drm_clip(str(args.drm_clip))
+        if drm_clip_bin is None:
+            _log("drm_clip_serve_error", error="drm_clip not found")
+        else:
+            drm_clip_service = DrmClipService(drm_clip_bin, Path(args.drm_clip_serve_socket), dry_run=args.dry_run)
+            atexit.register(drm_clip_service.stop)
+
     def _tty_cmd(mode: str, *, clear: bool) -> list[str]:
         cmd = [tty_tool]
         if args.drm_clip:
             cmd += ["--drm-clip", str(args.drm_clip)]
+        if drm_clip_service is not None:
+            sock = drm_clip_service.ensure()
+            if sock:
+                cmd += ["--drm-clip-socket", sock]
         if args.tty_state_file:
             cmd += ["--state-file", str(args.tty_state_file)]
         cmd += ["set", mode, "--height", str(int(args.display_height)), "--best-effort"]
@@ -401,6 +790,30 @@ def main(argv: list[str]) -> int:
             cmd += ["--no-clear"]
         return cmd
 
+    # In-process console engine: parsed argv per distinct command line, and
+    # one controller holding tty geometry + the drm_clip server connection.
+    console: x1fold_tty.ConsoleController | None = None
+    if args.tty_clip and args.tty_engine == "auto" and Path(tty_tool).name in _TTY_TOOL_NAMES:
+        console = x1fold_tty.ConsoleController(args.tty_state_file)
+        atexit.register(console.close)
+    tty_args: dict[tuple[str, ...], argparse.Namespace | None] = {}
+
+    def _apply_tty(mode: str, *, clear: bool) -> int:
+        cmd = _tty_cmd(mode, clear=clear)
+        targs = None
+        if console is not None:
+            key = tuple(cmd)
+            if key not in tty_args:
+                tty_args[key] = _inprocess_tty_args(cmd)
+            targs = tty_args[key]
+        return run_tty(cmd, targs, dry_run=args.dry_run, timeout_s=args.cmd_timeout_s, controller=console)
+
+    if console is not None and not args.dry_run:
+        # Per-VT geometry up front: the first apply on any VT is table-driven.
+        prime_args = _inprocess_tty_args(_tty_cmd("full", clear=False))
+        if prime_args is not None:
+            console.prime(prime_args)
+
     def _default_status_cmd() -> list[str]:
         for candidate in (
             Path("/usr/local/bin/x1fold_mode.py"),
@@ -411,16 +824,175 @@ def main(argv: list[str]) -> int:
                 return [str(candidate), "status"]
         return ["x1fold_mode.py", "status"]
 
+    half_cmd = _parse_cmd(args.half_cmd) if args.half_cmd else _default_tool_cmd("half")
+    full_cmd = _parse_cmd(args.full_cmd) if args.full_cmd else _default_tool_cmd("full")
+    status_cmd = _parse_cmd(args.status_cmd) if args.status_cmd else _default_status_cmd()
+    inprocess = args.mode_engine == "auto"
     cmds = Commands(
-        half=_parse_cmd(args.half_cmd) if args.half_cmd else _default_tool_cmd("half"),
-        full=_parse_cmd(args.full_cmd) if args.full_cmd else _default_tool_cmd("full"),
-        status=_parse_cmd(args.status_cmd) if args.status_cmd else _default_status_cmd(),
+        half=half_cmd,
+        full=full_cmd,
+        status=status_cmd,
+        half_args=_inprocess_mode_args(half_cmd) if inprocess and not args.half_cmd else None,
+        full_args=_inprocess_mode_args(full_cmd) if inprocess and not args.full_cmd else None,
+        status_args=_inprocess_mode_args(status_cmd) if inprocess else None,
     )
+    # One hidraw discovery + open fds shared by every in-process set/status.
+    digitizer = x1fold_mode.DigitizerController() if inprocess else None
+    # Device hotplug (uevent netlink): a digitizer hidraw node that (re)appears,
+    # e.g. i2c-hid re-probing after resume, comes back in its power-on latch
+    # state, so the desired mode is re-applied as soon as it is added.
+    devices = x1fold_uevent.shared()
+    devices_fd = devices.fileno()
+    digitizer_added: list[str] = []
+
+    def _on_device_change(change: x1fold_uevent.DeviceChange) -> None:
+        if change.kind != "hidraw" or change.action != "add" or change.node is None or change.node.devnode is None:
+            return
+        if x1fold_mode.select_wacf2200_col02_devices([x1fold_mode.hidraw_device(change.node)]):
+            digitizer_added.append(change.name)
+
+    devices.subscribe(_on_device_change)
+
+    def _apply_mode(docked: int) -> int:
+        rc = run_mode(
+            cmds.half if docked else cmds.full,
+            cmds.half_args if docked else cmds.full_args,
+            dry_run=args.dry_run,
+            timeout_s=args.cmd_timeout_s,
+            controller=digitizer,
+        )
+        # Any digitizer added so far, including the hidraw adds this apply
+        # polled itself while waiting for the devices, now has the mode.
+        digitizer_added.clear()
+        return rc
+
+    stream: StateStreamServer | None = None
+    if args.state_socket:
+        stream = StateStreamServer(Path(args.state_socket))
+        ok, err = stream.start()
+        if not ok:
+            _log("state_socket_error", path=str(args.state_socket), error=err)
+            stream = None
+
+    def _record(data: dict) -> None:
+        """
+        Write the state.json snapshot and push the transition to stream subscribers.
+        """
+
+        if stream is None:
+            _write_json_atomic(args.state_file, data)
+            return
+        msg = stream.stamp(data)
+        _write_json_atomic(args.state_file, msg)
+        stream.push(msg)
+
+    dock_events: DockEvents | None = None
+    if args.backend == "events":
+        dock_events = DockEvents()
+        sources = dock_events.open()
+        _log("dock_events", sources=sources, errors=dock_events.errors, safety_s=float(args.events_safety_s))
+        if not sources:
+            # Nothing to wait on; behave like the auto polling backend.
+            dock_events = None
+    dock_notified = True
+
+    # Active-VT switches (tty0/active POLLPRI): the tty clip is re-applied
+    # from inside the sleep, so a switch costs milliseconds instead of up to
+    # one poll interval and the dock poll cadence is unchanged.
+    vt_watcher: x1fold_tty.VtWatcher | None = None
+    if args.tty_clip:
+        vt_watcher = x1fold_tty.VtWatcher()
+        if not vt_watcher.open():
+            _log("vt_watch_error", path=str(vt_watcher.path), error=vt_watcher.error)
+            vt_watcher = None
+    vt_fd = vt_watcher.fileno() if vt_watcher is not None else None
+    xfds = [vt_fd] if vt_fd is not None else []
+
+    def _wait_fds() -> list[int]:
+        fds = dock_events.fds() if dock_events is not None else []
+        # DockEvents already lists the shared uevent socket when it uses it.
+        if devices_fd is not None and devices_fd not in fds:
+            fds = fds + [devices_fd]
+        return fds
+
+    def _sleep(seconds: float) -> None:
+        nonlocal dock_notified
+        if dock_events is not None:
+            # Input changes the registry read during an apply (digitizer wait).
+            reasons = dock_events.drain(())
+            if reasons:
+                dock_notified = True
+                _log("dock_event", reasons=reasons)
+                return
+        fds = _wait_fds()
+        if not fds and not xfds and stream is None:
+            time.sleep(seconds)
+            return
+        deadline = time.monotonic() + max(0.0, float(seconds))
+        while True:
+            remaining = max(0.0, deadline - time.monotonic())
+            if stream is not None:
+                ready = stream.wait(remaining, fds, xfds)
+            else:
+                try:
+                    readable, _, excepted = select.select(fds, [], xfds, remaining)
+                    ready = readable + excepted
+                except InterruptedError:
+                    ready = []
+            if not ready:
+                return
+            woke = False
+            if vt_watcher is not None and vt_fd in ready:
+                switched = vt_watcher.drain()
+                if switched:
+                    _vt_switched(switched, time.monotonic())
+            if devices_fd in ready:
+                changes = devices.poll()
+                if changes:
+                    _log("device_event", changes=[f"{c.kind}:{c.action} {c.name}".rstrip() for c in changes])
+                woke = bool(digitizer_added)
+            if dock_events is not None:
+                reasons = dock_events.drain(ready)
+                if reasons:
+                    dock_notified = True
+                    woke = True
+                    _log("dock_event", reasons=reasons)
+            # Unrelated uevents (batteries, other hotplug) keep sleeping.
+            if woke or deadline - time.monotonic() <= 0:
+                return
+            fds = _wait_fds()
 
     last: DockState | None = None
     pending: DockState | None = None
     pending_since = 0.0
     last_apply_ts = 0.0
+
+    def _vt_switched(active_tty: str, switch_ts: float) -> None:
+        nonlocal last_active_tty
+        # Only in a stable dock state; transitions apply the tty themselves and
+        # the main loop catches up on the active VT afterwards.
+        if last is None or pending is not None or last.docked not in (0, 1):
+            return
+        last_active_tty = active_tty
+        desired = "half" if last.docked else "full"
+        rc_tty = _apply_tty(desired, clear=False)
+        _log(
+            "vt_switch",
+            active_tty=active_tty,
+            desired=desired,
+            rc=rc_tty,
+            switch_to_apply_s=round(time.monotonic() - switch_ts, 4),
+        )
+        if rc_tty != 0:
+            _log(
+                "tty_active_change_error",
+                docked=last.docked,
+                modeid=last.modeid,
+                desired=desired,
+                active_tty=active_tty,
+                rc=rc_tty,
+            )
+
     last_enforce_ts = 0.0
     enforce_every_s = float(args.enforce_every_s or 0.0)
     last_tty_enforce_ts = 0.0
@@ -430,6 +1002,35 @@ def main(argv: list[str]) -> int:
     # between a graphical VT (KD_GRAPHICS; sway) and a text VT (KD_TEXT).
     last_active_tty = None
 
+    # Periodic work that needs the loop to wake up even without dock events
+    # (VT switches only need polling when tty0/active can't be watched).
+    periodic = (bool(args.tty_clip) and vt_watcher is None) or enforce_every_s > 0 or tty_enforce_every_s > 0
+    idle_s = float(args.interval_s)
+    if dock_events is not None and not periodic:
+        idle_s = float(args.events_safety_s)
+    scheduler: PollScheduler | None = None
+    if args.poll_scheduler == "adaptive" and dock_events is None:
+        scheduler = PollScheduler(
+            min_s=args.poll_min_s,
+            max_s=args.poll_max_s,
+            boost_s=args.poll_boost_s,
+            budget_per_min=args.poll_budget_per_min,
+        )
+        scheduler.vt = vt_watcher
+        scheduler.boost("start")
+
+    def _idle_sleep() -> None:
+        """
+        Sleep between steady-state polls (fixed, events or adaptive).
+        """
+
+        if scheduler is None:
+            _sleep(idle_s)
+            return
+        interval_s, reason = scheduler.next_interval()
+        _log("poll_interval", interval_s=interval_s, reason=reason)
+        _sleep(interval_s)
+
     _log(
         "start",
         backend=args.backend,
@@ -438,28 +1039,50 @@ def main(argv: list[str]) -> int:
         enforce_every_s=enforce_every_s,
         tty_clip=bool(args.tty_clip),
         tty_enforce_every_s=tty_enforce_every_s,
+        tty_engine="inprocess" if console is not None else "exec",
+        vt_watch=vt_watcher is not None,
+        idle_s=idle_s,
+        poll_scheduler=args.poll_scheduler if scheduler is not None else "fixed",
         dry_run=bool(args.dry_run),
         cmds={"half": cmds.half, "full": cmds.full, "status": cmds.status},
+        engines=cmds.engines(),
         state_file=str(args.state_file),
+        state_socket=str(args.state_socket) if stream else None,
         dmi=dmi,
         hostname=os.uname().nodename if hasattr(os, "uname") else None,
     )
 
+    dock_reader = DockReader(
+        backend=args.backend,
+        acpi_call_path=args.acpi_call,
+        gdst_path=args.gdst,
+        cmmd_path=args.cmmd,
+        ec_io=args.ec_io,
+        ec_offset=args.ec_offset,
+        dock_sysfs=args.dock_sysfs,
+    )
+    last_read: DockState | None = None
+    last_read_ts = 0.0
+
     while True:
-        state = read_dock_state(
-            backend=args.backend,
-            acpi_call_path=args.acpi_call,
-            gdst_path=args.gdst,
-            cmmd_path=args.cmmd,
-            ec_io=args.ec_io,
-            ec_offset=args.ec_offset,
-            dock_sysfs=args.dock_sysfs,
-        )
+        read_now = time.monotonic()
+        if (
+            dock_events is None
+            or dock_notified
+            or last_read is None
+            or last_read.docked not in (0, 1)
+            or pending is not None
+            or (read_now - last_read_ts) >= float(args.events_safety_s)
+        ):
+            dock_notified = False
+            last_read_ts = read_now
+            last_read = dock_reader.read()
+        state = last_read
         if state.docked not in (0, 1):
             # We can't act without a stable signal; keep polling.
             pending = None
             pending_since = 0.0
-            time.sleep(args.interval_s)
+            _sleep(args.interval_s)
             continue
 
         if last is None:
@@ -468,8 +1091,7 @@ def main(argv: list[str]) -> int:
                 desired = "half" if state.docked else "full"
                 # Write desired state immediately so UI helpers can react even if the
                 # mode-switch command itself is slow (I2C timeouts, etc.).
-                _write_json_atomic(
-                    args.state_file,
+                _record(
                     {
                         "ts": utc_iso(),
                         "event": "apply_initial_pending",
@@ -478,17 +1100,22 @@ def main(argv: list[str]) -> int:
                         "desired": desired,
                     },
                 )
-                rc = run_cmd(cmds.half if state.docked else cmds.full, dry_run=args.dry_run, timeout_s=args.cmd_timeout_s)
+                apply_start = time.monotonic()
+                rc = _apply_mode(state.docked)
+                apply_s = round(time.monotonic() - apply_start, 3)
                 rc_tty = None
                 if args.tty_clip:
-                    rc_tty = run_cmd(
-                        _tty_cmd(desired, clear=(desired == "half")),
-                        dry_run=args.dry_run,
-                        timeout_s=args.cmd_timeout_s,
-                    )
-                _log("apply_initial", docked=state.docked, modeid=state.modeid, desired=desired, rc=rc)
-                _write_json_atomic(
-                    args.state_file,
+                    rc_tty = _apply_tty(desired, clear=(desired == "half"))
+                _log(
+                    "apply_initial",
+                    docked=state.docked,
+                    modeid=state.modeid,
+                    desired=desired,
+                    rc=rc,
+                    apply_s=apply_s,
+                    engine=cmds.engines()["half" if state.docked else "full"],
+                )
+                _record(
                     {
                         "ts": utc_iso(),
                         "event": "apply_initial",
@@ -500,19 +1127,38 @@ def main(argv: list[str]) -> int:
                     },
                 )
                 last_apply_ts = time.monotonic()
-            time.sleep(args.interval_s)
+            _idle_sleep()
             continue
 
         now = time.monotonic()
         if state.docked == last.docked:
             pending = None
             pending_since = 0.0
+            if digitizer_added:
+                added = list(digitizer_added)
+                digitizer_added.clear()
+                desired = "half" if state.docked else "full"
+                apply_start = time.monotonic()
+                rc = _apply_mode(state.docked)
+                _log(
+                    "digitizer_added_apply",
+                    docked=state.docked,
+                    modeid=state.modeid,
+                    desired=desired,
+                    nodes=added,
+                    rc=rc,
+                    apply_s=round(time.monotonic() - apply_start, 3),
+                )
+                last_apply_ts = now
             if args.tty_clip:
-                active_tty = _safe_read_text(Path("/sys/class/tty/tty0/active"))
+                if vt_watcher is not None:
+                    active_tty = vt_watcher.active
+                else:
+                    active_tty = _safe_read_text(x1fold_tty.ACTIVE_VT_PATH)
                 if active_tty and active_tty != last_active_tty:
                     last_active_tty = active_tty
                     desired = "half" if state.docked else "full"
-                    rc_tty = run_cmd(_tty_cmd(desired, clear=False), dry_run=args.dry_run, timeout_s=args.cmd_timeout_s)
+                    rc_tty = _apply_tty(desired, clear=False)
                     if rc_tty != 0:
                         _log(
                             "tty_active_change_error",
@@ -526,7 +1172,7 @@ def main(argv: list[str]) -> int:
             if args.tty_clip and tty_enforce_every_s > 0 and (now - last_tty_enforce_ts) >= tty_enforce_every_s:
                 last_tty_enforce_ts = now
                 desired = "half" if state.docked else "full"
-                rc_tty = run_cmd(_tty_cmd(desired, clear=False), dry_run=args.dry_run, timeout_s=args.cmd_timeout_s)
+                rc_tty = _apply_tty(desired, clear=False)
                 if rc_tty != 0:
                     _log("tty_enforce_error", docked=state.docked, modeid=state.modeid, desired=desired, rc=rc_tty)
 
@@ -534,12 +1180,17 @@ def main(argv: list[str]) -> int:
                 last_enforce_ts = now
                 desired = "half" if state.docked else "full"
                 expected_digitizer_mode = _digitizer_mode_for_desired(desired)
-                status, err = run_status(cmds.status, dry_run=args.dry_run, timeout_s=args.cmd_timeout_s)
+                status, err = run_mode_status(
+                    cmds.status,
+                    cmds.status_args,
+                    dry_run=args.dry_run,
+                    timeout_s=args.cmd_timeout_s,
+                    controller=digitizer,
+                )
                 current = _status_mode(status) if status else None
                 if err:
                     _log("enforce_check_error", docked=state.docked, modeid=state.modeid, desired=desired, error=err)
-                    _write_json_atomic(
-                        args.state_file,
+                    _record(
                         {
                             "ts": utc_iso(),
                             "event": "enforce_check_error",
@@ -550,18 +1201,12 @@ def main(argv: list[str]) -> int:
                         },
                     )
                 elif current != expected_digitizer_mode:
-                    rc = run_cmd(
-                        cmds.half if state.docked else cmds.full,
-                        dry_run=args.dry_run,
-                        timeout_s=args.cmd_timeout_s,
-                    )
+                    apply_start = time.monotonic()
+                    rc = _apply_mode(state.docked)
+                    apply_s = round(time.monotonic() - apply_start, 3)
                     rc_tty = None
                     if args.tty_clip:
-                        rc_tty = run_cmd(
-                            _tty_cmd(desired, clear=False),
-                            dry_run=args.dry_run,
-                            timeout_s=args.cmd_timeout_s,
-                        )
+                        rc_tty = _apply_tty(desired, clear=False)
                     _log(
                         "enforce_apply",
                         docked=state.docked,
@@ -571,10 +1216,12 @@ def main(argv: list[str]) -> int:
                         digitizer_observed=current,
                         rc=rc,
                         tty_rc=rc_tty,
+                        apply_s=apply_s,
+                        check_s=round(apply_start - now, 3),
+                        engine=cmds.engines()["half" if state.docked else "full"],
                         since_last_apply_s=round(now - last_apply_ts, 3),
                     )
-                    _write_json_atomic(
-                        args.state_file,
+                    _record(
                         {
                             "ts": utc_iso(),
                             "event": "enforce_apply",
@@ -589,7 +1236,7 @@ def main(argv: list[str]) -> int:
                         },
                     )
                     last_apply_ts = now
-            time.sleep(args.interval_s)
+            _idle_sleep()
             continue
 
         # Dock signal changed. Optionally debounce transitions to avoid flapping
@@ -601,6 +1248,8 @@ def main(argv: list[str]) -> int:
                 pending = state
                 pending_since = now
                 desired = "half" if state.docked else "full"
+                if scheduler is not None:
+                    scheduler.boost("transition")
                 _log(
                     "dock_change_candidate",
                     from_docked=last.docked,
@@ -608,8 +1257,7 @@ def main(argv: list[str]) -> int:
                     desired=desired,
                     debounce_s=debounce_s,
                 )
-                _write_json_atomic(
-                    args.state_file,
+                _record(
                     {
                         "ts": utc_iso(),
                         "event": "dock_change_candidate",
@@ -622,21 +1270,23 @@ def main(argv: list[str]) -> int:
                     },
                 )
                 sleep_s = debounce_poll_s if debounce_poll_s > 0 else args.interval_s
-                time.sleep(max(0.05, float(sleep_s)))
+                _sleep(max(0.05, float(sleep_s)))
                 continue
             if (now - pending_since) < debounce_s:
                 sleep_s = debounce_poll_s if debounce_poll_s > 0 else args.interval_s
-                time.sleep(max(0.05, float(sleep_s)))
+                _sleep(max(0.05, float(sleep_s)))
                 continue
             # Stable long enough; accept the transition.
+            detected_ts = pending_since
             pending = None
             pending_since = 0.0
+        else:
+            detected_ts = now
 
         desired = "half" if state.docked else "full"
         # Write desired state immediately so UI helpers can react even if the
         # mode-switch command itself is slow (I2C timeouts, etc.).
-        _write_json_atomic(
-            args.state_file,
+        _record(
             {
                 "ts": utc_iso(),
                 "event": "dock_change_pending",
@@ -647,10 +1297,12 @@ def main(argv: list[str]) -> int:
                 "desired": desired,
             },
         )
-        rc = run_cmd(cmds.half if state.docked else cmds.full, dry_run=args.dry_run, timeout_s=args.cmd_timeout_s)
+        apply_start = time.monotonic()
+        rc = _apply_mode(state.docked)
+        apply_done = time.monotonic()
         rc_tty = None
         if args.tty_clip:
-            rc_tty = run_cmd(_tty_cmd(desired, clear=(desired == "half")), dry_run=args.dry_run, timeout_s=args.cmd_timeout_s)
+            rc_tty = _apply_tty(desired, clear=(desired == "half"))
         _log(
             "dock_change",
             from_docked=last.docked,
@@ -659,9 +1311,12 @@ def main(argv: list[str]) -> int:
             desired=desired,
             rc=rc,
             tty_rc=rc_tty,
+            apply_s=round(apply_done - apply_start, 3),
+            # Dock signal first observed -> digitizer switch complete (includes debounce).
+            dock_to_digitizer_s=round(apply_done - detected_ts, 3),
+            engine=cmds.engines()["half" if state.docked else "full"],
         )
-        _write_json_atomic(
-            args.state_file,
+        _record(
             {
                 "ts": utc_iso(),
                 "event": "dock_change",
@@ -676,7 +1331,9 @@ def main(argv: list[str]) -> int:
         )
         last_apply_ts = now
         last = state
-        time.sleep(args.interval_s)
+        if scheduler is not None:
+            scheduler.boost("transition")
+        _idle_sleep()
 
 
 if __name__ == "__main__":
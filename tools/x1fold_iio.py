@@ -0,0 +1,410 @@
+"""
+Direct IIO accelerometer orientation source (no iio-sensor-proxy).
+
+Repo source: x1fold/tools/x1fold_iio.py
+
+Reads the accelerometer from /sys/bus/iio/devices/iio:device*:
+  - buffered: enables the x/y/z scan elements, attaches the device's own
+    trigger if it needs one, and reads samples from /dev/iio:deviceN, so the
+    caller can select() on `fileno()` and rotation latency is set by the sample
+    rate plus the caller's debounce;
+  - raw: when the buffer cannot be enabled (not root, buffer busy because
+    iio-sensor-proxy owns it, no trigger), reads in_accel_{x,y,z}_raw on demand
+    through persistent fds.
+
+Samples are scaled, rotated by the mount matrix and mapped to the same
+orientation names iio-sensor-proxy uses (normal, left-up, right-up, bottom-up),
+with the same portrait/landscape tilt test plus configurable hysteresis, so it
+plugs into the existing rotation policy (and its calibration) unchanged.
+
+IIOAccel mirrors the SensorProxy interface from x1fold_dbus.py.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+import time
+from dataclasses import dataclass
+from pathlib import Path
+
+IIO_ROOT = Path("/sys/bus/iio/devices")
+DEV_ROOT = Path("/dev")
+
+_AXES = ("x", "y", "z")
+_TYPE_RE = re.compile(r"^(be|le):([su])(\d+)/(\d+)(?:X(\d+))?>>(\d+)$")
+
+
+@dataclass(frozen=True)
+class ScanElement:
+    axis: str
+    index: int
+    little_endian: bool
+    signed: bool
+    realbits: int
+    storagebits: int
+    shift: int
+
+    @property
+    def size(self) -> int:
+        return self.storagebits // 8
+
+    def decode(self, raw: bytes) -> int:
+        v = int.from_bytes(raw, "little" if self.little_endian else "big")
+        v = (v >> self.shift) & ((1 << self.realbits) - 1)
+        if self.signed and v & (1 << (self.realbits - 1)):
+            v -= 1 << self.realbits
+        return v
+
+
+def _read(path: Path) -> str | None:
+    try:
+        return path.read_text(encoding="utf-8", errors="replace").strip()
+    except OSError:
+        return None
+
+
+def _write(path: Path, value: str) -> None:
+    path.write_text(value + "\n", encoding="utf-8")
+
+
+def parse_mount_matrix(text: str | None) -> tuple[tuple[float, ...], ...]:
+    """
+    Parse "x1, y1, z1; x2, y2, z2; x3, y3, z3"; identity if absent/invalid.
+    """
+
+    identity = ((1.0, 0.0, 0.0), (0.0, 1.0, 0.0), (0.0, 0.0, 1.0))
+    if not text:
+        return identity
+    try:
+        rows = tuple(tuple(float(v) for v in row.split(",")) for row in text.split(";"))
+    except ValueError:
+        return identity
+    if len(rows) != 3 or any(len(r) != 3 for r in rows):
+        return identity
+    return rows
+
+
+def find_accelerometer(root: Path = IIO_ROOT) -> Path | None:
+    """
+    Pick the first IIO device with accelerometer x/y/z channels.
+    """
+
+    try:
+        devices = sorted(root.glob("iio:device*"), key=lambda p: int(p.name[len("iio:device") :] or 0))
+    except (OSError, ValueError):
+        return None
+    for dev in devices:
+        if all((dev / f"in_accel_{a}_raw").exists() for a in _AXES):
+            return dev
+    return None
+
+
+def orientation_from_vector(
+    x: float,
+    y: float,
+    z: float,
+    *,
+    prev: str | None,
+    threshold_deg: float,
+    hysteresis_deg: float,
+) -> str | None:
+    """
+    Map a (mount-matrix corrected) gravity vector to an orientation name.
+
+    Same tilt test as iio-sensor-proxy: tilt around each axis must exceed
+    `threshold_deg`. The current orientation is kept until its own tilt drops
+    below `threshold_deg - hysteresis_deg`, and while the device lies flat.
+    """
+
+    portrait = math.degrees(math.atan2(x, math.sqrt(y * y + z * z)))
+    landscape = math.degrees(math.atan2(y, math.sqrt(x * x + z * z)))
+    keep = max(0.0, threshold_deg - hysteresis_deg)
+    if prev == "left-up" and portrait > keep:
+        return prev
+    if prev == "right-up" and -portrait > keep:
+        return prev
+    if prev == "bottom-up" and landscape > keep:
+        return prev
+    if prev == "normal" and -landscape > keep:
+        return prev
+    if abs(portrait) > threshold_deg:
+        return "left-up" if portrait > 0 else "right-up"
+    if abs(landscape) > threshold_deg:
+        return "bottom-up" if landscape > 0 else "normal"
+    return prev
+
+
+class IIOAccel:
+    """
+    Orientation from an IIO accelerometer; same surface as x1fold_dbus.SensorProxy.
+    """
+
+    def __init__(
+        self,
+        *,
+        device: Path | None = None,
+        threshold_deg: float = 35.0,
+        hysteresis_deg: float = 10.0,
+        sample_s: float = 0.1,
+        buffered: bool = True,
+        retry_s: float = 5.0,
+    ) -> None:
+        self.device_override = device
+        self.threshold_deg = float(threshold_deg)
+        self.hysteresis_deg = float(hysteresis_deg)
+        self.sample_s = float(sample_s)
+        self.want_buffered = bool(buffered)
+        self.retry_s = float(retry_s)
+        self.device: Path | None = None
+        self.mode: str | None = None  # "buffered" | "raw"
+        self.claimed = False
+        self.error: str | None = None
+        self.last_attempt = 0.0
+        self._orientation: str | None = None
+        self._matrix = parse_mount_matrix(None)
+        self._scale = (1.0, 1.0, 1.0)
+        self._raw_fds: list[int] = []
+        self._buf_fd: int | None = None
+        self._scan: list[ScanElement] = []
+        self._scan_size = 0
+        self._pending = b""
+        self._last_sample = 0.0
+
+    # --- SensorProxy-compatible surface ----------------------------------
+
+    def active(self) -> bool:
+        return self.claimed
+
+    def connected(self) -> bool:
+        """
+        True when samples are pushed (buffered mode); raw mode is read on demand.
+        """
+
+        return self._buf_fd is not None
+
+    def fileno(self) -> int | None:
+        return self._buf_fd
+
+    @property
+    def orientation(self) -> str | None:
+        if self.mode == "raw" and (time.monotonic() - self._last_sample) >= self.sample_s:
+            self._sample_raw()
+        return self._orientation
+
+    def start(self) -> bool:
+        if self.claimed:
+            return False
+        now = time.monotonic()
+        if self.last_attempt and (now - self.last_attempt) < self.retry_s:
+            return False
+        self.last_attempt = now
+        dev = self.device_override or find_accelerometer()
+        if dev is None:
+            self.error = f"no IIO accelerometer under {IIO_ROOT}"
+            return False
+        self.device = dev
+        self._matrix = parse_mount_matrix(_read(dev / "in_accel_mount_matrix") or _read(dev / "mount_matrix"))
+        common = _read(dev / "in_accel_scale")
+        scales: list[float] = []
+        for a in _AXES:
+            s = _read(dev / f"in_accel_{a}_scale") or common
+            try:
+                scales.append(float(s) if s else 1.0)
+            except ValueError:
+                scales.append(1.0)
+        self._scale = (scales[0], scales[1], scales[2])
+
+        err_buffered: str | None = None
+        if self.want_buffered:
+            try:
+                self._enable_buffer(dev)
+                self.mode = "buffered"
+            except (OSError, ValueError) as exc:
+                err_buffered = f"{type(exc).__name__}: {exc}"
+                self._disable_buffer()
+        if self.mode is None:
+            try:
+                for a in _AXES:
+                    self._raw_fds.append(os.open(dev / f"in_accel_{a}_raw", os.O_RDONLY | os.O_CLOEXEC))
+            except OSError as exc:
+                self._close_raw()
+                self.error = f"{type(exc).__name__}: {exc}"
+                return False
+            self.mode = "raw"
+            self._sample_raw()
+        self.claimed = True
+        # Keep the reason buffered mode was not used visible to the caller's log.
+        self.error = f"buffered unavailable ({err_buffered}); using raw sysfs" if err_buffered else None
+        return True
+
+    def stop(self) -> bool:
+        if not self.claimed:
+            return False
+        self.close()
+        self.last_attempt = 0.0
+        return True
+
+    def close(self) -> None:
+        self._disable_buffer()
+        self._close_raw()
+        self.claimed = False
+        self.mode = None
+        self._orientation = None
+
+    def handle_events(self) -> bool:
+        """
+        Consume buffered samples; returns True if the orientation changed.
+        """
+
+        if self._buf_fd is None:
+            return False
+        before = self._orientation
+        latest: tuple[int, int, int] | None = None
+        while True:
+            try:
+                data = os.read(self._buf_fd, max(self._scan_size * 64, 4096))
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as exc:
+                self.error = f"{type(exc).__name__}: {exc}"
+                self.close()
+                return before is not None
+            if not data:
+                break
+            data = self._pending + data
+            n = len(data) // self._scan_size
+            if n:
+                latest = self._decode_scan(data[(n - 1) * self._scan_size : n * self._scan_size])
+            self._pending = data[n * self._scan_size :]
+        if latest is not None:
+            self._update(*latest)
+        return self._orientation != before
+
+    # --- internals -------------------------------------------------------
+
+    def _update(self, rx: int, ry: int, rz: int) -> None:
+        self._last_sample = time.monotonic()
+        v = (rx * self._scale[0], ry * self._scale[1], rz * self._scale[2])
+        m = self._matrix
+        x = m[0][0] * v[0] + m[0][1] * v[1] + m[0][2] * v[2]
+        y = m[1][0] * v[0] + m[1][1] * v[1] + m[1][2] * v[2]
+        z = m[2][0] * v[0] + m[2][1] * v[1] + m[2][2] * v[2]
+        self._orientation = orientation_from_vector(
+            x,
+            y,
+            z,
+            prev=self._orientation,
+            threshold_deg=self.threshold_deg,
+            hysteresis_deg=self.hysteresis_deg,
+        )
+
+    def _sample_raw(self) -> None:
+        vals: list[int] = []
+        try:
+            for fd in self._raw_fds:
+                vals.append(int(os.pread(fd, 32, 0).decode("ascii", errors="replace").strip()))
+        except (OSError, ValueError) as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+            self._last_sample = time.monotonic()
+            return
+        if len(vals) == 3:
+            self._update(vals[0], vals[1], vals[2])
+
+    def _close_raw(self) -> None:
+        for fd in self._raw_fds:
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._raw_fds = []
+
+    def _decode_scan(self, scan: bytes) -> tuple[int, int, int]:
+        vals: dict[str, int] = {}
+        off = 0
+        for el in self._scan:
+            off += (-off) % el.size
+            vals[el.axis] = el.decode(scan[off : off + el.size])
+            off += el.size
+        return vals["x"], vals["y"], vals["z"]
+
+    def _enable_buffer(self, dev: Path) -> None:
+        scan_dir = dev / "scan_elements"
+        if not scan_dir.is_dir():
+            raise ValueError("no scan_elements (device has no buffer)")
+        if _read(dev / "buffer" / "enable") == "1":
+            raise OSError("buffer already enabled (owned by another reader, e.g. iio-sensor-proxy)")
+        # Only our three channels; anything else (timestamp, ...) off.
+        for en in scan_dir.glob("*_en"):
+            name = en.name[: -len("_en")]
+            _write(en, "1" if name in {f"in_accel_{a}" for a in _AXES} else "0")
+        elements: list[ScanElement] = []
+        for a in _AXES:
+            typ = _read(scan_dir / f"in_accel_{a}_type") or ""
+            m = _TYPE_RE.match(typ)
+            idx = _read(scan_dir / f"in_accel_{a}_index")
+            if not m or idx is None:
+                raise ValueError(f"unsupported scan type for {a}: {typ!r}")
+            if m.group(5):
+                raise ValueError(f"repeated scan elements not supported: {typ!r}")
+            elements.append(
+                ScanElement(
+                    axis=a,
+                    index=int(idx),
+                    little_endian=m.group(1) == "le",
+                    signed=m.group(2) == "s",
+                    realbits=int(m.group(3)),
+                    storagebits=int(m.group(4)),
+                    shift=int(m.group(6)),
+                )
+            )
+        elements.sort(key=lambda e: e.index)
+        size = 0
+        for el in elements:
+            size += (-size) % el.size + el.size
+        largest = max(el.size for el in elements)
+        size += (-size) % largest
+        self._scan = elements
+        self._scan_size = size
+
+        trig = dev / "trigger" / "current_trigger"
+        if trig.exists() and not _read(trig):
+            # Attach the device's own data-ready trigger ("<name>-dev<N>").
+            dev_name = _read(dev / "name") or ""
+            suffix = dev.name[len("iio:device") :]
+            for t in sorted(IIO_ROOT.glob("trigger*")):
+                tname = _read(t / "name") or ""
+                if tname in (f"{dev_name}-dev{suffix}", dev_name) or tname.startswith(f"{dev_name}-"):
+                    _write(trig, tname)
+                    break
+        if (dev / "buffer" / "length").exists():
+            _write(dev / "buffer" / "length", "16")
+        fd = os.open(DEV_ROOT / dev.name, os.O_RDONLY | os.O_NONBLOCK | os.O_CLOEXEC)
+        try:
+            _write(dev / "buffer" / "enable", "1")
+        except OSError:
+            os.close(fd)
+            raise
+        self._buf_fd = fd
+        self._pending = b""
+        # Seed from raw sysfs so we have an orientation before the first sample.
+        try:
+            vals = [int(_read(dev / f"in_accel_{a}_raw") or "") for a in _AXES]
+            self._update(vals[0], vals[1], vals[2])
+        except ValueError:
+            pass
+
+    def _disable_buffer(self) -> None:
+        if self._buf_fd is None:
+            return
+        try:
+            os.close(self._buf_fd)
+        except OSError:
+            pass
+        self._buf_fd = None
+        if self.device is not None:
+            try:
+                _write(self.device / "buffer" / "enable", "0")
+            except OSError:
+                pass
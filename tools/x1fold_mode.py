@@ -12,18 +12,24 @@ This tool implements the "digitizer" half/full toggle via hidraw feature report
 0x03, patching bytes [10..15] to either:
   - half: 9c 18 2c 28 33 1a
   - full: 00 00 00 00 00 00
+
+x1fold_halfblankd.py drives it in-process through DigitizerController (open
+hidraw fds, report lengths from the HID report descriptor); the raw I2C
+fallback goes through I2CTransport.
 """
 
 from __future__ import annotations
 
 import argparse
 import ctypes
+import errno
 import hashlib
 import json
 import os
 import re
 import shutil
 import subprocess
+import sys
 import time
 from dataclasses import dataclass
 from pathlib import Path
@@ -31,6 +37,10 @@ from typing import Any, Iterable
 
 import fcntl
 
+import x1fold_uevent
+from x1fold_uevent import DeviceChange, DeviceNode, DeviceRegistry
+from x1fold_xrandr import XRandR
+
 
 HALF_BYTES = bytes.fromhex("9c 18 2c 28 33 1a")
 FULL_BYTES = b"\x00" * 6
@@ -66,8 +76,10 @@ def _hex_bytes(data: bytes) -> str:
 
 I2C_SLAVE = 0x0703
 I2C_SLAVE_FORCE = 0x0706
+I2C_FUNCS = 0x0705
 I2C_RDWR = 0x0707
 I2C_M_RD = 0x0001
+I2C_FUNC_I2C = 0x00000001
 
 
 class _I2CMsg(ctypes.Structure):
@@ -90,15 +102,6 @@ LENOVO_LEN1034_PREFIX = bytes.fromhex("04 00 39 03 05 00 04 04 09 20 00 00")
 LENOVO_LEN1034_DELTA_OFFSET = 0x0C
 
 
-def _write_all(fd: int, buf: bytes) -> None:
-    offset = 0
-    while offset < len(buf):
-        written = os.write(fd, buf[offset:])
-        if written <= 0:
-            raise OSError("short write")
-        offset += written
-
-
 def build_lenovo_len1034_payload(delta6: bytes) -> bytes:
     if len(delta6) != 6:
         raise ValueError("delta must be exactly 6 bytes")
@@ -108,64 +111,148 @@ def build_lenovo_len1034_payload(delta6: bytes) -> bytes:
     return bytes(buf)
 
 
-def i2c_write_payload(dev: str, addr: int, payload: bytes, *, force: bool = True) -> None:
-    fd = os.open(dev, os.O_RDWR | getattr(os, "O_CLOEXEC", 0))
-    try:
-        fcntl.ioctl(fd, I2C_SLAVE_FORCE if force else I2C_SLAVE, addr)
-        _write_all(fd, payload)
-    finally:
-        os.close(fd)
+I2C_QUERY_WRITE = bytes.fromhex("04 00 34 02 05 00")
+I2C_QUERY_READ_LEN = 1029
+I2C_QUERY_TAIL_OFFSET = 0x10  # bytes [0x10..0x11] toggle 00 00 vs 33 1a
 
 
-def i2c_wr_rd(dev: str, addr: int, write_buf: bytes, read_len: int, *, force: bool = True) -> bytes:
+def i2c_tail_mode(tail2: bytes) -> str:
+    if tail2 == b"\x33\x1a":
+        return "half"
+    if tail2 == b"\x00\x00":
+        return "full"
+    return "unknown"
+
+
+# errnos meaning the node behind an open fd is gone (unbind, resume
+# re-enumeration); the cached discovery is stale.
+_DEVICE_GONE_ERRNOS = (errno.ENODEV, errno.ENXIO, errno.ENOENT, errno.EBADF, errno.ESHUTDOWN)
+
+
+class I2CTransport:
     """
-    Perform a single combined I2C write+read (repeated-start) via I2C_RDWR.
+    Open /dev/i2c-N handle for the LEN1034 mode payloads and the tail query.
+
+    Keeps the adapter fd open with the slave address set, builds both
+    1034-byte payloads, the query write and the read buffer once as ctypes
+    arrays, and submits a switch (zero write + delta write, optionally the
+    verify query) as one I2C_RDWR transaction: repeated starts, so no other
+    master can get in between and the digitizer is never left
+    half-configured with the bus free. Adapters that reject the combined
+    transfer (no I2C_FUNC_I2C, or EOPNOTSUPP/EINVAL for the message mix) get
+    the same messages one I2C_RDWR at a time on the same fd; `last_transfer`
+    records which path was used.
     """
 
-    if read_len <= 0:
-        raise ValueError("read_len must be > 0")
-    fd = os.open(dev, os.O_RDWR | getattr(os, "O_CLOEXEC", 0))
-    try:
-        fcntl.ioctl(fd, I2C_SLAVE_FORCE if force else I2C_SLAVE, addr)
-
-        w = (ctypes.c_uint8 * len(write_buf)).from_buffer_copy(write_buf)
-        r = (ctypes.c_uint8 * read_len)()
+    def __init__(self, dev: str, addr: int, *, force: bool = True) -> None:
+        self.dev = dev
+        self.addr = int(addr)
+        self.force = force
+        self.fd: int | None = None
+        self.combined: bool | None = None  # None = not probed yet
+        self.last_transfer: str | None = None
+        self._payloads = {
+            "full": self._cbuf(build_lenovo_len1034_payload(FULL_BYTES)),
+            "half": self._cbuf(build_lenovo_len1034_payload(HALF_BYTES)),
+        }
+        self._query = self._cbuf(I2C_QUERY_WRITE)
+        self._reply = (ctypes.c_uint8 * I2C_QUERY_READ_LEN)()
+        self._msgs: dict[tuple[str, bool], ctypes.Array] = {}
 
-        msgs = (_I2CMsg * 2)()
-        msgs[0].addr = addr
-        msgs[0].flags = 0
-        msgs[0].len = len(write_buf)
-        msgs[0].buf = ctypes.cast(w, ctypes.c_void_p)
-        msgs[1].addr = addr
-        msgs[1].flags = I2C_M_RD
-        msgs[1].len = read_len
-        msgs[1].buf = ctypes.cast(r, ctypes.c_void_p)
+    @staticmethod
+    def _cbuf(data: bytes) -> ctypes.Array:
+        return (ctypes.c_uint8 * len(data)).from_buffer_copy(data)
 
-        data = _I2CRdwrIoctlData(msgs=ctypes.cast(msgs, ctypes.POINTER(_I2CMsg)), nmsgs=2)
-        fcntl.ioctl(fd, I2C_RDWR, data)
-        return bytes(r)
-    finally:
-        os.close(fd)
+    def _msg(self, buf: ctypes.Array, flags: int = 0) -> _I2CMsg:
+        return _I2CMsg(addr=self.addr, flags=flags, len=len(buf), buf=ctypes.cast(buf, ctypes.c_void_p))
 
+    def _open(self) -> int:
+        if self.fd is not None:
+            return self.fd
+        fd = os.open(self.dev, os.O_RDWR | getattr(os, "O_CLOEXEC", 0))
+        try:
+            fcntl.ioctl(fd, I2C_SLAVE_FORCE if self.force else I2C_SLAVE, self.addr)
+            if self.combined is None:
+                funcs = ctypes.c_ulong(0)
+                try:
+                    fcntl.ioctl(fd, I2C_FUNCS, funcs, True)
+                    self.combined = bool(funcs.value & I2C_FUNC_I2C)
+                except OSError:
+                    self.combined = False
+        except OSError:
+            os.close(fd)
+            raise
+        self.fd = fd
+        return fd
+
+    def _sequence(self, mode: str | None, verify: bool) -> ctypes.Array:
+        key = (mode or "", verify)
+        msgs = self._msgs.get(key)
+        if msgs is None:
+            parts: list[_I2CMsg] = []
+            if mode is not None:
+                # Match Windows: an initial "all-zero tail" write, then the 6-byte delta write.
+                parts.append(self._msg(self._payloads["full"]))
+                if mode == "half":
+                    parts.append(self._msg(self._payloads["half"]))
+            if verify:
+                parts.append(self._msg(self._query))
+                parts.append(self._msg(self._reply, I2C_M_RD))
+            msgs = self._msgs[key] = (_I2CMsg * len(parts))(*parts)
+        return msgs
+
+    def _rdwr(self, fd: int, msgs: ctypes.Array, start: int, count: int) -> None:
+        first = ctypes.cast(ctypes.addressof(msgs) + start * ctypes.sizeof(_I2CMsg), ctypes.POINTER(_I2CMsg))
+        fcntl.ioctl(fd, I2C_RDWR, _I2CRdwrIoctlData(msgs=first, nmsgs=count))
+
+    def _transfer(self, msgs: ctypes.Array, verify: bool) -> None:
+        try:
+            fd = self._open()
+            if self.combined:
+                try:
+                    self._rdwr(fd, msgs, 0, len(msgs))
+                    self.last_transfer = "combined"
+                    return
+                except OSError as exc:
+                    if exc.errno not in (errno.EOPNOTSUPP, errno.EINVAL):
+                        raise
+                    self.combined = False
+            # Split: each write on its own, the query write+read kept together.
+            n = len(msgs) - 2 if verify else len(msgs)
+            for i in range(n):
+                self._rdwr(fd, msgs, i, 1)
+            if verify:
+                self._rdwr(fd, msgs, n, 2)
+            self.last_transfer = "split"
+        except OSError as exc:
+            if exc.errno in _DEVICE_GONE_ERRNOS:
+                self.close()
+            raise
 
-I2C_QUERY_WRITE = bytes.fromhex("04 00 34 02 05 00")
-I2C_QUERY_READ_LEN = 1029
-I2C_QUERY_TAIL_OFFSET = 0x10  # bytes [0x10..0x11] toggle 00 00 vs 33 1a
+    def _tail(self) -> bytes:
+        return bytes(self._reply[I2C_QUERY_TAIL_OFFSET : I2C_QUERY_TAIL_OFFSET + 2])
 
+    def switch(self, mode: str, *, verify: bool = False) -> bytes | None:
+        """
+        Write the `mode` payload(s); with `verify`, also query and return the tail.
+        """
 
-def i2c_query_tail(dev: str, addr: int) -> bytes:
-    resp = i2c_wr_rd(dev, addr, I2C_QUERY_WRITE, I2C_QUERY_READ_LEN, force=True)
-    if len(resp) < I2C_QUERY_TAIL_OFFSET + 2:
-        raise OSError("short I2C query response")
-    return resp[I2C_QUERY_TAIL_OFFSET : I2C_QUERY_TAIL_OFFSET + 2]
+        if mode not in self._payloads:
+            raise ValueError(f"unknown mode: {mode!r}")
+        self._transfer(self._sequence(mode, verify), verify)
+        return self._tail() if verify else None
 
+    def query_tail(self) -> bytes:
+        self._transfer(self._sequence(None, True), True)
+        return self._tail()
 
-def i2c_tail_mode(tail2: bytes) -> str:
-    if tail2 == b"\x33\x1a":
-        return "half"
-    if tail2 == b"\x00\x00":
-        return "full"
-    return "unknown"
+    def close(self) -> None:
+        if self.fd is not None:
+            try:
+                os.close(self.fd)
+            except OSError:
+                pass
+        self.fd = None
 
 
 # --- hidraw feature ioctls --------------------------------------------------
@@ -197,6 +284,62 @@ def hidiocsfeature(size: int) -> int:
     return _ioc(IOC_READ | IOC_WRITE, ord("H"), 0x06, size)
 
 
+HID_MAX_DESCRIPTOR_SIZE = 4096
+# HIDIOCGRDESCSIZE = _IOR('H', 0x01, int)
+HIDIOCGRDESCSIZE = _ioc(IOC_READ, ord("H"), 0x01, 4)
+# HIDIOCGRDESC = _IOR('H', 0x02, struct hidraw_report_descriptor {__u32 size; __u8 value[4096];})
+HIDIOCGRDESC = _ioc(IOC_READ, ord("H"), 0x02, 4 + HID_MAX_DESCRIPTOR_SIZE)
+
+# Feature report length used when the descriptor can't be read/parsed (the
+# historical --report-len default).
+REPORT_LEN_FALLBACK = 256
+# For the saved-time estimate: i2c-hid on this machine runs the bus in Fast
+# mode; each byte costs 9 clocks (8 data + ACK).
+I2C_HID_BUS_HZ = 400_000
+
+
+def feature_report_lengths(desc: bytes) -> dict[int, int]:
+    """
+    Length of every feature report in a HID report descriptor, in bytes.
+
+    The length is what HIDIOCGFEATURE/HIDIOCSFEATURE transfer: the report
+    number byte plus the report's fields (report ID 0 when the descriptor
+    uses no IDs). Only short items matter here: Report Size/Count/ID and
+    Push/Pop (global), Feature (main); long items are skipped.
+    """
+
+    bits: dict[int, int] = {}
+    size = count = report_id = 0
+    stack: list[tuple[int, int, int]] = []
+    i = 0
+    while i < len(desc):
+        prefix = desc[i]
+        if prefix == 0xFE:  # long item: bDataSize, bLongItemTag, data
+            if i + 1 >= len(desc):
+                break
+            i += 3 + desc[i + 1]
+            continue
+        n = (0, 1, 2, 4)[prefix & 0x03]
+        value = int.from_bytes(desc[i + 1 : i + 1 + n], "little")
+        i += 1 + n
+        item_type = (prefix >> 2) & 0x03
+        tag = prefix >> 4
+        if item_type == 1:  # global
+            if tag == 0x7:
+                size = value
+            elif tag == 0x9:
+                count = value
+            elif tag == 0x8:
+                report_id = value
+            elif tag == 0xA:
+                stack.append((size, count, report_id))
+            elif tag == 0xB and stack:
+                size, count, report_id = stack.pop()
+        elif item_type == 0 and tag == 0xB:  # main: Feature
+            bits[report_id] = bits.get(report_id, 0) + size * count
+    return {rid: 1 + (nbits + 7) // 8 for rid, nbits in bits.items()}
+
+
 @dataclass(frozen=True)
 class HidrawDevice:
     dev: Path
@@ -215,16 +358,6 @@ class HidrawDevice:
         }
 
 
-def _parse_uevent_kv(uevent_text: str) -> dict[str, str]:
-    out: dict[str, str] = {}
-    for line in uevent_text.splitlines():
-        if "=" not in line:
-            continue
-        k, v = line.split("=", 1)
-        out[k.strip()] = v.strip()
-    return out
-
-
 def _hid_id_vendor_product(hid_id: str) -> tuple[int, int] | None:
     # Format typically "0005:0000056A:000052BA" (bus:vendor:product).
     m = re.fullmatch(r"[0-9A-Fa-f]{4}:([0-9A-Fa-f]{8}):([0-9A-Fa-f]{8})", hid_id.strip())
@@ -235,20 +368,25 @@ def _hid_id_vendor_product(hid_id: str) -> tuple[int, int] | None:
     return vendor, product
 
 
-def discover_wacom_hidraw_candidates() -> list[HidrawDevice]:
-    out: list[HidrawDevice] = []
-    for dev in sorted(Path("/dev").glob("hidraw*")):
-        sysfs = Path("/sys/class/hidraw") / dev.name / "device"
-        if not sysfs.exists():
-            continue
-        uevent_path = sysfs / "uevent"
-        uevent_text = _safe_read_text(uevent_path) or ""
-        kv = _parse_uevent_kv(uevent_text)
-        hid_name = kv.get("HID_NAME")
-        hid_id = kv.get("HID_ID")
-        driver = kv.get("DRIVER")
-        out.append(HidrawDevice(dev=dev, sysfs=sysfs, hid_name=hid_name, hid_id=hid_id, driver=driver))
-    return out
+def discover_wacom_hidraw_candidates(registry: DeviceRegistry | None = None) -> list[HidrawDevice]:
+    """
+    All hidraw nodes with their HID parent's identity, from the uevent registry.
+    """
+
+    registry = registry or x1fold_uevent.shared()
+    return [hidraw_device(node) for node in registry.hidraw() if node.devnode is not None]
+
+
+def hidraw_device(node: DeviceNode) -> HidrawDevice:
+    assert node.devnode is not None
+    kv = node.props
+    return HidrawDevice(
+        dev=node.devnode,
+        sysfs=node.sysfs,
+        hid_name=kv.get("HID_NAME"),
+        hid_id=kv.get("HID_ID"),
+        driver=kv.get("DRIVER"),
+    )
 
 
 def select_wacf2200_col02_devices(devices: Iterable[HidrawDevice]) -> list[HidrawDevice]:
@@ -271,48 +409,167 @@ def select_wacf2200_col02_devices(devices: Iterable[HidrawDevice]) -> list[Hidra
     return selected
 
 
-def hid_get_feature(dev: HidrawDevice, report_id: int, size: int) -> bytes:
-    last_exc: OSError | None = None
-    for attempt in range(3):
-        fd = os.open(str(dev.dev), os.O_RDWR | getattr(os, "O_CLOEXEC", 0))
-        try:
-            buf = bytearray(size)
-            if size > 0:
-                buf[0] = report_id & 0xFF
-            fcntl.ioctl(fd, hidiocgfeature(size), buf, True)
-            return bytes(buf)
-        except OSError as exc:
-            last_exc = exc
-            if exc.errno in (110, 121) and attempt < 2:
-                time.sleep(0.15 * (attempt + 1))
-                continue
-            raise
-        finally:
-            os.close(fd)
-    if last_exc is not None:
-        raise last_exc
-    raise RuntimeError("hid_get_feature failed without exception")
+# Transient i2c-hid errors worth a short retry.
+_HIDRAW_RETRY_ERRNOS = (errno.ETIMEDOUT, errno.EREMOTEIO)
 
 
-def hid_set_feature(dev: HidrawDevice, report: bytes) -> None:
-    last_exc: OSError | None = None
-    for attempt in range(3):
-        fd = os.open(str(dev.dev), os.O_RDWR | getattr(os, "O_CLOEXEC", 0))
-        try:
-            buf = bytearray(report)
-            fcntl.ioctl(fd, hidiocsfeature(len(buf)), buf, True)
-            return
-        except OSError as exc:
-            last_exc = exc
-            if exc.errno in (110, 121) and attempt < 2:
-                time.sleep(0.15 * (attempt + 1))
-                continue
-            raise
-        finally:
-            os.close(fd)
-    if last_exc is not None:
-        raise last_exc
-    raise RuntimeError("hid_set_feature failed without exception")
+class DigitizerController:
+    """
+    Long-lived handle on the Wacom hidraw node(s) for repeated get/patch/set.
+
+    Resolves the candidates once, keeps one fd per node open, and reuses
+    preallocated report buffers across get/set calls (x1fold_halfblankd keeps
+    one for its lifetime; the CLI uses a temporary one). Transient i2c-hid
+    errors are retried. The cache is dropped when the device registry reports
+    a hidraw add/remove (x1fold_uevent) or when an ioctl fails with a "device
+    gone" errno, so the next call re-discovers (e.g. after i2c-hid
+    re-enumerates on resume).
+    """
+
+    def __init__(self, registry: DeviceRegistry | None = None) -> None:
+        self.registry = registry or x1fold_uevent.shared()
+        self.registry.subscribe(self._on_change)
+        self._devices: list[HidrawDevice] | None = None
+        self._fds: dict[Path, int] = {}
+        # Report buffers by size; set has its own since callers patch a
+        # report they just read into the get buffer.
+        self._get_bufs: dict[int, bytearray] = {}
+        self._set_bufs: dict[int, bytearray] = {}
+        self._i2c: dict[tuple[str, int], I2CTransport] = {}
+        # HID_ID -> {report id: feature length}; survives invalidate() since a
+        # re-enumerated digitizer has the same descriptor.
+        self._report_lens: dict[str, dict[int, int]] = {}
+        self.discoveries = 0
+        self.invalidations = 0
+        self.last_invalidate: str | None = None
+
+    def _on_change(self, change: DeviceChange) -> None:
+        if change.kind == "hidraw":
+            self.invalidate(f"uevent_{change.action} {change.name}".rstrip())
+        elif change.kind == "i2c":
+            self._close_i2c()
+
+    def _close_i2c(self) -> None:
+        for transport in self._i2c.values():
+            transport.close()
+        self._i2c.clear()
+
+    def i2c(self, dev: str, addr: int) -> I2CTransport:
+        """
+        Persistent I2CTransport for `dev`/`addr` (dropped on i2c uevents).
+        """
+
+        transport = self._i2c.get((dev, addr))
+        if transport is None:
+            transport = self._i2c[(dev, addr)] = I2CTransport(dev, addr)
+        return transport
+
+    def invalidate(self, reason: str) -> None:
+        for fd in self._fds.values():
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+        self._fds.clear()
+        if self._devices is not None:
+            self.invalidations += 1
+            self.last_invalidate = reason
+        self._devices = None
+
+    def devices(self) -> list[HidrawDevice]:
+        """
+        Wacom digitizer hidraw nodes (discovered once, until invalidated).
+        """
+
+        self.registry.poll()
+        if self._devices is None:
+            self._devices = select_wacf2200_col02_devices(discover_wacom_hidraw_candidates(self.registry))
+            self.discoveries += 1
+        return self._devices
+
+    def wait_for_devices(self, timeout_s: float) -> list[HidrawDevice]:
+        """
+        Return the digitizer nodes, blocking up to `timeout_s` for a hidraw add
+        uevent if there are none yet (e.g. right after resume).
+        """
+
+        deadline = time.monotonic() + max(0.0, float(timeout_s))
+        while True:
+            devs = self.devices()
+            remaining = deadline - time.monotonic()
+            if devs or remaining <= 0 or not self.registry.live():
+                return devs
+            if self.registry.wait(lambda c: c.kind == "hidraw" and c.action in ("add", "resync"), remaining) is None:
+                return self.devices()
+
+    def _fd(self, dev: HidrawDevice) -> int:
+        fd = self._fds.get(dev.dev)
+        if fd is None:
+            fd = self._fds[dev.dev] = os.open(str(dev.dev), os.O_RDWR | getattr(os, "O_CLOEXEC", 0))
+        return fd
+
+    @staticmethod
+    def _buf(bufs: dict[int, bytearray], size: int) -> bytearray:
+        buf = bufs.get(size)
+        if buf is None:
+            buf = bufs[size] = bytearray(size)
+        return buf
+
+    def _ioctl(self, dev: HidrawDevice, request: int, buf: bytearray) -> None:
+        for attempt in range(3):
+            try:
+                fcntl.ioctl(self._fd(dev), request, buf, True)
+                return
+            except OSError as exc:
+                if exc.errno in _DEVICE_GONE_ERRNOS:
+                    self.invalidate(f"{dev.dev}: errno {exc.errno}")
+                    raise
+                if exc.errno in _HIDRAW_RETRY_ERRNOS and attempt < 2:
+                    time.sleep(0.15 * (attempt + 1))
+                    continue
+                raise
+
+    def report_descriptor(self, dev: HidrawDevice) -> bytes:
+        """
+        The raw HID report descriptor (kernel copy; no bus traffic).
+        """
+
+        size = bytearray(4)
+        self._ioctl(dev, HIDIOCGRDESCSIZE, size)
+        n = min(int.from_bytes(size, sys.byteorder), HID_MAX_DESCRIPTOR_SIZE)
+        buf = bytearray(4 + HID_MAX_DESCRIPTOR_SIZE)
+        buf[0:4] = n.to_bytes(4, sys.byteorder)
+        self._ioctl(dev, HIDIOCGRDESC, buf)
+        return bytes(buf[4 : 4 + n])
+
+    def feature_report_len(self, dev: HidrawDevice, report_id: int) -> int | None:
+        """
+        Descriptor length of feature report `report_id`, cached per HID_ID.
+        """
+
+        key = dev.hid_id or str(dev.dev)
+        lens = self._report_lens.get(key)
+        if lens is None:
+            lens = self._report_lens[key] = feature_report_lengths(self.report_descriptor(dev))
+        return lens.get(report_id)
+
+    def get_feature(self, dev: HidrawDevice, report_id: int, size: int) -> bytes:
+        buf = self._buf(self._get_bufs, size)
+        buf[:] = bytes(size)
+        if size > 0:
+            buf[0] = report_id & 0xFF
+        self._ioctl(dev, hidiocgfeature(size), buf)
+        return bytes(buf)
+
+    def set_feature(self, dev: HidrawDevice, report: bytes) -> None:
+        buf = self._buf(self._set_bufs, len(report))
+        buf[:] = report
+        self._ioctl(dev, hidiocsfeature(len(buf)), buf)
+
+    def close(self) -> None:
+        self.invalidate("close")
+        self._close_i2c()
+        self.registry.unsubscribe(self._on_change)
 
 
 def patch_report(report: bytes, offset: int, patch: bytes) -> bytes:
@@ -334,20 +591,19 @@ def report_mode(report: bytes, offset: int) -> str:
     return "unknown"
 
 
-def read_display_status() -> dict[str, Any]:
-    drm_root = Path("/sys/class/drm")
+def read_display_status(registry: DeviceRegistry | None = None) -> dict[str, Any]:
+    registry = registry or x1fold_uevent.shared()
     edp: list[dict[str, Any]] = []
-    if drm_root.exists():
-        for status_path in sorted(drm_root.glob("card*-eDP-*/status")):
-            connector_dir = status_path.parent
-            edp.append(
-                {
-                    "connector": connector_dir.name,
-                    "status": _safe_read_text(status_path),
-                    "dpms": _safe_read_text(connector_dir / "dpms"),
-                    "mode": _safe_read_text(connector_dir / "mode"),
-                }
-            )
+    for node in registry.edp_connectors():
+        connector_dir = node.sysfs
+        edp.append(
+            {
+                "connector": node.name,
+                "status": _safe_read_text(connector_dir / "status"),
+                "dpms": _safe_read_text(connector_dir / "dpms"),
+                "mode": _safe_read_text(connector_dir / "mode"),
+            }
+        )
 
     fb0 = Path("/sys/class/graphics/fb0")
     fb: dict[str, Any] | None = None
@@ -390,9 +646,29 @@ def _xrandr(display: str, argv: list[str]) -> subprocess.CompletedProcess[str]:
     return subprocess.run(["xrandr", *argv], check=False, capture_output=True, text=True, env=env)
 
 
+_X11_RANDR: dict[str, XRandR] = {}
+
+
+def _x11_randr(display: str) -> XRandR | None:
+    """
+    RandR connection for `display`, kept open across calls when x1fold_mode runs
+    inside x1fold_halfblankd; None falls back to the `xrandr` binary.
+    """
+
+    rr = _X11_RANDR.get(display)
+    if rr is None:
+        rr = _X11_RANDR[display] = XRandR(display)
+    ok, _ = rr.connect()
+    return rr if ok else None
+
+
 def _x11_pick_output(display: str, preferred: str | None) -> str | None:
     if preferred:
         return preferred
+    rr = _x11_randr(display)
+    if rr is not None:
+        rr.refresh()
+        return rr.pick_output(None)
     proc = _xrandr(display, ["--query"])
     if proc.returncode != 0:
         return None
@@ -424,6 +700,16 @@ def _x11_monitor_geometry(display: str, output: str) -> tuple[int, int, int, int
 
 
 def _x11_set_monitor(display: str, *, name: str, output: str, target_h: int) -> tuple[bool, str]:
+    rr = _x11_randr(display)
+    if rr is not None:
+        rr.refresh()
+        geom = rr.monitor_geometry(output)
+        if not geom:
+            return False, rr.error or f"failed to read monitor geometry for {output}"
+        w_px, _w_mm, full_h, _full_mm = geom
+        if target_h <= 0 or target_h > full_h:
+            return False, f"target height must be in 1..{full_h}"
+        return rr.set_monitor(name, output=output, x=0, y=0, w=w_px, h=target_h)
     _x11_del_monitor(display, name=name)
     geom = _x11_monitor_geometry(display, output)
     if not geom:
@@ -441,6 +727,9 @@ def _x11_set_monitor(display: str, *, name: str, output: str, target_h: int) ->
 
 
 def _x11_del_monitor(display: str, *, name: str) -> tuple[bool, str]:
+    rr = _x11_randr(display)
+    if rr is not None:
+        return rr.delete_monitor(name)
     proc = _xrandr(display, ["--delmonitor", name])
     if proc.returncode == 0:
         return True, ""
@@ -501,25 +790,106 @@ def apply_display_mode(args: argparse.Namespace) -> dict[str, Any]:
     return {"requested": display_mode, "used": "none", "ok": False, "error": "no usable display backend detected"}
 
 
-def cmd_status(args: argparse.Namespace) -> int:
-    all_devs = discover_wacom_hidraw_candidates()
-    candidates = select_wacf2200_col02_devices(all_devs)
+def resolve_report_len(
+    args: argparse.Namespace,
+    controller: DigitizerController,
+    dev: HidrawDevice,
+) -> tuple[int, dict[str, Any]]:
+    """
+    Pick the feature report length for `dev`: --report-len when given, else the
+    report descriptor's length for --report-id, else REPORT_LEN_FALLBACK.
+
+    Returns (length, info); info["warning"] is set when --report-len disagrees
+    with the descriptor (or the descriptor length can't hold the patch).
+    """
+
+    configured = args.report_len
+    info: dict[str, Any] = {"configured": configured, "descriptor": None}
+    try:
+        desc_len = controller.feature_report_len(dev, args.report_id)
+    except OSError as exc:
+        desc_len = None
+        info["descriptor_error"] = f"[{exc.errno}] {exc.strerror}"
+    info["descriptor"] = desc_len
+    if desc_len is not None and desc_len < args.patch_offset + 6:
+        info["warning"] = (
+            f"{dev.dev}: descriptor length {desc_len} of report 0x{args.report_id:02x} "
+            f"does not cover patch offset {args.patch_offset}; ignoring it"
+        )
+        desc_len = None
+    if configured is not None:
+        used, source = int(configured), "configured"
+        if desc_len is not None and desc_len != used:
+            info["warning"] = (
+                f"{dev.dev}: --report-len {used} differs from the descriptor length {desc_len} "
+                f"of report 0x{args.report_id:02x}"
+            )
+    elif desc_len is not None:
+        used, source = desc_len, "descriptor"
+    else:
+        used, source = REPORT_LEN_FALLBACK, "fallback"
+    # A hidraw switch moves the report three times (get, set, verify get).
+    baseline = int(configured) if configured is not None else REPORT_LEN_FALLBACK
+    exact = desc_len if desc_len is not None else used
+    info.update(
+        used=used,
+        source=source,
+        bytes_saved_per_transfer=baseline - exact,
+        est_saved_per_switch_s=round(3 * (baseline - exact) * 9 / I2C_HID_BUS_HZ, 4),
+    )
+    return used, info
+
+
+def _warn(msg: str) -> None:
+    print(f"warning: {msg}", file=sys.stderr, flush=True)
+
+
+def _i2c_dev(args: argparse.Namespace, registry: DeviceRegistry | None = None) -> str:
+    """
+    --i2c-dev, else --i2c-bus, else the adapter hosting WACF2200 (bus 1 if unknown).
+    """
+
+    if args.i2c_dev:
+        return str(args.i2c_dev)
+    bus = args.i2c_bus
+    if bus is None:
+        bus = (registry or x1fold_uevent.shared()).wacom_i2c_bus()
+    return f"/dev/i2c-{int(bus if bus is not None else 1)}"
+
+
+def read_status(args: argparse.Namespace, controller: DigitizerController | None = None) -> dict[str, Any]:
+    """
+    Collect the `status` JSON blob without printing it (library entry point).
+
+    Long-running callers pass a DigitizerController to skip discovery and
+    re-opening the hidraw nodes; without one a temporary controller is used.
+    """
+
+    if controller is None:
+        controller = DigitizerController()
+        try:
+            return read_status(args, controller)
+        finally:
+            controller.close()
+
+    candidates = controller.devices()
+    lens = {dev.dev: resolve_report_len(args, controller, dev) for dev in candidates}
 
     status: dict[str, Any] = {
         "ts": utc_iso(),
         "mode": None,
         "mode_source": None,
         "report_id": f"0x{args.report_id:02x}",
-        "report_len": args.report_len,
+        "report_len": lens[candidates[0].dev][0] if candidates else args.report_len,
         "patch_offset": args.patch_offset,
         "expected_half_bytes": _hex_bytes(HALF_BYTES),
         "expected_full_bytes": _hex_bytes(FULL_BYTES),
         "candidates": [d.to_json() for d in candidates],
         "devices": [],
-        "display": read_display_status(),
+        "display": read_display_status(controller.registry),
         "i2c_query": {
             "enabled": bool(args.i2c_query),
-            "dev": args.i2c_dev or f"/dev/i2c-{int(args.i2c_bus)}",
+            "dev": _i2c_dev(args, controller.registry),
             "addr": f"0x{int(args.i2c_addr):02x}",
             "tail_offset": f"0x{I2C_QUERY_TAIL_OFFSET:x}",
             "tail_0x10_0x11": None,
@@ -529,8 +899,9 @@ def cmd_status(args: argparse.Namespace) -> int:
 
     for dev in candidates:
         entry: dict[str, Any] = dev.to_json()
+        report_len, entry["report_len"] = lens[dev.dev]
         try:
-            r = hid_get_feature(dev, args.report_id, args.report_len)
+            r = controller.get_feature(dev, args.report_id, report_len)
             entry["report_sha256"] = hashlib.sha256(r).hexdigest()
             entry["mode"] = report_mode(r, args.patch_offset)
             entry["bytes_10_15"] = _hex_bytes(r[args.patch_offset : args.patch_offset + 6])
@@ -543,7 +914,7 @@ def cmd_status(args: argparse.Namespace) -> int:
         i2c_dev = status["i2c_query"]["dev"]
         i2c_addr = int(args.i2c_addr)
         try:
-            tail = i2c_query_tail(str(i2c_dev), i2c_addr)
+            tail = controller.i2c(str(i2c_dev), i2c_addr).query_tail()
             status["i2c_query"]["tail_0x10_0x11"] = _hex_bytes(tail)
             status["i2c_query"]["mode"] = i2c_tail_mode(tail)
             if status["i2c_query"]["mode"] in ("half", "full"):
@@ -560,17 +931,44 @@ def cmd_status(args: argparse.Namespace) -> int:
             status["mode"] = next(iter(modes))
             status["mode_source"] = "hidraw"
 
+    return status
+
+
+def cmd_status(args: argparse.Namespace) -> int:
+    status = read_status(args)
+    for entry in status["devices"]:
+        if entry["report_len"].get("warning"):
+            _warn(entry["report_len"]["warning"])
     print(json.dumps(status, indent=2, sort_keys=True))
     return 0
 
 
-def cmd_set(args: argparse.Namespace) -> int:
+def set_mode(
+    args: argparse.Namespace,
+    controller: DigitizerController | None = None,
+) -> tuple[dict[str, Any], list[str]]:
+    """
+    Apply `set half|full` and return (result JSON, digitizer failures).
+
+    This is the library entry point used by long-running callers
+    (x1fold_halfblankd.py) so they don't pay an interpreter spawn per switch;
+    they also pass a DigitizerController so hidraw discovery and fds persist
+    across switches. Raises SystemExit for fatal setup errors, like the CLI.
+    """
+
+    if controller is None:
+        controller = DigitizerController()
+        try:
+            return set_mode(args, controller)
+        finally:
+            controller.close()
+
     target = HALF_BYTES if args.mode == "half" else FULL_BYTES
 
-    all_devs = discover_wacom_hidraw_candidates()
-    candidates = select_wacf2200_col02_devices(all_devs)
+    candidates = controller.wait_for_devices(float(getattr(args, "wait_device_s", 0.0) or 0.0))
     if not candidates:
         raise SystemExit("no hidraw candidates found (need WACF2200 / 056a:52ba?)")
+    lens = {dev.dev: resolve_report_len(args, controller, dev) for dev in candidates}
 
     digitizer = str(args.digitizer).strip().lower()
     if digitizer not in ("auto", "hidraw", "i2c"):
@@ -581,8 +979,9 @@ def cmd_set(args: argparse.Namespace) -> int:
         rows: list[dict[str, Any]] = []
         for dev in candidates:
             row: dict[str, Any] = dev.to_json()
+            report_len, row["report_len"] = lens[dev.dev]
             try:
-                before = hid_get_feature(dev, args.report_id, args.report_len)
+                before = controller.get_feature(dev, args.report_id, report_len)
                 row["before_mode"] = report_mode(before, args.patch_offset)
                 row["before_bytes_10_15"] = _hex_bytes(before[args.patch_offset : args.patch_offset + 6])
             except OSError as exc:
@@ -595,7 +994,7 @@ def cmd_set(args: argparse.Namespace) -> int:
         failures: list[str] = []
         for dev, row in zip(candidates, rows, strict=False):
             try:
-                verify = hid_get_feature(dev, args.report_id, args.report_len)
+                verify = controller.get_feature(dev, args.report_id, lens[dev.dev][0])
                 row["verify_mode"] = report_mode(verify, args.patch_offset)
                 row["verify_bytes_10_15"] = _hex_bytes(verify[args.patch_offset : args.patch_offset + 6])
                 if verify[args.patch_offset : args.patch_offset + 6] != target:
@@ -610,9 +1009,10 @@ def cmd_set(args: argparse.Namespace) -> int:
         rows: list[dict[str, Any]] = []
         for dev in candidates:
             row: dict[str, Any] = dev.to_json()
+            report_len, row["report_len"] = lens[dev.dev]
             wrote = False
             try:
-                before = hid_get_feature(dev, args.report_id, args.report_len)
+                before = controller.get_feature(dev, args.report_id, report_len)
                 before_bytes = before[args.patch_offset : args.patch_offset + 6]
                 row["before_mode"] = report_mode(before, args.patch_offset)
                 row["before_bytes_10_15"] = _hex_bytes(before_bytes)
@@ -625,7 +1025,7 @@ def cmd_set(args: argparse.Namespace) -> int:
                     if args.dry_run:
                         row["dry_run"] = True
                     else:
-                        hid_set_feature(dev, after)
+                        controller.set_feature(dev, after)
                         wrote = True
             except OSError as exc:
                 failures.append(f"{dev.dev}: [{exc.errno}] {exc.strerror}")
@@ -642,7 +1042,7 @@ def cmd_set(args: argparse.Namespace) -> int:
             if not row.get("_wrote"):
                 continue
             try:
-                verify = hid_get_feature(dev, args.report_id, args.report_len)
+                verify = controller.get_feature(dev, args.report_id, lens[dev.dev][0])
                 row["verify_mode"] = report_mode(verify, args.patch_offset)
                 row["verify_bytes_10_15"] = _hex_bytes(verify[args.patch_offset : args.patch_offset + 6])
                 if verify[args.patch_offset : args.patch_offset + 6] != target:
@@ -655,20 +1055,28 @@ def cmd_set(args: argparse.Namespace) -> int:
             row.pop("_wrote", None)
         return rows, failures
 
+    i2c_info: dict[str, Any] = {
+        "dev": _i2c_dev(args, controller.registry),
+        "addr": f"0x{int(args.i2c_addr):02x}",
+        "payload_len": LENOVO_LEN1034_SIZE,
+        "delta_offset": f"0x{LENOVO_LEN1034_DELTA_OFFSET:x}",
+    }
+
     def _attempt_i2c() -> tuple[list[dict[str, Any]], list[str]]:
         rows, failures = _read_before()
         if not args.dry_run:
-            dev = args.i2c_dev or f"/dev/i2c-{int(args.i2c_bus)}"
-            addr = int(args.i2c_addr)
-            full_payload = build_lenovo_len1034_payload(FULL_BYTES)
-            half_payload = build_lenovo_len1034_payload(HALF_BYTES)
+            transport = controller.i2c(_i2c_dev(args, controller.registry), int(args.i2c_addr))
+            verify_i2c = bool(getattr(args, "i2c_verify", False))
+            start = time.monotonic()
             try:
-                if args.mode == "half":
-                    # Match Windows: an initial "all-zero tail" write followed by the 6-byte delta write.
-                    i2c_write_payload(dev, addr, full_payload, force=True)
-                    i2c_write_payload(dev, addr, half_payload, force=True)
-                else:
-                    i2c_write_payload(dev, addr, full_payload, force=True)
+                tail = transport.switch(args.mode, verify=verify_i2c)
+                i2c_info["transfer"] = transport.last_transfer
+                i2c_info["transfer_s"] = round(time.monotonic() - start, 4)
+                if tail is not None:
+                    i2c_info["verify_tail"] = _hex_bytes(tail)
+                    i2c_info["verify_mode"] = i2c_tail_mode(tail)
+                    if i2c_info["verify_mode"] != args.mode:
+                        failures.append(f"i2c verify mismatch (tail {i2c_info['verify_tail']})")
             except OSError as exc:
                 failures.append(f"i2c write failed: [{exc.errno}] {exc.strerror}")
         for row in rows:
@@ -712,35 +1120,54 @@ def cmd_set(args: argparse.Namespace) -> int:
         "digitizer_attempted": attempted,
         "display": display_result,
         "report_id": f"0x{args.report_id:02x}",
-        "report_len": args.report_len,
+        "report_len": lens[candidates[0].dev][0],
         "patch_offset": args.patch_offset,
         "patch_bytes": _hex_bytes(target),
-        "i2c": {
-            "dev": args.i2c_dev or f"/dev/i2c-{int(args.i2c_bus)}",
-            "addr": f"0x{int(args.i2c_addr):02x}",
-            "payload_len": LENOVO_LEN1034_SIZE,
-            "delta_offset": f"0x{LENOVO_LEN1034_DELTA_OFFSET:x}",
-        },
+        "i2c": i2c_info,
         "dry_run": args.dry_run,
         "results": results,
     }
-    print(json.dumps(out, indent=2, sort_keys=True))
+    return out, failures
+
+
+def set_mode_error(args: argparse.Namespace, out: dict[str, Any], failures: list[str]) -> str | None:
+    """
+    Return the error message `set` exits with, or None on success.
+    """
+
     display_info = out.get("display", {})
     if (
         display_info.get("ok") is False
         and not display_info.get("skipped")
         and str(args.display).strip().lower() != "none"
     ):
-        raise SystemExit(display_info.get("error", "display backend failed"))
+        return str(display_info.get("error", "display backend failed"))
     if failures:
-        raise SystemExit("; ".join(failures))
+        return "; ".join(failures)
+    return None
+
+
+def cmd_set(args: argparse.Namespace) -> int:
+    out, failures = set_mode(args)
+    for row in out.get("results", []):
+        if row.get("report_len", {}).get("warning"):
+            _warn(row["report_len"]["warning"])
+    print(json.dumps(out, indent=2, sort_keys=True))
+    err = set_mode_error(args, out, failures)
+    if err:
+        raise SystemExit(err)
     return 0
 
 
 def build_parser() -> argparse.ArgumentParser:
     parser = argparse.ArgumentParser(description="Switch X1 Fold full-height vs halfblank mode on Linux.")
     parser.add_argument("--report-id", type=lambda s: int(s, 0), default=0x03, help="Feature report ID (default: 0x03)")
-    parser.add_argument("--report-len", type=int, default=256, help="Feature report length to get/set (default: 256)")
+    parser.add_argument(
+        "--report-len",
+        type=int,
+        default=None,
+        help=f"Feature report length to get/set (default: from the HID report descriptor, else {REPORT_LEN_FALLBACK})",
+    )
     parser.add_argument("--patch-offset", type=int, default=10, help="Byte offset in report to patch (default: 10)")
     sub = parser.add_subparsers(dest="cmd", required=True)
 
@@ -759,7 +1186,12 @@ def build_parser() -> argparse.ArgumentParser:
         help="Disable the Windows-derived I2C query (w6+r1029).",
     )
     p_status.set_defaults(i2c_query=False)
-    p_status.add_argument("--i2c-bus", type=int, default=1, help="I2C bus number for 0x0A query (default: 1).")
+    p_status.add_argument(
+        "--i2c-bus",
+        type=int,
+        default=None,
+        help="I2C bus number for 0x0A query (default: the adapter hosting WACF2200, else 1).",
+    )
     p_status.add_argument(
         "--i2c-addr",
         type=lambda s: int(s, 0),
@@ -808,7 +1240,12 @@ def build_parser() -> argparse.ArgumentParser:
         default="",
         help="XRandR output name override for x11 backend (default: auto pick eDP-*).",
     )
-    p_set.add_argument("--i2c-bus", type=int, default=1, help="I2C bus number for 0x0A payload (default: 1).")
+    p_set.add_argument(
+        "--i2c-bus",
+        type=int,
+        default=None,
+        help="I2C bus number for 0x0A payload (default: the adapter hosting WACF2200, else 1).",
+    )
     p_set.add_argument(
         "--i2c-addr",
         type=lambda s: int(s, 0),
@@ -820,16 +1257,31 @@ def build_parser() -> argparse.ArgumentParser:
         default="",
         help="Override I2C device path (default: /dev/i2c-<bus>).",
     )
+    p_set.add_argument(
+        "--i2c-verify",
+        action="store_true",
+        help="I2C backend: append the w6+r1029 tail query to the mode write (same transaction) and check it.",
+    )
+    p_set.add_argument(
+        "--wait-device-s",
+        type=float,
+        default=0.0,
+        help="If no digitizer hidraw node exists yet, wait this long for its add uevent (default: 0).",
+    )
     p_set.add_argument("--dry-run", action="store_true", help="Compute and verify without writing.")
     p_set.set_defaults(fn=cmd_set)
     return parser
 
 
-def main(argv: list[str]) -> int:
-    parser = build_parser()
-    args = parser.parse_args(argv)
-    if args.report_len <= 0 or args.report_len > 4096:
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    args = build_parser().parse_args(argv)
+    if args.report_len is not None and (args.report_len <= 0 or args.report_len > 4096):
         raise SystemExit("--report-len must be in 1..4096")
+    return args
+
+
+def main(argv: list[str]) -> int:
+    args = parse_args(argv)
     return int(args.fn(args))
 
 
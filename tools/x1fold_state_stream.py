@@ -0,0 +1,401 @@
+"""
+Push channel for x1fold_halfblankd.py state transitions.
+
+Repo source: x1fold/tools/x1fold_state_stream.py
+
+The daemon keeps writing state.json as a snapshot, and additionally serves a
+local Unix stream socket (default: /run/x1fold-halfblank/state.sock). Every
+state transition it records (dock_change_candidate, dock_change_pending,
+dock_change, enforce_apply, ...) is published as one message.
+
+Wire format (both directions): a 4-byte big-endian length followed by that many
+bytes of UTF-8 JSON.
+
+  client -> server, once after connect:
+    {"subscribe": true, "stream": "<stream id or null>", "since": <seq or null>}
+
+  server -> client, for every transition:
+    {"stream": "<id>", "seq": <n>, "event": "...", "desired": "...", ...}
+
+`seq` increases by one per message for the lifetime of the daemon process;
+`stream` changes when the daemon restarts. On subscribe the server replays the
+buffered messages after `since` when it still has all of them (same stream).
+Otherwise it sends the latest message with "resync": true, which is a full
+snapshot because every message carries the whole state (same payload as
+state.json).
+
+Slow clients are dropped rather than buffered without bound; they reconnect and
+resume from the last seq they saw.
+"""
+
+from __future__ import annotations
+
+import collections
+import json
+import os
+import select
+import socket
+import struct
+import time
+from pathlib import Path
+from typing import Any, Sequence
+
+_LEN = struct.Struct(">I")
+MAX_MESSAGE = 1 << 20
+
+
+def encode_message(msg: dict[str, Any]) -> bytes:
+    body = json.dumps(msg, sort_keys=True).encode("utf-8")
+    return _LEN.pack(len(body)) + body
+
+
+class _Framer:
+    """
+    Incremental decoder for length-prefixed JSON messages.
+    """
+
+    def __init__(self) -> None:
+        self.buf = bytearray()
+
+    def feed(self, data: bytes) -> list[dict[str, Any]]:
+        self.buf += data
+        out: list[dict[str, Any]] = []
+        while len(self.buf) >= _LEN.size:
+            (n,) = _LEN.unpack_from(self.buf, 0)
+            if n > MAX_MESSAGE:
+                raise ValueError(f"message too large: {n}")
+            if len(self.buf) < _LEN.size + n:
+                break
+            body = bytes(self.buf[_LEN.size : _LEN.size + n])
+            del self.buf[: _LEN.size + n]
+            msg = json.loads(body.decode("utf-8", errors="replace"))
+            if isinstance(msg, dict):
+                out.append(msg)
+        return out
+
+
+class _Peer:
+    def __init__(self, sock: socket.socket) -> None:
+        self.sock = sock
+        self.framer = _Framer()
+        self.subscribed = False
+        self.accepted = time.monotonic()
+
+
+class StateStreamServer:
+    """
+    Non-blocking server side, driven from the daemon's own loop.
+
+    Call `wait(timeout_s)` instead of time.sleep() so new clients are accepted
+    and subscribe requests answered while the daemon is idle. A transition is
+    `stamp()`ed (next seq, kept for replay), written to state.json by the
+    daemon, then `push()`ed immediately to every subscribed client.
+
+    The socket is world-connectable and the daemon runs as root, so clients
+    are bounded: at most `max_peers` connections, and a connection that has
+    not subscribed within `subscribe_timeout_s` is closed. When full, the
+    oldest unsubscribed connection makes room, else the new one is refused.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        backlog: int = 256,
+        max_peers: int = 16,
+        subscribe_timeout_s: float = 2.0,
+    ) -> None:
+        self.path = path
+        self.max_peers = max(1, int(max_peers))
+        self.subscribe_timeout_s = max(0.0, float(subscribe_timeout_s))
+        self.stream = f"{os.getpid()}-{time.time_ns()}"
+        self.seq = 0
+        self.history: collections.deque[dict[str, Any]] = collections.deque(maxlen=max(1, int(backlog)))
+        self.sock: socket.socket | None = None
+        self.peers: dict[int, _Peer] = {}
+
+    def start(self) -> tuple[bool, str]:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC)
+            sock.bind(str(self.path))
+            # Read-only stream; let the per-user UI helper connect.
+            os.chmod(self.path, 0o666)
+            sock.listen(16)
+            sock.setblocking(False)
+        except OSError as exc:
+            return False, f"{type(exc).__name__}: {exc}"
+        self.sock = sock
+        return True, ""
+
+    def close(self) -> None:
+        for fd in list(self.peers):
+            self._drop(fd)
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            try:
+                self.path.unlink()
+            except OSError:
+                pass
+
+    def stamp(self, msg: dict[str, Any]) -> dict[str, Any]:
+        """
+        Assign the next seq to `msg` and remember it for replay.
+
+        The daemon writes the stamped dict to state.json before calling push(),
+        so a client that sees seq N can rely on the snapshot being at least N.
+        """
+
+        self.seq += 1
+        stamped = {**msg, "stream": self.stream, "seq": self.seq}
+        self.history.append(stamped)
+        return stamped
+
+    def push(self, stamped: dict[str, Any]) -> None:
+        data = encode_message(stamped)
+        for fd, peer in list(self.peers.items()):
+            if peer.subscribed:
+                self._send(fd, data)
+
+    def wait(self, timeout_s: float, fds: Sequence[int] = (), xfds: Sequence[int] = ()) -> list[int]:
+        """
+        Sleep up to `timeout_s`, servicing the listening socket and clients.
+
+        Returns early with the ready subset of `fds` (the caller's own event
+        sources) as soon as any of them becomes readable, or of `xfds` when
+        they report an exceptional condition (POLLPRI, e.g. sysfs_notify).
+        """
+
+        deadline = time.monotonic() + max(0.0, float(timeout_s))
+        while True:
+            now = time.monotonic()
+            remaining = deadline - now
+            expiry = self._reap(now)
+            own = [self.sock.fileno(), *self.peers] if self.sock is not None else []
+            if not own and not fds and not xfds:
+                if remaining > 0:
+                    time.sleep(remaining)
+                return []
+            timeout = max(0.0, remaining)
+            if expiry is not None:
+                # Wake up to drop a connection that never subscribed.
+                timeout = min(timeout, max(0.0, expiry - now))
+            try:
+                ready, _, excepted = select.select([*own, *fds], [], list(xfds), timeout)
+            except InterruptedError:
+                ready, excepted = [], []
+            extra = [fd for fd in ready if fd in fds] + [fd for fd in excepted if fd in xfds]
+            for fd in ready:
+                if fd in extra:
+                    continue
+                if self.sock is not None and fd == self.sock.fileno():
+                    self._accept()
+                else:
+                    self._service(fd)
+            if extra or time.monotonic() >= deadline:
+                return extra
+
+    def _reap(self, now: float) -> float | None:
+        """
+        Drop connections that did not subscribe in time; returns the next expiry.
+        """
+
+        nearest: float | None = None
+        for fd, peer in list(self.peers.items()):
+            if peer.subscribed:
+                continue
+            expires = peer.accepted + self.subscribe_timeout_s
+            if expires <= now:
+                self._drop(fd)
+            elif nearest is None or expires < nearest:
+                nearest = expires
+        return nearest
+
+    def _accept(self) -> None:
+        assert self.sock is not None
+        while True:
+            try:
+                conn, _ = self.sock.accept()
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                return
+            conn.setblocking(False)
+            if len(self.peers) >= self.max_peers:
+                waiting = [fd for fd, peer in self.peers.items() if not peer.subscribed]
+                if not waiting:
+                    conn.close()
+                    continue
+                self._drop(min(waiting, key=lambda fd: self.peers[fd].accepted))
+            self.peers[conn.fileno()] = _Peer(conn)
+
+    def _service(self, fd: int) -> None:
+        peer = self.peers.get(fd)
+        if peer is None:
+            return
+        try:
+            data = peer.sock.recv(4096)
+        except (BlockingIOError, InterruptedError):
+            return
+        except OSError:
+            self._drop(fd)
+            return
+        if not data:
+            self._drop(fd)
+            return
+        try:
+            msgs = peer.framer.feed(data)
+        except ValueError:
+            self._drop(fd)
+            return
+        for msg in msgs:
+            if msg.get("subscribe") and not peer.subscribed:
+                peer.subscribed = True
+                self._replay(fd, msg.get("stream"), msg.get("since"))
+
+    def _replay(self, fd: int, stream: object, since: object) -> None:
+        if not self.history:
+            return
+        if stream == self.stream and isinstance(since, int):
+            if since >= self.seq:
+                return
+            oldest = int(self.history[0]["seq"])
+            if since >= oldest - 1:
+                for msg in self.history:
+                    if int(msg["seq"]) > since:
+                        if not self._send(fd, encode_message(msg)):
+                            return
+                return
+        self._send(fd, encode_message({**self.history[-1], "resync": True}))
+
+    def _send(self, fd: int, data: bytes) -> bool:
+        peer = self.peers.get(fd)
+        if peer is None:
+            return False
+        try:
+            sent = peer.sock.send(data)
+        except (BlockingIOError, InterruptedError):
+            sent = 0
+        except OSError:
+            self._drop(fd)
+            return False
+        if sent != len(data):
+            # Partial frame or full socket buffer: the client is not keeping up.
+            # Drop it; it will reconnect and resume from its last seq.
+            self._drop(fd)
+            return False
+        return True
+
+    def _drop(self, fd: int) -> None:
+        peer = self.peers.pop(fd, None)
+        if peer is not None:
+            try:
+                peer.sock.close()
+            except OSError:
+                pass
+
+
+class StateStreamClient:
+    """
+    Subscriber side, used by the session helpers.
+
+    `connect()` is cheap to retry; after a disconnect the next connect resumes
+    from the last seen seq. `fileno()` is None while disconnected so callers can
+    fall back to reading the state file.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self.sock: socket.socket | None = None
+        self.framer = _Framer()
+        self.stream: str | None = None
+        self.seq: int | None = None
+
+    def connected(self) -> bool:
+        return self.sock is not None
+
+    def fileno(self) -> int | None:
+        return self.sock.fileno() if self.sock is not None else None
+
+    def connect(self) -> bool:
+        if self.sock is not None:
+            return True
+        try:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC)
+        except OSError:
+            return False
+        try:
+            sock.settimeout(1.0)
+            sock.connect(str(self.path))
+            sock.sendall(encode_message({"subscribe": True, "stream": self.stream, "since": self.seq}))
+            sock.setblocking(False)
+        except OSError:
+            sock.close()
+            return False
+        self.sock = sock
+        self.framer = _Framer()
+        return True
+
+    def close(self) -> None:
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+
+    def read(self) -> list[dict[str, Any]]:
+        """
+        Drain whatever is buffered without blocking.
+
+        Returns the received messages in order (possibly empty). On EOF/error
+        the client disconnects; check `connected()` afterwards.
+        """
+
+        if self.sock is None:
+            return []
+        out: list[dict[str, Any]] = []
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError:
+                self.close()
+                break
+            if not data:
+                self.close()
+                break
+            try:
+                out.extend(self.framer.feed(data))
+            except ValueError:
+                self.close()
+                break
+        for msg in out:
+            stream = msg.get("stream")
+            seq = msg.get("seq")
+            if isinstance(stream, str) and isinstance(seq, int):
+                self.stream = stream
+                self.seq = seq
+        return out
+
+    def wait(self, timeout_s: float | None) -> list[dict[str, Any]]:
+        """
+        Block up to `timeout_s` (None = forever) for the next messages.
+        """
+
+        fd = self.fileno()
+        if fd is None:
+            if timeout_s:
+                time.sleep(timeout_s)
+            return []
+        try:
+            ready, _, _ = select.select([fd], [], [], timeout_s)
+        except InterruptedError:
+            return []
+        return self.read() if ready else []
@@ -8,15 +8,27 @@ This is the "bare terminal" counterpart to the X11/Wayland UI helper:
   - clips the primary DRM plane via drm_clip (so the bottom becomes invisible)
   - resizes the active Linux virtual terminal (winsize + scroll region) so text
     output stays within the visible top region
+
+With --drm-clip-socket it talks to a running `drm_clip serve --socket PATH`
+(started by x1fold_halfblankd.py) instead of exec'ing drm_clip per call; the
+server answers a clip with the status read back after the commit, so a switch
+is one round trip (clip+verify) on one connection. If the
+socket is unavailable it falls back to running drm_clip, still one exec per
+switch (`half|full --print-status` reports the status read back after the
+commit).
+
+Library entry points for x1fold_halfblankd.py: set_console() with a
+long-lived ConsoleController, GeometryTable (per-VT half/full geometry from
+the fbcon font and DRM mode) and VtWatcher (VT switch notifications).
 """
 
 from __future__ import annotations
 
 import argparse
 import json
-import math
 import os
 import shutil
+import socket
 import struct
 import subprocess
 import time
@@ -32,6 +44,17 @@ KDGETMODE = 0x4B3B
 KD_TEXT = 0x00
 KD_GRAPHICS = 0x01
 
+ACTIVE_VT_PATH = Path("/sys/class/tty/tty0/active")
+
+KDFONTOP = 0x4B72
+KD_FONT_OP_GET = 1
+# struct console_font_op: op, flags, width, height, charcount, data pointer.
+CONSOLE_FONT_OP = struct.Struct("@IIIIIP")
+
+# /sys/class/vc/vcsN exists for every allocated VT (created by vc_allocate).
+VC_SYSFS = Path("/sys/class/vc")
+MAX_VT = 63
+
 
 def utc_iso() -> str:
     return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
@@ -127,7 +150,7 @@ def _write_json_atomic(path: Path, data: dict[str, Any]) -> None:
 
 
 def _active_tty_name() -> str | None:
-    active = _safe_read_text(Path("/sys/class/tty/tty0/active"))
+    active = _safe_read_text(ACTIVE_VT_PATH)
     if not active:
         return None
     active = active.strip()
@@ -136,6 +159,66 @@ def _active_tty_name() -> str | None:
     return None
 
 
+class VtWatcher:
+    """
+    Active-VT switch notifications without re-reading sysfs on a timer.
+
+    The kernel sysfs_notify()s /sys/class/tty/tty0/active on every console
+    switch, so an fd held on it raises POLLPRI (select(): an exceptional
+    condition) until the attribute is read again from offset 0. Put
+    `fileno()` in the exceptional set -- never the readable set, a sysfs file
+    is always readable -- and call `drain()` when it fires.
+    """
+
+    def __init__(self, path: Path = ACTIVE_VT_PATH) -> None:
+        self.path = path
+        self.fd: int | None = None
+        self.active: str | None = None
+        self.error: str | None = None
+        self.switches = 0
+
+    def open(self) -> bool:
+        if self.fd is not None:
+            return True
+        try:
+            self.fd = os.open(str(self.path), os.O_RDONLY | getattr(os, "O_CLOEXEC", 0))
+        except OSError as exc:
+            self.error = f"[{exc.errno}] {exc.strerror}"
+            return False
+        # The initial read arms the notification.
+        self.active = self._read()
+        return True
+
+    def fileno(self) -> int | None:
+        return self.fd
+
+    def _read(self) -> str | None:
+        if self.fd is None:
+            return None
+        try:
+            data = os.pread(self.fd, 64, 0)
+        except OSError:
+            return None
+        return data.decode("ascii", errors="replace").strip() or None
+
+    def drain(self) -> str | None:
+        """
+        Re-read (and re-arm) after POLLPRI; returns the new VT name if it changed.
+        """
+
+        active = self._read()
+        if active is None or active == self.active:
+            return None
+        self.active = active
+        self.switches += 1
+        return active
+
+    def close(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+        self.fd = None
+
+
 def _resolve_tty(arg: str | None) -> Path:
     if arg:
         v = arg.strip()
@@ -183,6 +266,152 @@ def _write_tty(fd: int, s: str) -> None:
     os.write(fd, s.encode("utf-8", errors="ignore"))
 
 
+def _font_size(fd: int) -> tuple[int, int] | None:
+    """
+    (width, height) of the VT's console font via KDFONTOP.
+
+    Metrics only: with a NULL data pointer fbcon fills in the size without
+    copying glyphs. Fails on a KD_GRAPHICS VT or a console without fonts.
+    """
+
+    buf = bytearray(CONSOLE_FONT_OP.pack(KD_FONT_OP_GET, 0, 64, 128, 0, 0))
+    try:
+        fcntl.ioctl(fd, KDFONTOP, buf, True)
+    except OSError:
+        return None
+    _, _, width, height, _, _ = CONSOLE_FONT_OP.unpack(buf)
+    if width <= 0 or height <= 0:
+        return None
+    return int(width), int(height)
+
+
+def _allocated_vts() -> list[str]:
+    try:
+        names = os.listdir(VC_SYSFS)
+    except OSError:
+        return []
+    nums = {int(n[3:]) for n in names if n.startswith("vcs") and n[3:].isdigit()}
+    return [f"tty{n}" for n in sorted(nums) if 1 <= n <= MAX_VT]
+
+
+@dataclass(frozen=True)
+class ConsoleGeometry:
+    tty: str
+    font_w: int
+    font_h: int
+    font_source: str  # "kdfontop" | "default" (another VT's font) | "winsize"
+    full_rows: int
+    full_cols: int
+    half_rows: int
+    half_seq: str  # scroll region + home for half mode
+    full_seq: str  # scroll region reset + home
+
+
+class GeometryTable:
+    """
+    Half/full winsize and scroll-region sequences per VT, computed up front.
+
+    fbcon sizes a text VT as mode // font, so with the DRM mode and each VT's
+    font known, nothing about a VT's geometry has to be derived (or inferred
+    from a previous visit) at apply time. `build()` takes the mode once and
+    reads the font of every allocated VT (tty1..tty63); an apply then only
+    compares the VT's current winsize against its entry. The table is rebuilt
+    when the mode or half height changes, and a VT's entry is refreshed when
+    its winsize matches neither of its sizes (setfont resizes the VT) or when
+    the VT was allocated after the build.
+    """
+
+    def __init__(self) -> None:
+        self.mode_w = 0
+        self.mode_h = 0
+        self.half_height = 0
+        self.font: tuple[int, int] | None = None  # fallback for VTs that can't answer
+        self.entries: dict[str, ConsoleGeometry] = {}
+        self.builds = 0
+        self.refreshes = 0
+
+    def matches(self, mode_w: int, mode_h: int, half_height: int) -> bool:
+        return self.builds > 0 and (self.mode_w, self.mode_h, self.half_height) == (mode_w, mode_h, half_height)
+
+    def build(self, mode_w: int, mode_h: int, half_height: int) -> None:
+        self.mode_w, self.mode_h, self.half_height = int(mode_w), int(mode_h), int(half_height)
+        self.builds += 1
+        fonts: dict[str, tuple[int, int]] = {}
+        vts = _allocated_vts()
+        for tty in vts:
+            try:
+                fd = os.open(f"/dev/{tty}", os.O_RDONLY | os.O_NOCTTY | os.O_NONBLOCK | getattr(os, "O_CLOEXEC", 0))
+            except OSError:
+                continue
+            try:
+                font = _font_size(fd)
+            finally:
+                os.close(fd)
+            if font is not None:
+                fonts[tty] = font
+        if fonts:
+            # The most common font stands in for VTs that are in KD_GRAPHICS now.
+            counts: dict[tuple[int, int], int] = {}
+            for font in fonts.values():
+                counts[font] = counts.get(font, 0) + 1
+            self.font = max(counts, key=lambda f: counts[f])
+        self.entries = {}
+        for tty in vts:
+            font = fonts.get(tty) or self.font
+            if font is not None:
+                self.entries[tty] = self._entry(tty, font, "kdfontop" if tty in fonts else "default")
+
+    def _entry(self, tty: str, font: tuple[int, int], source: str) -> ConsoleGeometry:
+        font_w, font_h = font
+        full_rows = max(1, self.mode_h // font_h)
+        full_cols = max(1, self.mode_w // font_w)
+        half_rows = max(1, min(full_rows, self.half_height // font_h))
+        return ConsoleGeometry(
+            tty=tty,
+            font_w=font_w,
+            font_h=font_h,
+            font_source=source,
+            full_rows=full_rows,
+            full_cols=full_cols,
+            half_rows=half_rows,
+            half_seq=f"\x1b[1;{half_rows}r\x1b[H",
+            full_seq="\x1b[r\x1b[H",
+        )
+
+    def lookup(self, tty: str, fd: int, rows: int, cols: int) -> ConsoleGeometry | None:
+        """
+        Entry for `tty` (open as `fd`, currently `rows` x `cols`).
+        """
+
+        geo = self.entries.get(tty)
+        if geo is not None and cols == geo.full_cols and rows in (geo.full_rows, geo.half_rows):
+            return geo
+        font = _font_size(fd)
+        source = "kdfontop"
+        if font is None:
+            if geo is not None:
+                return geo
+            font, source = self.font, "default"
+        if font is None:
+            if rows <= 0 or cols <= 0:
+                return None
+            # No font interface (not fbcon): take the VT as being at full size.
+            font, source = (max(1, self.mode_w // cols), max(1, self.mode_h // rows)), "winsize"
+        fresh = self._entry(tty, font, source)
+        if fresh != geo:
+            self.entries[tty] = fresh
+            self.refreshes += 1
+            _log(
+                "tty_geometry_refreshed",
+                tty=tty,
+                font=f"{fresh.font_w}x{fresh.font_h}",
+                font_source=source,
+                full=f"{fresh.full_rows}x{fresh.full_cols}",
+                half_rows=fresh.half_rows,
+            )
+        return fresh
+
+
 def _pick_drm_clip(path_arg: str) -> str:
     if path_arg:
         return path_arg
@@ -199,7 +428,86 @@ class DrmStatus:
     clip_h: int
 
 
-def _drm_status(drm_clip: str, *, card: str, connector: str) -> DrmStatus:
+class DrmClipServer:
+    """
+    Line client for `drm_clip serve --socket PATH` (one connection, reused).
+
+    Requests are `status`, `half H`, `full`; every reply is one JSON line.
+    Raises OSError when the server is unreachable and RuntimeError when it
+    answers with ok=false.
+    """
+
+    def __init__(self, path: Path, *, timeout_s: float = 5.0) -> None:
+        self.path = path
+        self.timeout_s = float(timeout_s)
+        self.sock: socket.socket | None = None
+        self._rfile: Any = None
+
+    def _connect(self) -> None:
+        if self.sock is not None:
+            return
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | getattr(socket, "SOCK_CLOEXEC", 0))
+        sock.settimeout(self.timeout_s)
+        try:
+            sock.connect(str(self.path))
+        except OSError:
+            sock.close()
+            raise
+        self.sock = sock
+        self._rfile = sock.makefile("rb")
+
+    def request(self, line: str) -> dict[str, Any]:
+        self._connect()
+        assert self.sock is not None
+        try:
+            self.sock.sendall(line.encode("ascii") + b"\n")
+            raw = self._rfile.readline()
+        except OSError:
+            self.close()
+            raise
+        if not raw:
+            self.close()
+            raise ConnectionError("drm_clip server closed the connection")
+        reply = json.loads(raw)
+        if not reply.get("ok"):
+            raise RuntimeError(f"drm_clip {line.split()[0]} failed: {reply.get('error')}")
+        return reply
+
+    def close(self) -> None:
+        if self.sock is not None:
+            try:
+                self._rfile.close()
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+        self._rfile = None
+
+
+def _open_drm_clip_server(path_arg: str) -> DrmClipServer | None:
+    if not path_arg:
+        return None
+    server = DrmClipServer(Path(path_arg))
+    try:
+        server._connect()
+    except OSError as exc:
+        _log("drm_clip_socket_unavailable", path=path_arg, error=f"[{exc.errno}] {exc.strerror}")
+        return None
+    return server
+
+
+def _parse_drm_status(data: dict[str, Any]) -> DrmStatus:
+    mode = str((data.get("crtc") or {}).get("mode") or "")
+    if "x" not in mode:
+        raise RuntimeError(f"unexpected drm_clip mode: {mode!r}")
+    w_s, h_s = mode.split("x", 1)
+    clip_h = int(((data.get("plane_rect") or {}).get("crtc") or {}).get("h") or 0)
+    return DrmStatus(mode_w=int(w_s), mode_h=int(h_s), clip_h=clip_h)
+
+
+def _drm_status(drm_clip: str, *, card: str, connector: str, server: DrmClipServer | None = None) -> DrmStatus:
+    if server is not None:
+        return _parse_drm_status(server.request("status")["status"])
     cmd = [drm_clip]
     if card:
         cmd += ["--card", card]
@@ -210,13 +518,7 @@ def _drm_status(drm_clip: str, *, card: str, connector: str) -> DrmStatus:
     if proc.returncode != 0:
         msg = (proc.stderr or proc.stdout).strip() or f"rc={proc.returncode}"
         raise RuntimeError(f"drm_clip status failed: {msg}")
-    data = json.loads(proc.stdout)
-    mode = str((data.get("crtc") or {}).get("mode") or "")
-    if "x" not in mode:
-        raise RuntimeError(f"unexpected drm_clip mode: {mode!r}")
-    w_s, h_s = mode.split("x", 1)
-    clip_h = int(((data.get("plane_rect") or {}).get("crtc") or {}).get("h") or 0)
-    return DrmStatus(mode_w=int(w_s), mode_h=int(h_s), clip_h=clip_h)
+    return _parse_drm_status(json.loads(proc.stdout))
 
 
 def _run_drm_clip(
@@ -227,7 +529,25 @@ def _run_drm_clip(
     height: int,
     mode: str,
     best_effort: bool,
-) -> tuple[int, str]:
+    server: DrmClipServer | None = None,
+) -> tuple[int, str, DrmStatus | None]:
+    """
+    Apply the clip; returns (rc, error, status after). Both paths verify in the
+    same call: the server answers with the read-back status and the exec path
+    uses `--print-status`. The status is None when the clip failed or its
+    output could not be parsed.
+    """
+
+    if server is not None:
+        line = f"half {int(height)}" if mode == "half" else "full"
+        try:
+            return 0, "", _parse_drm_status(server.request(line)["status"])
+        except (OSError, RuntimeError, ValueError) as exc:
+            msg = str(exc)
+            if best_effort:
+                _log("drm_clip_skipped", request=line, error=msg)
+                return 0, msg, None
+            return 1, msg, None
     cmd = [drm_clip]
     if card:
         cmd += ["--card", card]
@@ -237,14 +557,19 @@ def _run_drm_clip(
         cmd += ["--height", str(int(height)), "half"]
     else:
         cmd += ["full"]
+    cmd += ["--print-status"]
     proc = subprocess.run(cmd, check=False, capture_output=True, text=True)
     if proc.returncode == 0:
-        return 0, ""
+        try:
+            return 0, "", _parse_drm_status(json.loads(proc.stdout))
+        except (ValueError, AttributeError) as exc:
+            _log("drm_clip_status_unparsed", cmd=cmd, error=f"{type(exc).__name__}: {exc}")
+            return 0, "", None
     msg = (proc.stderr or proc.stdout).strip() or f"rc={proc.returncode}"
     if best_effort:
         _log("drm_clip_skipped", cmd=cmd, error=msg)
-        return 0, msg
-    return int(proc.returncode), msg
+        return 0, msg, None
+    return int(proc.returncode), msg, None
 
 
 def _ensure_state_entry(state: dict[str, Any], tty_key: str) -> dict[str, Any]:
@@ -263,7 +588,7 @@ def cmd_status(args: argparse.Namespace) -> int:
     tty_path = _resolve_tty(args.tty)
     out: dict[str, Any] = {"ts": utc_iso(), "tty": str(tty_path), "active_tty": _active_tty_name()}
     try:
-        fd = os.open(str(tty_path), os.O_RDWR | getattr(os, "O_CLOEXEC", 0))
+        fd = os.open(str(tty_path), os.O_RDWR | os.O_NOCTTY | getattr(os, "O_CLOEXEC", 0))
     except OSError as exc:
         out["tty_error"] = f"[{exc.errno}] {exc.strerror}"
         print(json.dumps(out, indent=2, sort_keys=True))
@@ -277,11 +602,15 @@ def cmd_status(args: argparse.Namespace) -> int:
         os.close(fd)
 
     drm_clip = _pick_drm_clip(args.drm_clip)
+    server = _open_drm_clip_server(args.drm_clip_socket)
     try:
-        ds = _drm_status(drm_clip, card=args.card, connector=args.connector)
+        ds = _drm_status(drm_clip, card=args.card, connector=args.connector, server=server)
         out["drm"] = {"mode": f"{ds.mode_w}x{ds.mode_h}", "clip_h": ds.clip_h}
     except Exception as exc:
         out["drm_error"] = f"{type(exc).__name__}: {exc}"
+    finally:
+        if server is not None:
+            server.close()
 
     out["fbcon"] = {
         "rotate": _safe_read_int(Path("/sys/class/graphics/fbcon/rotate")),
@@ -292,36 +621,159 @@ def cmd_status(args: argparse.Namespace) -> int:
     return 0
 
 
+class ConsoleController:
+    """
+    Long-lived handle for repeated `set` calls (x1fold_halfblankd --tty-clip).
+
+    Run as a CLI, every `set` re-reads the state file, connects to (or execs)
+    drm_clip and rewrites the state file. The daemon keeps one of these
+    instead: the per-tty geometry table (see GeometryTable) lives in memory,
+    the state file is written back only when it changes, and the drm_clip
+    server connection is reused across applies.
+    """
+
+    def __init__(self, state_file: Path) -> None:
+        self.state_file = state_file
+        self.geometry = GeometryTable()
+        self.state = _read_json(state_file)
+        self._saved = self._snapshot()
+        self._server: DrmClipServer | None = None
+        self._server_error: str | None = None
+        self.applies = 0
+        self.writes = 0
+
+    def _snapshot(self) -> str:
+        return json.dumps({k: v for k, v in self.state.items() if k != "ts"}, sort_keys=True)
+
+    def server(self, path: str) -> DrmClipServer | None:
+        """
+        Connected drm_clip server for `path` (None: exec drm_clip instead).
+        """
+
+        if self._server is not None and str(self._server.path) != path:
+            self._server.close()
+            self._server = None
+        if not path:
+            return None
+        if self._server is None:
+            self._server = DrmClipServer(Path(path))
+        try:
+            self._server._connect()
+        except OSError as exc:
+            err = f"[{exc.errno}] {exc.strerror}"
+            if err != self._server_error:
+                _log("drm_clip_socket_unavailable", path=path, error=err)
+            self._server_error = err
+            return None
+        self._server_error = None
+        return self._server
+
+    def prime(self, args: argparse.Namespace) -> bool:
+        """
+        Build the geometry table now (one DRM status query, one KDFONTOP per
+        allocated VT) so the first apply on any VT is already table-driven.
+        """
+
+        try:
+            ds = _drm_status(
+                _pick_drm_clip(args.drm_clip),
+                card=args.card,
+                connector=args.connector,
+                server=self.server(args.drm_clip_socket),
+            )
+        except Exception as exc:
+            _log("tty_geometry_skipped", error=f"{type(exc).__name__}: {exc}")
+            return False
+        if ds.mode_w <= 0 or ds.mode_h <= 0:
+            return False
+        self.build_geometry(ds.mode_w, ds.mode_h, int(args.height), reason="prime")
+        return True
+
+    def build_geometry(self, mode_w: int, mode_h: int, half_height: int, *, reason: str) -> None:
+        start = time.monotonic()
+        self.geometry.build(mode_w, mode_h, half_height)
+        table = self.geometry
+        _log(
+            "tty_geometry_built",
+            reason=reason,
+            mode=f"{mode_w}x{mode_h}",
+            half_height=half_height,
+            font=f"{table.font[0]}x{table.font[1]}" if table.font else None,
+            ttys=list(table.entries),
+            build_s=round(time.monotonic() - start, 4),
+        )
+
+    def save(self) -> None:
+        snap = self._snapshot()
+        if snap == self._saved:
+            return
+        _write_json_atomic(self.state_file, self.state)
+        self._saved = snap
+        self.writes += 1
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            self._server = None
+
+
+def set_console(args: argparse.Namespace, controller: ConsoleController | None = None) -> int:
+    """
+    Apply `set half|full` (parsed x1fold_tty.py argv) to the target console.
+
+    Raises SystemExit on failure unless --best-effort. Without a controller a
+    temporary one is used (the CLI path).
+    """
+
+    own = controller is None
+    if controller is None:
+        controller = ConsoleController(args.state_file)
+    try:
+        controller.applies += 1
+        return _set_console(args, controller)
+    finally:
+        if own:
+            controller.close()
+
+
 def cmd_set(args: argparse.Namespace) -> int:
+    return set_console(args)
+
+
+def _set_console(args: argparse.Namespace, ctl: ConsoleController) -> int:
     target = str(args.mode).strip().lower()
     if target not in ("half", "full"):
         raise SystemExit("mode must be half|full")
 
     tty_path = _resolve_tty(args.tty)
-    tty_key = tty_path.name
-    state_path: Path = args.state_file
-    state = _read_json(state_path)
 
-    drm_clip = _pick_drm_clip(args.drm_clip)
-
-    # Capture current tty geometry/mode before we touch anything.
+    # One fd per apply: KDGETMODE/TIOCGWINSZ now, scroll region + TIOCSWINSZ
+    # after the clip.
     try:
-        fd = os.open(str(tty_path), os.O_RDWR | getattr(os, "O_CLOEXEC", 0))
+        fd = os.open(str(tty_path), os.O_RDWR | os.O_NOCTTY | getattr(os, "O_CLOEXEC", 0))
     except OSError as exc:
         if args.best_effort:
-            fd = -1
-        else:
-            raise SystemExit(f"failed to open {tty_path}: [{exc.errno}] {exc.strerror}")
+            return 0
+        raise SystemExit(f"failed to open {tty_path}: [{exc.errno}] {exc.strerror}")
+    try:
+        return _apply_console(args, ctl, target, tty_path, fd)
+    finally:
+        os.close(fd)
+
 
-    kd = None
+def _apply_console(args: argparse.Namespace, ctl: ConsoleController, target: str, tty_path: Path, fd: int) -> int:
+    tty_key = tty_path.name
+    state = ctl.state
+    drm_clip = _pick_drm_clip(args.drm_clip)
+
+    # Current tty mode/size: only text VTs are touched, and an apply that
+    # already matches the table is a no-op.
+    kd = _kd_mode(fd)
     rows = cols = 0
     try:
-        if fd >= 0:
-            kd = _kd_mode(fd)
-            rows, cols = _get_winsize(fd)
-    finally:
-        if fd >= 0:
-            os.close(fd)
+        rows, cols = _get_winsize(fd)
+    except OSError:
+        pass
 
     # This helper is intended for Linux text consoles only. In a graphical VT
     # (KD_GRAPHICS), do nothing unless explicitly requested otherwise.
@@ -332,54 +784,32 @@ def cmd_set(args: argparse.Namespace) -> int:
 
     _force_fbcon_rotate_zero(best_effort=bool(args.best_effort))
 
-    entry = _ensure_state_entry(state, tty_key)
-    if isinstance(rows, int) and rows > 0 and isinstance(cols, int) and cols > 0:
-        entry.setdefault("last_rows", rows)
-        entry.setdefault("last_cols", cols)
-        if target == "half":
-            entry.setdefault("full_rows", rows)
-            entry.setdefault("full_cols", cols)
-
-    # Snapshot DRM status before switching to full so we can infer the old clip height if needed.
-    before: DrmStatus | None = None
-    try:
-        before = _drm_status(drm_clip, card=args.card, connector=args.connector)
-    except Exception as exc:
-        if not args.best_effort:
-            raise SystemExit(str(exc))
-        _log("drm_status_skipped", error=f"{type(exc).__name__}: {exc}")
-
-    if target == "half":
-        rc, err = _run_drm_clip(
-            drm_clip,
-            card=args.card,
-            connector=args.connector,
-            height=int(args.height),
-            mode="half",
-            best_effort=bool(args.best_effort),
-        )
-        if rc != 0:
-            raise SystemExit(err or f"drm_clip failed (rc={rc})")
+    server = ctl.server(args.drm_clip_socket)
+    rc, err, after_clip = _run_drm_clip(
+        drm_clip,
+        card=args.card,
+        connector=args.connector,
+        height=int(args.height),
+        mode=target,
+        best_effort=bool(args.best_effort),
+        server=server,
+    )
+    if rc != 0:
+        raise SystemExit(err or f"drm_clip failed (rc={rc})")
+
+    # DRM status after the clip normally came back with the clip itself;
+    # query it separately only if that failed.
+    after: DrmStatus
+    if after_clip is not None:
+        after = after_clip
     else:
-        rc, err = _run_drm_clip(
-            drm_clip,
-            card=args.card,
-            connector=args.connector,
-            height=int(args.height),
-            mode="full",
-            best_effort=bool(args.best_effort),
-        )
-        if rc != 0:
-            raise SystemExit(err or f"drm_clip failed (rc={rc})")
-
-    # Re-check DRM status after the clip so we can compute row scaling.
-    try:
-        after = _drm_status(drm_clip, card=args.card, connector=args.connector)
-    except Exception as exc:
-        if not args.best_effort:
-            raise SystemExit(str(exc))
-        _log("drm_status_after_skipped", error=f"{type(exc).__name__}: {exc}")
-        after = before or DrmStatus(mode_w=0, mode_h=0, clip_h=0)
+        try:
+            after = _drm_status(drm_clip, card=args.card, connector=args.connector, server=server)
+        except Exception as exc:
+            if not args.best_effort:
+                raise SystemExit(str(exc))
+            _log("drm_status_after_skipped", error=f"{type(exc).__name__}: {exc}")
+            after = DrmStatus(mode_w=0, mode_h=0, clip_h=0)
 
     # Avoid resizing the console unless the clip is actually in effect.
     if target == "half":
@@ -405,85 +835,68 @@ def cmd_set(args: argparse.Namespace) -> int:
             raise SystemExit(msg)
 
     mode_h = int(after.mode_h or 0)
-    if mode_h <= 0:
+    if mode_h <= 0 or after.mode_w <= 0:
         if args.best_effort:
             _log("tty_resize_skipped", reason="missing_mode_h", tty=str(tty_path))
             return 0
         raise SystemExit("failed to determine DRM mode height")
 
-    if target == "half":
-        full_rows = int(entry.get("full_rows") or 0)
-        full_cols = int(entry.get("full_cols") or 0)
-        if full_rows <= 0 or full_cols <= 0:
-            full_rows, full_cols = rows, cols
-            entry["full_rows"] = full_rows
-            entry["full_cols"] = full_cols
+    # The clip reply carries the mode, so a mode change (or a new half
+    # height) is noticed here and rebuilds the table.
+    if not ctl.geometry.matches(after.mode_w, mode_h, int(args.height)):
+        ctl.build_geometry(after.mode_w, mode_h, int(args.height), reason="mode" if ctl.geometry.builds else "first_apply")
+    geo = ctl.geometry.lookup(tty_key, fd, rows, cols)
+    if geo is None:
+        if args.best_effort:
+            _log("tty_resize_skipped", reason="unknown_font", tty=str(tty_path))
+            return 0
+        raise SystemExit(f"failed to determine the console font of {tty_path}")
 
-        desired_rows = max(1, min(full_rows, int(math.floor(full_rows * (int(args.height) / mode_h)))))
+    entry = _ensure_state_entry(state, tty_key)
+    entry.setdefault("last_rows", rows)
+    entry.setdefault("last_cols", cols)
+    entry["full_rows"] = geo.full_rows
+    entry["full_cols"] = geo.full_cols
+    entry["font"] = f"{geo.font_w}x{geo.font_h}"
+    entry["last_mode_h"] = mode_h
 
+    if target == "half":
         try:
-            fd2 = os.open(str(tty_path), os.O_RDWR | getattr(os, "O_CLOEXEC", 0))
-            try:
-                current_rows, current_cols = _get_winsize(fd2)
-                if current_rows != desired_rows or current_cols != full_cols:
-                    if args.clear:
-                        _write_tty(fd2, f"\x1b[1;{desired_rows}r\x1b[H\x1b[2J")
-                    else:
-                        _write_tty(fd2, f"\x1b[1;{desired_rows}r\x1b[H")
-                    _set_winsize(fd2, desired_rows, full_cols)
-            finally:
-                os.close(fd2)
+            if rows != geo.half_rows or cols != geo.full_cols:
+                _write_tty(fd, geo.half_seq + ("\x1b[2J" if args.clear else ""))
+                _set_winsize(fd, geo.half_rows, geo.full_cols)
         except OSError as exc:
             if not args.best_effort:
                 raise SystemExit(f"failed to resize {tty_path}: [{exc.errno}] {exc.strerror}")
             _log("tty_resize_error", tty=str(tty_path), error=f"[{exc.errno}] {exc.strerror}")
             return 0
 
-        entry["half_rows"] = desired_rows
+        entry["half_rows"] = geo.half_rows
         entry["last_half_height"] = int(args.height)
-        entry["last_mode_h"] = mode_h
 
         state["ts"] = utc_iso()
         state["last_event"] = "set_half"
         state["last_tty"] = tty_key
         state["last_height"] = int(args.height)
-        _write_json_atomic(state_path, state)
-        _log("tty_half_applied", tty=str(tty_path), rows=desired_rows, cols=full_cols, mode_h=mode_h, height=int(args.height))
+        ctl.save()
+        _log("tty_half_applied", tty=str(tty_path), rows=geo.half_rows, cols=geo.full_cols, mode_h=mode_h, height=int(args.height))
         return 0
 
     # full restore
-    full_rows = int(entry.get("full_rows") or 0)
-    full_cols = int(entry.get("full_cols") or 0)
-    if full_rows <= 0 or full_cols <= 0:
-        # Try to infer full size if we don't have a baseline.
-        inferred = 0
-        if before and before.clip_h and before.clip_h < before.mode_h and rows:
-            inferred = int(math.ceil(rows * (before.mode_h / before.clip_h)))
-        if not inferred:
-            last_half_h = int(entry.get("last_half_height") or int(args.height))
-            inferred = int(math.ceil(rows * (mode_h / max(1, last_half_h))))
-        full_rows = inferred
-        full_cols = cols
-
     try:
-        fd3 = os.open(str(tty_path), os.O_RDWR | getattr(os, "O_CLOEXEC", 0))
-        try:
-            _write_tty(fd3, "\x1b[r\x1b[H")
-            _set_winsize(fd3, full_rows, full_cols)
-        finally:
-            os.close(fd3)
+        _write_tty(fd, geo.full_seq)
+        _set_winsize(fd, geo.full_rows, geo.full_cols)
     except OSError as exc:
         if not args.best_effort:
             raise SystemExit(f"failed to restore {tty_path}: [{exc.errno}] {exc.strerror}")
         _log("tty_restore_error", tty=str(tty_path), error=f"[{exc.errno}] {exc.strerror}")
         return 0
 
-    entry["last_mode_h"] = mode_h
     state["ts"] = utc_iso()
     state["last_event"] = "set_full"
     state["last_tty"] = tty_key
-    _write_json_atomic(state_path, state)
-    _log("tty_full_restored", tty=str(tty_path), rows=full_rows, cols=full_cols)
+    ctl.save()
+    _log("tty_full_restored", tty=str(tty_path), rows=geo.full_rows, cols=geo.full_cols)
     return 0
 
 
@@ -497,6 +910,14 @@ def build_parser() -> argparse.ArgumentParser:
     parser.add_argument("--drm-clip", default="", help="Path to drm_clip (default: find in $PATH).")
     parser.add_argument("--card", default="", help="Pass --card to drm_clip (default: drm_clip default).")
     parser.add_argument("--connector", default="", help="Pass --connector to drm_clip (default: drm_clip default).")
+    parser.add_argument(
+        "--drm-clip-socket",
+        default="",
+        help=(
+            "Talk to a running `drm_clip serve --socket PATH` instead of exec'ing drm_clip "
+            "(its own --card/--connector apply; falls back to exec if unreachable)."
+        ),
+    )
     parser.add_argument("--state-file", type=Path, default=_default_state_file(), help="State file path.")
 
     sub = parser.add_subparsers(dest="cmd", required=True)
@@ -522,9 +943,12 @@ def build_parser() -> argparse.ArgumentParser:
     return parser
 
 
+def parse_args(argv: list[str]) -> argparse.Namespace:
+    return build_parser().parse_args(argv)
+
+
 def main(argv: list[str]) -> int:
-    parser = build_parser()
-    args = parser.parse_args(argv)
+    args = parse_args(argv)
     return int(args.fn(args))
 
 
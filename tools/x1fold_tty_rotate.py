@@ -5,8 +5,12 @@ TTY/fbcon auto-rotation helper for X1 Fold.
 Repo source: x1fold/tools/x1fold_tty_rotate.py
 
 This is the "bare console" counterpart to x1fold_halfblank_ui.py's auto-rotate:
-  - reads /run/x1fold-halfblank/state.json (written by x1fold_halfblankd.py)
-  - reads orientation from iio-sensor-proxy over the *system* D-Bus
+  - follows x1fold_halfblankd.py state transitions over its state socket
+    (/run/x1fold-halfblank/state.sock), falling back to reading
+    /run/x1fold-halfblank/state.json when the socket is unavailable
+  - claims the accelerometer and receives orientation changes from
+    iio-sensor-proxy over the *system* D-Bus (x1fold_dbus.py; no busctl or
+    monitor-sensor children)
   - writes rotation to /sys/class/graphics/fbcon/rotate
 
 Policy:
@@ -24,13 +28,15 @@ from __future__ import annotations
 import argparse
 import json
 import os
-import re
-import shutil
-import subprocess
+import select
 import time
 from pathlib import Path
 from typing import Any
 
+from x1fold_dbus import SensorProxy
+from x1fold_iio import IIOAccel
+from x1fold_state_stream import StateStreamClient
+
 
 def utc_iso() -> str:
     return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())
@@ -61,137 +67,6 @@ def _desired_mode(state: dict[str, Any]) -> str | None:
     return None
 
 
-def _sensorproxy_claim() -> None:
-    try:
-        subprocess.run(
-            [
-                "busctl",
-                "--system",
-                "call",
-                "net.hadess.SensorProxy",
-                "/net/hadess/SensorProxy",
-                "net.hadess.SensorProxy",
-                "ClaimAccelerometer",
-            ],
-            check=False,
-            capture_output=True,
-            text=True,
-        )
-    except OSError:
-        return
-
-
-def _sensorproxy_orientation() -> str | None:
-    """
-    Read iio-sensor-proxy's AccelerometerOrientation, e.g. "normal", "left-up".
-
-    Returns None on failure or if no orientation is available.
-    """
-
-    try:
-        proc = subprocess.run(
-            [
-                "busctl",
-                "--system",
-                "get-property",
-                "net.hadess.SensorProxy",
-                "/net/hadess/SensorProxy",
-                "net.hadess.SensorProxy",
-                "AccelerometerOrientation",
-            ],
-            check=False,
-            capture_output=True,
-            text=True,
-        )
-    except OSError:
-        return None
-    if proc.returncode != 0:
-        return None
-    m = re.search(r"\"([^\"]*)\"", proc.stdout)
-    if not m:
-        return None
-    s = m.group(1).strip()
-    return s or None
-
-
-class SensorClaim:
-    """
-    Keep iio-sensor-proxy's accelerometer "claimed" while auto-rotate is needed.
-
-    iio-sensor-proxy may power down sensors when no clients claim them. A one-shot
-    ClaimAccelerometer call is typically not enough because the claim is tied to
-    the D-Bus connection lifetime.
-    """
-
-    def __init__(self) -> None:
-        self.proc: subprocess.Popen[str] | None = None
-        self.available: bool | None = None
-
-    def _have_monitor_sensor(self) -> bool:
-        if self.available is not None:
-            return bool(self.available)
-        self.available = bool(shutil.which("monitor-sensor"))
-        return bool(self.available)
-
-    def _any_monitor_sensor_running(self) -> bool:
-        if shutil.which("pgrep"):
-            try:
-                proc = subprocess.run(["pgrep", "-x", "monitor-sensor"], check=False, capture_output=True, text=True)
-                if proc.returncode == 0:
-                    return True
-            except OSError:
-                pass
-
-        # Fallback: scan /proc (works on minimal systems without procps-ng).
-        try:
-            for comm in Path("/proc").glob("[0-9]*/comm"):
-                if comm.read_text(encoding="utf-8", errors="replace").strip() == "monitor-sensor":
-                    return True
-        except OSError:
-            return False
-        return False
-
-    def running(self) -> bool:
-        if self.proc and self.proc.poll() is None:
-            return True
-        return self._any_monitor_sensor_running()
-
-    def start(self) -> bool:
-        if self.running():
-            return False
-        if not self._have_monitor_sensor():
-            return False
-        try:
-            self.proc = subprocess.Popen(
-                ["monitor-sensor", "--accel"],
-                stdin=subprocess.DEVNULL,
-                stdout=subprocess.DEVNULL,
-                stderr=subprocess.DEVNULL,
-                text=True,
-            )
-        except OSError as exc:
-            _log("sensor_claim_start_failed", error=f"{type(exc).__name__}: {exc}")
-            self.proc = None
-            self.available = False
-            return False
-        return True
-
-    def stop(self) -> bool:
-        if not self.proc:
-            return False
-        try:
-            if self.proc.poll() is None:
-                self.proc.terminate()
-                try:
-                    self.proc.wait(timeout=1.0)
-                except subprocess.TimeoutExpired:
-                    self.proc.kill()
-                    self.proc.wait(timeout=1.0)
-        finally:
-            self.proc = None
-        return True
-
-
 def _read_fbcon_rotate(path: Path) -> int | None:
     try:
         s = path.read_text(encoding="utf-8", errors="replace").strip()
@@ -243,12 +118,47 @@ def main(argv: list[str]) -> int:
         default=Path("/run/x1fold-halfblank/state.json"),
         help="Path to x1fold_halfblankd state file (default: /run/x1fold-halfblank/state.json).",
     )
+    p.add_argument(
+        "--state-socket",
+        default="/run/x1fold-halfblank/state.sock",
+        help=(
+            "x1fold_halfblankd state stream socket; wakes on dock transitions instead of waiting for the next poll "
+            "(empty disables; default: /run/x1fold-halfblank/state.sock)."
+        ),
+    )
     p.add_argument(
         "--rotate-path",
         type=Path,
         default=Path(os.environ.get("X1FOLD_FBCON_ROTATE_PATH", "/sys/class/graphics/fbcon/rotate")),
         help="fbcon rotate sysfs path (default: /sys/class/graphics/fbcon/rotate).",
     )
+    p.add_argument(
+        "--sensor-backend",
+        choices=["sensorproxy", "iio"],
+        default="sensorproxy",
+        help=(
+            "Orientation source for auto-rotate: iio-sensor-proxy over D-Bus, or the IIO accelerometer "
+            "directly (buffered /dev/iio:deviceN when possible, else raw sysfs) (default: sensorproxy)."
+        ),
+    )
+    p.add_argument(
+        "--iio-threshold-deg",
+        type=float,
+        default=35.0,
+        help="iio backend: tilt needed to enter an orientation (default: 35, as iio-sensor-proxy).",
+    )
+    p.add_argument(
+        "--iio-hysteresis-deg",
+        type=float,
+        default=10.0,
+        help="iio backend: stay in the current orientation until its tilt drops this far below the threshold (default: 10).",
+    )
+    p.add_argument(
+        "--iio-sample-s",
+        type=float,
+        default=0.1,
+        help="iio backend, raw sysfs mode: minimum time between samples (default: 0.1).",
+    )
     p.add_argument("--interval-s", type=float, default=1.5, help="Polling interval (default: 1.5).")
     p.add_argument("--stable-s", type=float, default=0.8, help="Require sensor orientation stable for this long (default: 0.8).")
     p.add_argument("--min-apply-s", type=float, default=1.0, help="Minimum time between applying rotations (default: 1.0).")
@@ -297,16 +207,68 @@ def main(argv: list[str]) -> int:
         _log("rotate_path_missing", path=str(args.rotate_path))
         return 1
 
-    sensor_claim = SensorClaim()
-    sensor_claim_enabled = False
+    sensor: SensorProxy | IIOAccel
+    if args.sensor_backend == "iio":
+        sensor = IIOAccel(
+            threshold_deg=args.iio_threshold_deg,
+            hysteresis_deg=args.iio_hysteresis_deg,
+            sample_s=args.iio_sample_s,
+        )
+    else:
+        sensor = SensorProxy()
+    last_sensor_error: str | None = None
 
     last_sensor_orientation: str | None = None
     last_sensor_orientation_change = 0.0
     last_apply_ts = 0.0
 
+    state_stream = StateStreamClient(Path(args.state_socket)) if args.state_socket else None
+    st: dict[str, Any] | None = None
+    stream_state: dict[str, Any] | None = None
+
+    def _wait(timeout_s: float) -> None:
+        """
+        Sleep until the next poll, returning early when the daemon pushes a
+        transition or iio-sensor-proxy reports a new orientation.
+        """
+
+        nonlocal stream_state
+        fds: list[int] = []
+        stream_fd = state_stream.fileno() if state_stream is not None else None
+        if stream_fd is not None:
+            fds.append(stream_fd)
+        sensor_fd = sensor.fileno()
+        if sensor_fd is not None:
+            fds.append(sensor_fd)
+        if not fds:
+            time.sleep(timeout_s)
+            return
+        try:
+            ready, _, _ = select.select(fds, [], [], timeout_s)
+        except InterruptedError:
+            return
+        if sensor_fd is not None and sensor_fd in ready:
+            sensor.handle_events()
+        if stream_fd is not None and stream_fd in ready and state_stream is not None:
+            msgs = state_stream.read()
+            if msgs:
+                stream_state = msgs[-1]
+            if not state_stream.connected():
+                _log("state_stream", path=str(args.state_socket), connected=False)
+
     try:
         while True:
-            st = _read_state(args.state_file)
+            if state_stream is not None and not state_stream.connected() and state_stream.connect():
+                _log("state_stream", path=str(args.state_socket), connected=True, since=state_stream.seq)
+                # The subscribe reply (replay/resync) is normally already queued.
+                msgs = state_stream.wait(0.05)
+                if msgs:
+                    stream_state = msgs[-1]
+            if stream_state is not None:
+                st = stream_state
+                stream_state = None
+            elif state_stream is None or not state_stream.connected() or st is None:
+                st = _read_state(args.state_file)
             desired = _desired_mode(st) if st else None
             desired = desired or "full"
 
@@ -323,25 +285,21 @@ def main(argv: list[str]) -> int:
 
             want_sensor = desired == "full"
             if want_sensor:
-                if not sensor_claim_enabled:
-                    sensor_claim_enabled = True
-                    _sensorproxy_claim()
-                    started = sensor_claim.start()
-                    _log("sensor_claim_enabled", started=bool(started), running=bool(sensor_claim.running()))
-                elif not sensor_claim.running():
-                    started = sensor_claim.start()
-                    if started:
-                        _log("sensor_claim_restarted", running=bool(sensor_claim.running()))
-            elif sensor_claim_enabled:
-                sensor_claim_enabled = False
-                stopped = sensor_claim.stop()
+                if sensor.start():
+                    _log("sensor_claim_enabled", backend=args.sensor_backend, mode=sensor.mode, orientation=sensor.orientation, note=sensor.error)
+                elif not sensor.claimed and sensor.error and sensor.error != last_sensor_error:
+                    _log("sensor_claim_failed", error=sensor.error)
+                last_sensor_error = sensor.error
+            elif sensor.active():
+                stopped = sensor.stop()
+                last_sensor_error = None
                 _log("sensor_claim_disabled", stopped=bool(stopped))
 
             if desired == "half" and args.force_normal_when_half:
                 target = 0
                 reason = "force_normal_when_half"
             elif desired == "full":
-                sensor_orientation = _sensorproxy_orientation()
+                sensor_orientation = sensor.orientation
                 if sensor_orientation:
                     if sensor_orientation != last_sensor_orientation:
                         last_sensor_orientation = sensor_orientation
@@ -362,7 +320,7 @@ def main(argv: list[str]) -> int:
                 _log("rotate_read_error", path=str(args.rotate_path))
                 if args.once:
                     return 1
-                time.sleep(float(args.interval_s))
+                _wait(float(args.interval_s))
                 continue
 
             if target is not None and target != cur:
@@ -451,9 +409,11 @@ def main(argv: list[str]) -> int:
 
             if args.once:
                 return 0
-            time.sleep(float(args.interval_s))
+            _wait(float(args.interval_s))
     finally:
-        sensor_claim.stop()
+        sensor.stop()
+        if state_stream is not None:
+            state_stream.close()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,355 @@
+"""
+Live registry of the X1 Fold devices the tools care about, fed by kernel uevents.
+
+Repo source: x1fold/tools/x1fold_uevent.py
+
+Discovery used to mean globbing /dev/hidraw* and /sys/class/drm/card*-eDP-* on
+every `set`/`status`. This module scans sysfs once and then follows the kernel
+uevent netlink socket (NETLINK_KOBJECT_UEVENT, group 1: raw kernel events, no
+udevd dependency) to keep four tables current:
+
+  - hidraw: every hidraw node with its HID parent's uevent (HID_ID, HID_NAME,
+    DRIVER); x1fold_mode.py picks the Wacom WACF2200 node from it.
+  - i2c: I2C clients that are the digitizer (ACPI WACF2200, or address 0x0a),
+    with the adapter bus hosting them.
+  - drm: DRM connectors (card*-eDP-* is what the tools look at) and their card.
+  - input: input devices (inputN) with their NAME; x1fold_dock.py's DockEvents
+    treats an add/remove (the keyboard attaching) as a hint to re-read the EC.
+
+Subscribers get a DeviceChange for every add/remove (and DRM hotplug "change").
+Events are only read when someone asks: `poll()` drains the socket without
+blocking, and every query calls it first. Long-running callers can also put
+`fileno()` in their select set, or block in `wait()` for a specific change
+(e.g. the digitizer hidraw node coming back after resume).
+
+If the netlink socket cannot be opened, every query rescans sysfs (the old
+behaviour).
+"""
+
+from __future__ import annotations
+
+import errno
+import os
+import re
+import select
+import socket
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable
+
+NETLINK_KOBJECT_UEVENT = 15
+
+KINDS = ("hidraw", "i2c", "drm", "input")
+
+# Digitizer I2C client: ACPI-enumerated ("i2c-WACF2200:00") or a board-info
+# client at 0x0a ("<bus>-000a").
+_WACOM_I2C_RE = re.compile(r"^(?:i2c-WACF2200:.*|\d+-000a)$")
+_I2C_BUS_RE = re.compile(r"^i2c-(\d+)$")
+_DRM_CONNECTOR_RE = re.compile(r"^(card\d+)-(.+)$")
+_INPUT_RE = re.compile(r"^input\d+$")
+
+
+def _safe_read_text(path: Path) -> str | None:
+    try:
+        return path.read_text(encoding="utf-8", errors="replace").strip()
+    except OSError:
+        return None
+
+
+def _parse_kv(text: str) -> dict[str, str]:
+    out: dict[str, str] = {}
+    for line in text.splitlines():
+        k, sep, v = line.partition("=")
+        if sep:
+            out[k.strip()] = v.strip()
+    return out
+
+
+@dataclass(frozen=True)
+class DeviceNode:
+    kind: str  # "hidraw" | "i2c" | "drm" | "input"
+    name: str  # hidraw3 / i2c-WACF2200:00 / card1-eDP-1 / input7
+    sysfs: Path
+    devnode: Path | None  # /dev/hidraw3, /dev/i2c-1, /dev/dri/card1 (None for input)
+    props: dict[str, str] = field(default_factory=dict, compare=False)
+
+
+@dataclass(frozen=True)
+class DeviceChange:
+    kind: str
+    action: str  # "add" | "remove" | "change" | "resync"
+    name: str
+    node: DeviceNode | None
+
+
+class DeviceRegistry:
+    """
+    hidraw / digitizer-i2c / DRM connector / input tables kept current from uevents.
+    """
+
+    def __init__(self, *, sys_root: Path = Path("/sys"), dev_root: Path = Path("/dev")) -> None:
+        self.sys_root = sys_root
+        self.dev_root = dev_root
+        self._sock: socket.socket | None = None
+        self._opened = False
+        self._tables: dict[str, dict[str, DeviceNode]] = {k: {} for k in KINDS}
+        self._subscribers: list[Callable[[DeviceChange], None]] = []
+        self.error: str | None = None
+        self.scans = 0
+
+    # --- lifecycle -------------------------------------------------------------
+
+    def open(self) -> bool:
+        """
+        Subscribe to uevents, then scan sysfs once; returns True when live.
+        """
+
+        if self._opened:
+            return self._sock is not None
+        self._opened = True
+        try:
+            sock = socket.socket(
+                socket.AF_NETLINK, socket.SOCK_DGRAM | socket.SOCK_CLOEXEC | socket.SOCK_NONBLOCK, NETLINK_KOBJECT_UEVENT
+            )
+            sock.bind((0, 1))
+            self._sock = sock
+        except (OSError, AttributeError) as exc:
+            self.error = f"{type(exc).__name__}: {exc}"
+        # Socket first: anything that appears during the scan is queued, not lost.
+        self._scan()
+        return self._sock is not None
+
+    def live(self) -> bool:
+        return self._sock is not None
+
+    def fileno(self) -> int | None:
+        self.open()
+        return self._sock.fileno() if self._sock is not None else None
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+        self._sock = None
+        self._opened = False
+
+    def subscribe(self, callback: Callable[[DeviceChange], None]) -> None:
+        if callback not in self._subscribers:
+            self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[[DeviceChange], None]) -> None:
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    # --- queries ---------------------------------------------------------------
+
+    def _table(self, kind: str) -> list[DeviceNode]:
+        fresh = not self._opened
+        if self.open():
+            self.poll()
+        elif not fresh:
+            self._scan()
+        return sorted(self._tables[kind].values(), key=lambda n: (len(n.name), n.name))
+
+    def hidraw(self) -> list[DeviceNode]:
+        return self._table("hidraw")
+
+    def wacom_i2c(self) -> list[DeviceNode]:
+        return self._table("i2c")
+
+    def wacom_i2c_bus(self) -> int | None:
+        """
+        Bus number of the adapter hosting the digitizer (WACF2200 @ 0x0a).
+        """
+
+        for node in self.wacom_i2c():
+            bus = node.props.get("I2C_BUS")
+            if bus is not None:
+                return int(bus)
+        return None
+
+    def drm_connectors(self, prefix: str = "") -> list[DeviceNode]:
+        return [n for n in self._table("drm") if n.props.get("CONNECTOR", "").startswith(prefix)]
+
+    def edp_connectors(self) -> list[DeviceNode]:
+        return self.drm_connectors("eDP-")
+
+    def input_devices(self) -> list[DeviceNode]:
+        return self._table("input")
+
+    # --- events ----------------------------------------------------------------
+
+    def poll(self) -> list[DeviceChange]:
+        """
+        Apply queued uevents without blocking; returns (and publishes) the changes.
+        """
+
+        changes: list[DeviceChange] = []
+        sock = self._sock
+        while sock is not None:
+            try:
+                data = sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as exc:
+                if exc.errno == errno.ENOBUFS:
+                    # Receive queue overflowed: events were dropped, start over.
+                    changes += self._resync()
+                    continue
+                break
+            change = self._apply(data)
+            if change is not None:
+                changes.append(change)
+        for change in changes:
+            for callback in list(self._subscribers):
+                callback(change)
+        return changes
+
+    def wait(self, match: Callable[[DeviceChange], bool], timeout_s: float) -> DeviceChange | None:
+        """
+        Block until a change satisfying `match` arrives (or `timeout_s` passes).
+        """
+
+        fd = self.fileno()
+        if fd is None:
+            return None
+        deadline = time.monotonic() + max(0.0, float(timeout_s))
+        while True:
+            for change in self.poll():
+                if match(change):
+                    return change
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            try:
+                select.select([fd], [], [], remaining)
+            except InterruptedError:
+                pass
+
+    def _apply(self, data: bytes) -> DeviceChange | None:
+        fields = data.split(b"\0")
+        env: dict[str, str] = {}
+        for f in fields[1:]:
+            k, sep, v = f.partition(b"=")
+            if sep:
+                env[k.decode("ascii", errors="replace")] = v.decode("utf-8", errors="replace")
+        action = env.get("ACTION", "")
+        devpath = env.get("DEVPATH", "")
+        subsystem = env.get("SUBSYSTEM")
+        if not devpath or action not in ("add", "remove", "change"):
+            return None
+        sysfs = self.sys_root / devpath.lstrip("/")
+        name = sysfs.name
+        if subsystem == "hidraw" and action in ("add", "remove"):
+            kind = "hidraw"
+            node = self._hidraw_node(sysfs, env) if action == "add" else None
+        elif subsystem == "i2c" and env.get("DEVTYPE") == "i2c_client" and action in ("add", "remove"):
+            if not _WACOM_I2C_RE.match(name):
+                return None
+            kind = "i2c"
+            node = self._i2c_node(sysfs) if action == "add" else None
+        elif subsystem == "drm":
+            if action == "change":
+                # Connector status changes arrive as a card "change" with HOTPLUG=1.
+                if env.get("HOTPLUG") != "1":
+                    return None
+                return DeviceChange("drm", "change", name, None)
+            if not _DRM_CONNECTOR_RE.match(name):
+                return None
+            kind = "drm"
+            node = self._drm_node(sysfs) if action == "add" else None
+        elif subsystem == "input" and action in ("add", "remove"):
+            # Only the inputN device itself, not its eventN/mouseN children.
+            if not _INPUT_RE.match(name):
+                return None
+            kind = "input"
+            node = self._input_node(sysfs, env) if action == "add" else None
+        else:
+            return None
+        if node is not None:
+            self._tables[kind][name] = node
+        else:
+            node = self._tables[kind].pop(name, None)
+        return DeviceChange(kind, action, name, node)
+
+    # --- sysfs -----------------------------------------------------------------
+
+    def _hidraw_node(self, sysfs: Path, env: dict[str, str] | None = None) -> DeviceNode:
+        props = _parse_kv(_safe_read_text(sysfs / "device" / "uevent") or "")
+        devname = (env or {}).get("DEVNAME") or sysfs.name
+        return DeviceNode("hidraw", sysfs.name, sysfs / "device", self.dev_root / devname, props)
+
+    def _i2c_node(self, sysfs: Path) -> DeviceNode:
+        props = _parse_kv(_safe_read_text(sysfs / "uevent") or "")
+        try:
+            parent = sysfs.resolve().parent.name
+        except OSError:
+            parent = sysfs.parent.name
+        m = _I2C_BUS_RE.match(parent)
+        devnode = None
+        if m:
+            props["I2C_BUS"] = m.group(1)
+            devnode = self.dev_root / f"i2c-{m.group(1)}"
+        return DeviceNode("i2c", sysfs.name, sysfs, devnode, props)
+
+    def _drm_node(self, sysfs: Path) -> DeviceNode:
+        m = _DRM_CONNECTOR_RE.match(sysfs.name)
+        card, connector = (m.group(1), m.group(2)) if m else ("", sysfs.name)
+        props = {"CARD": card, "CONNECTOR": connector}
+        return DeviceNode("drm", sysfs.name, sysfs, self.dev_root / "dri" / card if card else None, props)
+
+    def _input_node(self, sysfs: Path, env: dict[str, str] | None = None) -> DeviceNode:
+        name = (env or {}).get("NAME")
+        if name is None:
+            name = _safe_read_text(sysfs / "name") or ""
+        return DeviceNode("input", sysfs.name, sysfs, None, {"NAME": name.strip().strip('"')})
+
+    def _scan(self) -> None:
+        self.scans += 1
+        tables: dict[str, dict[str, DeviceNode]] = {k: {} for k in KINDS}
+        for base, kind in (
+            (self.sys_root / "class" / "hidraw", "hidraw"),
+            (self.sys_root / "bus" / "i2c" / "devices", "i2c"),
+            (self.sys_root / "class" / "drm", "drm"),
+            (self.sys_root / "class" / "input", "input"),
+        ):
+            try:
+                entries = sorted(os.listdir(base))
+            except OSError:
+                continue
+            for name in entries:
+                sysfs = base / name
+                if kind == "hidraw":
+                    node = self._hidraw_node(sysfs)
+                elif kind == "i2c":
+                    if not _WACOM_I2C_RE.match(name):
+                        continue
+                    node = self._i2c_node(sysfs)
+                elif kind == "drm":
+                    if not _DRM_CONNECTOR_RE.match(name):
+                        continue
+                    node = self._drm_node(sysfs)
+                else:
+                    if not _INPUT_RE.match(name):
+                        continue
+                    node = self._input_node(sysfs)
+                tables[kind][name] = node
+        self._tables = tables
+
+    def _resync(self) -> list[DeviceChange]:
+        self._scan()
+        return [DeviceChange(kind, "resync", "", None) for kind in KINDS]
+
+
+_shared: DeviceRegistry | None = None
+
+
+def shared() -> DeviceRegistry:
+    """
+    Process-wide registry (one netlink socket shared by every user in-process).
+    """
+
+    global _shared
+    if _shared is None:
+        _shared = DeviceRegistry()
+    return _shared
@@ -8,6 +8,10 @@
 //
 // Notes:
 // - Requires compositor support for wlr-layer-shell (wlroots-based compositors).
+// - The black fill is a single 1x1 buffer scaled to the region with
+//   wp_viewporter when available (wp_single_pixel_buffer_manager_v1, else a
+//   1x1 wl_shm buffer); only without viewporter is a region-sized SHM buffer
+//   allocated.
 // - Does not attempt global pointer confinement; Wayland does not offer a
 //   compositor-agnostic equivalent to XFixes pointer barriers.
 
@@ -28,6 +32,8 @@
 
 #include <wayland-client.h>
 
+#include "wayland/single-pixel-buffer-v1-client-protocol.h"
+#include "wayland/viewporter-client-protocol.h"
 #include "wayland/wlr-layer-shell-unstable-v1-client-protocol.h"
 
 static volatile sig_atomic_t g_stop = 0;
@@ -49,7 +55,12 @@ static void install_signal_handlers(void) {
   sigaction(SIGTERM, &sa, NULL);
 }
 
-static int pump_events(struct wl_display *display, int timeout_ms) {
+// Dispatch Wayland events for up to timeout_ms. `extra_fd` (-1 for none) is
+// polled alongside the display fd; *extra_ready reports whether it fired.
+static int pump_events(struct wl_display *display, int timeout_ms, int extra_fd, bool *extra_ready) {
+  if (extra_ready) {
+    *extra_ready = false;
+  }
   if (wl_display_dispatch_pending(display) < 0) {
     return -1;
   }
@@ -72,8 +83,11 @@ static int pump_events(struct wl_display *display, int timeout_ms) {
   }
 
   const int fd = wl_display_get_fd(display);
-  struct pollfd pfd = {.fd = fd, .events = POLLIN, .revents = 0};
-  int rc = poll(&pfd, 1, timeout_ms);
+  struct pollfd pfds[2] = {
+      {.fd = fd, .events = POLLIN, .revents = 0},
+      {.fd = extra_fd, .events = POLLIN, .revents = 0},
+  };
+  int rc = poll(pfds, 2, timeout_ms);
   if (rc < 0) {
     wl_display_cancel_read(display);
     if (errno == EINTR) {
@@ -81,11 +95,14 @@ static int pump_events(struct wl_display *display, int timeout_ms) {
     }
     return -1;
   }
-  if (rc == 0) {
+  if (extra_ready && extra_fd >= 0 && (pfds[1].revents & (POLLIN | POLLHUP | POLLERR))) {
+    *extra_ready = true;
+  }
+  if (rc == 0 || pfds[0].revents == 0) {
     wl_display_cancel_read(display);
     return 0;
   }
-  if (pfd.revents & (POLLERR | POLLHUP | POLLNVAL)) {
+  if (pfds[0].revents & (POLLERR | POLLHUP | POLLNVAL)) {
     wl_display_cancel_read(display);
     return -1;
   }
@@ -111,7 +128,7 @@ static void dief(const char *fmt, ...) {
 static void usage(FILE *out) {
   fprintf(out,
           "Usage:\n"
-          "  x1fold_wl_blank [--side SIDE] [--active-size PX] [--name NAME]\n"
+          "  x1fold_wl_blank [--side SIDE] [--active-size PX] [--name NAME] [--buffer MODE] [--control] [--hidden]\n"
           "\n"
           "Creates a Wayland layer-shell surface covering the 'blank' region and\n"
           "reserves that space via exclusive_zone.\n"
@@ -120,29 +137,64 @@ static void usage(FILE *out) {
           "  bottom  -> blank bottom, active top is PX tall\n"
           "  top     -> blank top, active bottom is PX tall\n"
           "  left    -> blank left, active right is PX wide\n"
-          "  right   -> blank right, active left is PX wide\n");
+          "  right   -> blank right, active left is PX wide\n"
+          "\n"
+          "MODE picks how the black fill is allocated (default: auto, first available):\n"
+          "  single-pixel  -> wp_single_pixel_buffer_manager_v1 + wp_viewporter\n"
+          "  shm-1x1       -> 1x1 wl_shm buffer + wp_viewporter\n"
+          "  shm-full      -> wl_shm buffer the size of the blank region\n"
+          "\n"
+          "--control reads commands from stdin, one per line, and answers each with\n"
+          "one line on stdout (\"ready ...\" once the surface is up):\n"
+          "  size PX | side SIDE | show | hide  -> configured side=S active=PX visible=0|1 buffer=MODE\n"
+          "  quit                               -> bye\n"
+          "  anything invalid                   -> error MESSAGE\n"
+          "Replies are sent after a wl_display.sync round-trip, i.e. once the\n"
+          "compositor has processed the change.\n"
+          "--hidden starts with the surface unmapped (until \"show\").\n");
 }
 
 enum Side { SIDE_BOTTOM = 0, SIDE_TOP = 1, SIDE_LEFT = 2, SIDE_RIGHT = 3 };
 
+static const char *const k_side_names[] = {"bottom", "top", "left", "right"};
+
+static bool side_from_str(const char *s, enum Side *out) {
+  for (int i = 0; i < 4; i++) {
+    if (s && strcmp(s, k_side_names[i]) == 0) {
+      *out = (enum Side)i;
+      return true;
+    }
+  }
+  return false;
+}
+
 static enum Side parse_side(const char *s) {
   if (!s || s[0] == '\0') {
     return SIDE_BOTTOM;
   }
-  if (strcmp(s, "bottom") == 0) {
-    return SIDE_BOTTOM;
-  }
-  if (strcmp(s, "top") == 0) {
-    return SIDE_TOP;
+  enum Side side = SIDE_BOTTOM;
+  if (!side_from_str(s, &side)) {
+    dief("invalid --side (must be one of: bottom, top, left, right)");
   }
-  if (strcmp(s, "left") == 0) {
-    return SIDE_LEFT;
+  return side;
+}
+
+enum BufferMode { BUFFER_AUTO = -1, BUFFER_SINGLE_PIXEL = 0, BUFFER_SHM_1X1 = 1, BUFFER_SHM_FULL = 2 };
+
+static const char *const k_buffer_names[] = {"single-pixel", "shm-1x1", "shm-full"};
+
+static enum BufferMode parse_buffer_mode(const char *s) {
+  if (strcmp(s, "auto") == 0) {
+    return BUFFER_AUTO;
   }
-  if (strcmp(s, "right") == 0) {
-    return SIDE_RIGHT;
+  for (size_t i = 0; i < sizeof(k_buffer_names) / sizeof(k_buffer_names[0]); i++) {
+    if (strcmp(s, k_buffer_names[i]) == 0) {
+      return (enum BufferMode)i;
+    }
   }
-  dief("invalid --side (must be one of: bottom, top, left, right)");
-  return SIDE_BOTTOM;
+  fprintf(stderr, "error: --buffer must be one of: auto, single-pixel, shm-1x1, shm-full\n");
+  usage(stderr);
+  exit(2);
 }
 
 static int create_tmpfile(off_t size) {
@@ -173,6 +225,8 @@ struct app {
   struct wl_compositor *compositor;
   struct wl_shm *shm;
   struct zwlr_layer_shell_v1 *layer_shell;
+  struct wp_viewporter *viewporter;
+  struct wp_single_pixel_buffer_manager_v1 *single_pixel;
 
   struct output_info out;
   bool have_output;
@@ -183,7 +237,10 @@ struct app {
 
   struct wl_surface *surface;
   struct zwlr_layer_surface_v1 *layer_surface;
+  struct wp_viewport *viewport;
+  bool visible;
 
+  enum BufferMode buffer_mode;
   struct wl_buffer *buffer;
   void *buf_data;
   size_t buf_len;
@@ -212,26 +269,13 @@ static void destroy_buffer(struct app *app) {
   app->buf_stride = 0;
 }
 
-static void ensure_buffer(struct app *app, int32_t width, int32_t height) {
+static void create_shm_buffer(struct app *app, int buf_w, int buf_h) {
   if (!app->shm) {
     dief("missing wl_shm");
   }
-  if (width <= 0 || height <= 0) {
-    dief("invalid configured size %dx%d", (int)width, (int)height);
-  }
-
-  const int32_t scale = (app->scale > 0) ? app->scale : 1;
-  const int buf_w = (int)width * (int)scale;
-  const int buf_h = (int)height * (int)scale;
   const int stride = buf_w * 4;
   const size_t size = (size_t)stride * (size_t)buf_h;
 
-  if (app->buffer && app->buf_w == buf_w && app->buf_h == buf_h) {
-    return;
-  }
-
-  destroy_buffer(app);
-
   int fd = create_tmpfile((off_t)size);
   if (fd < 0) {
     dief("mkstemp/ftruncate failed: %s", strerror(errno));
@@ -268,6 +312,63 @@ static void ensure_buffer(struct app *app, int32_t width, int32_t height) {
   app->buf_stride = stride;
 }
 
+// Pick the cheapest fill the compositor supports. Called once the globals are
+// bound; an explicit --buffer mode that is unavailable degrades the same way.
+static void choose_buffer_mode(struct app *app) {
+  enum BufferMode mode = app->buffer_mode == BUFFER_AUTO ? BUFFER_SINGLE_PIXEL : app->buffer_mode;
+  if (mode == BUFFER_SINGLE_PIXEL && (!app->single_pixel || !app->viewporter)) {
+    mode = BUFFER_SHM_1X1;
+  }
+  if (mode == BUFFER_SHM_1X1 && !app->viewporter) {
+    mode = BUFFER_SHM_FULL;
+  }
+  if (app->buffer_mode != BUFFER_AUTO && mode != app->buffer_mode) {
+    fprintf(stderr, "warning: --buffer %s unavailable on this compositor; using %s\n",
+            k_buffer_names[app->buffer_mode], k_buffer_names[mode]);
+  }
+  app->buffer_mode = mode;
+}
+
+// Attach-ready black buffer for a configured surface of width x height
+// (surface-local units). With a viewport the same 1x1 buffer is reused and
+// only the destination size changes; otherwise a buffer of the full size (in
+// buffer pixels) is (re)allocated when the size changes.
+static void ensure_buffer(struct app *app, int32_t width, int32_t height) {
+  if (width <= 0 || height <= 0) {
+    dief("invalid configured size %dx%d", (int)width, (int)height);
+  }
+
+  if (app->buffer_mode != BUFFER_SHM_FULL) {
+    wp_viewport_set_destination(app->viewport, width, height);
+    wl_surface_set_buffer_scale(app->surface, 1);
+    if (app->buffer) {
+      return;
+    }
+    if (app->buffer_mode == BUFFER_SINGLE_PIXEL) {
+      // Pre-multiplied RGBA, opaque black.
+      app->buffer = wp_single_pixel_buffer_manager_v1_create_u32_rgba_buffer(app->single_pixel, 0, 0, 0, UINT32_MAX);
+      if (!app->buffer) {
+        dief("wp_single_pixel_buffer_manager_v1_create_u32_rgba_buffer failed");
+      }
+      app->buf_w = 1;
+      app->buf_h = 1;
+    } else {
+      create_shm_buffer(app, 1, 1);
+    }
+    return;
+  }
+
+  const int32_t scale = (app->scale > 0) ? app->scale : 1;
+  const int buf_w = (int)width * (int)scale;
+  const int buf_h = (int)height * (int)scale;
+  wl_surface_set_buffer_scale(app->surface, scale);
+  if (app->buffer && app->buf_w == buf_w && app->buf_h == buf_h) {
+    return;
+  }
+  destroy_buffer(app);
+  create_shm_buffer(app, buf_w, buf_h);
+}
+
 static void layer_surface_configure(void *data, struct zwlr_layer_surface_v1 *surface,
                                     uint32_t serial, uint32_t width, uint32_t height) {
   (void)serial;
@@ -280,13 +381,17 @@ static void layer_surface_configure(void *data, struct zwlr_layer_surface_v1 *su
   }
 
   zwlr_layer_surface_v1_ack_configure(surface, serial);
+  if (!app->visible) {
+    // Hidden via the control channel: attaching would map it again.
+    return;
+  }
 
-  wl_surface_set_buffer_scale(app->surface, app->scale > 0 ? app->scale : 1);
   ensure_buffer(app, w, h);
 
   wl_surface_attach(app->surface, app->buffer, 0, 0);
   // wl_surface_damage_buffer requires wl_surface v4; wl_surface_damage is
-  // sufficient for our static black buffer.
+  // sufficient for our static black buffer. A reused buffer still needs the
+  // damage: the viewport destination may have changed.
   wl_surface_damage(app->surface, 0, 0, INT32_MAX, INT32_MAX);
   wl_surface_commit(app->surface);
 }
@@ -360,6 +465,10 @@ static void registry_global(void *data, struct wl_registry *registry, uint32_t n
   } else if (strcmp(interface, zwlr_layer_shell_v1_interface.name) == 0) {
     uint32_t v = version < 1 ? version : 1;
     app->layer_shell = wl_registry_bind(registry, name, &zwlr_layer_shell_v1_interface, v);
+  } else if (strcmp(interface, wp_viewporter_interface.name) == 0) {
+    app->viewporter = wl_registry_bind(registry, name, &wp_viewporter_interface, 1);
+  } else if (strcmp(interface, wp_single_pixel_buffer_manager_v1_interface.name) == 0) {
+    app->single_pixel = wl_registry_bind(registry, name, &wp_single_pixel_buffer_manager_v1_interface, 1);
   } else if (strcmp(interface, wl_output_interface.name) == 0) {
     if (!app->have_output) {
       uint32_t v = version < 2 ? version : 2;
@@ -381,18 +490,21 @@ static const struct wl_registry_listener registry_listener = {
     .global_remove = registry_remove,
 };
 
-static void setup_geometry(struct app *app) {
+// Compute blank size/exclusive zone for (side, active_size_px) on the current
+// output. On success the app's geometry is updated and NULL is returned; on
+// failure nothing changes and the error text is returned.
+static const char *setup_geometry(struct app *app, enum Side side, int32_t active_size_px) {
+  static char err[160];
   if (!app->have_output || !app->out.have_current_mode) {
-    dief("no wl_output current mode available (compositor did not report output size)");
+    return "no wl_output current mode available (compositor did not report output size)";
   }
   int32_t scale = app->out.scale > 0 ? app->out.scale : 1;
-  app->scale = scale;
 
   // wl_output mode size is in physical pixels; layer-shell surface size and
   // exclusive zone are in surface-local units (logical px). Convert with scale.
   const int32_t full_w = app->out.width / scale;
   const int32_t full_h = app->out.height / scale;
-  int32_t active = app->active_size_px / scale;
+  int32_t active = active_size_px / scale;
   if (active <= 0) {
     active = 1;
   }
@@ -401,25 +513,33 @@ static void setup_geometry(struct app *app) {
   int32_t blank_h = full_h;
   int32_t exclusive = 0;
 
-  if (app->side == SIDE_BOTTOM || app->side == SIDE_TOP) {
+  if (side == SIDE_BOTTOM || side == SIDE_TOP) {
     if (active >= full_h) {
-      dief("--active-size must be in 1..(screen_height-1); full_h=%d active=%d", (int)full_h, (int)active);
+      snprintf(err, sizeof(err), "--active-size must be in 1..(screen_height-1); full_h=%d active=%d", (int)full_h,
+               (int)active);
+      return err;
     }
     blank_h = full_h - active;
     exclusive = blank_h;
     blank_w = 0;  // fill
   } else {
     if (active >= full_w) {
-      dief("--active-size must be in 1..(screen_width-1); full_w=%d active=%d", (int)full_w, (int)active);
+      snprintf(err, sizeof(err), "--active-size must be in 1..(screen_width-1); full_w=%d active=%d", (int)full_w,
+               (int)active);
+      return err;
     }
     blank_w = full_w - active;
     exclusive = blank_w;
     blank_h = 0;  // fill
   }
 
+  app->scale = scale;
+  app->side = side;
+  app->active_size_px = active_size_px;
   app->desired_w = blank_w;
   app->desired_h = blank_h;
   app->exclusive_zone = exclusive;
+  return NULL;
 }
 
 static void create_surface(struct app *app) {
@@ -427,8 +547,6 @@ static void create_surface(struct app *app) {
     dief("missing Wayland globals (need wl_compositor + zwlr_layer_shell_v1)");
   }
 
-  setup_geometry(app);
-
   app->surface = wl_compositor_create_surface(app->compositor);
   if (!app->surface) {
     dief("wl_compositor_create_surface failed");
@@ -441,6 +559,22 @@ static void create_surface(struct app *app) {
     dief("zwlr_layer_shell_v1_get_layer_surface failed");
   }
 
+  zwlr_layer_surface_v1_add_listener(app->layer_surface, &layer_surface_listener, app);
+
+  choose_buffer_mode(app);
+  if (app->buffer_mode != BUFFER_SHM_FULL) {
+    app->viewport = wp_viewporter_get_viewport(app->viewporter, app->surface);
+    if (!app->viewport) {
+      dief("wp_viewporter_get_viewport failed");
+    }
+  }
+}
+
+// Send the layer-surface state for the current geometry and commit. The
+// compositor answers with a configure; layer_surface_configure() attaches the
+// buffer. Used for the initial map, to re-map after `hide`, and to move a
+// mapped surface to a new side/size.
+static void map_surface(struct app *app) {
   uint32_t anchors = 0;
   if (app->side == SIDE_BOTTOM) {
     anchors = ZWLR_LAYER_SURFACE_V1_ANCHOR_BOTTOM | ZWLR_LAYER_SURFACE_V1_ANCHOR_LEFT |
@@ -461,15 +595,188 @@ static void create_surface(struct app *app) {
   zwlr_layer_surface_v1_set_exclusive_zone(app->layer_surface, app->exclusive_zone);
   zwlr_layer_surface_v1_set_keyboard_interactivity(app->layer_surface, 0);
 
-  zwlr_layer_surface_v1_add_listener(app->layer_surface, &layer_surface_listener, app);
+  wl_surface_commit(app->surface);
+  app->visible = true;
+}
 
+// A null buffer unmaps a layer surface; it returns to its just-created state
+// and map_surface() maps it again.
+static void unmap_surface(struct app *app) {
+  wl_surface_attach(app->surface, NULL, 0, 0);
   wl_surface_commit(app->surface);
+  app->visible = false;
+}
+
+// --control: one command per line on stdin, exactly one reply line per
+// command on stdout (plus "ready" once the surface is up):
+//
+//   size PX | side SIDE | show | hide  ->  configured side=S active=PX visible=0|1
+//   quit                               ->  bye
+//   (invalid)                          ->  error MESSAGE
+//
+// Replies for surface changes are sent from a wl_display.sync callback, i.e.
+// after the compositor processed the commit and any configure it triggered
+// was handled. EOF on stdin is treated as quit.
+static void reply_state(const char *kind, const struct app *app) {
+  printf("%s side=%s active=%d visible=%d buffer=%s\n", kind, k_side_names[app->side], (int)app->active_size_px,
+         app->visible ? 1 : 0, app->buffer_mode == BUFFER_AUTO ? "auto" : k_buffer_names[app->buffer_mode]);
+  fflush(stdout);
+}
+
+static void reply_error(const char *msg) {
+  printf("error %s\n", msg);
+  fflush(stdout);
+}
+
+struct pending_reply {
+  struct app *app;
+  const char *kind;
+};
+
+static void sync_done(void *data, struct wl_callback *callback, uint32_t serial) {
+  (void)serial;
+  struct pending_reply *pending = data;
+  reply_state(pending->kind, pending->app);
+  wl_callback_destroy(callback);
+  free(pending);
+}
+
+static const struct wl_callback_listener sync_listener = {
+    .done = sync_done,
+};
+
+static void reply_after_roundtrip(struct app *app, const char *kind) {
+  struct pending_reply *pending = calloc(1, sizeof(*pending));
+  struct wl_callback *callback = pending ? wl_display_sync(app->display) : NULL;
+  if (!callback) {
+    free(pending);
+    reply_state(kind, app);
+    return;
+  }
+  pending->app = app;
+  pending->kind = kind;
+  wl_callback_add_listener(callback, &sync_listener, pending);
+  wl_display_flush(app->display);
+}
+
+static void handle_command(struct app *app, char *line) {
+  char *arg = strchr(line, ' ');
+  if (arg) {
+    *arg++ = '\0';
+    while (*arg == ' ') {
+      arg++;
+    }
+  }
+  enum Side side = app->side;
+  int32_t active = app->active_size_px;
+  if (strcmp(line, "size") == 0 && arg) {
+    char *end = NULL;
+    long v = strtol(arg, &end, 0);
+    if (!end || end == arg || *end != '\0' || v <= 0 || v > INT32_MAX) {
+      reply_error("size: expected a pixel count >= 1");
+      return;
+    }
+    active = (int32_t)v;
+  } else if (strcmp(line, "side") == 0 && arg) {
+    if (!side_from_str(arg, &side)) {
+      reply_error("side: must be one of: bottom, top, left, right");
+      return;
+    }
+  } else if (strcmp(line, "show") == 0) {
+    if (app->layer_surface && !app->visible) {
+      // The output mode/scale may have changed while the surface sat hidden.
+      const char *err = setup_geometry(app, app->side, app->active_size_px);
+      if (err) {
+        reply_error(err);
+        return;
+      }
+      map_surface(app);
+      reply_after_roundtrip(app, "configured");
+      return;
+    }
+    app->visible = true;
+    reply_state("configured", app);
+    return;
+  } else if (strcmp(line, "hide") == 0) {
+    if (app->layer_surface && app->visible) {
+      unmap_surface(app);
+      reply_after_roundtrip(app, "configured");
+      return;
+    }
+    app->visible = false;
+    reply_state("configured", app);
+    return;
+  } else if (strcmp(line, "quit") == 0) {
+    printf("bye\n");
+    fflush(stdout);
+    g_stop = 1;
+    return;
+  } else {
+    if (line[0] != '\0') {
+      reply_error("unknown command (size PX | side SIDE | show | hide | quit)");
+    }
+    return;
+  }
+
+  if (!app->layer_surface) {
+    // Still waiting for the output; the new geometry is used when the surface
+    // is created.
+    app->side = side;
+    app->active_size_px = active;
+    reply_state("configured", app);
+    return;
+  }
+  const char *err = setup_geometry(app, side, active);
+  if (err) {
+    reply_error(err);
+    return;
+  }
+  if (app->visible) {
+    map_surface(app);
+    reply_after_roundtrip(app, "configured");
+  } else {
+    reply_state("configured", app);
+  }
+}
+
+// Returns false on EOF/error (parent gone).
+static bool read_commands(struct app *app, char *buf, size_t cap, size_t *len) {
+  ssize_t n = read(STDIN_FILENO, buf + *len, cap - 1 - *len);
+  if (n < 0) {
+    return errno == EINTR || errno == EAGAIN;
+  }
+  if (n == 0) {
+    return false;
+  }
+  *len += (size_t)n;
+  buf[*len] = '\0';
+  char *start = buf;
+  char *nl = NULL;
+  while (!g_stop && (nl = strchr(start, '\n')) != NULL) {
+    *nl = '\0';
+    if (nl > start && nl[-1] == '\r') {
+      nl[-1] = '\0';
+    }
+    handle_command(app, start);
+    start = nl + 1;
+  }
+  *len = strlen(start);
+  memmove(buf, start, *len + 1);
+  if (*len >= cap - 1) {
+    // Overlong line: drop it rather than wedging the channel.
+    reply_error("command too long");
+    *len = 0;
+  }
+  return true;
 }
 
 int main(int argc, char **argv) {
   const char *name = "X1FOLD_HALFBLANK";
   const char *side_str = "bottom";
   int32_t active_size = 1240;
+  bool control = false;
+  bool start_hidden = false;
+  enum BufferMode buffer_mode = BUFFER_AUTO;
 
   for (int i = 1; i < argc; i++) {
     if (strcmp(argv[i], "--side") == 0 && i + 1 < argc) {
@@ -481,6 +788,12 @@ int main(int argc, char **argv) {
       active_size = (int32_t)strtol(argv[++i], NULL, 0);
     } else if (strcmp(argv[i], "--name") == 0 && i + 1 < argc) {
       name = argv[++i];
+    } else if (strcmp(argv[i], "--buffer") == 0 && i + 1 < argc) {
+      buffer_mode = parse_buffer_mode(argv[++i]);
+    } else if (strcmp(argv[i], "--control") == 0) {
+      control = true;
+    } else if (strcmp(argv[i], "--hidden") == 0) {
+      start_hidden = true;
     } else if (strcmp(argv[i], "-h") == 0 || strcmp(argv[i], "--help") == 0) {
       usage(stdout);
       return 0;
@@ -495,11 +808,17 @@ int main(int argc, char **argv) {
   }
 
   install_signal_handlers();
+  if (control) {
+    // A parent that died mid-write must not kill us before we clean up.
+    signal(SIGPIPE, SIG_IGN);
+  }
 
   struct app app = {0};
   app.side = parse_side(side_str);
   app.active_size_px = active_size;
   app.name = name;
+  app.visible = !start_hidden;
+  app.buffer_mode = buffer_mode;
 
   app.display = wl_display_connect(NULL);
   if (!app.display) {
@@ -511,6 +830,11 @@ int main(int argc, char **argv) {
   }
   wl_registry_add_listener(app.registry, &registry_listener, &app);
 
+  const int cmd_fd = control ? STDIN_FILENO : -1;
+  char cmd_buf[256];
+  size_t cmd_len = 0;
+  bool cmd_ready = false;
+
   // Populate globals, then wait for an output current mode.
   //
   // On some compositors (notably Sway when its VT is inactive), wl_output may
@@ -522,24 +846,43 @@ int main(int argc, char **argv) {
       ready = true;
       break;
     }
-    if (pump_events(app.display, 1000) < 0) {
+    if (pump_events(app.display, 1000, cmd_fd, &cmd_ready) < 0) {
       break;
     }
+    if (cmd_ready && !read_commands(&app, cmd_buf, sizeof(cmd_buf), &cmd_len)) {
+      g_stop = 1;
+    }
   }
   if (!g_stop && ready) {
     if (!app.layer_shell) {
       dief("compositor missing zwlr_layer_shell_v1 (wlroots layer-shell)");
     }
+    const char *err = setup_geometry(&app, app.side, app.active_size_px);
+    if (err) {
+      dief("%s", err);
+    }
     create_surface(&app);
+    if (app.visible) {
+      map_surface(&app);
+    }
+    if (control) {
+      reply_after_roundtrip(&app, "ready");
+    }
   }
 
   while (!g_stop) {
-    if (pump_events(app.display, 1000) < 0) {
+    if (pump_events(app.display, 1000, cmd_fd, &cmd_ready) < 0) {
+      break;
+    }
+    if (cmd_ready && !read_commands(&app, cmd_buf, sizeof(cmd_buf), &cmd_len)) {
       break;
     }
   }
 
   destroy_buffer(&app);
+  if (app.viewport) {
+    wp_viewport_destroy(app.viewport);
+  }
   if (app.layer_surface) {
     zwlr_layer_surface_v1_destroy(app.layer_surface);
   }
@@ -552,6 +895,12 @@ int main(int argc, char **argv) {
   if (app.layer_shell) {
     zwlr_layer_shell_v1_destroy(app.layer_shell);
   }
+  if (app.single_pixel) {
+    wp_single_pixel_buffer_manager_v1_destroy(app.single_pixel);
+  }
+  if (app.viewporter) {
+    wp_viewporter_destroy(app.viewporter);
+  }
   if (app.shm) {
     wl_shm_destroy(app.shm);
   }
@@ -1,7 +1,12 @@
 #include <X11/Xatom.h>
 #include <X11/Xlib.h>
 #include <X11/extensions/Xfixes.h>
+#ifdef HAVE_XI2
+#include <X11/extensions/XInput2.h>
+#endif
 #include <errno.h>
+#include <fcntl.h>
+#include <poll.h>
 #include <signal.h>
 #include <stdbool.h>
 #include <stdint.h>
@@ -14,10 +19,18 @@
 
 static volatile sig_atomic_t g_stop = 0;
 static volatile sig_atomic_t g_xerr = 0;
+// Self-pipe so a signal always wakes poll(), even if it lands just before it.
+static int g_sigpipe[2] = {-1, -1};
 
 static void on_signal(int signo) {
   (void)signo;
   g_stop = 1;
+  if (g_sigpipe[1] >= 0) {
+    int saved = errno;
+    ssize_t rc = write(g_sigpipe[1], "x", 1);
+    (void)rc;
+    errno = saved;
+  }
 }
 
 static void die_msg(const char *msg) {
@@ -29,10 +42,12 @@ static void usage(FILE *out) {
   fprintf(out,
           "Usage:\n"
           "  x1fold_x11_blank [--display :N] [--side SIDE] [--active-size PX] [--name NAME]\n"
+          "                   [--control] [--hidden]\n"
           "\n"
           "Creates a black DOCK window that covers the 'blank' region of the screen and\n"
           "reserves that space via _NET_WM_STRUT(_PARTIAL). It also installs an XFixes\n"
-          "pointer barrier to prevent the cursor entering the blank region.\n"
+          "pointer barrier to prevent the cursor entering the blank region, and clamps\n"
+          "the cursor back on XInput2 raw motion (every 100 ms without XI2).\n"
           "\n"
           "This emulates the X1 Fold 'halfblank' behavior under X11 without requiring\n"
           "DRM master.\n"
@@ -41,7 +56,14 @@ static void usage(FILE *out) {
           "  bottom  -> blank bottom, active top is PX tall\n"
           "  top     -> blank top, active bottom is PX tall\n"
           "  left    -> blank left, active right is PX wide\n"
-          "  right   -> blank right, active left is PX wide\n");
+          "  right   -> blank right, active left is PX wide\n"
+          "\n"
+          "--control reads commands from stdin, one per line, and answers each with\n"
+          "one line on stdout (\"ready ...\" once at startup):\n"
+          "  size PX | side SIDE | show | hide  -> configured side=S active=PX visible=0|1\n"
+          "  quit                               -> bye\n"
+          "  anything invalid                   -> error MESSAGE\n"
+          "--hidden starts with the window unmapped (until \"show\").\n");
 }
 
 static int on_xerror(Display *dpy, XErrorEvent *ev) {
@@ -69,26 +91,118 @@ static void set_cardinals(Display *dpy, Window win, Atom prop, long *vals, int n
 
 enum Side { SIDE_BOTTOM = 0, SIDE_TOP = 1, SIDE_LEFT = 2, SIDE_RIGHT = 3 };
 
+static const char *const k_side_names[] = {"bottom", "top", "left", "right"};
+
+static bool side_from_str(const char *s, enum Side *out) {
+  for (int i = 0; i < 4; i++) {
+    if (s && strcmp(s, k_side_names[i]) == 0) {
+      *out = (enum Side)i;
+      return true;
+    }
+  }
+  return false;
+}
+
 static enum Side parse_side(const char *s) {
   if (!s || s[0] == '\0') {
     return SIDE_BOTTOM;
   }
-  if (strcmp(s, "bottom") == 0) {
-    return SIDE_BOTTOM;
+  enum Side side = SIDE_BOTTOM;
+  if (!side_from_str(s, &side)) {
+    die_msg("invalid --side (must be one of: bottom, top, left, right)");
   }
-  if (strcmp(s, "top") == 0) {
-    return SIDE_TOP;
+  return side;
+}
+
+// Blank window rectangle, pointer barrier and strut values for one
+// (side, active size, screen size) combination.
+struct layout {
+  unsigned long x, y, w, h;
+  int barrier_x1, barrier_y1, barrier_x2, barrier_y2;
+  int barrier_dir;
+  long strut[4];   // left, right, top, bottom
+  long sp[12];     // _NET_WM_STRUT_PARTIAL
+};
+
+static const char *compute_layout(enum Side side, unsigned long active_size, unsigned long w, unsigned long h,
+                                  struct layout *lay) {
+  if (active_size == 0) {
+    return "--active-size must be >= 1";
+  }
+  if ((side == SIDE_BOTTOM || side == SIDE_TOP) && active_size >= h) {
+    return "--active-size must be in 1..(screen_height-1) for top/bottom";
   }
-  if (strcmp(s, "left") == 0) {
-    return SIDE_LEFT;
+  if ((side == SIDE_LEFT || side == SIDE_RIGHT) && active_size >= w) {
+    return "--active-size must be in 1..(screen_width-1) for left/right";
   }
-  if (strcmp(s, "right") == 0) {
-    return SIDE_RIGHT;
+
+  memset(lay, 0, sizeof(*lay));
+  lay->w = w;
+  lay->h = h;
+
+  if (side == SIDE_BOTTOM) {
+    lay->y = active_size;
+    lay->h = h - active_size;
+    lay->barrier_x1 = 0;
+    lay->barrier_x2 = (w > 0) ? (int)(w - 1U) : 0;
+    lay->barrier_y1 = lay->barrier_y2 = (int)active_size;
+    lay->barrier_dir = BarrierPositiveY;
+    lay->strut[3] = (long)lay->h;
+    lay->sp[3] = (long)lay->h;      // bottom
+    lay->sp[10] = 0;                // bottom_start_x
+    lay->sp[11] = (long)(w - 1U);   // bottom_end_x
+  } else if (side == SIDE_TOP) {
+    lay->y = 0;
+    lay->h = h - active_size;
+    unsigned long active_y = h - active_size;
+    lay->barrier_x1 = 0;
+    lay->barrier_x2 = (w > 0) ? (int)(w - 1U) : 0;
+    lay->barrier_y1 = lay->barrier_y2 = (int)active_y;
+    lay->barrier_dir = BarrierNegativeY;
+    lay->strut[2] = (long)lay->h;
+    lay->sp[2] = (long)lay->h;      // top
+    lay->sp[8] = 0;                 // top_start_x
+    lay->sp[9] = (long)(w - 1U);    // top_end_x
+  } else if (side == SIDE_LEFT) {
+    lay->x = 0;
+    lay->w = w - active_size;
+    unsigned long active_x = w - active_size;
+    lay->barrier_y1 = 0;
+    lay->barrier_y2 = (h > 0) ? (int)(h - 1U) : 0;
+    lay->barrier_x1 = lay->barrier_x2 = (int)active_x;
+    lay->barrier_dir = BarrierNegativeX;
+    lay->strut[0] = (long)lay->w;
+    lay->sp[0] = (long)lay->w;      // left
+    lay->sp[4] = 0;                 // left_start_y
+    lay->sp[5] = (long)(h - 1U);    // left_end_y
+  } else if (side == SIDE_RIGHT) {
+    lay->x = active_size;
+    lay->w = w - active_size;
+    lay->barrier_y1 = 0;
+    lay->barrier_y2 = (h > 0) ? (int)(h - 1U) : 0;
+    lay->barrier_x1 = lay->barrier_x2 = (int)active_size;
+    lay->barrier_dir = BarrierPositiveX;
+    lay->strut[1] = (long)lay->w;
+    lay->sp[1] = (long)lay->w;      // right
+    lay->sp[6] = 0;                 // right_start_y
+    lay->sp[7] = (long)(h - 1U);    // right_end_y
   }
-  die_msg("invalid --side (must be one of: bottom, top, left, right)");
-  return SIDE_BOTTOM;
+  return NULL;
 }
 
+struct blank {
+  Display *dpy;
+  Window root;
+  Window win;
+  unsigned long w, h;
+  enum Side side;
+  unsigned long active_size;
+  struct layout lay;
+  bool visible;
+  bool have_xfixes;
+  PointerBarrier barrier;
+};
+
 static void clamp_pointer_to_active(Display *dpy, Window root, enum Side side, unsigned long w, unsigned long h,
                                     unsigned long active_size) {
   Window rr = 0, cr = 0;
@@ -145,11 +259,219 @@ static void clamp_pointer_to_active(Display *dpy, Window root, enum Side side, u
   }
 }
 
+static void clamp(struct blank *b) {
+  if (b->visible) {
+    clamp_pointer_to_active(b->dpy, b->root, b->side, b->w, b->h, b->active_size);
+  }
+}
+
+static void destroy_barrier(struct blank *b) {
+  if (b->barrier) {
+    XFixesDestroyPointerBarrier(b->dpy, b->barrier);
+    b->barrier = 0;
+  }
+}
+
+// Prevent pointer entering the blank region. If the extension is missing,
+// keep going (blank window + strut still provide the core behavior).
+static void create_barrier(struct blank *b) {
+  if (!b->have_xfixes) {
+    return;
+  }
+  const struct layout *lay = &b->lay;
+  int (*old_handler)(Display *, XErrorEvent *) = XSetErrorHandler(on_xerror);
+  g_xerr = 0;
+  b->barrier = XFixesCreatePointerBarrier(b->dpy, b->root, lay->barrier_x1, lay->barrier_y1, lay->barrier_x2,
+                                          lay->barrier_y2, lay->barrier_dir, 0, NULL);
+  XSync(b->dpy, False);
+  if (g_xerr != 0) {
+    char errtxt[256];
+    XGetErrorText(b->dpy, (int)g_xerr, errtxt, (int)sizeof(errtxt));
+    fprintf(stderr, "warning: failed to create pointer barrier (X error %d: %s)\n", (int)g_xerr, errtxt);
+    b->barrier = 0;
+    g_xerr = 0;
+  }
+  XSetErrorHandler(old_handler);
+}
+
+static void set_struts(struct blank *b) {
+  set_cardinals(b->dpy, b->win, intern(b->dpy, "_NET_WM_STRUT"), b->lay.strut, 4);
+  set_cardinals(b->dpy, b->win, intern(b->dpy, "_NET_WM_STRUT_PARTIAL"), b->lay.sp, 12);
+}
+
+// The root window size changes with RandR rotation/mode switches; a window
+// kept hidden (--hidden / "hide") may outlive several of them. Returns true if
+// the cached size changed.
+static bool update_screen_size(struct blank *b) {
+  Window root_ret = 0;
+  int x = 0, y = 0;
+  unsigned int w = 0, h = 0, border = 0, depth = 0;
+  if (!XGetGeometry(b->dpy, b->root, &root_ret, &x, &y, &w, &h, &border, &depth) || w == 0 || h == 0) {
+    return false;
+  }
+  if (w == b->w && h == b->h) {
+    return false;
+  }
+  b->w = w;
+  b->h = h;
+  return true;
+}
+
+// Move the existing window/struts/barrier to a new geometry (no reconnect,
+// no new window). Returns an error string and leaves the old geometry in place
+// if the request is invalid.
+static const char *reconfigure(struct blank *b, enum Side side, unsigned long active_size) {
+  update_screen_size(b);
+  struct layout lay;
+  const char *err = compute_layout(side, active_size, b->w, b->h, &lay);
+  if (err) {
+    return err;
+  }
+  b->side = side;
+  b->active_size = active_size;
+  b->lay = lay;
+  XMoveResizeWindow(b->dpy, b->win, (int)lay.x, (int)lay.y, (unsigned int)lay.w, (unsigned int)lay.h);
+  set_struts(b);
+  if (b->visible) {
+    destroy_barrier(b);
+    create_barrier(b);
+  }
+  XSync(b->dpy, False);
+  clamp(b);
+  return NULL;
+}
+
+static const char *set_visible(struct blank *b, bool visible) {
+  if (visible == b->visible) {
+    return NULL;
+  }
+  if (visible && update_screen_size(b)) {
+    const char *err = reconfigure(b, b->side, b->active_size);
+    if (err) {
+      return err;
+    }
+  }
+  b->visible = visible;
+  if (visible) {
+    XMapRaised(b->dpy, b->win);
+    create_barrier(b);
+  } else {
+    destroy_barrier(b);
+    XUnmapWindow(b->dpy, b->win);
+  }
+  XSync(b->dpy, False);
+  clamp(b);
+  return NULL;
+}
+
+// --control: one command per line on stdin, exactly one reply line per
+// command on stdout (plus "ready" once at startup):
+//
+//   size PX | side SIDE | show | hide  ->  configured side=S active=PX visible=0|1
+//   quit                               ->  bye
+//   (invalid)                          ->  error MESSAGE
+//
+// EOF on stdin is treated as quit, so the helper never outlives its parent.
+static void reply_state(const char *kind, const struct blank *b) {
+  printf("%s side=%s active=%lu visible=%d\n", kind, k_side_names[b->side], b->active_size, b->visible ? 1 : 0);
+  fflush(stdout);
+}
+
+static void reply_error(const char *msg) {
+  printf("error %s\n", msg);
+  fflush(stdout);
+}
+
+static void handle_command(struct blank *b, char *line) {
+  char *arg = strchr(line, ' ');
+  if (arg) {
+    *arg++ = '\0';
+    while (*arg == ' ') {
+      arg++;
+    }
+  }
+  if (strcmp(line, "size") == 0 && arg) {
+    char *end = NULL;
+    unsigned long v = strtoul(arg, &end, 0);
+    if (!end || end == arg || *end != '\0') {
+      reply_error("size: expected a pixel count");
+      return;
+    }
+    const char *err = reconfigure(b, b->side, v);
+    if (err) {
+      reply_error(err);
+    } else {
+      reply_state("configured", b);
+    }
+  } else if (strcmp(line, "side") == 0 && arg) {
+    enum Side side = b->side;
+    if (!side_from_str(arg, &side)) {
+      reply_error("side: must be one of: bottom, top, left, right");
+      return;
+    }
+    const char *err = reconfigure(b, side, b->active_size);
+    if (err) {
+      reply_error(err);
+    } else {
+      reply_state("configured", b);
+    }
+  } else if (strcmp(line, "show") == 0) {
+    const char *err = set_visible(b, true);
+    if (err) {
+      reply_error(err);
+    } else {
+      reply_state("configured", b);
+    }
+  } else if (strcmp(line, "hide") == 0) {
+    set_visible(b, false);
+    reply_state("configured", b);
+  } else if (strcmp(line, "quit") == 0) {
+    printf("bye\n");
+    fflush(stdout);
+    g_stop = 1;
+  } else if (line[0] != '\0') {
+    reply_error("unknown command (size PX | side SIDE | show | hide | quit)");
+  }
+}
+
+// Returns false on EOF/error (parent gone).
+static bool read_commands(struct blank *b, char *buf, size_t cap, size_t *len) {
+  ssize_t n = read(STDIN_FILENO, buf + *len, cap - 1 - *len);
+  if (n < 0) {
+    return errno == EINTR || errno == EAGAIN;
+  }
+  if (n == 0) {
+    return false;
+  }
+  *len += (size_t)n;
+  buf[*len] = '\0';
+  char *start = buf;
+  char *nl = NULL;
+  while (!g_stop && (nl = strchr(start, '\n')) != NULL) {
+    *nl = '\0';
+    if (nl > start && nl[-1] == '\r') {
+      nl[-1] = '\0';
+    }
+    handle_command(b, start);
+    start = nl + 1;
+  }
+  *len = strlen(start);
+  memmove(buf, start, *len + 1);
+  if (*len >= cap - 1) {
+    // Overlong line: drop it rather than wedging the channel.
+    reply_error("command too long");
+    *len = 0;
+  }
+  return true;
+}
+
 int main(int argc, char **argv) {
   const char *display = NULL;
   const char *name = "X1FOLD_HALFBLANK";
   const char *side_str = "bottom";
   unsigned long active_size = 1240;
+  bool control = false;
+  bool start_hidden = false;
 
   for (int i = 1; i < argc; i++) {
     if (strcmp(argv[i], "--display") == 0 && i + 1 < argc) {
@@ -163,6 +485,10 @@ int main(int argc, char **argv) {
       active_size = strtoul(argv[++i], NULL, 0);
     } else if (strcmp(argv[i], "--name") == 0 && i + 1 < argc) {
       name = argv[++i];
+    } else if (strcmp(argv[i], "--control") == 0) {
+      control = true;
+    } else if (strcmp(argv[i], "--hidden") == 0) {
+      start_hidden = true;
     } else if (strcmp(argv[i], "-h") == 0 || strcmp(argv[i], "--help") == 0) {
       usage(stdout);
       return 0;
@@ -172,90 +498,59 @@ int main(int argc, char **argv) {
     }
   }
 
+  if (pipe(g_sigpipe) != 0) {
+    die_msg("pipe failed");
+  }
+  for (int i = 0; i < 2; i++) {
+    fcntl(g_sigpipe[i], F_SETFL, fcntl(g_sigpipe[i], F_GETFL) | O_NONBLOCK);
+    fcntl(g_sigpipe[i], F_SETFD, FD_CLOEXEC);
+  }
   signal(SIGINT, on_signal);
   signal(SIGTERM, on_signal);
+  if (control) {
+    // A parent that died mid-write must not kill us before we clean up.
+    signal(SIGPIPE, SIG_IGN);
+  }
 
   Display *dpy = XOpenDisplay(display);
   if (!dpy) {
     die_msg("XOpenDisplay failed (check DISPLAY or --display)");
   }
 
+  struct blank b = {0};
+  b.dpy = dpy;
   int screen = DefaultScreen(dpy);
-  Window root = RootWindow(dpy, screen);
-  unsigned long w = (unsigned long)DisplayWidth(dpy, screen);
-  unsigned long h = (unsigned long)DisplayHeight(dpy, screen);
-  if (w == 0 || h == 0) {
+  b.root = RootWindow(dpy, screen);
+  b.w = (unsigned long)DisplayWidth(dpy, screen);
+  b.h = (unsigned long)DisplayHeight(dpy, screen);
+  if (b.w == 0 || b.h == 0) {
     die_msg("DisplayWidth/DisplayHeight returned 0");
   }
 
-  enum Side side = parse_side(side_str);
-  if (active_size == 0) {
-    die_msg("--active-size must be >= 1");
-  }
-  if ((side == SIDE_BOTTOM || side == SIDE_TOP) && active_size >= h) {
-    die_msg("--active-size must be in 1..(screen_height-1) for top/bottom");
-  }
-  if ((side == SIDE_LEFT || side == SIDE_RIGHT) && active_size >= w) {
-    die_msg("--active-size must be in 1..(screen_width-1) for left/right");
-  }
-
-  unsigned long blank_x = 0;
-  unsigned long blank_y = 0;
-  unsigned long blank_w = w;
-  unsigned long blank_h = h;
-  int barrier_x1 = 0, barrier_y1 = 0, barrier_x2 = 0, barrier_y2 = 0;
-  int barrier_dir = 0;
-
-  if (side == SIDE_BOTTOM) {
-    blank_y = active_size;
-    blank_h = h - active_size;
-    barrier_x1 = 0;
-    barrier_x2 = (w > 0) ? (int)(w - 1U) : 0;
-    barrier_y1 = barrier_y2 = (int)active_size;
-    barrier_dir = BarrierPositiveY;
-  } else if (side == SIDE_TOP) {
-    blank_y = 0;
-    blank_h = h - active_size;
-    unsigned long active_y = h - active_size;
-    barrier_x1 = 0;
-    barrier_x2 = (w > 0) ? (int)(w - 1U) : 0;
-    barrier_y1 = barrier_y2 = (int)active_y;
-    barrier_dir = BarrierNegativeY;
-  } else if (side == SIDE_LEFT) {
-    blank_x = 0;
-    blank_w = w - active_size;
-    unsigned long active_x = w - active_size;
-    barrier_y1 = 0;
-    barrier_y2 = (h > 0) ? (int)(h - 1U) : 0;
-    barrier_x1 = barrier_x2 = (int)active_x;
-    barrier_dir = BarrierNegativeX;
-  } else if (side == SIDE_RIGHT) {
-    blank_x = active_size;
-    blank_w = w - active_size;
-    barrier_y1 = 0;
-    barrier_y2 = (h > 0) ? (int)(h - 1U) : 0;
-    barrier_x1 = barrier_x2 = (int)active_size;
-    barrier_dir = BarrierPositiveX;
+  b.side = parse_side(side_str);
+  b.active_size = active_size;
+  const char *layout_err = compute_layout(b.side, b.active_size, b.w, b.h, &b.lay);
+  if (layout_err) {
+    die_msg(layout_err);
   }
 
   XSetWindowAttributes attrs = {0};
   attrs.background_pixel = BlackPixel(dpy, screen);
   attrs.event_mask = ExposureMask | StructureNotifyMask;
 
-  Window win = XCreateWindow(dpy, root, (int)blank_x, (int)blank_y, (unsigned int)blank_w, (unsigned int)blank_h, 0,
-                             CopyFromParent,
-                             InputOutput, CopyFromParent, CWBackPixel | CWEventMask, &attrs);
-  if (!win) {
+  b.win = XCreateWindow(dpy, b.root, (int)b.lay.x, (int)b.lay.y, (unsigned int)b.lay.w, (unsigned int)b.lay.h, 0,
+                        CopyFromParent, InputOutput, CopyFromParent, CWBackPixel | CWEventMask, &attrs);
+  if (!b.win) {
     die_msg("XCreateWindow failed");
   }
 
-  XStoreName(dpy, win, name);
+  XStoreName(dpy, b.win, name);
 
   // EWMH properties: window type, state, and struts.
   Atom net_wm_window_type = intern(dpy, "_NET_WM_WINDOW_TYPE");
   Atom net_wm_window_type_dock = intern(dpy, "_NET_WM_WINDOW_TYPE_DOCK");
   Atom win_type = net_wm_window_type_dock;
-  set_atoms(dpy, win, net_wm_window_type, &win_type, 1);
+  set_atoms(dpy, b.win, net_wm_window_type, &win_type, 1);
 
   Atom net_wm_state = intern(dpy, "_NET_WM_STATE");
   Atom states[4];
@@ -264,90 +559,116 @@ int main(int argc, char **argv) {
   states[nstates++] = intern(dpy, "_NET_WM_STATE_STICKY");
   states[nstates++] = intern(dpy, "_NET_WM_STATE_SKIP_TASKBAR");
   states[nstates++] = intern(dpy, "_NET_WM_STATE_SKIP_PAGER");
-  set_atoms(dpy, win, net_wm_state, states, nstates);
+  set_atoms(dpy, b.win, net_wm_state, states, nstates);
 
-  Atom net_wm_strut = intern(dpy, "_NET_WM_STRUT");
-  long strut[4] = {0, 0, 0, 0};  // left, right, top, bottom
-  if (side == SIDE_BOTTOM) {
-    strut[3] = (long)blank_h;
-  } else if (side == SIDE_TOP) {
-    strut[2] = (long)blank_h;
-  } else if (side == SIDE_LEFT) {
-    strut[0] = (long)blank_w;
-  } else if (side == SIDE_RIGHT) {
-    strut[1] = (long)blank_w;
-  }
-  set_cardinals(dpy, win, net_wm_strut, strut, 4);
-
-  Atom net_wm_strut_partial = intern(dpy, "_NET_WM_STRUT_PARTIAL");
-  long sp[12] = {0};
-  if (side == SIDE_BOTTOM) {
-    sp[3] = (long)blank_h;     // bottom
-    sp[10] = 0;               // bottom_start_x
-    sp[11] = (long)(w - 1U);  // bottom_end_x
-  } else if (side == SIDE_TOP) {
-    sp[2] = (long)blank_h;    // top
-    sp[8] = 0;               // top_start_x
-    sp[9] = (long)(w - 1U);  // top_end_x
-  } else if (side == SIDE_LEFT) {
-    sp[0] = (long)blank_w;    // left
-    sp[4] = 0;               // left_start_y
-    sp[5] = (long)(h - 1U);  // left_end_y
-  } else if (side == SIDE_RIGHT) {
-    sp[1] = (long)blank_w;    // right
-    sp[6] = 0;               // right_start_y
-    sp[7] = (long)(h - 1U);  // right_end_y
-  }
-  set_cardinals(dpy, win, net_wm_strut_partial, sp, 12);
+  set_struts(&b);
 
-  XMapRaised(dpy, win);
-  XFlush(dpy);
-
-  // Prevent pointer entering the blank region. If the extension is missing,
-  // keep going (blank window + strut still provide the core behavior).
   int xfixes_event_base = 0;
   int xfixes_error_base = 0;
-  PointerBarrier barrier = 0;
-  if (XFixesQueryExtension(dpy, &xfixes_event_base, &xfixes_error_base)) {
-    int (*old_handler)(Display *, XErrorEvent *) = XSetErrorHandler(on_xerror);
-    g_xerr = 0;
-    barrier = XFixesCreatePointerBarrier(dpy, root, barrier_x1, barrier_y1, barrier_x2, barrier_y2, barrier_dir, 0, NULL);
+  b.have_xfixes = XFixesQueryExtension(dpy, &xfixes_event_base, &xfixes_error_base);
+  if (!b.have_xfixes) {
+    fprintf(stderr, "warning: XFixes extension missing; cursor will not be constrained\n");
+  }
+  if (start_hidden) {
     XSync(dpy, False);
-    if (g_xerr != 0) {
-      char errtxt[256];
-      XGetErrorText(dpy, (int)g_xerr, errtxt, (int)sizeof(errtxt));
-      fprintf(stderr, "warning: failed to create pointer barrier (X error %d: %s)\n", (int)g_xerr, errtxt);
-      barrier = 0;
-      g_xerr = 0;
-    }
-    XSetErrorHandler(old_handler);
   } else {
-    fprintf(stderr, "warning: XFixes extension missing; cursor will not be constrained\n");
+    (void)set_visible(&b, true);
+  }
+
+  // Raw motion is delivered to the root window for every pointer movement
+  // (XI 2.1+: also while another client holds a grab), so the clamp below can
+  // run per motion burst instead of on a timer.
+  bool motion_events = false;
+  int xi_opcode = -1;
+#ifdef HAVE_XI2
+  int xi_event = 0, xi_error = 0;
+  if (XQueryExtension(dpy, "XInputExtension", &xi_opcode, &xi_event, &xi_error)) {
+    int major = 2, minor = 2;
+    if (XIQueryVersion(dpy, &major, &minor) == Success && (major > 2 || (major == 2 && minor >= 1))) {
+      unsigned char mask_bits[XIMaskLen(XI_LASTEVENT)] = {0};
+      XIEventMask mask = {0};
+      mask.deviceid = XIAllMasterDevices;
+      mask.mask_len = (int)sizeof(mask_bits);
+      mask.mask = mask_bits;
+      XISetMask(mask_bits, XI_RawMotion);
+      XISelectEvents(dpy, b.root, &mask, 1);
+      motion_events = true;
+    }
+  }
+#endif
+  if (!motion_events) {
+    fprintf(stderr, "warning: XInput 2.1+ raw motion unavailable; clamping the cursor every 100 ms\n");
   }
 
   // In practice the pointer can still end up in the blank region (e.g. large
   // accumulated deltas against the barrier, client-side warps, or races when
   // enabling halfblank). Always clamp it back into the active top region to
   // avoid "stuck cursor says it's in the blank area" UX.
-  clamp_pointer_to_active(dpy, root, side, w, h, active_size);
+  clamp(&b);
+
+  char cmd_buf[256];
+  size_t cmd_len = 0;
+  if (control) {
+    reply_state("ready", &b);
+  }
 
-  // Minimal event loop: keep the window alive until killed by systemd/UI helper.
+  // Event loop: keep the window alive until killed by systemd/UI helper (or
+  // told to quit on the control channel), sleeping in poll() on the X
+  // connection between events.
+  int xfd = ConnectionNumber(dpy);
   while (!g_stop) {
+    bool moved = false;
     while (XPending(dpy) > 0) {
       XEvent ev;
       XNextEvent(dpy, &ev);
-      if (ev.type == Expose) {
+      if (ev.type == GenericEvent && ev.xcookie.extension == xi_opcode) {
+        // Raw events carry no screen position; one XQueryPointer per burst.
+        moved = true;
+      } else if (ev.type == Expose) {
         // Repaint is handled by background_pixel; nothing to draw.
       }
     }
-    clamp_pointer_to_active(dpy, root, side, w, h, active_size);
-    usleep(100 * 1000);
-  }
+    if (moved) {
+      clamp(&b);
+    }
+    if (g_stop) {
+      break;
+    }
+    // clamp()'s round trips let Xlib read events already on the socket into
+    // its own queue, which poll() cannot see; drain them before blocking.
+    if (XEventsQueued(dpy, QueuedAlready) > 0) {
+      continue;
+    }
 
-  if (barrier) {
-    XFixesDestroyPointerBarrier(dpy, barrier);
+    struct pollfd pfds[3] = {
+        {.fd = xfd, .events = POLLIN},
+        {.fd = g_sigpipe[0], .events = POLLIN},
+        {.fd = control ? STDIN_FILENO : -1, .events = POLLIN},
+    };
+    int rc = poll(pfds, 3, (motion_events || !b.visible) ? -1 : 100);
+    if (rc < 0) {
+      if (errno == EINTR) {
+        continue;
+      }
+      perror("poll");
+      break;
+    }
+    if (rc == 0) {
+      clamp(&b);
+    }
+    if (pfds[0].revents & (POLLERR | POLLHUP)) {
+      fprintf(stderr, "X connection closed\n");
+      break;
+    }
+    if (pfds[2].revents & (POLLIN | POLLHUP | POLLERR)) {
+      if (!read_commands(&b, cmd_buf, sizeof(cmd_buf), &cmd_len)) {
+        break;
+      }
+    }
   }
-  XDestroyWindow(dpy, win);
+
+  destroy_barrier(&b);
+  XDestroyWindow(dpy, b.win);
   XCloseDisplay(dpy);
   return 0;
 }
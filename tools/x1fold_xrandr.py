@@ -0,0 +1,939 @@
+#!/usr/bin/env python3
+"""
+Minimal X11 RandR client with a persistent connection.
+
+Repo source: x1fold/tools/x1fold_xrandr.py
+
+Speaks the X11 wire protocol over the display socket (MIT-MAGIC-COOKIE-1 from
+$XAUTHORITY, or no auth), and implements only the RandR requests the X1 Fold
+helpers need:
+
+  RRGetScreenResourcesCurrent, RRGetOutputInfo, RRGetCrtcInfo   (snapshot)
+  RRSetCrtcConfig, RRSetScreenSize                             (rotation, --fb)
+  RRGetMonitors, RRSetMonitor, RRDeleteMonitor                 (halfblank monitor)
+
+One `xrandr` run opens a connection, fetches the screen resources and every
+output/CRTC, and exits; `_apply_x11` used to do that six or more times per apply.
+XRandR keeps one connection and one snapshot (pipelined: two round trips for the
+whole screen), so an apply costs a refresh plus the requests that change
+something. No libX11/libxcb-randr or ctypes needed.
+
+After `subscribe()` (RRScreenChangeNotify, RRCrtcChangeNotify and
+RROutputChangeNotify on the root window) the snapshot is kept until an event
+marks it stale, so `refresh()` on an unchanged screen sends no requests at all;
+callers select() on `fileno()` and call `handle_events()` when it is readable.
+
+CLI (debugging / latency comparison against the xrandr binary):
+  x1fold_xrandr.py query [--display :0]
+  x1fold_xrandr.py watch [--display :0]
+  x1fold_xrandr.py bench [--display :0] [--output eDP-1] [--active-size 1240] [--iterations 50]
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import select
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+# Core requests.
+_X_GET_GEOMETRY = 14
+_X_INTERN_ATOM = 16
+_X_GET_ATOM_NAME = 17
+_X_GRAB_SERVER = 36
+_X_UNGRAB_SERVER = 37
+_X_GET_INPUT_FOCUS = 43
+_X_QUERY_EXTENSION = 98
+
+# RandR minor opcodes.
+_RR_QUERY_VERSION = 0
+_RR_SELECT_INPUT = 4
+_RR_SET_SCREEN_SIZE = 7
+_RR_GET_OUTPUT_INFO = 9
+_RR_GET_CRTC_INFO = 20
+_RR_SET_CRTC_CONFIG = 21
+_RR_GET_SCREEN_RESOURCES_CURRENT = 25
+_RR_GET_MONITORS = 42
+_RR_SET_MONITOR = 43
+_RR_DELETE_MONITOR = 44
+
+ROTATIONS = {"normal": 1, "left": 2, "inverted": 4, "right": 8}
+_ROTATION_NAMES = {v: k for k, v in ROTATIONS.items()}
+_ROTATION_MASK = 0x0F
+
+CONNECTED = 0
+
+# RRSelectInput mask / event codes (relative to the extension's first event).
+_RR_SCREEN_CHANGE_NOTIFY_MASK = 1 << 0
+_RR_CRTC_CHANGE_NOTIFY_MASK = 1 << 1
+_RR_OUTPUT_CHANGE_NOTIFY_MASK = 1 << 2
+_RR_SCREEN_CHANGE_NOTIFY = 0
+_RR_NOTIFY = 1
+_RR_NOTIFY_CRTC_CHANGE = 0
+_RR_NOTIFY_OUTPUT_CHANGE = 1
+
+_SET_CONFIG_STATUS = {0: "Success", 1: "InvalidConfigTime", 2: "InvalidTime", 3: "Failed"}
+_X_ERRORS = {
+    1: "BadRequest",
+    2: "BadValue",
+    3: "BadWindow",
+    5: "BadAtom",
+    8: "BadMatch",
+    11: "BadAlloc",
+    15: "BadName",
+    16: "BadLength",
+    17: "BadImplementation",
+}
+_RR_ERRORS = ("BadRROutput", "BadRRCrtc", "BadRRMode", "BadRRProvider")
+
+
+def _pad(n: int) -> int:
+    return (4 - (n % 4)) % 4
+
+
+class XError(Exception):
+    def __init__(self, code: int, *, major: int, minor: int, resource: int, name: str) -> None:
+        super().__init__(f"{name} (code={code} major={major} minor={minor} resource=0x{resource:x})")
+        self.code = code
+        self.major = major
+        self.minor = minor
+        self.resource = resource
+        self.name = name
+
+
+@dataclass(frozen=True)
+class Mode:
+    id: int
+    width: int
+    height: int
+
+
+@dataclass(frozen=True)
+class Crtc:
+    id: int
+    x: int
+    y: int
+    width: int
+    height: int
+    mode: int
+    rotation: int
+    rotations: int
+    outputs: tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class Output:
+    id: int
+    name: str
+    connected: bool
+    crtc: int
+    mm_width: int
+    mm_height: int
+
+
+@dataclass(frozen=True)
+class Monitor:
+    name: str
+    primary: bool
+    automatic: bool
+    x: int
+    y: int
+    width: int
+    height: int
+    mm_width: int
+    mm_height: int
+    outputs: tuple[int, ...]
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    config_timestamp: int
+    screen_width: int
+    screen_height: int
+    modes: dict[int, Mode]
+    crtcs: dict[int, Crtc]
+    outputs: dict[int, Output]
+
+    def output_named(self, name: str) -> Output | None:
+        for out in self.outputs.values():
+            if out.name == name:
+                return out
+        return None
+
+
+def parse_display(display: str) -> tuple[str, int, int]:
+    """
+    ":0", ":0.0", "unix:1", "host:10.0" -> (host, display number, screen).
+    """
+
+    host, sep, rest = display.rpartition(":")
+    if not sep:
+        raise ValueError(f"invalid DISPLAY: {display!r}")
+    num, _, screen = rest.partition(".")
+    return host, int(num), int(screen or 0)
+
+
+def _xauth_cookie(display_num: int) -> tuple[bytes, bytes]:
+    """
+    Find an MIT-MAGIC-COOKIE-1 for this display in $XAUTHORITY (or ~/.Xauthority).
+
+    Returns (b"", b"") when there is none; the server may still accept us
+    (e.g. `xhost +si:localuser:...`).
+    """
+
+    path = os.environ.get("XAUTHORITY") or str(Path.home() / ".Xauthority")
+    try:
+        data = Path(path).read_bytes()
+    except OSError:
+        return b"", b""
+    hostname = socket.gethostname().encode()
+    want = str(display_num).encode()
+    off = 0
+    fallback: tuple[bytes, bytes] = (b"", b"")
+    try:
+        while off + 2 <= len(data):
+            (family,) = struct.unpack_from(">H", data, off)
+            off += 2
+            fields: list[bytes] = []
+            for _ in range(4):
+                (n,) = struct.unpack_from(">H", data, off)
+                off += 2
+                fields.append(data[off : off + n])
+                off += n
+            address, number, name, cookie = fields
+            if name != b"MIT-MAGIC-COOKIE-1" or (number and number != want):
+                continue
+            if family == 256 and address == hostname:  # FamilyLocal
+                return name, cookie
+            if family == 65535 and not fallback[0]:  # FamilyWild
+                fallback = (name, cookie)
+    except struct.error:
+        pass
+    return fallback
+
+
+class XRandR:
+    """
+    Persistent RandR connection for one display.
+
+    Methods return (ok, err) or None on failure like the rest of the tools, and
+    drop the connection on socket errors so the next call reconnects. Queries
+    read the last `refresh()` snapshot; writes invalidate it, and so do RandR
+    events once subscribed.
+    """
+
+    def __init__(self, display: str, *, timeout_s: float = 2.0) -> None:
+        self.display = display
+        self.timeout_s = float(timeout_s)
+        self.sock: socket.socket | None = None
+        self.error: str | None = None
+        self.root = 0
+        self.screen_mm = (0, 0)
+        self.major = 0
+        self.first_event = 0
+        self.first_error = 0
+        self.version = (0, 0)
+        self.snapshot: Snapshot | None = None
+        self._seq = 0
+        self._stash: dict[int, bytes] = {}
+        self._atoms: dict[str, int] = {}
+        self._atom_names: dict[int, str] = {}
+        self.subscribed = False
+        self.stale = True
+        self.events_seen = 0
+
+    # --- connection -------------------------------------------------------
+
+    def connected(self) -> bool:
+        return self.sock is not None
+
+    def fileno(self) -> int | None:
+        return self.sock.fileno() if self.sock is not None else None
+
+    def connect(self) -> tuple[bool, str]:
+        if self.sock is not None:
+            return True, ""
+        try:
+            self._connect()
+        except (OSError, ValueError, struct.error, XError) as exc:
+            self.close()
+            self.error = f"{type(exc).__name__}: {exc}"
+            return False, self.error
+        self.error = None
+        return True, ""
+
+    def close(self) -> None:
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+        self.snapshot = None
+        self.subscribed = False
+        self.stale = True
+        self._stash.clear()
+        self._atoms.clear()
+        self._atom_names.clear()
+
+    def _open_socket(self, host: str, num: int) -> socket.socket:
+        if host in ("", "unix"):
+            path = f"/tmp/.X11-unix/X{num}"
+            last: OSError | None = None
+            # Abstract namespace first, as libxcb does.
+            for addr in ("\0" + path, path):
+                sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM | socket.SOCK_CLOEXEC)
+                sock.settimeout(self.timeout_s)
+                try:
+                    sock.connect(addr)
+                    return sock
+                except OSError as exc:
+                    sock.close()
+                    last = exc
+            assert last is not None
+            raise last
+        return socket.create_connection((host, 6000 + num), timeout=self.timeout_s)
+
+    def _connect(self) -> None:
+        host, num, screen = parse_display(self.display)
+        sock = self._open_socket(host, num)
+        self.sock = sock
+        self._seq = 0
+        auth_name, auth_data = _xauth_cookie(num)
+        setup = struct.pack("<BxHHHHxx", 0x6C, 11, 0, len(auth_name), len(auth_data))
+        setup += auth_name + b"\0" * _pad(len(auth_name)) + auth_data + b"\0" * _pad(len(auth_data))
+        sock.sendall(setup)
+        head = self._recv(8)
+        status = head[0]
+        (extra,) = struct.unpack_from("<H", head, 6)
+        body = self._recv(extra * 4)
+        if status != 1:
+            reason = body[: head[1]] if status == 0 else body
+            raise ValueError(f"X connection refused: {reason.decode('latin-1', errors='replace').strip()}")
+
+        vendor_len, _max_req, n_screens, n_formats = struct.unpack_from("<HHBB", body, 16)
+        off = 32 + vendor_len + _pad(vendor_len) + 8 * n_formats
+        if screen >= n_screens:
+            raise ValueError(f"screen {screen} not present (screens={n_screens})")
+        for i in range(n_screens):
+            root = struct.unpack_from("<I", body, off)[0]
+            mm_w, mm_h = struct.unpack_from("<HH", body, off + 24)
+            n_depths = body[off + 39]
+            if i == screen:
+                self.root = root
+                self.screen_mm = (mm_w, mm_h)
+            off += 40
+            for _ in range(n_depths):
+                (n_visuals,) = struct.unpack_from("<H", body, off + 2)
+                off += 8 + 24 * n_visuals
+
+        name = b"RANDR"
+        seq = self._request(_X_QUERY_EXTENSION, 0, struct.pack("<HH", len(name), 0) + name)
+        reply = self._reply(seq)
+        if not reply[8]:
+            raise ValueError("RANDR extension not present")
+        self.major, self.first_event, self.first_error = reply[9], reply[10], reply[11]
+
+        seq = self._rr(_RR_QUERY_VERSION, struct.pack("<II", 1, 6))
+        reply = self._reply(seq)
+        self.version = struct.unpack_from("<II", reply, 8)
+        if self.version < (1, 5):
+            raise ValueError(f"RandR {self.version[0]}.{self.version[1]} has no monitors (need 1.5)")
+
+    # --- wire -------------------------------------------------------------
+
+    def _recv(self, n: int) -> bytes:
+        assert self.sock is not None
+        buf = bytearray()
+        while len(buf) < n:
+            chunk = self.sock.recv(n - len(buf))
+            if not chunk:
+                raise ConnectionError("X server closed the connection")
+            buf += chunk
+        return bytes(buf)
+
+    def _request(self, opcode: int, data: int, body: bytes = b"") -> int:
+        if self.sock is None:
+            raise ConnectionError("not connected")
+        body += b"\0" * _pad(len(body))
+        self.sock.sendall(struct.pack("<BBH", opcode, data, 1 + len(body) // 4) + body)
+        self._seq = (self._seq + 1) & 0xFFFF
+        return self._seq
+
+    def _rr(self, minor: int, body: bytes = b"") -> int:
+        return self._request(self.major, minor, body)
+
+    def _read_packet(self) -> None:
+        pkt = self._recv(32)
+        kind = pkt[0] & 0x7F
+        if kind == 1 or kind == 35:  # reply / GenericEvent carry extra length
+            (extra,) = struct.unpack_from("<I", pkt, 4)
+            pkt += self._recv(extra * 4)
+        if kind in (0, 1):
+            (seq,) = struct.unpack_from("<H", pkt, 2)
+            self._stash[seq] = pkt
+        else:
+            self._on_event(pkt)
+
+    def _on_event(self, pkt: bytes) -> None:
+        code = (pkt[0] & 0x7F) - self.first_event
+        if code == _RR_SCREEN_CHANGE_NOTIFY:
+            # Keep the physical size current for the DPI used by set_screen_size().
+            self.screen_mm = struct.unpack_from("<HH", pkt, 28)
+        elif not (code == _RR_NOTIFY and pkt[1] in (_RR_NOTIFY_CRTC_CHANGE, _RR_NOTIFY_OUTPUT_CHANGE)):
+            return
+        self.events_seen += 1
+        self.stale = True
+
+    def _xerror(self, pkt: bytes) -> XError:
+        code = pkt[1]
+        (resource,) = struct.unpack_from("<I", pkt, 4)
+        (minor,) = struct.unpack_from("<H", pkt, 8)
+        major = pkt[10]
+        name = _X_ERRORS.get(code, "")
+        if not name and self.first_error and 0 <= code - self.first_error < len(_RR_ERRORS):
+            name = _RR_ERRORS[code - self.first_error]
+        return XError(code, major=major, minor=minor, resource=resource, name=name or f"XError{code}")
+
+    def _reply(self, seq: int) -> bytes:
+        while seq not in self._stash:
+            self._read_packet()
+        pkt = self._stash.pop(seq)
+        if pkt[0] == 0:
+            raise self._xerror(pkt)
+        return pkt
+
+    def _checked(self, seqs: list[int]) -> None:
+        """
+        Round-trip (GetInputFocus) so errors for the void requests `seqs` arrive.
+        """
+
+        sync = self._request(_X_GET_INPUT_FOCUS, 0)
+        self._reply(sync)
+        errors = [self._stash[s] for s in seqs if s in self._stash]
+        self._stash.clear()
+        if errors:
+            raise self._xerror(errors[0])
+
+    def _guard(self, exc: BaseException) -> str:
+        msg = f"{type(exc).__name__}: {exc}"
+        if isinstance(exc, (OSError, struct.error)):
+            self.close()
+        self.error = msg
+        return msg
+
+    # --- events -----------------------------------------------------------
+
+    def subscribe(self) -> tuple[bool, str]:
+        """
+        Select screen/CRTC/output change events on the root window.
+        """
+
+        if self.subscribed:
+            return True, ""
+        ok, err = self.connect()
+        if not ok:
+            return False, err
+        mask = _RR_SCREEN_CHANGE_NOTIFY_MASK | _RR_CRTC_CHANGE_NOTIFY_MASK | _RR_OUTPUT_CHANGE_NOTIFY_MASK
+        try:
+            self._checked([self._rr(_RR_SELECT_INPUT, struct.pack("<IH2x", self.root, mask))])
+        except (OSError, ValueError, struct.error, XError) as exc:
+            return False, self._guard(exc)
+        self.subscribed = True
+        self.stale = True
+        return True, ""
+
+    def handle_events(self) -> bool:
+        """
+        Read whatever the server has sent without blocking.
+
+        Returns True if the snapshot is stale afterwards (a RandR change
+        arrived, or the connection dropped and must be re-established).
+        """
+
+        if self.sock is None:
+            return True
+        try:
+            while select.select([self.sock], [], [], 0)[0]:
+                self._read_packet()
+        except (OSError, struct.error) as exc:
+            self._guard(exc)
+        return self.stale
+
+    # --- atoms ------------------------------------------------------------
+
+    def _atom(self, name: str, *, only_if_exists: bool) -> int:
+        atom = self._atoms.get(name)
+        if atom:
+            return atom
+        raw = name.encode()
+        seq = self._request(_X_INTERN_ATOM, int(only_if_exists), struct.pack("<HH", len(raw), 0) + raw)
+        (atom,) = struct.unpack_from("<I", self._reply(seq), 8)
+        if atom:
+            self._atoms[name] = atom
+            self._atom_names[atom] = name
+        return atom
+
+    def _atom_name(self, atom: int) -> str:
+        name = self._atom_names.get(atom)
+        if name is not None:
+            return name
+        reply = self._reply(self._request(_X_GET_ATOM_NAME, 0, struct.pack("<I", atom)))
+        (n,) = struct.unpack_from("<H", reply, 8)
+        name = reply[32 : 32 + n].decode("latin-1")
+        self._atom_names[atom] = name
+        self._atoms[name] = atom
+        return name
+
+    # --- snapshot ---------------------------------------------------------
+
+    def refresh(self) -> Snapshot | None:
+        """
+        Fetch screen size, modes, CRTCs and outputs (two pipelined round trips).
+
+        When subscribed, an unchanged snapshot is returned without any request.
+        """
+
+        ok, _ = self.connect()
+        if not ok:
+            return None
+        if self.subscribed and not self.stale and self.snapshot is not None:
+            return self.snapshot
+        # Cleared first: an event that races the fetch marks it stale again.
+        self.stale = False
+        try:
+            self.snapshot = self._fetch()
+        except (OSError, ValueError, struct.error, XError) as exc:
+            self._guard(exc)
+            self.snapshot = None
+        return self.snapshot
+
+    def _fetch(self) -> Snapshot:
+        s_res = self._rr(_RR_GET_SCREEN_RESOURCES_CURRENT, struct.pack("<I", self.root))
+        s_geo = self._request(_X_GET_GEOMETRY, 0, struct.pack("<I", self.root))
+        res = self._reply(s_res)
+        geo = self._reply(s_geo)
+        screen_w, screen_h = struct.unpack_from("<HH", geo, 16)
+
+        cfg_ts, n_crtcs, n_outputs, n_modes, _names_len = struct.unpack_from("<IHHHH", res, 12)
+        off = 32
+        crtc_ids = struct.unpack_from(f"<{n_crtcs}I", res, off)
+        off += 4 * n_crtcs
+        output_ids = struct.unpack_from(f"<{n_outputs}I", res, off)
+        off += 4 * n_outputs
+        modes: dict[int, Mode] = {}
+        for _ in range(n_modes):
+            mid, mw, mh = struct.unpack_from("<IHH", res, off)
+            modes[mid] = Mode(id=mid, width=mw, height=mh)
+            off += 32
+
+        ts = struct.pack("<I", cfg_ts)
+        s_outs = [(oid, self._rr(_RR_GET_OUTPUT_INFO, struct.pack("<I", oid) + ts)) for oid in output_ids]
+        s_crtcs = [(cid, self._rr(_RR_GET_CRTC_INFO, struct.pack("<I", cid) + ts)) for cid in crtc_ids]
+
+        outputs: dict[int, Output] = {}
+        for oid, seq in s_outs:
+            r = self._reply(seq)
+            crtc, mm_w, mm_h = struct.unpack_from("<III", r, 12)
+            conn = r[24]
+            nc, nm, _npref, ncl, name_len = struct.unpack_from("<HHHHH", r, 26)
+            name_off = 36 + 4 * (nc + nm + ncl)
+            name = r[name_off : name_off + name_len].decode("latin-1")
+            outputs[oid] = Output(id=oid, name=name, connected=conn == CONNECTED, crtc=crtc, mm_width=mm_w, mm_height=mm_h)
+
+        crtcs: dict[int, Crtc] = {}
+        for cid, seq in s_crtcs:
+            r = self._reply(seq)
+            x, y, w, h, mode, rot, rots, n_out, _n_poss = struct.unpack_from("<hhHHIHHHH", r, 12)
+            outs = struct.unpack_from(f"<{n_out}I", r, 32)
+            crtcs[cid] = Crtc(id=cid, x=x, y=y, width=w, height=h, mode=mode, rotation=rot, rotations=rots, outputs=tuple(outs))
+
+        return Snapshot(
+            config_timestamp=cfg_ts,
+            screen_width=screen_w,
+            screen_height=screen_h,
+            modes=modes,
+            crtcs=crtcs,
+            outputs=outputs,
+        )
+
+    def _snap(self) -> Snapshot | None:
+        return self.snapshot if self.snapshot is not None else self.refresh()
+
+    # --- queries (served from the snapshot) -------------------------------
+
+    def pick_output(self, preferred: str | None) -> str | None:
+        if preferred:
+            return preferred
+        snap = self._snap()
+        if snap is None:
+            return None
+        connected = [o.name for o in snap.outputs.values() if o.connected]
+        for name in connected:
+            if name.startswith("eDP-"):
+                return name
+        return connected[0] if connected else None
+
+    def _active_crtc(self, snap: Snapshot, output: str) -> tuple[Output, Crtc] | None:
+        out = snap.output_named(output)
+        if out is None or not out.connected or not out.crtc:
+            return None
+        crtc = snap.crtcs.get(out.crtc)
+        if crtc is None or not crtc.mode:
+            return None
+        return out, crtc
+
+    def output_rotation(self, output: str) -> str | None:
+        snap = self._snap()
+        found = self._active_crtc(snap, output) if snap is not None else None
+        if found is None:
+            return None
+        return _ROTATION_NAMES.get(found[1].rotation & _ROTATION_MASK)
+
+    def current_mode(self, output: str) -> tuple[int, int] | None:
+        """
+        Size of the output on the screen (rotation applied), as `xrandr --query` prints it.
+        """
+
+        snap = self._snap()
+        found = self._active_crtc(snap, output) if snap is not None else None
+        if found is None:
+            return None
+        return found[1].width, found[1].height
+
+    def monitor_geometry(self, output: str) -> tuple[int, int, int, int] | None:
+        """
+        (w_px, w_mm, h_px, h_mm) of the output's automatic monitor (`xrandr --listmonitors`).
+        """
+
+        snap = self._snap()
+        found = self._active_crtc(snap, output) if snap is not None else None
+        if found is None:
+            return None
+        out, crtc = found
+        mm_w, mm_h = out.mm_width, out.mm_height
+        if crtc.rotation & (ROTATIONS["left"] | ROTATIONS["right"]):
+            mm_w, mm_h = mm_h, mm_w
+        return crtc.width, mm_w, crtc.height, mm_h
+
+    def monitors(self) -> list[Monitor] | None:
+        ok, _ = self.connect()
+        if not ok:
+            return None
+        try:
+            r = self._reply(self._rr(_RR_GET_MONITORS, struct.pack("<IB3x", self.root, 1)))
+            (n_mon,) = struct.unpack_from("<I", r, 12)
+            off = 32
+            out: list[Monitor] = []
+            for _ in range(n_mon):
+                atom, primary, automatic, n_out, x, y, w, h, mm_w, mm_h = struct.unpack_from("<IBBHhhHHII", r, off)
+                outs = struct.unpack_from(f"<{n_out}I", r, off + 24)
+                off += 24 + 4 * n_out
+                out.append(
+                    Monitor(
+                        name=self._atom_name(atom),
+                        primary=bool(primary),
+                        automatic=bool(automatic),
+                        x=x,
+                        y=y,
+                        width=w,
+                        height=h,
+                        mm_width=mm_w,
+                        mm_height=mm_h,
+                        outputs=tuple(outs),
+                    )
+                )
+            return out
+        except (OSError, ValueError, struct.error, XError) as exc:
+            self._guard(exc)
+            return None
+
+    # --- writes -----------------------------------------------------------
+
+    def _mm_for(self, w: int, h: int, snap: Snapshot) -> tuple[int, int]:
+        # Keep the current DPI, like `xrandr --fb` without --dpi.
+        mm_w, mm_h = self.screen_mm
+        if snap.screen_height and mm_h:
+            dpi = 25.4 * snap.screen_height / mm_h
+            return max(1, int(25.4 * w / dpi)), max(1, int(25.4 * h / dpi))
+        return mm_w or 1, mm_h or 1
+
+    def _set_screen_size_req(self, w: int, h: int, snap: Snapshot) -> int:
+        mm_w, mm_h = self._mm_for(w, h, snap)
+        seq = self._rr(_RR_SET_SCREEN_SIZE, struct.pack("<IHHII", self.root, w, h, mm_w, mm_h))
+        self.screen_mm = (mm_w, mm_h)
+        return seq
+
+    def set_screen_size(self, w: int, h: int) -> tuple[bool, str]:
+        """
+        `xrandr --fb WxH`; no request when the screen already has that size.
+        """
+
+        snap = self._snap()
+        if snap is None:
+            return False, self.error or "RandR unavailable"
+        if (snap.screen_width, snap.screen_height) == (int(w), int(h)):
+            return True, ""
+        try:
+            self._checked([self._set_screen_size_req(int(w), int(h), snap)])
+        except (OSError, ValueError, struct.error, XError) as exc:
+            return False, self._guard(exc)
+        finally:
+            self.snapshot = None
+        return True, ""
+
+    def _set_crtc(self, crtc: Crtc, ts: int, *, mode: int, rotation: int, outputs: tuple[int, ...], x: int, y: int) -> None:
+        body = struct.pack("<IIIhhIH2x", crtc.id, 0, ts, x, y, mode, rotation)
+        body += struct.pack(f"<{len(outputs)}I", *outputs)
+        r = self._reply(self._rr(_RR_SET_CRTC_CONFIG, body))
+        if r[1] != 0:
+            raise ValueError(f"RRSetCrtcConfig: {_SET_CONFIG_STATUS.get(r[1], r[1])}")
+
+    def set_rotation(self, output: str, rotation: str) -> tuple[bool, str]:
+        """
+        `xrandr --output OUT --rotate ROT`: resize the screen around the rotated
+        CRTC (disabling CRTCs that would not fit meanwhile), under a server grab.
+        """
+
+        bit = ROTATIONS.get(rotation)
+        if bit is None:
+            return False, f"invalid rotation: {rotation}"
+        snap = self.refresh()
+        if snap is None:
+            return False, self.error or "RandR unavailable"
+        found = self._active_crtc(snap, output)
+        if found is None:
+            return False, f"output {output} is not active"
+        _out, crtc = found
+        if (crtc.rotation & _ROTATION_MASK) == bit:
+            return True, ""
+        if not (crtc.rotations & bit):
+            return False, f"rotation {rotation} not supported by {output}"
+        mode = snap.modes.get(crtc.mode)
+        if mode is None:
+            return False, f"unknown mode 0x{crtc.mode:x}"
+        new_w, new_h = (mode.height, mode.width) if bit & (ROTATIONS["left"] | ROTATIONS["right"]) else (mode.width, mode.height)
+
+        active = [c for c in snap.crtcs.values() if c.mode]
+        fb_w = max([crtc.x + new_w] + [c.x + c.width for c in active if c.id != crtc.id])
+        fb_h = max([crtc.y + new_h] + [c.y + c.height for c in active if c.id != crtc.id])
+        ts = snap.config_timestamp
+        try:
+            grab = self._request(_X_GRAB_SERVER, 0)
+            try:
+                self._checked([grab])
+                disabled = [c for c in active if c.x + c.width > fb_w or c.y + c.height > fb_h]
+                for c in disabled:
+                    self._set_crtc(c, ts, mode=0, rotation=1, outputs=(), x=0, y=0)
+                if (fb_w, fb_h) != (snap.screen_width, snap.screen_height):
+                    self._checked([self._set_screen_size_req(fb_w, fb_h, snap)])
+                rot = bit | (crtc.rotation & ~_ROTATION_MASK)
+                self._set_crtc(crtc, ts, mode=crtc.mode, rotation=rot, outputs=crtc.outputs, x=crtc.x, y=crtc.y)
+                for c in disabled:
+                    if c.id != crtc.id:
+                        self._set_crtc(c, ts, mode=c.mode, rotation=c.rotation, outputs=c.outputs, x=c.x, y=c.y)
+            finally:
+                if self.sock is not None:
+                    self._checked([self._request(_X_UNGRAB_SERVER, 0)])
+        except (OSError, ValueError, struct.error, XError) as exc:
+            return False, self._guard(exc)
+        finally:
+            self.snapshot = None
+        return True, ""
+
+    def set_monitor(self, name: str, *, output: str, x: int, y: int, w: int, h: int) -> tuple[bool, str]:
+        """
+        `xrandr --setmonitor NAME W/MMxH/MM+X+Y OUTPUT`, with the physical size
+        scaled from the output's monitor. RRSetMonitor replaces an existing
+        monitor of the same name, so no delete is needed first.
+        """
+
+        geom = self.monitor_geometry(output)
+        if not geom:
+            return False, f"failed to read monitor geometry for {output}"
+        full_w, w_mm, full_h, h_mm = geom
+        if w <= 0 or h <= 0:
+            return False, "rect width/height must be > 0"
+        if x < 0 or y < 0:
+            return False, "rect x/y must be >= 0"
+        if x + w > full_w or y + h > full_h:
+            return False, f"rect out of range (full={full_w}x{full_h})"
+        target_w_mm = max(1, int(round(w_mm * (w / full_w))))
+        target_h_mm = max(1, int(round(h_mm * (h / full_h))))
+        snap = self.snapshot
+        out = snap.output_named(output) if snap is not None else None
+        if out is None:
+            return False, f"unknown output {output}"
+        try:
+            atom = self._atom(name, only_if_exists=False)
+            body = struct.pack("<IIBBHhhHHII", self.root, atom, 0, 0, 1, x, y, w, h, target_w_mm, target_h_mm)
+            body += struct.pack("<I", out.id)
+            self._checked([self._rr(_RR_SET_MONITOR, body)])
+        except (OSError, ValueError, struct.error, XError) as exc:
+            return False, self._guard(exc)
+        return True, ""
+
+    def delete_monitor(self, name: str) -> tuple[bool, str]:
+        """
+        `xrandr --delmonitor NAME`; a monitor that does not exist is not an error.
+        """
+
+        ok, err = self.connect()
+        if not ok:
+            return False, err
+        try:
+            atom = self._atom(name, only_if_exists=True)
+            if not atom:
+                return True, ""
+            self._checked([self._rr(_RR_DELETE_MONITOR, struct.pack("<II", self.root, atom))])
+        except XError:
+            return True, ""
+        except (OSError, ValueError, struct.error) as exc:
+            return False, self._guard(exc)
+        return True, ""
+
+
+def _stats(samples: list[float]) -> dict[str, float]:
+    ms = sorted(s * 1000.0 for s in samples)
+    return {
+        "n": len(ms),
+        "mean_ms": round(statistics.fmean(ms), 3),
+        "p50_ms": round(ms[len(ms) // 2], 3),
+        "max_ms": round(ms[-1], 3),
+    }
+
+
+def _bench_xrandr(display: str, output: str, active_size: int, monitor: str) -> None:
+    # The subprocess sequence one `_apply_x11` half apply used to run.
+    env = {**os.environ, "DISPLAY": display}
+
+    def run(*argv: str) -> str:
+        return subprocess.run(["xrandr", *argv], check=False, capture_output=True, text=True, env=env).stdout
+
+    run("--query")
+    run("--query")
+    w, h = 0, 0
+    for line in run("--query").splitlines():
+        if line.startswith(output + " ") and " connected" in line:
+            for tok in line.split():
+                if "x" in tok and "+" in tok:
+                    w, h = (int(v) for v in tok.split("+", 1)[0].split("x"))
+                    break
+    run("--fb", f"{w}x{h}")
+    run("--delmonitor", monitor)
+    run("--listmonitors")
+    run("--setmonitor", monitor, f"{w}/100x{active_size}/50+0+0", output)
+
+
+def _bench_native(rr: XRandR, output: str, active_size: int, monitor: str) -> None:
+    rr.refresh()
+    mode = rr.current_mode(output)
+    if not mode:
+        raise SystemExit(f"output {output} not active")
+    rr.set_screen_size(*mode)
+    ok, err = rr.set_monitor(monitor, output=output, x=0, y=0, w=mode[0], h=active_size)
+    if not ok:
+        raise SystemExit(err)
+
+
+def main(argv: list[str]) -> int:
+    p = argparse.ArgumentParser(description="Minimal RandR client (X1 Fold helpers).")
+    p.add_argument("--display", default=os.environ.get("DISPLAY", ":0"), help="X display (default: $DISPLAY or :0).")
+    sub = p.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("query", help="Print outputs, CRTCs and monitors as JSON.")
+    sub.add_parser("watch", help="Print a line per RandR change (event-driven, no polling).")
+    b = sub.add_parser("bench", help="Compare one half apply via xrandr subprocesses vs this binding.")
+    b.add_argument("--output", default="", help="Output (default: auto pick eDP-*).")
+    b.add_argument("--active-size", type=int, default=1240)
+    b.add_argument("--iterations", type=int, default=50)
+    b.add_argument("--monitor-name", default="X1FOLD_BENCH")
+    b.add_argument("--no-xrandr", action="store_true", help="Skip the subprocess side (no xrandr binary).")
+    args = p.parse_args(argv)
+
+    rr = XRandR(str(args.display))
+    ok, err = rr.connect()
+    if not ok:
+        print(json.dumps({"ok": False, "error": err}), file=sys.stderr)
+        return 1
+
+    if args.cmd == "query":
+        snap = rr.refresh()
+        mons = rr.monitors()
+        if snap is None or mons is None:
+            print(json.dumps({"ok": False, "error": rr.error}), file=sys.stderr)
+            return 1
+        out: dict[str, Any] = {
+            "display": rr.display,
+            "randr": f"{rr.version[0]}.{rr.version[1]}",
+            "screen": {"width": snap.screen_width, "height": snap.screen_height, "mm": list(rr.screen_mm)},
+            "outputs": [o.__dict__ for o in snap.outputs.values()],
+            "crtcs": [{**c.__dict__, "rotation_name": _ROTATION_NAMES.get(c.rotation & _ROTATION_MASK)} for c in snap.crtcs.values()],
+            "monitors": [m.__dict__ for m in mons],
+        }
+        print(json.dumps(out, indent=2, sort_keys=True))
+        return 0
+
+    if args.cmd == "watch":
+        ok, err = rr.subscribe()
+        last: Snapshot | None = None
+        while ok:
+            snap = rr.refresh()
+            if snap is None:
+                break
+            for o in snap.outputs.values() if snap is not last else ():
+                if o.connected:
+                    print(
+                        json.dumps(
+                            {
+                                "ts": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+                                "output": o.name,
+                                "mode": rr.current_mode(o.name),
+                                "rotation": rr.output_rotation(o.name),
+                                "events_seen": rr.events_seen,
+                            }
+                        ),
+                        flush=True,
+                    )
+            last = snap
+            fd = rr.fileno()
+            if fd is None:
+                break
+            select.select([fd], [], [])
+            rr.handle_events()
+        print(json.dumps({"ok": False, "error": err or rr.error}), file=sys.stderr)
+        return 1
+
+    output = rr.pick_output(args.output or None)
+    if not output:
+        print(json.dumps({"ok": False, "error": "no connected output"}), file=sys.stderr)
+        return 1
+    result: dict[str, Any] = {"display": rr.display, "output": output, "iterations": int(args.iterations)}
+    native: list[float] = []
+    for _ in range(max(1, int(args.iterations))):
+        t0 = time.perf_counter()
+        _bench_native(rr, output, int(args.active_size), str(args.monitor_name))
+        native.append(time.perf_counter() - t0)
+    result["native"] = _stats(native)
+    if not args.no_xrandr:
+        spawned: list[float] = []
+        for _ in range(max(1, int(args.iterations))):
+            t0 = time.perf_counter()
+            _bench_xrandr(rr.display, output, int(args.active_size), str(args.monitor_name))
+            spawned.append(time.perf_counter() - t0)
+        result["xrandr"] = _stats(spawned)
+    rr.delete_monitor(str(args.monitor_name))
+    print(json.dumps(result, sort_keys=True))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main(sys.argv[1:]))